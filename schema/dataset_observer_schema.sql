@@ -29,6 +29,7 @@ CREATE TABLE dataset_observer (
     PRIMARY KEY (model_zone_tag, model_namespace, model_name, model_dataset_props)
 );
 CREATE UNIQUE INDEX dataset_observer_indx ON dataset_observer(dataset_observer_id);
+CREATE INDEX dataset_observer2_indx ON dataset_observer(status_update_dt); -- catalog cache change polls
 
 /*
    Immutable relationship between source and sink. Can only have one "active" record
@@ -54,24 +55,68 @@ CREATE TABLE dataset_source_to_sink_meta_rel (
     PRIMARY KEY (dataset_rel_id)
 );
 CREATE UNIQUE INDEX dataset_source_to_sink_meta_rel_indx ON dataset_source_to_sink_meta_rel (sink_dataset_id, source_dataset_id, terminated_dt);
-CREATE INDEX dataset_source_to_sink_meta_rel2_indx ON dataset_source_to_sink_meta_rel (source_dataset_id);
+-- covers the downstream walk (source -> active sinks) and the sinks fanned out to by a finish
+CREATE INDEX dataset_source_to_sink_meta_rel3_indx ON dataset_source_to_sink_meta_rel (source_dataset_id, terminated_dt, sink_dataset_id);
 
 /*
-   Holds records indicating a source is has events to be consumed by a sink.
+   Source run events waiting to be consumed by a sink. Keyed by sink, so a sink finds its ready sources without
+   going through the rels. A sink start moves its events to dataset_source_sink_event_queue (consumed events).
+*/
+CREATE TABLE dataset_source_sink_pending_event (
+    sink_dataset_id CHAR(32) NOT NULL,
+    dataset_rel_id CHAR(32) NOT NULL,
+    source_run_id CHAR(32) NOT NULL,
+    source_dataset_id CHAR(32) NOT NULL, -- denormalized info
+
+    rerun_last_sink_run_id CHAR(32),
+    rerun_status INT,
+
+    source_ready_dt DATETIME NOT NULL,
+    quarantined_dt DATETIME, -- set by DatasetLineage.impact_of_run(quarantine=True), sinks skip the event
+
+    PRIMARY KEY (sink_dataset_id, dataset_rel_id, source_run_id)
+);
+CREATE INDEX dataset_source_sink_pending_event_indx ON dataset_source_sink_pending_event(source_run_id);
+
+/*
+   Optional materialized readiness counters (see dataset_readiness.SinkReadinessCounters). Pending events per
+   (sink, source) and per sink the active source rels, the distinct sources with pending events and the pending
+   events. Maintained in the transactions that change dataset_source_sink_pending_event and the rels, so a
+   dependency check reads one row instead of the sink's pending events.
+*/
+CREATE TABLE dataset_sink_source_pending_count (
+    sink_dataset_id CHAR(32) NOT NULL,
+    source_dataset_id CHAR(32) NOT NULL,
+    pending_count INT NOT NULL DEFAULT 0,
+
+    PRIMARY KEY (sink_dataset_id, source_dataset_id)
+);
+CREATE TABLE dataset_sink_readiness (
+    sink_dataset_id CHAR(32) NOT NULL,
+    source_count INT NOT NULL DEFAULT 0, -- active source rels
+    ready_source_count INT NOT NULL DEFAULT 0, -- sources with pending_count > 0
+    pending_count INT NOT NULL DEFAULT 0,
+
+    PRIMARY KEY (sink_dataset_id)
+);
+
+/*
+   Holds records of the source events consumed by a sink run. Rows are appended when the sink run starts and never
+   updated.
 */
 CREATE TABLE dataset_source_sink_event_queue (
 
     dataset_rel_id CHAR(32) NOT NULL, -- UUID **new**
 
     source_run_id CHAR(32) NOT NULL,
-    sink_run_id CHAR(32) NOT NULL DEFAULT 'zzzzzzzzzzzzzzzzzzzzzzzzzzzzzzzz',  -- this gets updated when sink observer starts running
+    sink_run_id CHAR(32) NOT NULL, -- sink run that consumed the event
 
     rerun_last_sink_run_id CHAR(32), -- UUID **new** before retry/replay make sure dataset_rel_id still exists in rel table
 
     rerun_status INT, -- null original not rerun, 1 replay from success, 2 retry from error, 3 retry from cleared-orphan  -- **new**
 
     source_ready_dt DATETIME NOT NULL, -- denormalized info
-    sink_start_dt DATETIME, -- this gets updated when sink etl observer runs - denormalized info
+    sink_start_dt DATETIME, -- when the sink run started - denormalized info
 
     PRIMARY KEY (dataset_rel_id, sink_run_id, source_run_id) -- source_run_id is second intentionally?? **change**
 );
@@ -117,4 +162,61 @@ CREATE TABLE dataset_observer_run (
 );
 CREATE INDEX dataset_observer_run_indx ON dataset_observer_run(dataset_observer_id, start_dt); -- for joins
 CREATE INDEX dataset_observer_run2_indx ON dataset_observer_run(start_dt, dataset_observer_id); -- for joins
-CREATE INDEX dataset_observer_run3_indx ON dataset_observer_run(start_dt, status); -- for joins
\ No newline at end of file
+CREATE INDEX dataset_observer_run3_indx ON dataset_observer_run(start_dt, status); -- for joins
+CREATE INDEX dataset_observer_run4_indx ON dataset_observer_run(dataset_observer_id, status); -- active (ready/started) run checks
+/*
+   Consumed events moved out of dataset_source_sink_event_queue by the event queue compactor (see
+   dataset_compaction.EventQueueCompactor) once they are older than the retention window. Same columns as the
+   queue plus when the event was archived. Pending events are never archived.
+   */
+CREATE TABLE dataset_source_sink_event_queue_archive (
+    dataset_rel_id CHAR(32) NOT NULL,
+    source_run_id CHAR(32) NOT NULL,
+    sink_run_id CHAR(32) NOT NULL,
+    rerun_last_sink_run_id CHAR(32),
+    rerun_status INT,
+    source_ready_dt DATETIME NOT NULL,
+    sink_start_dt DATETIME,
+    archived_dt DATETIME NOT NULL,
+
+    PRIMARY KEY (dataset_rel_id, sink_run_id, source_run_id)
+);
+CREATE INDEX dataset_source_sink_event_queue_archive_indx ON dataset_source_sink_event_queue_archive(sink_run_id);
+CREATE INDEX dataset_source_sink_event_queue_archive2_indx ON dataset_source_sink_event_queue_archive(source_run_id);
+CREATE INDEX dataset_source_sink_event_queue_archive3_indx ON dataset_source_sink_event_queue_archive(source_ready_dt);
+
+/*
+   Resumable position of each event queue compactor: the (source_ready_dt, dataset_rel_id, sink_run_id,
+   source_run_id) key of the last archived event of the current pass. NULL key means the next chunk starts a new
+   pass from the oldest event.
+   */
+CREATE TABLE dataset_event_queue_compaction (
+    compactor_name VARCHAR(64) NOT NULL,
+    source_ready_dt DATETIME,
+    dataset_rel_id CHAR(32),
+    sink_run_id CHAR(32),
+    source_run_id CHAR(32),
+    pass_count INT NOT NULL DEFAULT 0,
+    archived_count BIGINT NOT NULL DEFAULT 0,
+    updated_dt DATETIME NOT NULL,
+
+    PRIMARY KEY (compactor_name)
+);
+/*
+   Per observer, per day summary of the runs purged from dataset_observer_run by the run history retention job (see
+   dataset_retention.RunHistoryRetention). Durations are end_dt - start_dt in seconds.
+   */
+CREATE TABLE dataset_observer_run_daily (
+    dataset_observer_id CHAR(32) NOT NULL,
+    run_day DATE NOT NULL, -- day the runs started
+    run_count INT NOT NULL,
+    error_count INT NOT NULL DEFAULT 0,
+    success_count INT NOT NULL DEFAULT 0,
+    cleared_count INT NOT NULL DEFAULT 0, -- cleared-orphan runs
+    record_count BIGINT NOT NULL DEFAULT 0,
+    p50_duration_sec DOUBLE,
+    p95_duration_sec DOUBLE,
+    updated_dt DATETIME NOT NULL,
+
+    PRIMARY KEY (dataset_observer_id, run_day)
+);
\ No newline at end of file
@@ -0,0 +1,5 @@
+/*
+   Active (ready/started) run checks of the start/fetch readiness query and the guarded run insert look up runs by
+   observer and status. Without this index they read every historical run of the observer.
+   */
+CREATE INDEX dataset_observer_run4_indx ON dataset_observer_run(dataset_observer_id, status);
@@ -0,0 +1,38 @@
+/*
+   Consumed events moved out of dataset_source_sink_event_queue by the event queue compactor (see
+   dataset_compaction.EventQueueCompactor) once they are older than the retention window. Same columns as the
+   queue plus when the event was archived. Pending events are never archived.
+   */
+CREATE TABLE dataset_source_sink_event_queue_archive (
+    dataset_rel_id CHAR(32) NOT NULL,
+    source_run_id CHAR(32) NOT NULL,
+    sink_run_id CHAR(32) NOT NULL,
+    rerun_last_sink_run_id CHAR(32),
+    rerun_status INT,
+    source_ready_dt DATETIME NOT NULL,
+    sink_start_dt DATETIME,
+    archived_dt DATETIME NOT NULL,
+
+    PRIMARY KEY (dataset_rel_id, sink_run_id, source_run_id)
+);
+CREATE INDEX dataset_source_sink_event_queue_archive_indx ON dataset_source_sink_event_queue_archive(sink_run_id);
+CREATE INDEX dataset_source_sink_event_queue_archive2_indx ON dataset_source_sink_event_queue_archive(source_run_id);
+CREATE INDEX dataset_source_sink_event_queue_archive3_indx ON dataset_source_sink_event_queue_archive(source_ready_dt);
+
+/*
+   Resumable position of each event queue compactor: the (source_ready_dt, dataset_rel_id, sink_run_id,
+   source_run_id) key of the last archived event of the current pass. NULL key means the next chunk starts a new
+   pass from the oldest event.
+   */
+CREATE TABLE dataset_event_queue_compaction (
+    compactor_name VARCHAR(64) NOT NULL,
+    source_ready_dt DATETIME,
+    dataset_rel_id CHAR(32),
+    sink_run_id CHAR(32),
+    source_run_id CHAR(32),
+    pass_count INT NOT NULL DEFAULT 0,
+    archived_count BIGINT NOT NULL DEFAULT 0,
+    updated_dt DATETIME NOT NULL,
+
+    PRIMARY KEY (compactor_name)
+);
@@ -0,0 +1,18 @@
+/*
+   Per observer, per day summary of the runs purged from dataset_observer_run by the run history retention job (see
+   dataset_retention.RunHistoryRetention). Durations are end_dt - start_dt in seconds.
+   */
+CREATE TABLE dataset_observer_run_daily (
+    dataset_observer_id CHAR(32) NOT NULL,
+    run_day DATE NOT NULL, -- day the runs started
+    run_count INT NOT NULL,
+    error_count INT NOT NULL DEFAULT 0,
+    success_count INT NOT NULL DEFAULT 0,
+    cleared_count INT NOT NULL DEFAULT 0, -- cleared-orphan runs
+    record_count BIGINT NOT NULL DEFAULT 0,
+    p50_duration_sec DOUBLE,
+    p95_duration_sec DOUBLE,
+    updated_dt DATETIME NOT NULL,
+
+    PRIMARY KEY (dataset_observer_id, run_day)
+);
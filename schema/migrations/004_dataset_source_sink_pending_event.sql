@@ -0,0 +1,33 @@
+/*
+   Pending events move out of dataset_source_sink_event_queue (sink_run_id = 'zzzz...' rows) into their own table
+   keyed by sink. The queue only keeps consumed events, appended when the sink run starts.
+
+   Stop the DatasetLineage writers (start/finish calls) while this runs. MySQL syntax.
+   */
+CREATE TABLE dataset_source_sink_pending_event (
+    sink_dataset_id CHAR(32) NOT NULL,
+    dataset_rel_id CHAR(32) NOT NULL,
+    source_run_id CHAR(32) NOT NULL,
+    source_dataset_id CHAR(32) NOT NULL, -- denormalized info
+
+    rerun_last_sink_run_id CHAR(32),
+    rerun_status INT,
+
+    source_ready_dt DATETIME NOT NULL,
+
+    PRIMARY KEY (sink_dataset_id, dataset_rel_id, source_run_id)
+);
+CREATE INDEX dataset_source_sink_pending_event_indx ON dataset_source_sink_pending_event(source_run_id);
+
+INSERT INTO dataset_source_sink_pending_event (
+    sink_dataset_id, dataset_rel_id, source_run_id, source_dataset_id,
+    rerun_last_sink_run_id, rerun_status, source_ready_dt)
+SELECT rel.sink_dataset_id, qu.dataset_rel_id, qu.source_run_id, rel.source_dataset_id,
+       qu.rerun_last_sink_run_id, qu.rerun_status, qu.source_ready_dt
+FROM dataset_source_sink_event_queue qu
+JOIN dataset_source_to_sink_meta_rel rel ON (rel.dataset_rel_id = qu.dataset_rel_id)
+WHERE qu.sink_run_id = 'zzzzzzzzzzzzzzzzzzzzzzzzzzzzzzzz';
+
+DELETE FROM dataset_source_sink_event_queue WHERE sink_run_id = 'zzzzzzzzzzzzzzzzzzzzzzzzzzzzzzzz';
+
+ALTER TABLE dataset_source_sink_event_queue ALTER COLUMN sink_run_id DROP DEFAULT;
@@ -0,0 +1,20 @@
+/*
+   Optional materialized readiness counters (see dataset_readiness.SinkReadinessCounters). The tables start empty,
+   build them with DatasetLineage.verify_readiness_counters(repair=True) before passing readiness_counters to the
+   writers. MySQL syntax.
+   */
+CREATE TABLE dataset_sink_source_pending_count (
+    sink_dataset_id CHAR(32) NOT NULL,
+    source_dataset_id CHAR(32) NOT NULL,
+    pending_count INT NOT NULL DEFAULT 0,
+
+    PRIMARY KEY (sink_dataset_id, source_dataset_id)
+);
+CREATE TABLE dataset_sink_readiness (
+    sink_dataset_id CHAR(32) NOT NULL,
+    source_count INT NOT NULL DEFAULT 0, -- active source rels
+    ready_source_count INT NOT NULL DEFAULT 0, -- sources with pending_count > 0
+    pending_count INT NOT NULL DEFAULT 0,
+
+    PRIMARY KEY (sink_dataset_id)
+);
@@ -0,0 +1,7 @@
+/*
+   Downstream lineage walks (DatasetLineage.get_downstream) and the finish fan out look up the active sinks of a
+   source. The source_dataset_id index is replaced by one covering (source, terminated_dt, sink) so both are answered
+   from the index alone. MySQL syntax.
+   */
+CREATE INDEX dataset_source_to_sink_meta_rel3_indx ON dataset_source_to_sink_meta_rel (source_dataset_id, terminated_dt, sink_dataset_id);
+DROP INDEX dataset_source_to_sink_meta_rel2_indx ON dataset_source_to_sink_meta_rel;
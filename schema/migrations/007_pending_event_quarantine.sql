@@ -0,0 +1,5 @@
+/*
+   Pending events of a bad source run (and of the runs that consumed it) can be quarantined with
+   DatasetLineage.impact_of_run(quarantine=True). Sinks skip quarantined events. MySQL syntax.
+   */
+ALTER TABLE dataset_source_sink_pending_event ADD COLUMN quarantined_dt DATETIME;
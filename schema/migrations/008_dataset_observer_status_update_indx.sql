@@ -0,0 +1,5 @@
+/*
+   ObserverCatalogCache.refresh() of every process polls the observers changed since its watermark. Without this
+   index each poll reads all of dataset_observer.
+   */
+CREATE INDEX dataset_observer2_indx ON dataset_observer(status_update_dt);
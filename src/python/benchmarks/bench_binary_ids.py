@@ -0,0 +1,96 @@
+"""
+Table/index sizes and start/finish latency with hex (CHAR(32)) vs binary (BINARY(16)) ids.
+
+Builds the same database twice, once per id storage, with --runs rows of run history spread over --observers
+observers, then times the finishes and starts of a source -> sink pipeline. The page cache is kept small
+(--cache-size-kib, no memory mapping) so the run history does not fit in memory, the way a large history does not
+fit in the InnoDB buffer pool.
+
+    cd src/python
+    python -m benchmarks.bench_binary_ids --runs 1000000 --iterations 2000 [--cache-size-kib 2048]
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from data_lineage.dataset_lineage_mgmt import DatasetLineage
+from data_lineage.db_layer import SqliteBackend
+from .bench_start_finish import CountingBackend
+from .bench_queue_depth import Latencies
+
+SEED_BATCH = 100000
+
+
+def seed_runs(backend:SqliteBackend, runs:int, observers:int):
+    to_id = bytes.fromhex if backend.binary_ids else str
+    conn = backend.get_con()
+    try:
+        cursor = conn.cursor()
+        first_dt = datetime(2020, 1, 1)
+        for batch_start in range(0, runs, SEED_BATCH):
+            conn.start_transaction()
+            cursor.executemany("INSERT INTO dataset_observer_run (run_id, dataset_observer_id, start_dt, end_dt, "
+                               "status, record_count) VALUES (%s, %s, %s, %s, 3, 100)",
+                               [(to_id(os.urandom(16).hex()), to_id('%032x' % (i % observers)),
+                                 first_dt + timedelta(seconds=i), first_dt + timedelta(seconds=i + 1))
+                                for i in range(batch_start, min(batch_start + SEED_BATCH, runs))])
+            conn.commit()
+        cursor.close()
+    finally:
+        backend.release_con(conn)
+
+
+def run(db_path:str, binary_ids:bool, runs:int, observers:int, iterations:int, cache_size_kib:int):
+    sqlite_backend = SqliteBackend(db_path, cache_size_kib=cache_size_kib, mmap_size=0, binary_ids=binary_ids)
+    backend = CountingBackend(sqlite_backend)
+    dataset_lineage = DatasetLineage(backend=backend)
+
+    source = dataset_lineage.declare_dataset_observer(model_name="bench_source")
+    sink = dataset_lineage.declare_dataset_observer(model_name="bench_sink")
+    dataset_lineage.associate_dataset_source_to_sink(source, sink)
+    started = time.perf_counter()
+    seed_runs(sqlite_backend, runs, observers)
+    print("%s ids: seeded %d runs in %.1fs" % ("binary" if binary_ids else "hex", runs, time.perf_counter() - started))
+
+    conn = sqlite_backend.get_con()
+    try:
+        sizes = sqlite_backend.table_sizes(conn)
+    finally:
+        sqlite_backend.release_con(conn)
+    data_size, index_size = sizes["dataset_observer_run"]
+    print("%-30s data %8.1f MiB  indexes %8.1f MiB" % ("dataset_observer_run", data_size / 2**20, index_size / 2**20))
+
+    finish_success = Latencies(backend, "finish success (fan out)")
+    start_ready = Latencies(backend, "start (ready source)")
+    for i in range(iterations):
+        run_id = dataset_lineage.start_dataset_observer_run_with_id(source).run_id
+        with finish_success:
+            dataset_lineage.finish_dataset_observer_run(status="success", dataset_run_id=run_id)
+        with start_ready:
+            run_id = dataset_lineage.start_dataset_observer_run_with_id(sink).run_id
+        dataset_lineage.finish_dataset_observer_run(status="success", dataset_run_id=run_id)
+
+    for latencies in (finish_success, start_ready):
+        latencies.report()
+
+    dataset_lineage.close_db_con()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=1000000)
+    parser.add_argument("--observers", type=int, default=1000)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--cache-size-kib", type=int, default=2048)
+    args = parser.parse_args()
+
+    for binary_ids in (False, True):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            run(os.path.join(tmp_dir, "bench_lineage.db"), binary_ids, args.runs, args.observers, args.iterations,
+                args.cache_size_kib)
+
+
+if __name__ == '__main__':
+    main()
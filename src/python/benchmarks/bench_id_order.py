@@ -0,0 +1,88 @@
+"""
+Insert throughput and index fragmentation of dataset_observer_run with random (uuid4) vs time ordered (UUIDv7 style)
+run ids.
+
+Inserts --rows runs in transactions of --batch-size rows, the way concurrent finishes/starts commit, and reports
+the rows/sec of the first and the last 10% of the inserts (once the indexes no longer fit in the --cache-size-kib
+page cache). Fragmentation of the primary key index: leaf pages, average fill and the share of leaf pages stored
+further back in the file than the leaf before them in key order (50% is random placement; other tables and indexes
+grow in the same file, so even a perfectly appended index is never contiguous).
+
+    cd src/python
+    python -m benchmarks.bench_id_order --rows 5000000 [--batch-size 100] [--cache-size-kib 8192]
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from data_lineage.db_layer import SqliteBackend
+from data_lineage.uuid_util import get_new_guid, TimeOrderedGuidGenerator
+
+PK_INDEX = "sqlite_autoindex_dataset_observer_run_1"
+
+
+def fragmentation(backend:SqliteBackend, index_name:str):
+    conn = backend.get_con()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT pageno, unused, pgsize FROM dbstat WHERE name = %s AND pagetype = 'leaf' ORDER BY path",
+                       (index_name,))
+        leaves = cursor.fetchall()
+        cursor.close()
+    finally:
+        backend.release_con(conn)
+    out_of_order = sum(1 for prev, leaf in zip(leaves, leaves[1:]) if leaf[0] < prev[0])
+    fill = 1.0 - sum(leaf[1] for leaf in leaves) / float(sum(leaf[2] for leaf in leaves))
+    return len(leaves), fill, out_of_order / float(max(1, len(leaves) - 1))
+
+
+def run(db_path:str, name:str, new_guid, rows:int, batch_size:int, cache_size_kib:int):
+    backend = SqliteBackend(db_path, cache_size_kib=cache_size_kib, mmap_size=0, pool_size=1)
+    observer_ids = [get_new_guid().hex for i in range(1000)]
+    first_dt = datetime(2020, 1, 1)
+    window = max(batch_size, rows // 10)
+    window_rates = []
+    window_started = time.perf_counter()
+
+    conn = backend.get_con()
+    try:
+        cursor = conn.cursor()
+        for batch_start in range(0, rows, batch_size):
+            conn.start_transaction()
+            cursor.executemany("INSERT INTO dataset_observer_run (run_id, dataset_observer_id, start_dt, status) "
+                               "VALUES (%s, %s, %s, 2)",
+                               [(new_guid().hex, observer_ids[i % len(observer_ids)], first_dt + timedelta(seconds=i))
+                                for i in range(batch_start, min(batch_start + batch_size, rows))])
+            conn.commit()
+            if (batch_start + batch_size) % window < batch_size:
+                window_rates.append(window / (time.perf_counter() - window_started))
+                window_started = time.perf_counter()
+        cursor.close()
+    finally:
+        backend.release_con(conn)
+
+    leaf_pages, fill, out_of_order = fragmentation(backend, PK_INDEX)
+    print("%-13s first 10%% %9.0f rows/s  last 10%% %9.0f rows/s  pk leaf pages %8d  fill %5.1f%%  "
+          "out of order %5.1f%%  file %7.1f MiB" %
+          (name, window_rates[0], window_rates[-1], leaf_pages, fill * 100, out_of_order * 100,
+           os.path.getsize(db_path) / 2**20))
+    backend.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5000000)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--cache-size-kib", type=int, default=8192)
+    args = parser.parse_args()
+
+    for name, new_guid in (("uuid4", get_new_guid), ("time ordered", TimeOrderedGuidGenerator())):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            run(os.path.join(tmp_dir, "bench_lineage.db"), name, new_guid, args.rows, args.batch_size,
+                args.cache_size_kib)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+Transitive upstream/downstream lineage queries on a large graph: get_upstream()/get_downstream() walked in the
+database against the same calls answered from the in-process graph index.
+
+Seeds a layered DAG of --edges active rels over --layers layers, every observer below the top layer fed by --fan-in
+observers of the layer above (plus a few rels skipping layers), then times full and depth limited walks from
+observers of the top, middle and bottom layers. The repeated walk asks about the same observer every time, which
+the graph index answers from its walk cache.
+
+    cd src/python
+    python -m benchmarks.bench_lineage_walk --edges 100000 --iterations 20 [--db-path /tmp/lineage.db]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from data_lineage.dataset_lineage_mgmt import DatasetLineage
+from data_lineage.dataset_graph import LineageGraphIndex
+from data_lineage.db_layer import SqliteBackend
+from .bench_start_finish import CountingBackend
+from .bench_queue_depth import Latencies
+
+SEED_BATCH = 100000
+
+
+def seed_graph(backend:SqliteBackend, edges:int, layers:int, fan_in:int, seed:int) -> list:
+    """
+    :return: observer ids per layer
+    """
+    rnd = random.Random(seed)
+    layer_size = max(1, edges // (fan_in * (layers - 1)))
+    layer_ids = [['%032x' % (layer * layer_size + i) for i in range(layer_size)] for layer in range(layers)]
+
+    rels = set()
+    while len(rels) < edges:
+        layer = rnd.randrange(1, layers)
+        # mostly the layer above, sometimes further up
+        source_layer = layer - 1 if rnd.random() < 0.9 else rnd.randrange(0, layer)
+        rels.add((rnd.choice(layer_ids[source_layer]), rnd.choice(layer_ids[layer])))
+
+    conn = backend.get_con()
+    try:
+        started = time.perf_counter()
+        cursor = conn.cursor()
+        rels = sorted(rels)
+        for batch_start in range(0, len(rels), SEED_BATCH):
+            conn.start_transaction()
+            cursor.executemany("INSERT INTO dataset_source_to_sink_meta_rel (source_dataset_id, sink_dataset_id, "
+                               "dataset_rel_id) VALUES (%s, %s, %s)",
+                               [(source_id, sink_id, '%032x' % (i + 1 << 64))
+                                for i, (source_id, sink_id) in enumerate(rels[batch_start:batch_start + SEED_BATCH],
+                                                                          batch_start)])
+            conn.commit()
+        cursor.close()
+        print("seeded %d rels over %d layers of %d observers in %.1fs" %
+              (len(rels), layers, layer_size, time.perf_counter() - started))
+    finally:
+        backend.release_con(conn)
+    return layer_ids
+
+
+def run(db_path:str, edges:int, layers:int, fan_in:int, iterations:int, seed:int):
+    backend = CountingBackend(SqliteBackend(db_path))
+    layer_ids = seed_graph(backend, edges, layers, fan_in, seed)
+    rnd = random.Random(seed)
+
+    in_db = DatasetLineage(backend=backend)
+    in_memory = DatasetLineage(backend=backend, graph_index=LineageGraphIndex(refresh_interval_sec=None))
+    started = time.perf_counter()
+    in_memory.get_lineage_graph()
+    print("graph index loaded in %.1f ms" % ((time.perf_counter() - started) * 1e3))
+
+    walks = [("downstream top", lambda lineage, observer_id: lineage.get_downstream(observer_id), 0),
+             ("downstream top repeated", lambda lineage, observer_id: lineage.get_downstream(observer_id), None),
+             ("downstream top depth 3", lambda lineage, observer_id: lineage.get_downstream(observer_id, 3), 0),
+             ("upstream middle", lambda lineage, observer_id: lineage.get_upstream(observer_id), layers // 2),
+             ("upstream bottom", lambda lineage, observer_id: lineage.get_upstream(observer_id), layers - 1),
+             ("upstream bottom depth 3", lambda lineage, observer_id: lineage.get_upstream(observer_id, 3),
+              layers - 1)]
+    for name, walk, layer in walks:
+        if layer is None:
+            observer_ids = [layer_ids[0][0]] * iterations
+        else:
+            observer_ids = [rnd.choice(layer_ids[layer]) for _ in range(iterations)]
+        reached = 0
+        for mode, lineage in (("db", in_db), ("graph index", in_memory)):
+            latencies = Latencies(backend, "%s (%s)" % (name, mode))
+            for observer_id in observer_ids:
+                with latencies:
+                    reached = len(walk(lineage, observer_id))
+            latencies.report()
+        print("%-30s %d observers reached" % ("", reached))
+
+    in_db.close_db_con()
+    in_memory.close_db_con()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--edges", type=int, default=100000)
+    parser.add_argument("--layers", type=int, default=20)
+    parser.add_argument("--fan-in", type=int, default=5, help="sources per observer")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--db-path", default=None, help="sqlite file (default: temp file in WAL mode)")
+    args = parser.parse_args()
+
+    if args.db_path is not None:
+        run(args.db_path, args.edges, args.layers, args.fan_in, args.iterations, args.seed)
+        return
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        run(os.path.join(tmp_dir, "bench_lineage.db"), args.edges, args.layers, args.fan_in, args.iterations,
+            args.seed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+Lineage manifest sync: sync_lineage_manifest() of a large manifest against the same graph built with one
+declare_dataset_observer()/associate_dataset_source_to_sink() call per observer and rel.
+
+Builds a layered manifest of --edges rels over --layers layers, every observer below the top layer fed by --fan-in
+observers of the layer above, then times the first sync (everything declared and associated), a no-op sync and a
+sync that rewires a tenth of the rels. The call by call baseline is timed on the first --baseline-edges rels.
+
+    cd src/python
+    python -m benchmarks.bench_manifest_sync --edges 20000 [--db-path /tmp/lineage.db]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from data_lineage.dataset_lineage_mgmt import DatasetLineage
+from data_lineage.dataset_manifest import LineageManifest
+from data_lineage.db_layer import SqliteBackend
+from .bench_start_finish import CountingBackend
+
+
+def build_manifest(edges:int, layers:int, fan_in:int, seed:int, rewire:float = 0.0) -> dict:
+    rnd = random.Random(seed)
+    layer_size = max(1, edges // (fan_in * (layers - 1)))
+    observers = [[{'model_name': "orders_%d" % i, 'model_dataset_props': "layer=%d" % layer,
+                   'model_zone_tag': layer + 1} for i in range(layer_size)] for layer in range(layers)]
+    rels = []
+    for layer in range(1, layers):
+        for sink in observers[layer]:
+            for source in rnd.sample(observers[layer - 1], min(fan_in, layer_size)):
+                rels.append({'source': source, 'sink': sink})
+    rnd = random.Random(seed + 1)
+    for i in rnd.sample(range(len(rels)), int(len(rels) * rewire)):
+        layer = rels[i]['sink']['model_zone_tag'] - 1
+        rels[i] = dict(rels[i], source=rnd.choice(observers[layer - 1]))
+    return {'observers': [observer for layer in observers for observer in layer], 'rels': rels[:edges]}
+
+
+def timed(backend:CountingBackend, name:str, call):
+    backend.reset()
+    started = time.perf_counter()
+    result = call()
+    print("%-28s %8.2fs %8d statements" % (name, time.perf_counter() - started, backend.stats["statements"]))
+    return result
+
+
+def run(db_path:str, edges:int, layers:int, fan_in:int, baseline_edges:int, seed:int):
+    backend = CountingBackend(SqliteBackend(db_path))
+    dataset_lineage = DatasetLineage(backend=backend)
+
+    manifest = LineageManifest.from_dict(build_manifest(edges, layers, fan_in, seed))
+    print("manifest: %d observers, %d rels" % (len(manifest.observers), len(manifest.rels)))
+    print(timed(backend, "first sync", lambda: dataset_lineage.sync_lineage_manifest(manifest)).render(0))
+    print(timed(backend, "no-op sync", lambda: dataset_lineage.sync_lineage_manifest(manifest)).render(0))
+    rewired = LineageManifest.from_dict(build_manifest(edges, layers, fan_in, seed, rewire=0.1))
+    print(timed(backend, "rewire 10% plan", lambda: dataset_lineage.sync_lineage_manifest(rewired, dry_run=True))
+          .render(0))
+    print(timed(backend, "rewire 10% sync", lambda: dataset_lineage.sync_lineage_manifest(rewired)).render(0))
+
+    baseline_rels = manifest.rels[:baseline_edges]
+
+    def call_by_call():
+        ids = {}
+        for rel in baseline_rels:
+            for key in rel:
+                if key not in ids:
+                    entry = dict(manifest.observers[key], model_name="call_" + key[2])
+                    ids[key] = dataset_lineage.declare_dataset_observer(**entry)
+            dataset_lineage.associate_dataset_source_to_sink(ids[rel[0]], ids[rel[1]])
+        return len(ids)
+
+    started = time.perf_counter()
+    observer_count = timed(backend, "call by call %d rels" % len(baseline_rels), call_by_call)
+    elapsed = time.perf_counter() - started
+    print("%-28s %d observers, %.0fs projected for %d rels" %
+          ("", observer_count, elapsed * len(manifest.rels) / max(1, len(baseline_rels)), len(manifest.rels)))
+    dataset_lineage.close_db_con()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--edges", type=int, default=20000)
+    parser.add_argument("--layers", type=int, default=5)
+    parser.add_argument("--fan-in", type=int, default=4, help="sources per observer")
+    parser.add_argument("--baseline-edges", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--db-path", default=None, help="sqlite file (default: temp file in WAL mode)")
+    args = parser.parse_args()
+
+    if args.db_path is not None:
+        run(args.db_path, args.edges, args.layers, args.fan_in, args.baseline_edges, args.seed)
+        return
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        run(os.path.join(tmp_dir, "bench_manifest.db"), args.edges, args.layers, args.fan_in, args.baseline_edges,
+            args.seed)
+
+
+if __name__ == '__main__':
+    main()
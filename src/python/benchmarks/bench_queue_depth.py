@@ -0,0 +1,126 @@
+"""
+Start/finish latency of a source -> sink pipeline with a deep event queue.
+
+Seeds the queue with --queued-rows consumed events (history spread over --rels source/sink rels), then times
+sink starts that consume one ready source run each, and the source finishes that queue those events.
+
+    cd src/python
+    python -m benchmarks.bench_queue_depth --queued-rows 10000000 --iterations 2000 [--db-path /tmp/lineage.db]
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from data_lineage.dataset_lineage_mgmt import DatasetLineage
+from data_lineage.db_layer import SqliteBackend
+from .bench_start_finish import CountingBackend
+
+SEED_BATCH = 100000
+
+
+def seed_history(backend:SqliteBackend, rel_ids, queued_rows:int):
+    conn = backend.get_con()
+    try:
+        started = time.perf_counter()
+        cursor = conn.cursor()
+        first_dt = datetime(2020, 1, 1)
+        for batch_start in range(0, queued_rows, SEED_BATCH):
+            conn.start_transaction()
+            cursor.executemany("INSERT INTO dataset_source_sink_event_queue (dataset_rel_id, source_run_id, "
+                               "sink_run_id, source_ready_dt, sink_start_dt) VALUES (%s, %s, %s, %s, %s)",
+                               [(rel_ids[i % len(rel_ids)], '%032x' % i, '%032x' % (i + queued_rows),
+                                 first_dt + timedelta(seconds=i), first_dt + timedelta(seconds=i + 1))
+                                for i in range(batch_start, min(batch_start + SEED_BATCH, queued_rows))])
+            conn.commit()
+        cursor.close()
+        print("seeded %d consumed events in %.1fs" % (queued_rows, time.perf_counter() - started))
+    finally:
+        backend.release_con(conn)
+
+
+class Latencies:
+
+    def __init__(self, backend:CountingBackend, name:str):
+        self.backend = backend
+        self.name = name
+        self.samples = []
+        self.statements = 0
+
+    def __enter__(self):
+        self.backend.reset()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.samples.append(time.perf_counter() - self._started)
+        self.statements += self.backend.stats["statements"]
+        return False
+
+    def report(self):
+        samples = sorted(self.samples)
+        pct = lambda p: samples[min(len(samples) - 1, int(p * len(samples)))] * 1e6
+        print("%-30s mean %8.1f us  p50 %8.1f us  p99 %8.1f us  %5.2f round trips/call" %
+              (self.name, sum(samples) / len(samples) * 1e6, pct(0.5), pct(0.99),
+               self.statements / len(samples)))
+
+
+def run(db_path:str, queued_rows:int, rels:int, iterations:int):
+    backend = CountingBackend(SqliteBackend(db_path))
+    dataset_lineage = DatasetLineage(backend=backend)
+
+    source = dataset_lineage.declare_dataset_observer(model_name="bench_source")
+    sink = dataset_lineage.declare_dataset_observer(model_name="bench_sink")
+    dataset_lineage.associate_dataset_source_to_sink(source, sink)
+
+    # history of other pipelines sharing the queue
+    rel_ids = []
+    for i in range(rels - 1):
+        other_source = dataset_lineage.declare_dataset_observer(model_name="bench_source%d" % i)
+        other_sink = dataset_lineage.declare_dataset_observer(model_name="bench_sink%d" % i)
+        dataset_lineage.associate_dataset_source_to_sink(other_source, other_sink)
+    conn = backend.get_con()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT dataset_rel_id FROM dataset_source_to_sink_meta_rel")
+        rel_ids = [row[0] for row in cursor.fetchall()]
+        cursor.close()
+    finally:
+        backend.release_con(conn)
+    seed_history(backend.backend, rel_ids, queued_rows)
+
+    finish_success = Latencies(backend, "finish success (fan out)")
+    start_ready = Latencies(backend, "start (ready source)")
+
+    for i in range(iterations):
+        run_id = dataset_lineage.start_dataset_observer_run_with_id(source).run_id
+        with finish_success:
+            dataset_lineage.finish_dataset_observer_run(status="success", dataset_run_id=run_id)
+        with start_ready:
+            run_id = dataset_lineage.start_dataset_observer_run_with_id(sink).run_id
+        dataset_lineage.finish_dataset_observer_run(status="success", dataset_run_id=run_id)
+
+    for latencies in (finish_success, start_ready):
+        latencies.report()
+
+    dataset_lineage.close_db_con()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queued-rows", type=int, default=10000000)
+    parser.add_argument("--rels", type=int, default=1000)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--db-path", default=None, help="sqlite file (default: temp file in WAL mode)")
+    args = parser.parse_args()
+
+    if args.db_path is not None:
+        run(args.db_path, args.queued_rows, args.rels, args.iterations)
+        return
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        run(os.path.join(tmp_dir, "bench_lineage.db"), args.queued_rows, args.rels, args.iterations)
+
+
+if __name__ == '__main__':
+    main()
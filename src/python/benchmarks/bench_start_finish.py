@@ -0,0 +1,188 @@
+"""
+Round trips and lock hold time of the start/fetch/finish hot path.
+
+Runs a source -> sink pipeline on the embedded engine through a backend that counts the statements sent per API call
+and times how long each write transaction stays open (start_transaction to commit/rollback).
+
+    cd src/python
+    python -m benchmarks.bench_start_finish --iterations 2000 [--db-path /tmp/lineage.db]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from data_lineage.dataset_lineage_mgmt import DatasetLineage
+from data_lineage.db_layer import DBBackend, SqliteBackend
+
+
+class CountingCursor:
+
+    def __init__(self, cursor, stats):
+        self._cursor = cursor
+        self._stats = stats
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def execute(self, stmt, params=()):
+        self._stats["statements"] += 1
+        return self._cursor.execute(stmt, params)
+
+    def executemany(self, stmt, seq_of_params):
+        self._stats["statements"] += 1
+        return self._cursor.executemany(stmt, seq_of_params)
+
+
+class CountingConnection:
+
+    def __init__(self, conn, stats):
+        self._conn = conn
+        self._stats = stats
+        self._tx_start = None
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def cursor(self):
+        return CountingCursor(self._conn.cursor(), self._stats)
+
+    def start_transaction(self, isolation_level=None):
+        self._stats["statements"] += 1
+        self._conn.start_transaction()
+        self._tx_start = time.perf_counter()
+
+    def commit(self):
+        self._stats["statements"] += 1
+        self._conn.commit()
+        self.__end_tx()
+
+    def rollback(self):
+        self._stats["statements"] += 1
+        self._conn.rollback()
+        self.__end_tx()
+
+    def __end_tx(self):
+        if self._tx_start is not None:
+            self._stats["lock_sec"] += time.perf_counter() - self._tx_start
+            self._tx_start = None
+
+
+class CountingBackend(DBBackend):
+
+    def __init__(self, backend:DBBackend):
+        self.backend = backend
+        self.name = backend.name
+        self.binary_ids = backend.binary_ids
+        self.stats = {"statements": 0, "lock_sec": 0.0}
+        self._conn = None
+
+    def reset(self):
+        self.stats["statements"] = 0
+        self.stats["lock_sec"] = 0.0
+
+    def get_con(self):
+        conn = self.backend.get_con()
+        if self._conn is None or self._conn._conn is not conn:
+            self._conn = CountingConnection(conn, self.stats)
+        return self._conn
+
+    def release_con(self, conn):
+        self.backend.release_con(conn._conn)
+
+    def close(self):
+        self.backend.close()
+
+    def get_max_datetime_to_sec(self) -> str:
+        return self.backend.get_max_datetime_to_sec()
+
+    def get_skip_duplicate_clause(self, column:str) -> str:
+        return self.backend.get_skip_duplicate_clause(column)
+
+    def get_lock_rows_clause(self) -> str:
+        return self.backend.get_lock_rows_clause()
+
+
+class Measure:
+    """
+    Accumulates wall time, statements and lock hold time of the calls made inside the with block.
+    """
+
+    def __init__(self, backend:CountingBackend, name:str):
+        self.backend = backend
+        self.name = name
+        self.calls = 0
+        self.elapsed = 0.0
+        self.statements = 0
+        self.lock_sec = 0.0
+
+    def __enter__(self):
+        self.backend.reset()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.calls += 1
+        self.elapsed += time.perf_counter() - self._started
+        self.statements += self.backend.stats["statements"]
+        self.lock_sec += self.backend.stats["lock_sec"]
+        return False
+
+    def report(self):
+        print("%-30s %8.1f us/call %6.2f round trips/call %8.1f us lock held/call" %
+              (self.name, self.elapsed / self.calls * 1e6, self.statements / self.calls,
+               self.lock_sec / self.calls * 1e6))
+
+
+def run(db_path:str, iterations:int):
+    backend = CountingBackend(SqliteBackend(db_path))
+    dataset_lineage = DatasetLineage(backend=backend)
+
+    source = dataset_lineage.declare_dataset_observer(model_name="bench_source")
+    sink = dataset_lineage.declare_dataset_observer(model_name="bench_sink")
+    standalone = dataset_lineage.declare_dataset_observer(model_name="bench_standalone")
+    dataset_lineage.associate_dataset_source_to_sink(source, sink)
+
+    start_no_rels = Measure(backend, "start (no rels)")
+    finish_success = Measure(backend, "finish success (fan out)")
+    fetch_ready = Measure(backend, "fetch ready sources")
+    start_ready = Measure(backend, "start (ready sources)")
+    finish_error = Measure(backend, "finish error")
+
+    for i in range(iterations):
+        with start_no_rels:
+            run_id = dataset_lineage.start_dataset_observer_run_with_id(standalone).run_id
+        dataset_lineage.finish_dataset_observer_run(status="success", dataset_run_id=run_id)
+
+        run_id = dataset_lineage.start_dataset_observer_run_with_id(source).run_id
+        with finish_success:
+            dataset_lineage.finish_dataset_observer_run(status="success", dataset_run_id=run_id)
+
+        with fetch_ready:
+            dataset_lineage.fetch_ready_dataset_sources_by_sink_id(sink)
+        with start_ready:
+            run_id = dataset_lineage.start_dataset_observer_run_with_id(sink).run_id
+        with finish_error:
+            dataset_lineage.finish_dataset_observer_run(status="error", dataset_run_id=run_id)
+
+    for measure in (start_no_rels, finish_success, fetch_ready, start_ready, finish_error):
+        measure.report()
+
+    dataset_lineage.close_db_con()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--db-path", default=None, help="sqlite file (default: temp file in WAL mode)")
+    args = parser.parse_args()
+
+    if args.db_path is not None:
+        run(args.db_path, args.iterations)
+        return
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        run(os.path.join(tmp_dir, "bench_lineage.db"), args.iterations)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+Database load of sinks waiting for their sources: a fetch_ready_dataset_sources_by_sink_id() loop against
+wait_for_ready_sources().
+
+Several worker threads per sink wait for a source run that is finished after --delay seconds, once by a writer in the
+same process (wakeup) and once by a writer with its own ReadySourcesWaiter, as another process would (backoff only).
+The last mode pushes the finish to the workers with an on_sources_enqueued callback, no polling at all.
+Reports the statements run while waiting and how late the waiters saw the source run.
+
+    cd src/python
+    python -m benchmarks.bench_wait_ready --sinks 4 --waiters 8 --delay 10
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from data_lineage.dataset_lineage_mgmt import DatasetLineage
+from data_lineage.dataset_wait import ReadySourcesWaiter
+from data_lineage.db_layer import SqliteBackend
+from benchmarks.bench_start_finish import CountingBackend
+
+
+def poll_loop(dataset_lineage:DatasetLineage, sink_id:str, poll_sec:float):
+    while len(dataset_lineage.fetch_ready_dataset_sources_by_sink_id(sink_id).dataset_queue_list) == 0:
+        time.sleep(poll_sec)
+
+
+def run_mode(db_path:str, mode:str, sink_count:int, waiter_count:int, delay:float, poll_sec:float):
+    backend = CountingBackend(SqliteBackend(db_path))
+    dataset_lineage = DatasetLineage(backend=backend)
+    writer = dataset_lineage if mode != "wait (other process)" else \
+        DatasetLineage(backend=SqliteBackend(db_path), ready_waiter=ReadySourcesWaiter())
+
+    pairs = []
+    for i in range(sink_count):
+        source = dataset_lineage.declare_dataset_observer(model_name="bench_wait_source%d_%s" % (i, mode))
+        sink = dataset_lineage.declare_dataset_observer(model_name="bench_wait_sink%d_%s" % (i, mode))
+        dataset_lineage.associate_dataset_source_to_sink(source, sink)
+        pairs.append((source, sink))
+
+    enqueued = {sink: threading.Event() for source, sink in pairs}
+    if mode == "on_sources_enqueued":
+        dataset_lineage.on_sources_enqueued(lambda event: [enqueued[sink_id].set() for sink_id in event.sink_id_list])
+    backend.reset()
+
+    finished_at = {}
+    seen_lag = []
+    lock = threading.Lock()
+
+    def worker(sink_id):
+        if mode == "poll loop":
+            poll_loop(dataset_lineage, sink_id, poll_sec)
+        elif mode == "on_sources_enqueued":
+            enqueued[sink_id].wait()
+        else:
+            dataset_lineage.wait_for_ready_sources(sink_id, timeout_sec=delay * 10)
+        with lock:
+            seen_lag.append(time.monotonic() - finished_at[sink_id])
+
+    with ThreadPoolExecutor(max_workers=sink_count * waiter_count) as executor:
+        futures = [executor.submit(worker, sink) for source, sink in pairs for _ in range(waiter_count)]
+        time.sleep(delay)
+        for source, sink in pairs:
+            run_id = writer.start_dataset_observer_run_with_id(source).run_id
+            finished_at[sink] = time.monotonic()
+            writer.finish_dataset_observer_run(status="success", dataset_run_id=run_id)
+        for future in futures:
+            future.result()
+
+    statements = backend.stats["statements"]
+    seen_lag.sort()
+    print("%-22s %8d statements %8.1f statements/sec %8.1f ms p50 lag %8.1f ms max lag" %
+          (mode, statements, statements / delay, seen_lag[len(seen_lag) // 2] * 1e3, seen_lag[-1] * 1e3))
+
+    if writer is not dataset_lineage:
+        writer.close_db_con()
+    dataset_lineage.event_bus.shutdown()
+    dataset_lineage.close_db_con()
+
+
+def run(db_path:str, sink_count:int, waiter_count:int, delay:float, poll_sec:float):
+    for mode in ("poll loop", "wait (wakeup)", "wait (other process)", "on_sources_enqueued"):
+        run_mode(db_path, mode, sink_count, waiter_count, delay, poll_sec)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sinks", type=int, default=4)
+    parser.add_argument("--waiters", type=int, default=8, help="waiting threads per sink")
+    parser.add_argument("--delay", type=float, default=10.0, help="seconds until the source runs finish")
+    parser.add_argument("--poll-sec", type=float, default=0.01, help="sleep of the poll loop")
+    parser.add_argument("--db-path", default=None, help="sqlite file (default: temp file in WAL mode)")
+    args = parser.parse_args()
+
+    if args.db_path is not None:
+        run(args.db_path, args.sinks, args.waiters, args.delay, args.poll_sec)
+        return
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        run(os.path.join(tmp_dir, "bench_lineage.db"), args.sinks, args.waiters, args.delay, args.poll_sec)
+
+
+if __name__ == '__main__':
+    main()
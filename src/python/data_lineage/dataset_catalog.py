@@ -0,0 +1,235 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+from .dataset_structs import DatasetProperties
+from .db_layer import to_datetime
+
+import logging
+
+logger = logging.getLogger("dataset-catalog")
+logger.setLevel(logging.INFO)
+
+OBSERVER_COLUMNS = "dataset_observer_id, model_zone_tag, model_name, model_namespace, model_dataset_props, " \
+                   "observer_status, description, created_dt, status_update_dt, observer_config"
+
+
+def observer_from_row(row) -> DatasetProperties:
+    """
+    DatasetProperties from a dataset_observer row selected with OBSERVER_COLUMNS.
+    """
+    return DatasetProperties(
+        dataset_process_id=row[0],
+        zone=row[1],
+        model_name=row[2],
+        model_namespace=row[3],
+        model_partition_keys=row[4],
+        status=row[5],
+        description=row[6],
+        created_dt=row[7],
+        status_update_dt=row[8],
+        observer_config=row[9]
+    )
+
+
+class ObserverCatalogCache:
+    """
+    In-process cache of dataset_observer rows, looked up by observer id or by the observer keys
+    (zone, namespace, name, props).
+
+    Observers almost never change, so DatasetLineage answers id lookups, existence checks and association
+    validation from here. Entries are bounded (LRU) and expire after a TTL. declare/update calls on the same
+    DatasetLineage invalidate entries directly, and refresh() polls status_update_dt to drop entries changed by
+    other processes.
+    """
+
+    def __init__(self, max_entries:int = 10000, ttl_sec:float = 300, refresh_interval_sec:float = 30,
+                 poll_lag_sec:int = 5):
+        """
+        :param max_entries: Entries kept before the least recently used ones are evicted.
+        :param ttl_sec: Max age of an entry. None keeps entries until evicted/invalidated.
+        :param refresh_interval_sec: How often DatasetLineage polls status_update_dt. None disables the poll.
+        :param poll_lag_sec: Overlap window of the status_update_dt poll.
+        """
+        self.max_entries = max_entries
+        self.ttl_sec = ttl_sec
+        self.refresh_interval_sec = refresh_interval_sec
+        self.poll_lag_sec = poll_lag_sec
+
+        self._lock = threading.RLock()
+        self._entries: OrderedDict = OrderedDict()  # observer id -> (DatasetProperties, loaded at)
+        self._key_index: Dict[Tuple, str] = {}       # (zone, namespace, name, props) -> observer id
+        self._watermark: datetime = None
+        self._last_refresh = 0.0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations
+        }
+
+    def get_by_id(self, conn, dataset_observer_id:str) -> DatasetProperties:
+        """
+        :return: None if the observer does not exist.
+        """
+        observer = self.__get(dataset_observer_id)
+        if observer is not None:
+            return observer
+
+        observers = self.__load(conn, "dataset_observer_id = %s", (dataset_observer_id,))
+        return observers[0] if len(observers) > 0 else None
+
+    def get_by_ids(self, conn, dataset_observer_id_list:List[str]) -> Dict[str, DatasetProperties]:
+        """
+        Observers for a list of ids. Misses are loaded with one query.
+        """
+        found = {}
+        missing = []
+        for dataset_observer_id in dataset_observer_id_list:
+            observer = self.__get(dataset_observer_id)
+            if observer is not None:
+                found[dataset_observer_id] = observer
+            else:
+                missing.append(dataset_observer_id)
+
+        if len(missing) > 0:
+            predicate = "dataset_observer_id IN (%s)" % ', '.join(['%s'] * len(missing))
+            for observer in self.__load(conn, predicate, missing):
+                found[observer.dataset_process_id] = observer
+        return found
+
+    def get_by_keys(self, conn, model_name:str, model_namespace:str, model_dataset_props:str,
+                    model_zone_tag:int) -> DatasetProperties:
+        """
+        :return: None if the observer does not exist.
+        """
+        with self._lock:
+            dataset_observer_id = self._key_index.get((model_zone_tag, model_namespace, model_name,
+                                                       model_dataset_props))
+            if dataset_observer_id is not None:
+                observer = self.__get(dataset_observer_id)
+                if observer is not None:
+                    return observer
+            else:
+                self.misses += 1
+
+        observers = self.__load(conn, "model_zone_tag = %s AND model_name = %s AND model_namespace = %s AND "
+                                      "model_dataset_props = %s",
+                                (model_zone_tag, model_name, model_namespace, model_dataset_props))
+        return observers[0] if len(observers) > 0 else None
+
+    def invalidate(self, dataset_observer_id:str):
+        with self._lock:
+            entry = self._entries.pop(dataset_observer_id, None)
+            if entry is not None:
+                self.__drop_key(entry[0])
+                self.invalidations += 1
+
+    def invalidate_keys(self, model_name:str, model_namespace:str, model_dataset_props:str, model_zone_tag:int):
+        with self._lock:
+            dataset_observer_id = self._key_index.pop((model_zone_tag, model_namespace, model_name,
+                                                       model_dataset_props), None)
+            if dataset_observer_id is not None:
+                self.invalidate(dataset_observer_id)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._key_index.clear()
+
+    def needs_refresh(self) -> bool:
+        if self.refresh_interval_sec is None:
+            return False
+        return time.monotonic() - self._last_refresh >= self.refresh_interval_sec
+
+    def refresh(self, conn) -> int:
+        """
+        Poll status_update_dt and drop entries of observers updated (by any process) since the last poll. Every
+        write stamps status_update_dt with the database's current_timestamp, so the watermark never compares values
+        of different clocks.
+
+        :return: Number of cached entries invalidated.
+        """
+        cursor = conn.cursor()
+        if self._watermark is None:
+            cursor.execute("SELECT max(status_update_dt) FROM dataset_observer")
+            rows = cursor.fetchall()
+            cursor.close()
+            self._watermark = to_datetime(rows[0][0]) if len(rows) > 0 else None
+            self._last_refresh = time.monotonic()
+            # nothing to compare against yet, start clean
+            self.clear()
+            return 0
+
+        since = self._watermark.replace(microsecond=0) - timedelta(seconds=self.poll_lag_sec)
+        cursor.execute("SELECT dataset_observer_id, status_update_dt FROM dataset_observer "
+                       "WHERE status_update_dt >= %s", (since,))
+        rows = cursor.fetchall()
+        cursor.close()
+
+        invalidated = 0
+        with self._lock:
+            for row in rows:
+                if row[0] in self._entries:
+                    self.invalidate(row[0])
+                    invalidated += 1
+                status_update_dt = to_datetime(row[1])
+                if status_update_dt is not None and status_update_dt > self._watermark:
+                    self._watermark = status_update_dt
+            self._last_refresh = time.monotonic()
+
+        return invalidated
+
+    def __get(self, dataset_observer_id:str) -> DatasetProperties:
+        with self._lock:
+            entry = self._entries.get(dataset_observer_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            if self.ttl_sec is not None and time.monotonic() - entry[1] > self.ttl_sec:
+                del self._entries[dataset_observer_id]
+                self.__drop_key(entry[0])
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(dataset_observer_id)
+            self.hits += 1
+            return entry[0]
+
+    def __load(self, conn, predicate:str, input_vals) -> List[DatasetProperties]:
+        cursor = conn.cursor()
+        cursor.execute("SELECT %s FROM dataset_observer WHERE %s" % (OBSERVER_COLUMNS, predicate), input_vals)
+        rows = cursor.fetchall()
+        cursor.close()
+
+        observers = [observer_from_row(row) for row in rows]
+        loaded_at = time.monotonic()
+        with self._lock:
+            for observer in observers:
+                self._entries[observer.dataset_process_id] = (observer, loaded_at)
+                self._entries.move_to_end(observer.dataset_process_id)
+                self._key_index[self.__keys(observer)] = observer.dataset_process_id
+            while len(self._entries) > self.max_entries:
+                evicted_id, entry = self._entries.popitem(last=False)
+                self.__drop_key(entry[0])
+                self.evictions += 1
+        return observers
+
+    def __drop_key(self, observer:DatasetProperties):
+        keys = self.__keys(observer)
+        if self._key_index.get(keys) == observer.dataset_process_id:
+            del self._key_index[keys]
+
+    @staticmethod
+    def __keys(observer:DatasetProperties) -> Tuple:
+        return (observer.zone, observer.model_namespace, observer.model_name, observer.model_partition_keys)
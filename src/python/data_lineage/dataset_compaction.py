@@ -0,0 +1,166 @@
+from datetime import datetime, timedelta
+from typing import List, Tuple
+
+from .dataset_exceptions import ConfigValidationException, InternalDatasetException
+from .db_layer import after_key_condition
+
+import logging
+
+logger = logging.getLogger("dataset-compaction")
+logger.setLevel(logging.INFO)
+
+QUEUE_COLUMNS = "dataset_rel_id, source_run_id, sink_run_id, rerun_last_sink_run_id, rerun_status, " \
+                "source_ready_dt, sink_start_dt"
+# chunk order and checkpoint of a compaction pass (dataset_source_sink_event_queue_indx leads with the first two)
+QUEUE_KEY_COLUMNS = ['source_ready_dt', 'dataset_rel_id', 'sink_run_id', 'source_run_id']
+
+
+class CompactionResult:
+    def __init__(self, archived_count: int, chunk_count: int, pass_complete: bool, elapsed_sec: float):
+        """
+
+        :param archived_count: Events moved to the archive by this call.
+        :param chunk_count: Chunks (transactions) committed.
+        :param pass_complete: True if the compactor reached the retention cutoff. The next call starts a new pass.
+        :param elapsed_sec: Wall time of the call, including rate limit pauses.
+        """
+        self.archived_count = archived_count
+        self.chunk_count = chunk_count
+        self.pass_complete = pass_complete
+        self.elapsed_sec = elapsed_sec
+
+
+class EventQueueCompactor:
+    """
+    Moves consumed events (dataset_source_sink_event_queue rows) older than a retention window into
+    dataset_source_sink_event_queue_archive, so the queue only holds recent events. Pending events are never
+    touched.
+
+    Events are moved in chunks, in (source_ready_dt, dataset_rel_id) index order, one short transaction per chunk.
+    The chunk and the compactor's checkpoint (dataset_event_queue_compaction) commit together, so a compaction that
+    is stopped or dies resumes after the last committed chunk. A pass ends at the retention cutoff and the next pass
+    starts over from the oldest event.
+
+    Run it with DatasetLineage.compact_event_queue().
+    """
+
+    def __init__(self, retention_days:float = 30, chunk_size:int = 500, max_rows_per_sec:float = None,
+                 name:str = 'default'):
+        """
+        :param retention_days: Consumed events whose source_ready_dt is older than this are archived.
+        :param chunk_size: Max events moved per transaction.
+        :param max_rows_per_sec: Rate limit. Pauses between chunks keep the average at or below it. None runs the
+                                 chunks back to back.
+        :param name: Checkpoint name. Compactors with different names keep separate checkpoints.
+        """
+        if chunk_size < 1:
+            raise ConfigValidationException("chunk_size must be at least 1")
+        if max_rows_per_sec is not None and max_rows_per_sec <= 0:
+            raise ConfigValidationException("max_rows_per_sec must be positive")
+
+        self.retention_days = retention_days
+        self.chunk_size = chunk_size
+        self.max_rows_per_sec = max_rows_per_sec
+        self.name = name
+
+    def cutoff_dt(self, now:datetime = None) -> datetime:
+        now = now if now is not None else datetime.now()
+        return (now - timedelta(days=self.retention_days)).replace(microsecond=0)
+
+    def pause_sec(self, archived_count:int, chunk_sec:float) -> float:
+        """
+        How long to pause after a chunk that moved archived_count events in chunk_sec to stay within the rate limit.
+        """
+        if self.max_rows_per_sec is None:
+            return 0.0
+        return max(0.0, archived_count / self.max_rows_per_sec - chunk_sec)
+
+    def compact_chunk(self, conn, now:datetime = None) -> Tuple[int, bool]:
+        """
+        Archive the next chunk of consumed events and advance the checkpoint, in one transaction.
+
+        :return: (events archived, True if the pass reached the retention cutoff)
+        """
+        now = now if now is not None else datetime.now()
+        cutoff_dt = self.cutoff_dt(now)
+
+        conn.start_transaction()
+        try:
+            checkpoint = self.__lock_checkpoint(conn, now)
+
+            stmt_query = "SELECT source_ready_dt, dataset_rel_id, sink_run_id, source_run_id " \
+                         "FROM dataset_source_sink_event_queue " \
+                         "WHERE source_ready_dt < %s "
+            input_vals = [cutoff_dt]
+            if checkpoint is not None:
+                checkpoint_sql, checkpoint_vals = after_key_condition(QUEUE_KEY_COLUMNS, checkpoint)
+                stmt_query += "AND " + checkpoint_sql + " "
+                input_vals.extend(checkpoint_vals)
+            stmt_query += "ORDER BY " + ', '.join(QUEUE_KEY_COLUMNS) + " LIMIT %d" % self.chunk_size
+
+            cursor = conn.cursor()
+            cursor.execute(stmt_query, input_vals)
+            keys = cursor.fetchall()
+            cursor.close()
+
+            pass_complete = len(keys) < self.chunk_size
+            if len(keys) > 0:
+                self.__move(conn, keys, now)
+
+            cursor = conn.cursor()
+            if pass_complete:
+                cursor.execute("UPDATE dataset_event_queue_compaction SET source_ready_dt=NULL, dataset_rel_id=NULL, "
+                               "sink_run_id=NULL, source_run_id=NULL, pass_count=pass_count + 1, "
+                               "archived_count=archived_count + %s WHERE compactor_name=%s",
+                               (len(keys), self.name))
+            else:
+                cursor.execute("UPDATE dataset_event_queue_compaction SET source_ready_dt=%s, dataset_rel_id=%s, "
+                               "sink_run_id=%s, source_run_id=%s, archived_count=archived_count + %s "
+                               "WHERE compactor_name=%s",
+                               tuple(keys[-1]) + (len(keys), self.name))
+            cursor.close()
+
+            conn.commit()
+            logger.debug("Compactor %s archived %d events, pass complete: %s", self.name, len(keys), pass_complete)
+            return len(keys), pass_complete
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+
+    def __lock_checkpoint(self, conn, now:datetime) -> Tuple:
+        # UPDATE first so concurrent compactors of the same name queue on the checkpoint row
+        cursor = conn.cursor()
+        cursor.execute("UPDATE dataset_event_queue_compaction SET updated_dt=%s WHERE compactor_name=%s",
+                       (now, self.name))
+        if cursor.rowcount == 0:
+            cursor.execute("INSERT INTO dataset_event_queue_compaction (compactor_name, updated_dt) VALUES (%s, %s)",
+                           (self.name, now))
+            cursor.close()
+            return None
+
+        cursor.execute("SELECT source_ready_dt, dataset_rel_id, sink_run_id, source_run_id "
+                       "FROM dataset_event_queue_compaction WHERE compactor_name=%s", (self.name,))
+        rows = cursor.fetchall()
+        cursor.close()
+        if rows[0][0] is None:
+            return None
+        return tuple(rows[0])
+
+    def __move(self, conn, keys:List[Tuple], now:datetime):
+        key_predicate = ' OR '.join(['(dataset_rel_id=%s AND sink_run_id=%s AND source_run_id=%s)'] * len(keys))
+        key_vals = []
+        for key in keys:
+            key_vals.extend(key[1:])
+
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO dataset_source_sink_event_queue_archive (" + QUEUE_COLUMNS + ", archived_dt) "
+                       "SELECT " + QUEUE_COLUMNS + ", %s FROM dataset_source_sink_event_queue WHERE " + key_predicate,
+                       [now] + key_vals)
+        insert_count = cursor.rowcount
+        cursor.execute("DELETE FROM dataset_source_sink_event_queue WHERE " + key_predicate, key_vals)
+        delete_count = cursor.rowcount
+        cursor.close()
+
+        if insert_count != len(keys) or delete_count != len(keys):
+            raise InternalDatasetException("Event queue changed while compacting, archived {} and deleted {} of {} "
+                                           "events. Chunk rolled back.".format(insert_count, delete_count, len(keys)))
@@ -0,0 +1,138 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Tuple
+
+from .dataset_exceptions import ConfigValidationException
+
+import logging
+
+logger = logging.getLogger("dataset-events")
+logger.setLevel(logging.INFO)
+
+# Run lifecycle events published by DatasetLineage
+RUN_STARTED = "run_started"  # DatasetRunStartedEvent
+RUN_FINISHED = "run_finished"  # DatasetRunFinishedEvent
+SOURCES_ENQUEUED = "sources_enqueued"  # DatasetSourcesEnqueuedEvent
+
+EVENT_TYPES = (RUN_STARTED, RUN_FINISHED, SOURCES_ENQUEUED)
+
+
+class LineageEventBus:
+    """
+    In-process subscriptions to the run lifecycle of DatasetLineage.
+
+    Events are published after the transaction that caused them committed, so a callback always sees the new
+    state in the database. Callbacks run on a pool of max_workers threads, never on the thread of the API call,
+    and may call DatasetLineage themselves (e.g. start a sink from on_sources_enqueued). The callbacks of one event
+    run one after the other; separate events may be dispatched concurrently and out of order.
+
+    At most max_pending events wait for dispatch. Further events are dropped (and counted) instead of slowing
+    down the API calls, so a subscriber must not rely on seeing every event. A callback that raises is logged
+    and counted.
+
+    The events cover the calls made through the DatasetLineage objects sharing this bus, not other processes.
+    """
+
+    def __init__(self, max_workers:int = 4, max_pending:int = 10000):
+        """
+        :param max_workers: Threads running the callbacks.
+        :param max_pending: Most events waiting for dispatch before new ones are dropped.
+        """
+        if max_workers < 1 or max_pending < 1:
+            raise ConfigValidationException("max_workers and max_pending must be at least 1")
+
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.published_count = 0
+        self.dropped_count = 0
+        self.error_count = 0
+        self._lock = threading.Lock()
+        self._subscribers: Dict[str, Tuple[Callable, ...]] = {}
+        self._pending = threading.BoundedSemaphore(max_pending)
+        self._executor: ThreadPoolExecutor = None
+        self._pid = None
+
+    def subscribe(self, event_type:str, callback:Callable) -> Callable:
+        """
+        :param callback: Called with the event struct of event_type.
+        :return: callback, to unsubscribe it later.
+        """
+        if event_type not in EVENT_TYPES:
+            raise ConfigValidationException("Error: event_type not valid: %s" % (event_type))
+        with self._lock:
+            self._subscribers[event_type] = self._subscribers.get(event_type, ()) + (callback,)
+        return callback
+
+    def unsubscribe(self, event_type:str, callback:Callable) -> bool:
+        with self._lock:
+            callbacks = self._subscribers.get(event_type, ())
+            if callback not in callbacks:
+                return False
+            callbacks = tuple(subscribed for subscribed in callbacks if subscribed is not callback)
+            if len(callbacks) > 0:
+                self._subscribers[event_type] = callbacks
+            else:
+                del self._subscribers[event_type]
+            return True
+
+    def has_subscribers(self, event_type:str) -> bool:
+        return event_type in self._subscribers
+
+    def publish(self, event_type:str, event):
+        """
+        Queues the event for its subscribers. Never blocks.
+        """
+        callbacks = self._subscribers.get(event_type)
+        if callbacks is None:
+            return
+        if not self._pending.acquire(blocking=False):
+            with self._lock:
+                self.dropped_count += 1
+            logger.warning("Dropped %s event, %d events waiting for dispatch", event_type, self.max_pending)
+            return
+        try:
+            self.__get_executor().submit(self.__dispatch, event_type, callbacks, event)
+        except RuntimeError:
+            # shut down
+            self._pending.release()
+            with self._lock:
+                self.dropped_count += 1
+            return
+        with self._lock:
+            self.published_count += 1
+
+    def shutdown(self, wait:bool = True):
+        """
+        Stops the dispatch threads. With wait, the events already published are dispatched first. Publishing
+        afterwards starts new threads.
+        """
+        with self._lock:
+            executor = self._executor
+            self._executor = None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    def __get_executor(self) -> ThreadPoolExecutor:
+        executor = self._executor
+        if executor is not None and self._pid == os.getpid():
+            return executor
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                # threads do not survive a fork, the child starts a pool of its own
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix="dataset-events")
+                self._pid = os.getpid()
+            return self._executor
+
+    def __dispatch(self, event_type:str, callbacks:Tuple[Callable, ...], event):
+        try:
+            for callback in callbacks:
+                try:
+                    callback(event)
+                except Exception:
+                    with self._lock:
+                        self.error_count += 1
+                    logger.exception("%s callback %s failed", event_type, callback)
+        finally:
+            self._pending.release()
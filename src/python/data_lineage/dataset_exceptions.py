@@ -64,3 +64,10 @@ class APIValidationException(DatasetBaseException):
     def __init__(self, *args, **kwargs):
         DatasetBaseException.__init__(self, *args, **kwargs)
 
+
+class ConnectionPoolTimeoutException(DatasetBaseException):
+    """
+    No pooled db connection became available in time.
+    """
+    def __init__(self, *args, **kwargs):
+        DatasetBaseException.__init__(self, *args, **kwargs)
@@ -0,0 +1,311 @@
+import sys
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from .db_layer import to_datetime
+
+import logging
+
+logger = logging.getLogger("dataset-graph")
+logger.setLevel(logging.INFO)
+
+
+class LineageGraphIndex:
+    """
+    In-process index of the active source/sink rels (dataset_source_to_sink_meta_rel rows whose terminated_dt is
+    the max sentinel).
+
+    Observer ids are interned to small ints and each observer keeps a forward (source -> sinks) and a reverse
+    (sink -> sources) adjacency array of 4 byte node numbers, allocated on its first edge. There can only be one
+    active rel per source/sink pair, so edges are kept as node pairs and rel ids are not held in memory.
+
+    The index is built once with load() and kept current by the DatasetLineage associate/disassociate calls and by
+    refresh(), a delta poll on created_dt/terminated_dt.
+
+    upstream()/downstream() results are kept in a small LRU cache, dropped whenever an edge is added or removed, so
+    repeated questions about the same observers do not walk the graph again.
+    """
+
+    def __init__(self, refresh_interval_sec:float = 30, poll_lag_sec:int = 5, walk_cache_size:int = 128):
+        """
+        :param refresh_interval_sec: How old the index may get before DatasetLineage polls for rel changes made by
+                                     other processes. None disables the automatic poll.
+        :param poll_lag_sec: Overlap window of the delta poll. Rels committed late (created_dt older than the last
+                             poll) are still picked up as long as they land within this window.
+        :param walk_cache_size: Most upstream/downstream results cached. 0 disables the cache.
+        """
+        self.refresh_interval_sec = refresh_interval_sec
+        self.poll_lag_sec = poll_lag_sec
+        self.walk_cache_size = walk_cache_size
+
+        self._lock = threading.RLock()
+        self._node_ids: List[str] = []
+        self._node_index: Dict[str, int] = {}
+        self._sinks: List[array] = []    # forward adjacency, indexed by source node
+        self._sources: List[array] = []  # reverse adjacency, indexed by sink node
+        self._edge_count = 0
+        self._watermark: datetime = None
+        self._loaded = False
+        self._last_refresh = 0.0
+        self._walk_cache: OrderedDict = OrderedDict()  # (observer id, upstream, max_depth) -> {observer id: depth}
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    @property
+    def edge_count(self) -> int:
+        return self._edge_count
+
+    @property
+    def node_count(self) -> int:
+        return len(self._node_ids)
+
+    def needs_refresh(self) -> bool:
+        if not self._loaded:
+            return True
+        if self.refresh_interval_sec is None:
+            return False
+        return time.monotonic() - self._last_refresh >= self.refresh_interval_sec
+
+    def load(self, conn, max_datetime:str):
+        """
+        (Re)build the index from all active rels.
+        """
+        cursor = conn.cursor()
+        stmt_query = "SELECT source_dataset_id, sink_dataset_id, created_dt " \
+                     "FROM dataset_source_to_sink_meta_rel WHERE terminated_dt = %s"
+        cursor.execute(stmt_query, (max_datetime,))
+        rows = cursor.fetchall()
+        cursor.close()
+
+        with self._lock:
+            self._node_ids = []
+            self._node_index = {}
+            self._sinks = []
+            self._sources = []
+            self._edge_count = 0
+            self._walk_cache.clear()
+            watermark = None
+            for row in rows:
+                self.__add(row[0], row[1])
+                watermark = self.__later(watermark, row[2])
+
+            self._watermark = watermark
+            self._loaded = True
+            self._last_refresh = time.monotonic()
+
+        logger.info("Lineage graph index loaded: %d observers, %d active rels" % (self.node_count, self.edge_count))
+
+    def refresh(self, conn, max_datetime:str) -> int:
+        """
+        Delta poll for rels created or terminated since the last load/refresh.
+
+        :return: Number of rel rows applied.
+        """
+        if not self._loaded:
+            self.load(conn, max_datetime)
+            return self.edge_count
+
+        since = self._watermark
+        if since is None:
+            since = datetime(1970, 1, 1)
+        since = since.replace(microsecond=0) - timedelta(seconds=self.poll_lag_sec)
+
+        cursor = conn.cursor()
+        stmt_query = "SELECT source_dataset_id, sink_dataset_id, created_dt, terminated_dt " \
+                     "FROM dataset_source_to_sink_meta_rel " \
+                     "WHERE created_dt >= %s OR (terminated_dt >= %s AND terminated_dt <> %s) " \
+                     "ORDER BY created_dt"
+        cursor.execute(stmt_query, (since, since, max_datetime))
+        rows = cursor.fetchall()
+        cursor.close()
+
+        max_dt = to_datetime(max_datetime)
+        applied = 0
+        with self._lock:
+            watermark = self._watermark
+            # A pair re-associated after being terminated always shows up in the same poll (its created_dt is not
+            # older than the terminated_dt), so a terminated rel only removes the edge when no active rel replaced it.
+            active_pairs = set()
+            for row in rows:
+                if to_datetime(row[3]) == max_dt:
+                    active_pairs.add((row[0], row[1]))
+                    if self.__add(row[0], row[1]):
+                        applied += 1
+                watermark = self.__later(watermark, row[2])
+            for row in rows:
+                if to_datetime(row[3]) != max_dt:
+                    if (row[0], row[1]) not in active_pairs and self.__remove(row[0], row[1]):
+                        applied += 1
+                    watermark = self.__later(watermark, row[3])
+
+            self._watermark = watermark
+            self._last_refresh = time.monotonic()
+
+        return applied
+
+    def add_rel(self, source_dataset_id:str, sink_dataset_id:str):
+        with self._lock:
+            self.__add(source_dataset_id, sink_dataset_id)
+
+    def remove_rel(self, source_dataset_id:str, sink_dataset_id:str):
+        with self._lock:
+            self.__remove(source_dataset_id, sink_dataset_id)
+
+    def source_count(self, sink_dataset_id:str) -> int:
+        """
+        Static count of active sources feeding the sink.
+        """
+        node = self._node_index.get(sink_dataset_id)
+        if node is None or self._sources[node] is None:
+            return 0
+        return len(self._sources[node])
+
+    def get_sources(self, sink_dataset_id:str) -> List[str]:
+        node = self._node_index.get(sink_dataset_id)
+        if node is None or self._sources[node] is None:
+            return []
+        with self._lock:
+            return [self._node_ids[n] for n in self._sources[node]]
+
+    def get_sinks(self, source_dataset_id:str) -> List[str]:
+        node = self._node_index.get(source_dataset_id)
+        if node is None or self._sinks[node] is None:
+            return []
+        with self._lock:
+            return [self._node_ids[n] for n in self._sinks[node]]
+
+    def has_rel(self, source_dataset_id:str, sink_dataset_id:str) -> bool:
+        source = self._node_index.get(source_dataset_id)
+        sink = self._node_index.get(sink_dataset_id)
+        if source is None or sink is None or self._sinks[source] is None:
+            return False
+        return sink in self._sinks[source]
+
+    def upstream(self, dataset_observer_id:str, max_depth:int = None) -> Dict[str, int]:
+        """
+        All observers feeding this one, directly or transitively.
+
+        :return: dict of observer id -> depth (1 for direct sources). The start observer is not included.
+        """
+        return self.__cached_walk(dataset_observer_id, True, max_depth)
+
+    def downstream(self, dataset_observer_id:str, max_depth:int = None) -> Dict[str, int]:
+        """
+        All observers consuming from this one, directly or transitively.
+
+        :return: dict of observer id -> depth (1 for direct sinks). The start observer is not included.
+        """
+        return self.__cached_walk(dataset_observer_id, False, max_depth)
+
+    def memory_usage(self) -> Dict[str, float]:
+        """
+        Approximate bytes held by the index (containers plus interned ids).
+        """
+        with self._lock:
+            node_bytes = sys.getsizeof(self._node_ids) + sys.getsizeof(self._node_index) + \
+                         sum(sys.getsizeof(node_id) for node_id in self._node_ids)
+            adjacency_bytes = sys.getsizeof(self._sinks) + sys.getsizeof(self._sources) + \
+                              sum(sys.getsizeof(adj) for adj in self._sinks if adj is not None) + \
+                              sum(sys.getsizeof(adj) for adj in self._sources if adj is not None)
+            nodes = len(self._node_ids)
+            edges = self._edge_count
+
+        return {
+            "nodes": nodes,
+            "edges": edges,
+            "node_bytes": node_bytes,
+            "adjacency_bytes": adjacency_bytes,
+            "total_bytes": node_bytes + adjacency_bytes,
+            "bytes_per_edge": adjacency_bytes / edges if edges > 0 else 0.0
+        }
+
+    def __cached_walk(self, dataset_observer_id:str, upstream:bool, max_depth:int) -> Dict[str, int]:
+        key = (dataset_observer_id, upstream, max_depth)
+        with self._lock:
+            depths = self._walk_cache.get(key)
+            if depths is not None:
+                self._walk_cache.move_to_end(key)
+                return dict(depths)
+
+            depths = self.__walk(dataset_observer_id, self._sources if upstream else self._sinks, max_depth)
+            if self.walk_cache_size > 0:
+                self._walk_cache[key] = depths
+                if len(self._walk_cache) > self.walk_cache_size:
+                    self._walk_cache.popitem(last=False)
+            return dict(depths)
+
+    def __walk(self, dataset_observer_id:str, adjacency:List[array], max_depth:int) -> Dict[str, int]:
+        start = self._node_index.get(dataset_observer_id)
+        if start is None:
+            return {}
+
+        with self._lock:
+            depths = {start: 0}
+            frontier = [start]
+            depth = 0
+            while frontier and (max_depth is None or depth < max_depth):
+                depth += 1
+                next_frontier = []
+                for node in frontier:
+                    if adjacency[node] is None:
+                        continue
+                    for neighbour in adjacency[node]:
+                        if neighbour not in depths:
+                            depths[neighbour] = depth
+                            next_frontier.append(neighbour)
+                frontier = next_frontier
+
+            del depths[start]
+            return {self._node_ids[node]: node_depth for node, node_depth in depths.items()}
+
+    def __node(self, dataset_observer_id:str) -> int:
+        node = self._node_index.get(dataset_observer_id)
+        if node is None:
+            node = len(self._node_ids)
+            self._node_ids.append(sys.intern(str(dataset_observer_id)))  # HexId ids are stored as plain str
+            self._node_index[self._node_ids[node]] = node
+            self._sinks.append(None)
+            self._sources.append(None)
+        return node
+
+    def __add(self, source_dataset_id:str, sink_dataset_id:str) -> bool:
+        source = self.__node(source_dataset_id)
+        sink = self.__node(sink_dataset_id)
+        if self._sinks[source] is None:
+            self._sinks[source] = array('I')
+        elif sink in self._sinks[source]:
+            return False
+        if self._sources[sink] is None:
+            self._sources[sink] = array('I')
+
+        self._sinks[source].append(sink)
+        self._sources[sink].append(source)
+        self._edge_count += 1
+        self._walk_cache.clear()
+        return True
+
+    def __remove(self, source_dataset_id:str, sink_dataset_id:str) -> bool:
+        source = self._node_index.get(source_dataset_id)
+        sink = self._node_index.get(sink_dataset_id)
+        if source is None or sink is None or self._sinks[source] is None or sink not in self._sinks[source]:
+            return False
+
+        self._sinks[source].remove(sink)
+        self._sources[sink].remove(source)
+        self._edge_count -= 1
+        self._walk_cache.clear()
+        return True
+
+    def __later(self, current:datetime, val) -> datetime:
+        if val is None:
+            return current
+        val = to_datetime(val)
+        if current is None or val > current:
+            return val
+        return current
@@ -0,0 +1,613 @@
+"""
+Online migration of a lineage database from hex string ids (CHAR(32)) to binary ids (BINARY(16)).
+
+    cd src/python
+    python -m data_lineage.dataset_id_migration --sqlite /var/lib/dlcp/lineage.db prepare
+    python -m data_lineage.dataset_id_migration --sqlite /var/lib/dlcp/lineage.db copy --max-rows-per-sec 5000
+    # stop the writers (and the compaction/retention jobs), then
+    python -m data_lineage.dataset_id_migration --sqlite /var/lib/dlcp/lineage.db cutover
+    # restart the writers with binary_ids=True
+    python -m data_lineage.dataset_id_migration --sqlite /var/lib/dlcp/lineage.db report
+
+MySQL databases take --db-host/--db-user/--db-password/--db-name instead of --sqlite.
+"""
+import argparse
+import json
+import os
+import re
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+from .dataset_exceptions import ConfigValidationException, InternalDatasetException
+from .db_layer import DBBackend, MySQLBackend, SqliteBackend, DEFAULT_SCHEMA_PATH, HEX_ID_TYPE, binary_id_schema, \
+    after_key_condition, parse_datetime, to_datetime
+
+import logging
+
+logger = logging.getLogger("dataset-id-migration")
+logger.setLevel(logging.INFO)
+
+SHADOW_SUFFIX = '_bin'
+HEX_SUFFIX = '_hex'
+
+# Rows of the big tables written since a point in time. Every other table is small (observers, rels, pending events,
+# checkpoints) and is copied again in full at cutover.
+CHANGED_ROWS_FILTER = {
+    'dataset_observer_run': "start_dt >= %s OR end_dt >= %s",
+    'dataset_source_sink_event_queue': "sink_start_dt >= %s",
+    'dataset_source_sink_event_queue_archive': "archived_dt >= %s",
+    'dataset_observer_run_daily': "updated_dt >= %s",
+}
+
+STATE_TABLE = 'dataset_id_migration'
+STATE_TABLE_DDL = "CREATE TABLE " + STATE_TABLE + " (table_name VARCHAR(64) NOT NULL, " \
+                  "copy_started_dt DATETIME NOT NULL, copied_count BIGINT NOT NULL DEFAULT 0, copy_done_dt DATETIME, " \
+                  "cutover_dt DATETIME, PRIMARY KEY (table_name))"
+
+
+class IdTable:
+    def __init__(self, name: str, columns: List[str], column_types: List[str], id_columns: List[str],
+                 primary_key: List[str], create_stmt: str, index_stmts: List[str]):
+        """
+
+        :param name: Table name.
+        :param columns: All columns, in schema order.
+        :param column_types: Declared type of each column, upper case.
+        :param id_columns: The CHAR(32) id columns.
+        :param primary_key: Primary key columns, the copy order.
+        :param create_stmt: CREATE TABLE statement from the schema (comments stripped).
+        :param index_stmts: CREATE INDEX statements of the table.
+        """
+        self.name = name
+        self.columns = columns
+        self.column_types = column_types
+        self.id_columns = id_columns
+        self.primary_key = primary_key
+        self.create_stmt = create_stmt
+        self.index_stmts = index_stmts
+
+        self._id_pos = [columns.index(col) for col in id_columns]
+        self._key_id_pos = [pos for pos, col in enumerate(primary_key) if col in id_columns]
+
+    def shadow_ddl(self, rename_indexes:bool) -> List[str]:
+        """
+        Statements creating the binary id copy of the table, <name>_bin, with its indexes.
+
+        :param rename_indexes: Suffix the index names with _bin too, for engines with database wide index names.
+        """
+        shadow = self.name + SHADOW_SUFFIX
+        index_suffix = SHADOW_SUFFIX if rename_indexes else ''
+        stmts = [re.sub(r'^CREATE TABLE\s+' + self.name + r'\b', 'CREATE TABLE ' + shadow,
+                        binary_id_schema(self.create_stmt))]
+        for index_stmt in self.index_stmts:
+            index_stmt = re.sub(r'INDEX\s+(\w+)\s+ON\s+' + self.name + r'\b',
+                                lambda m: 'INDEX %s%s ON %s' % (m.group(1), index_suffix, shadow), index_stmt)
+            stmts.append(index_stmt)
+        return stmts
+
+    def to_binary(self, row) -> list:
+        vals = list(row)
+        for pos in self._id_pos:
+            if vals[pos] is not None:
+                try:
+                    vals[pos] = bytes.fromhex(vals[pos])
+                except ValueError as err:
+                    raise InternalDatasetException("%s.%s holds a value that is not a hex id: %r" %
+                                                   (self.name, self.columns[pos], vals[pos])) from err
+        return vals
+
+    def key_to_binary(self, key) -> list:
+        vals = list(key)
+        for pos in self._key_id_pos:
+            vals[pos] = bytes.fromhex(vals[pos])
+        return vals
+
+    def key_to_hex(self, key) -> list:
+        vals = list(key)
+        for pos in self._key_id_pos:
+            vals[pos] = vals[pos].hex()
+        return vals
+
+
+def strip_sql_comments(schema_sql: str) -> str:
+    schema_sql = re.sub(r'/\*.*?\*/', '', schema_sql, flags=re.DOTALL)
+    return re.sub(r'--[^\n]*', '', schema_sql)
+
+
+def _split_top_level(body: str) -> List[str]:
+    parts, depth, current = [], 0, ''
+    for char in body:
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        if char == ',' and depth == 0:
+            parts.append(current.strip())
+            current = ''
+        else:
+            current += char
+    if current.strip():
+        parts.append(current.strip())
+    return parts
+
+
+def schema_id_tables(schema_sql: str) -> List[IdTable]:
+    """
+    The tables of a (hex id) schema that have CHAR(32) id columns, in schema order.
+    """
+    creates: Dict[str, str] = {}
+    indexes: Dict[str, List[str]] = {}
+    for stmt in strip_sql_comments(schema_sql).split(';'):
+        stmt = ' '.join(stmt.split())
+        match = re.match(r'CREATE TABLE (\w+)', stmt, flags=re.IGNORECASE)
+        if match:
+            creates[match.group(1)] = stmt
+            continue
+        match = re.match(r'CREATE (UNIQUE )?INDEX \w+ ON (\w+)', stmt, flags=re.IGNORECASE)
+        if match:
+            indexes.setdefault(match.group(2), []).append(stmt)
+
+    tables = []
+    for name, create_stmt in creates.items():
+        body = create_stmt[create_stmt.index('(') + 1:create_stmt.rindex(')')]
+        columns, column_types, id_columns, primary_key = [], [], [], []
+        for part in _split_top_level(body):
+            if part.upper().startswith('PRIMARY KEY'):
+                primary_key = [col.strip() for col in part[part.index('(') + 1:part.rindex(')')].split(',')]
+                continue
+            col_name, col_type = part.split()[0:2]
+            columns.append(col_name)
+            column_types.append(col_type.upper())
+            if col_type.upper() == HEX_ID_TYPE:
+                id_columns.append(col_name)
+        if len(id_columns) > 0:
+            tables.append(IdTable(name, columns, column_types, id_columns, primary_key, create_stmt,
+                                  indexes.get(name, [])))
+    return tables
+
+
+class IdCopyResult:
+    def __init__(self, copied_count: int, batch_count: int, complete: bool, elapsed_sec: float):
+        """
+
+        :param copied_count: Rows copied to the binary id tables by this call.
+        :param batch_count: Batches (transactions) committed.
+        :param complete: True if every table has been copied once. Cutover can run.
+        :param elapsed_sec: Wall time of the call, including rate limit pauses.
+        """
+        self.copied_count = copied_count
+        self.batch_count = batch_count
+        self.complete = complete
+        self.elapsed_sec = elapsed_sec
+
+
+class IdSizeReport:
+    def __init__(self, table_sizes: Dict[str, Tuple[Tuple[int, int], Tuple[int, int]]],
+                 cache_read_stats: Tuple[int, int], taken_dt: datetime):
+        """
+
+        :param table_sizes: {table: ((hex data bytes, hex index bytes), (binary data bytes, binary index bytes))}.
+                            A side not created (yet) is None.
+        :param cache_read_stats: Cumulative (page read requests, cache misses) of the engine when the report was
+                                 taken. None if the engine does not report them.
+        :param taken_dt: When the report was taken.
+        """
+        self.table_sizes = table_sizes
+        self.cache_read_stats = cache_read_stats
+        self.taken_dt = taken_dt
+
+    def cache_hit_ratio(self, since: 'IdSizeReport' = None) -> float:
+        """
+        Share of page reads served from the cache, since the engine started or since an earlier report (e.g. one
+        taken before the cutover, to compare the hex and the binary id periods). None if not reported.
+        """
+        if self.cache_read_stats is None:
+            return None
+        requests, misses = self.cache_read_stats
+        if since is not None and since.cache_read_stats is not None:
+            requests -= since.cache_read_stats[0]
+            misses -= since.cache_read_stats[1]
+        if requests <= 0:
+            return None
+        return 1.0 - misses / requests
+
+    def render(self, since: 'IdSizeReport' = None) -> str:
+        lines = ["%-42s %12s %12s %12s %12s %7s" % ("table", "hex data", "hex index", "bin data", "bin index",
+                                                    "index")]
+        total_hex, total_bin = [0, 0], [0, 0]
+        for table, (hex_size, bin_size) in self.table_sizes.items():
+            hex_size = hex_size or (0, 0)
+            bin_size = bin_size or (0, 0)
+            for i in (0, 1):
+                total_hex[i] += hex_size[i]
+                total_bin[i] += bin_size[i]
+            lines.append("%-42s %12d %12d %12d %12d %7s" % (table, hex_size[0], hex_size[1], bin_size[0], bin_size[1],
+                                                             _change(hex_size[1], bin_size[1])))
+        lines.append("%-42s %12d %12d %12d %12d %7s" % ("total", total_hex[0], total_hex[1], total_bin[0],
+                                                        total_bin[1], _change(total_hex[1], total_bin[1])))
+
+        hit_ratio = self.cache_hit_ratio(since)
+        if hit_ratio is None:
+            lines.append("cache hit ratio: not reported by this engine")
+        elif since is None:
+            lines.append("cache hit ratio since engine start: %.4f" % hit_ratio)
+        else:
+            since_ratio = since.cache_hit_ratio()
+            lines.append("cache hit ratio since %s: %.4f (since engine start until then: %s)" %
+                         (since.taken_dt.isoformat(' ', 'seconds'), hit_ratio,
+                          "%.4f" % since_ratio if since_ratio is not None else "n/a"))
+        return '\n'.join(lines)
+
+    def to_json(self) -> str:
+        return json.dumps({"table_sizes": self.table_sizes, "cache_read_stats": self.cache_read_stats,
+                           "taken_dt": self.taken_dt.isoformat()})
+
+    @staticmethod
+    def from_json(text: str) -> 'IdSizeReport':
+        vals = json.loads(text)
+        table_sizes = {table: tuple(tuple(size) if size is not None else None for size in sizes)
+                       for table, sizes in vals["table_sizes"].items()}
+        cache_read_stats = tuple(vals["cache_read_stats"]) if vals["cache_read_stats"] is not None else None
+        return IdSizeReport(table_sizes, cache_read_stats, parse_datetime(vals["taken_dt"]))
+
+
+def _change(before: int, after: int) -> str:
+    if not before or not after:
+        return ''
+    return "%+.0f%%" % ((after - before) * 100.0 / before)
+
+
+class BinaryIdMigration:
+    """
+    Converts the id columns of a running lineage database from CHAR(32) hex strings to BINARY(16), table by table,
+    without stopping the writers for the bulk of the work:
+
+    1. prepare(): creates a binary id copy (<table>_bin) of every table with id columns, and the dataset_id_migration
+       state table.
+    2. copy(): copies each table into its copy in primary key order, one short transaction per batch, converting
+       the ids on the way. Writers keep running. A stopped copy resumes from the last key in the copy. Can be rate
+       limited.
+    3. cutover(), with the writers stopped: finishes the copy, copies again the rows written since the copy started
+       (small tables in full), checks the row counts and swaps the tables (<table> -> <table>_hex,
+       <table>_bin -> <table>). Then restart the writers with binary_ids=True.
+
+    The event queue compactor and the run history retention job delete rows, which the copy does not follow. Pause
+    them from prepare() to cutover(). The _hex tables are kept for a rollback (swap back), drop them when done.
+    """
+
+    def __init__(self, backend:DBBackend, schema_path:str = DEFAULT_SCHEMA_PATH, batch_size:int = 1000,
+                 max_rows_per_sec:float = None, cutover_margin_sec:float = 300):
+        """
+        :param backend: Backend of the database to migrate, opened without binary_ids.
+        :param schema_path: Schema the database was created from (with all migrations applied).
+        :param batch_size: Rows copied per transaction.
+        :param max_rows_per_sec: Rate limit of copy(). None runs the batches back to back.
+        :param cutover_margin_sec: Rows written up to this long before the copy started are copied again at cutover.
+                                   Covers clock skew between the ETL hosts and the host running the migration.
+        """
+        if batch_size < 1:
+            raise ConfigValidationException("batch_size must be at least 1")
+        if max_rows_per_sec is not None and max_rows_per_sec <= 0:
+            raise ConfigValidationException("max_rows_per_sec must be positive")
+
+        self.backend = backend
+        self.batch_size = batch_size
+        self.max_rows_per_sec = max_rows_per_sec
+        self.cutover_margin_sec = cutover_margin_sec
+        with open(schema_path) as schema_file:
+            self.tables = schema_id_tables(schema_file.read())
+
+    def pause_sec(self, copied_count:int, batch_sec:float) -> float:
+        if self.max_rows_per_sec is None:
+            return 0.0
+        return max(0.0, copied_count / self.max_rows_per_sec - batch_sec)
+
+    def prepare(self):
+        """
+        Create the binary id tables and the state table. Tables already prepared are left as they are.
+        """
+        conn = self.backend.get_con()
+        try:
+            existing = self.__existing_tables(conn)
+            cursor = conn.cursor()
+            if STATE_TABLE not in existing:
+                cursor.execute(STATE_TABLE_DDL)
+            for table in self.tables:
+                if table.name + SHADOW_SUFFIX in existing:
+                    continue
+                if table.name not in existing:
+                    raise ConfigValidationException("Table %s not found. Apply the schema migrations first." %
+                                                    table.name)
+                for stmt in table.shadow_ddl(rename_indexes=self.backend.name != 'mysql'):
+                    cursor.execute(stmt)
+                cursor.execute("INSERT INTO " + STATE_TABLE + " (table_name, copy_started_dt) VALUES (%s, %s)",
+                               (table.name, datetime.now().replace(microsecond=0)))
+                logger.info("Created %s%s", table.name, SHADOW_SUFFIX)
+            cursor.close()
+        finally:
+            self.backend.release_con(conn)
+
+    def copy(self, max_batches:int = None, max_duration_sec:float = None) -> IdCopyResult:
+        """
+        Copy batches, table by table, until every table is copied or max_batches/max_duration_sec is used up.
+        """
+        started = time.monotonic()
+        copied_count = 0
+        batch_count = 0
+        complete = False
+
+        while not complete:
+            batch_started = time.monotonic()
+            conn = self.backend.get_con()
+            try:
+                copied, complete = self.copy_batch(conn)
+            finally:
+                self.backend.release_con(conn)
+            copied_count += copied
+            batch_count += 1
+
+            if complete or (max_batches is not None and batch_count >= max_batches):
+                break
+            pause = self.pause_sec(copied, time.monotonic() - batch_started)
+            if max_duration_sec is not None and time.monotonic() + pause - started >= max_duration_sec:
+                break
+            if pause > 0:
+                time.sleep(pause)
+
+        return IdCopyResult(copied_count, batch_count, complete, time.monotonic() - started)
+
+    def copy_batch(self, conn) -> Tuple[int, bool]:
+        """
+        Copy the next batch of the first table not fully copied yet.
+
+        :return: (rows copied, True if every table is copied)
+        """
+        state = self.__state(conn)
+        for table in self.tables:
+            if table.name not in state:
+                raise ConfigValidationException("Table %s is not prepared, run prepare() first" % table.name)
+            if state[table.name][1] is not None:
+                continue
+
+            copied, last_key = self.__copy_rows(conn, table, self.__last_copied_key(conn, table), self.batch_size)
+            cursor = conn.cursor()
+            if copied < self.batch_size:
+                cursor.execute("UPDATE " + STATE_TABLE + " SET copied_count = copied_count + %s, copy_done_dt = %s "
+                               "WHERE table_name = %s", (copied, datetime.now(), table.name))
+                logger.info("Copied %s", table.name)
+            else:
+                cursor.execute("UPDATE " + STATE_TABLE + " SET copied_count = copied_count + %s "
+                               "WHERE table_name = %s", (copied, table.name))
+            cursor.close()
+            return copied, False
+        return 0, True
+
+    def cutover(self) -> int:
+        """
+        Finish the copy, copy the rows changed since it started and swap the tables, with the writers stopped.
+
+        :return: Rows copied by the cutover.
+        :raise: InternalDatasetException if a binary id table ends up with a different row count than its source
+                (rows deleted during the copy, e.g. by compaction or retention). Nothing is swapped then.
+        """
+        copied_count = self.copy().copied_count
+
+        conn = self.backend.get_con()
+        try:
+            state = self.__state(conn)
+            for table in self.tables:
+                copy_started_dt = to_datetime(state[table.name][0])
+                copied_count += self.__copy_changed_rows(conn, table,
+                                                         copy_started_dt - timedelta(seconds=self.cutover_margin_sec))
+
+            cursor = conn.cursor()
+            for table in self.tables:
+                cursor.execute("SELECT count(*) FROM " + table.name)
+                count = cursor.fetchall()[0][0]
+                cursor.execute("SELECT count(*) FROM " + table.name + SHADOW_SUFFIX)
+                shadow_count = cursor.fetchall()[0][0]
+                if count != shadow_count:
+                    cursor.close()
+                    raise InternalDatasetException("%s has %d rows, its binary id copy %d. Were rows deleted during "
+                                                   "the copy? Empty %s%s and copy it again." %
+                                                   (table.name, count, shadow_count, table.name, SHADOW_SUFFIX))
+
+            renames = []
+            for table in self.tables:
+                renames.append((table.name, table.name + HEX_SUFFIX))
+                renames.append((table.name + SHADOW_SUFFIX, table.name))
+            if self.backend.name == 'mysql':  # one atomic statement (DDL is not transactional)
+                cursor.execute("RENAME TABLE " + ', '.join("%s TO %s" % rename for rename in renames))
+            else:
+                conn.start_transaction()
+                for old_name, new_name in renames:
+                    cursor.execute("ALTER TABLE %s RENAME TO %s" % (old_name, new_name))
+            cursor.execute("UPDATE " + STATE_TABLE + " SET cutover_dt = %s", (datetime.now(),))
+            if conn.in_transaction:
+                conn.commit()
+            cursor.close()
+            logger.info("Swapped %d tables to binary ids, %d rows copied at cutover", len(self.tables), copied_count)
+            return copied_count
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self.backend.release_con(conn)
+
+    def size_report(self) -> IdSizeReport:
+        """
+        Data and index sizes of the hex and the binary id tables (before cutover <table> vs <table>_bin, after it
+        <table>_hex vs <table>) and the engine's cache read counters.
+        """
+        conn = self.backend.get_con()
+        try:
+            sizes = self.backend.table_sizes(conn)
+            cache_read_stats = self.backend.cache_read_stats(conn)
+        finally:
+            self.backend.release_con(conn)
+
+        table_sizes = {}
+        for table in self.tables:
+            if table.name + HEX_SUFFIX in sizes:
+                table_sizes[table.name] = (sizes[table.name + HEX_SUFFIX], sizes.get(table.name))
+            else:
+                table_sizes[table.name] = (sizes.get(table.name), sizes.get(table.name + SHADOW_SUFFIX))
+        return IdSizeReport(table_sizes, cache_read_stats, datetime.now().replace(microsecond=0))
+
+    def __copy_rows(self, conn, table:IdTable, after_key, limit:int, where:str = None, where_vals=()) -> Tuple[int, list]:
+        """
+        Copy up to limit source rows (matching where) with a primary key after after_key, in key order.
+
+        :return: (rows copied, primary key of the last row copied)
+        """
+        pk_cols = ', '.join(table.primary_key)
+        stmt_query = "SELECT " + self.__select_list(table) + " FROM " + table.name
+        conditions = []
+        input_vals = []
+        if where is not None:
+            conditions.append("(" + where + ")")
+            input_vals += list(where_vals)
+        if after_key is not None:
+            after_key_sql, after_key_vals = after_key_condition(table.primary_key, after_key)
+            conditions.append(after_key_sql)
+            input_vals += after_key_vals
+        if len(conditions) > 0:
+            stmt_query += " WHERE " + ' AND '.join(conditions)
+        stmt_query += " ORDER BY " + pk_cols + " LIMIT %d" % limit
+
+        cursor = conn.cursor()
+        cursor.execute(stmt_query, input_vals)
+        rows = cursor.fetchall()
+        if len(rows) == 0:
+            cursor.close()
+            return 0, after_key
+
+        stmt_insert = "INSERT INTO " + table.name + SHADOW_SUFFIX + " (" + ', '.join(table.columns) + ") VALUES (" + \
+                      ', '.join(['%s'] * len(table.columns)) + ")"
+        conn.start_transaction()
+        try:
+            cursor.executemany(stmt_insert, [table.to_binary(row) for row in rows])
+            conn.commit()
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            cursor.close()
+        return len(rows), [rows[-1][table.columns.index(col)] for col in table.primary_key]
+
+    def __copy_changed_rows(self, conn, table:IdTable, since_dt:datetime) -> int:
+        cursor = conn.cursor()
+        changed_filter = CHANGED_ROWS_FILTER.get(table.name)
+        if changed_filter is None:
+            cursor.execute("DELETE FROM " + table.name + SHADOW_SUFFIX)
+            where, where_vals = None, ()
+        else:
+            # drop the earlier copies of the changed rows first
+            where, where_vals = changed_filter, (since_dt,) * changed_filter.count('%s')
+            cursor.execute("SELECT " + ', '.join(table.primary_key) + " FROM " + table.name + " WHERE " + where,
+                           where_vals)
+            keys = [table.key_to_binary(row) for row in cursor.fetchall()]
+            if len(keys) > 0:
+                cursor.executemany("DELETE FROM " + table.name + SHADOW_SUFFIX + " WHERE " +
+                                   ' AND '.join(col + " = %s" for col in table.primary_key), keys)
+        cursor.close()
+
+        copied_count = 0
+        after_key = None
+        while True:
+            copied, after_key = self.__copy_rows(conn, table, after_key, self.batch_size, where, where_vals)
+            copied_count += copied
+            if copied < self.batch_size:
+                return copied_count
+
+    def __select_list(self, table:IdTable) -> str:
+        if self.backend.name != 'sqlite':
+            return ', '.join(table.columns)
+        # sqlite keeps datetimes as text. Copy the text as is (e.g. the '...59.0' of terminated_dt), the driver would
+        # hand back datetimes that are written back in a different format.
+        return ', '.join("CAST(%s AS TEXT)" % col if col_type in ('DATETIME', 'DATE') else col
+                         for col, col_type in zip(table.columns, table.column_types))
+
+    def __last_copied_key(self, conn, table:IdTable) -> list:
+        cursor = conn.cursor()
+        cursor.execute("SELECT " + ', '.join(table.primary_key) + " FROM " + table.name + SHADOW_SUFFIX +
+                       " ORDER BY " + ', '.join(col + " DESC" for col in table.primary_key) + " LIMIT 1")
+        rows = cursor.fetchall()
+        cursor.close()
+        if len(rows) == 0:
+            return None
+        return table.key_to_hex(rows[0])
+
+    def __state(self, conn) -> Dict[str, Tuple]:
+        if STATE_TABLE not in self.__existing_tables(conn):
+            raise ConfigValidationException("Migration not prepared, run prepare() first")
+        cursor = conn.cursor()
+        cursor.execute("SELECT table_name, copy_started_dt, copy_done_dt FROM " + STATE_TABLE)
+        rows = cursor.fetchall()
+        cursor.close()
+        return {row[0]: (row[1], row[2]) for row in rows}
+
+    def __existing_tables(self, conn) -> List[str]:
+        cursor = conn.cursor()
+        if self.backend.name == 'mysql':
+            cursor.execute("SELECT table_name FROM information_schema.TABLES WHERE table_schema = DATABASE()")
+        else:
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+        rows = cursor.fetchall()
+        cursor.close()
+        return [row[0] for row in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["prepare", "copy", "cutover", "report"])
+    parser.add_argument("--sqlite", default=None, help="sqlite database file")
+    parser.add_argument("--db-host", default=os.environ.get('DLC_DB_HOST'))
+    parser.add_argument("--db-user", default=os.environ.get('DLC_DB_USER'))
+    parser.add_argument("--db-password", default=os.environ.get('DLC_DB_PASSWORD'))
+    parser.add_argument("--db-name", default=os.environ.get('DLC_DB_NAME'))
+    parser.add_argument("--schema-path", default=DEFAULT_SCHEMA_PATH)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--max-rows-per-sec", type=float, default=None)
+    parser.add_argument("--max-duration-sec", type=float, default=None)
+    parser.add_argument("--snapshot", default=None,
+                        help="report: compare the cache hit ratio with the report saved in this file, then save "
+                             "the new one to it")
+    args = parser.parse_args()
+
+    if args.sqlite is not None:
+        if not os.path.exists(args.sqlite):
+            parser.error("database file not found: %s" % args.sqlite)
+        try:
+            backend = SqliteBackend(args.sqlite, schema_path=args.schema_path, pool_size=1)
+        except ConfigValidationException:  # already swapped to binary ids
+            backend = SqliteBackend(args.sqlite, schema_path=args.schema_path, pool_size=1, binary_ids=True)
+    else:
+        backend = MySQLBackend(db_host=args.db_host, db_user=args.db_user, db_password=args.db_password,
+                               db_name=args.db_name, pool_size=1)
+    migration = BinaryIdMigration(backend, schema_path=args.schema_path, batch_size=args.batch_size,
+                                  max_rows_per_sec=args.max_rows_per_sec)
+    try:
+        if args.command == "prepare":
+            migration.prepare()
+        elif args.command == "copy":
+            result = migration.copy(max_duration_sec=args.max_duration_sec)
+            print("copied %d rows in %d batches (%.1fs), complete: %s" %
+                  (result.copied_count, result.batch_count, result.elapsed_sec, result.complete))
+        elif args.command == "cutover":
+            print("copied %d rows at cutover" % migration.cutover())
+        else:
+            report = migration.size_report()
+            since = None
+            if args.snapshot is not None and os.path.exists(args.snapshot):
+                with open(args.snapshot) as snapshot_file:
+                    since = IdSizeReport.from_json(snapshot_file.read())
+            print(report.render(since))
+            if args.snapshot is not None:
+                with open(args.snapshot, 'w') as snapshot_file:
+                    snapshot_file.write(report.to_json())
+    finally:
+        backend.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,417 @@
+import functools
+import threading
+import time
+from typing import Dict, List, Tuple
+
+import logging
+
+logger = logging.getLogger("dataset-instrumentation")
+logger.setLevel(logging.INFO)
+
+# Metrics recorded per DatasetLineage API call
+WALL_TIME_US = "wall_time_us"
+DB_TIME_US = "db_time_us"
+STATEMENTS = "statements"
+ROWS = "rows"
+TRANSACTION_TIME_US = "transaction_time_us"
+
+METRIC_NAMES = (WALL_TIME_US, DB_TIME_US, STATEMENTS, ROWS, TRANSACTION_TIME_US)
+
+
+class LatencyHistogram:
+    """
+    HDR style (log-linear) histogram of non negative integer values. Values below 2^precision_bits are counted
+    exactly, larger values land in buckets whose width grows with the magnitude, so the relative error of a
+    reported value stays below 2^-(precision_bits - 1) at any scale. Buckets are kept sparse.
+    """
+
+    def __init__(self, precision_bits:int = 6):
+        self.precision_bits = precision_bits
+        self._half = 1 << (precision_bits - 1)
+        self._counts: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def record(self, value:int):
+        value = max(0, int(value))
+        shift = value.bit_length() - self.precision_bits
+        if shift <= 0:
+            index = value
+        else:
+            index = shift * self._half + (value >> shift)
+        self._counts[index] = self._counts.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def merge(self, other:'LatencyHistogram'):
+        if other.precision_bits != self.precision_bits:
+            raise ValueError("Cannot merge histograms of different precision")
+        for index, count in other._counts.items():
+            self._counts[index] = self._counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+
+    def buckets(self) -> List[Tuple[int, int]]:
+        """
+        :return: (highest value of the bucket, count) of every non empty bucket, lowest first.
+        """
+        return [(self.__bucket_upper(index), self._counts[index]) for index in sorted(self._counts)]
+
+    def percentile(self, percent:float) -> int:
+        """
+        :return: Value at the percentile (0-100), reported as the top of its bucket (capped at max). None if empty.
+        """
+        if self.count == 0:
+            return None
+        rank = max(1, int(round(percent / 100.0 * self.count)))
+        seen = 0
+        for upper, count in self.buckets():
+            seen += count
+            if seen >= rank:
+                return min(upper, self.max)
+        return self.max
+
+    def mean(self) -> float:
+        return self.total / self.count if self.count > 0 else 0.0
+
+    def count_at_or_below(self, value:float) -> int:
+        return sum(count for upper, count in self.buckets() if upper <= value)
+
+    def __bucket_upper(self, index:int) -> int:
+        if index < 2 * self._half:
+            return index
+        shift = index // self._half - 1
+        sub_bucket = index - shift * self._half
+        return ((sub_bucket + 1) << shift) - 1
+
+
+class _CallContext:
+    __slots__ = ("db_ns", "statements", "rows", "tx_ns", "tx_start")
+
+    def __init__(self):
+        self.db_ns = 0
+        self.statements = 0
+        self.rows = 0
+        self.tx_ns = 0
+        self.tx_start = None
+
+
+class DatasetInstrumentation:
+    """
+    Collects per API call wall time, DB time, statement count, rows returned/affected and transaction duration
+    into LatencyHistograms, one set per DatasetLineage API name.
+
+    Passed to DatasetLineage(instrumentation=...). The connections DatasetLineage gets from its backend are then
+    wrapped so every statement and transaction is timed and attributed to the API call running on the thread.
+    Without instrumentation nothing is wrapped and the API calls go straight through.
+    """
+
+    def __init__(self, precision_bits:int = 6):
+        self.precision_bits = precision_bits
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self._calls: Dict[str, int] = {}
+        self._errors: Dict[str, int] = {}
+
+    def wrap_connection(self, conn):
+        if isinstance(conn, InstrumentedConnection):
+            return conn
+        return InstrumentedConnection(conn, self)
+
+    def start_call(self) -> _CallContext:
+        """
+        Begin attributing statements on this thread to a new API call. Nested API calls are attributed to the
+        outermost one.
+        """
+        if getattr(self._local, "context", None) is not None:
+            return None
+        context = _CallContext()
+        self._local.context = context
+        return context
+
+    def end_call(self, api_name:str, context:_CallContext, wall_ns:int, failed:bool):
+        self._local.context = None
+        if context.tx_start is not None:  # transaction left open by the call
+            context.tx_ns += time.perf_counter_ns() - context.tx_start
+        with self._lock:
+            self._calls[api_name] = self._calls.get(api_name, 0) + 1
+            if failed:
+                self._errors[api_name] = self._errors.get(api_name, 0) + 1
+            self.__histogram(api_name, WALL_TIME_US).record(wall_ns // 1000)
+            self.__histogram(api_name, DB_TIME_US).record(context.db_ns // 1000)
+            self.__histogram(api_name, STATEMENTS).record(context.statements)
+            self.__histogram(api_name, ROWS).record(context.rows)
+            if context.tx_ns > 0:
+                self.__histogram(api_name, TRANSACTION_TIME_US).record(context.tx_ns // 1000)
+
+    def current_call(self) -> _CallContext:
+        return getattr(self._local, "context", None)
+
+    def histogram(self, api_name:str, metric:str) -> LatencyHistogram:
+        """
+        :return: Copy of the histogram, None if nothing was recorded for the api/metric.
+        """
+        with self._lock:
+            histogram = self._histograms.get((api_name, metric))
+            if histogram is None:
+                return None
+            copy = LatencyHistogram(self.precision_bits)
+            copy.merge(histogram)
+            return copy
+
+    def api_names(self) -> List[str]:
+        with self._lock:
+            return sorted(self._calls)
+
+    def call_count(self, api_name:str) -> int:
+        return self._calls.get(api_name, 0)
+
+    def error_count(self, api_name:str) -> int:
+        return self._errors.get(api_name, 0)
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._calls.clear()
+            self._errors.clear()
+
+    def __histogram(self, api_name:str, metric:str) -> LatencyHistogram:
+        histogram = self._histograms.get((api_name, metric))
+        if histogram is None:
+            histogram = LatencyHistogram(self.precision_bits)
+            self._histograms[(api_name, metric)] = histogram
+        return histogram
+
+
+def instrumented(func):
+    """
+    Times a DatasetLineage API method when the DatasetLineage has instrumentation. A no-op pass through otherwise.
+    """
+    api_name = func.__name__
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        instrumentation = self.instrumentation
+        if instrumentation is None:
+            return func(self, *args, **kwargs)
+
+        context = instrumentation.start_call()
+        if context is None:  # nested API call, counted in the outer one
+            return func(self, *args, **kwargs)
+
+        failed = True
+        started = time.perf_counter_ns()
+        try:
+            result = func(self, *args, **kwargs)
+            failed = False
+            return result
+        finally:
+            instrumentation.end_call(api_name, context, time.perf_counter_ns() - started, failed)
+
+    return wrapper
+
+
+class InstrumentedCursor:
+
+    def __init__(self, cursor, instrumentation:DatasetInstrumentation):
+        self._cursor = cursor
+        self._instrumentation = instrumentation
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def execute(self, stmt:str, params=()):
+        started = time.perf_counter_ns()
+        try:
+            return self._cursor.execute(stmt, params)
+        finally:
+            self.__record(started, statements=1, affected=True)
+
+    def executemany(self, stmt:str, seq_of_params):
+        started = time.perf_counter_ns()
+        try:
+            return self._cursor.executemany(stmt, seq_of_params)
+        finally:
+            self.__record(started, statements=1, affected=True)
+
+    def fetchall(self):
+        started = time.perf_counter_ns()
+        rows = self._cursor.fetchall()
+        self.__record(started, rows=len(rows))
+        return rows
+
+    def fetchone(self):
+        started = time.perf_counter_ns()
+        row = self._cursor.fetchone()
+        self.__record(started, rows=0 if row is None else 1)
+        return row
+
+    def close(self):
+        self._cursor.close()
+
+    def __record(self, started:int, statements:int = 0, rows:int = 0, affected:bool = False):
+        context = self._instrumentation.current_call()
+        if context is None:
+            return
+        context.db_ns += time.perf_counter_ns() - started
+        context.statements += statements
+        if affected and self._cursor.description is None and self._cursor.rowcount > 0:
+            rows += self._cursor.rowcount
+        context.rows += rows
+
+
+class InstrumentedConnection:
+    """
+    Wraps a backend connection and reports statement/transaction timings to the API call running on the thread.
+    """
+
+    def __init__(self, conn, instrumentation:DatasetInstrumentation):
+        self.raw_connection = conn
+        self._instrumentation = instrumentation
+
+    def __getattr__(self, name):
+        return getattr(self.raw_connection, name)
+
+    def __setattr__(self, name, value):
+        if name in ("raw_connection", "_instrumentation"):
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self.raw_connection, name, value)
+
+    def cursor(self):
+        return InstrumentedCursor(self.raw_connection.cursor(), self._instrumentation)
+
+    def start_transaction(self, *args, **kwargs):
+        started = time.perf_counter_ns()
+        self.raw_connection.start_transaction(*args, **kwargs)
+        context = self._instrumentation.current_call()
+        if context is not None:
+            context.db_ns += time.perf_counter_ns() - started
+            context.statements += 1
+            context.tx_start = started
+
+    def commit(self):
+        self.__end_transaction(self.raw_connection.commit)
+
+    def rollback(self):
+        self.__end_transaction(self.raw_connection.rollback)
+
+    def __end_transaction(self, end):
+        started = time.perf_counter_ns()
+        end()
+        context = self._instrumentation.current_call()
+        if context is not None:
+            ended = time.perf_counter_ns()
+            context.db_ns += ended - started
+            context.statements += 1
+            if context.tx_start is not None:
+                context.tx_ns += ended - context.tx_start
+                context.tx_start = None
+
+
+class InMemoryExporter:
+    """
+    Point in time snapshot of the recorded metrics as plain dicts, e.g. for tests, logs or a JSON status endpoint.
+    """
+
+    def __init__(self, instrumentation:DatasetInstrumentation, percentiles=(50, 90, 99, 99.9)):
+        self.instrumentation = instrumentation
+        self.percentiles = percentiles
+
+    def export(self) -> Dict[str, Dict]:
+        """
+        :return: {api name: {"calls": n, "errors": n, metric: {"count", "mean", "min", "max", "p50", ...}}}
+        """
+        snapshot = {}
+        for api_name in self.instrumentation.api_names():
+            api_stats = {
+                "calls": self.instrumentation.call_count(api_name),
+                "errors": self.instrumentation.error_count(api_name)
+            }
+            for metric in METRIC_NAMES:
+                histogram = self.instrumentation.histogram(api_name, metric)
+                if histogram is None:
+                    continue
+                metric_stats = {
+                    "count": histogram.count,
+                    "mean": histogram.mean(),
+                    "min": histogram.min,
+                    "max": histogram.max
+                }
+                for percent in self.percentiles:
+                    metric_stats["p%s" % ('%g' % percent)] = histogram.percentile(percent)
+                api_stats[metric] = metric_stats
+            snapshot[api_name] = api_stats
+        return snapshot
+
+
+class PrometheusExporter:
+    """
+    Renders the recorded metrics in the Prometheus text exposition format. Times are exported in seconds as
+    histograms over fixed bucket boundaries (the HDR buckets are folded into them).
+    """
+
+    DEFAULT_TIME_BUCKETS_SEC = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25,
+                                0.5, 1.0, 2.5, 5.0, 10.0)
+    DEFAULT_COUNT_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 4096, 16384)
+
+    def __init__(self, instrumentation:DatasetInstrumentation, prefix:str = "dlcp",
+                 time_buckets_sec=DEFAULT_TIME_BUCKETS_SEC, count_buckets=DEFAULT_COUNT_BUCKETS):
+        self.instrumentation = instrumentation
+        self.prefix = prefix
+        self.time_buckets_sec = time_buckets_sec
+        self.count_buckets = count_buckets
+
+    def render(self) -> str:
+        api_names = self.instrumentation.api_names()
+        lines = []
+
+        name = "%s_api_calls_total" % self.prefix
+        lines.append("# HELP %s DatasetLineage API calls." % name)
+        lines.append("# TYPE %s counter" % name)
+        for api_name in api_names:
+            lines.append('%s{api="%s"} %d' % (name, api_name, self.instrumentation.call_count(api_name)))
+
+        name = "%s_api_errors_total" % self.prefix
+        lines.append("# HELP %s DatasetLineage API calls that raised." % name)
+        lines.append("# TYPE %s counter" % name)
+        for api_name in api_names:
+            lines.append('%s{api="%s"} %d' % (name, api_name, self.instrumentation.error_count(api_name)))
+
+        for metric, help_text in ((WALL_TIME_US, "Wall time of the API call."),
+                                  (DB_TIME_US, "Time spent in database calls."),
+                                  (TRANSACTION_TIME_US, "Time write transactions were held open.")):
+            self.__histogram_lines(lines, "%s_api_%s_seconds" % (self.prefix, metric[:-len("_us")]), help_text,
+                                   api_names, metric, self.time_buckets_sec, 1e-6)
+        for metric, help_text in ((STATEMENTS, "Statements sent per API call."),
+                                  (ROWS, "Rows returned or affected per API call.")):
+            self.__histogram_lines(lines, "%s_api_%s" % (self.prefix, metric), help_text,
+                                   api_names, metric, self.count_buckets, 1)
+
+        return "\n".join(lines) + "\n"
+
+    def __histogram_lines(self, lines:List[str], name:str, help_text:str, api_names:List[str], metric:str,
+                          bounds, scale:float):
+        lines.append("# HELP %s %s" % (name, help_text))
+        lines.append("# TYPE %s histogram" % name)
+        for api_name in api_names:
+            histogram = self.instrumentation.histogram(api_name, metric)
+            if histogram is None:
+                continue
+            for bound in bounds:
+                lines.append('%s_bucket{api="%s",le="%s"} %d' %
+                             (name, api_name, '%g' % bound, histogram.count_at_or_below(bound / scale)))
+            lines.append('%s_bucket{api="%s",le="+Inf"} %d' % (name, api_name, histogram.count))
+            lines.append('%s_sum{api="%s"} %s' % (name, api_name, '%g' % (histogram.total * scale)))
+            lines.append('%s_count{api="%s"} %d' % (name, api_name, histogram.count))
@@ -1,12 +1,22 @@
-import mysql.connector as dbapi_connector
-# from mysql.connector import Error as dbapi_error
-from  mysql.connector.pooling import MySQLConnectionPool as dbapi_pool
 # from datetime import datetime
-from src.python.data_lineage.uuid_util import get_new_guid
+from .uuid_util import get_new_guid, HexId
 import uuid
 import os
+import time
+from datetime import date
+from typing import Callable, Dict, Tuple
 # from typing import List, Set
-from . db_layer import DBManager
+from . db_layer import DBManager, DBBackend, BinaryIdConnection, to_datetime
+from . dataset_graph import LineageGraphIndex
+from . dataset_catalog import ObserverCatalogCache, OBSERVER_COLUMNS, observer_from_row
+from . dataset_compaction import EventQueueCompactor, CompactionResult, QUEUE_COLUMNS
+from . dataset_retention import RunHistoryRetention, RetentionResult, DatasetRunRollup, ROLLUP_COLUMNS, rollup_from_row
+from . dataset_instrumentation import DatasetInstrumentation, InstrumentedConnection, instrumented
+from . dataset_wait import ReadySourcesWaiter, WAIT_DEPENDENCY_CHECKS, sources_ready
+from . dataset_events import LineageEventBus, RUN_STARTED, RUN_FINISHED, SOURCES_ENQUEUED
+from . dataset_readiness import SinkReadinessCounters, DatasetSinkReadiness, ReadinessCounterReport
+from . dataset_manifest import LineageManifest, ManifestObserver, ManifestPlan, ObserverKey, observer_key, \
+    format_key
 from . dataset_exceptions import *
 from . dataset_structs import *
 import logging
@@ -15,6 +25,16 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("dataset-app")
 logger.setLevel(logging.INFO)
 
+# frontier ids per statement of the database lineage walk (below SQLite's bound parameter limit)
+WALK_CHUNK_SIZE = 500
+
+PROVENANCE_RUN_COLUMNS = "run.status, run.batch_run_id, run.record_count, run.start_dt, run.end_dt"
+
+# observers per multi-row insert of declare_dataset_observers() (8 bound parameters a row)
+DECLARE_CHUNK_SIZE = 500
+# observer keys per lookup, one UNION ALL term each (SQLite allows 500 terms)
+KEY_LOOKUP_CHUNK_SIZE = 250
+
 
 ### A dataset lineage tracing, dataset dependency modeling, dataset inlet/outlet tracking, and overall ETL process monitoring.
 ### Build realtime and historical reports and visualize of ETL processing status (success, failures, orphaned, retries, replays).
@@ -27,9 +47,18 @@ def a_simple_func():
 class DatasetLineage:
 
     def __init__(self,
-                 db_con:dbapi_connector = None,
-                 db_pool:dbapi_pool = None,
-                 db_host:str = None, db_user:str = None, db_password:str = None, db_name:str = None):
+                 db_con = None,
+                 db_pool = None,
+                 db_host:str = None, db_user:str = None, db_password:str = None, db_name:str = None,
+                 backend:DBBackend = None,
+                 graph_index:LineageGraphIndex = None,
+                 catalog_cache:ObserverCatalogCache = None,
+                 instrumentation:DatasetInstrumentation = None,
+                 binary_ids:bool = False,
+                 id_generator:Callable[[], uuid.UUID] = get_new_guid,
+                 ready_waiter:ReadySourcesWaiter = None,
+                 event_bus:LineageEventBus = None,
+                 readiness_counters:SinkReadinessCounters = None):
         """
         Can pass in a db_con and manage the connection from the outside, pass a db pool and let the class
         request and return (close) connections from the pool, or pass db params to
@@ -37,49 +66,357 @@ class DatasetLineage:
 
         Pool is useful to use if this is long lived object and/or will be passed around and used
 
+        Alternatively pass a storage backend (e.g. db_layer.SqliteBackend for the embedded engine). Without
+        one the MySQL backend is built from the db_con/db_pool/db params.
+
+        One DatasetLineage can be shared by worker threads. Every call runs on a connection of its own (pooled
+        for db params, a db pool or a SQLite file) with its own transaction; a single outside db_con or the
+        in-memory SQLite db is handed to one call at a time.
+
         :param db_con: If provided, will let caller manage db con pooling and closing.
         :param db_host:
         :param db_user:
         :param db_password:
         :param db_name:
+        :param backend: Optional storage backend. Overrides the MySQL connection params.
+        :param graph_index: Optional in-process index of the active source/sink rels. When given, static rel counts
+                            and graph traversals are answered from memory instead of dataset_source_to_sink_meta_rel.
+        :param catalog_cache: Optional in-process cache of dataset_observer rows. When given, observer key to id
+                              resolution, existence checks and association validation are answered from memory.
+        :param instrumentation: Optional DatasetInstrumentation. When given, every API call records its wall time,
+                                DB time, statement count, rows and transaction time.
+        :param binary_ids: The database stores ids as BINARY(16) (see dataset_id_migration). Ids are still taken and
+                           returned as hex strings. For a backend passed in, set it on the backend instead.
+        :param id_generator: Creates the observer, rel and run ids. uuid_util.get_new_time_ordered_guid gives time
+                             ordered (UUIDv7 style) ids that are appended to the id indexes instead of scattered
+                             across them. Existing random ids keep working next to them.
+        :param ready_waiter: Optional ReadySourcesWaiter of wait_for_ready_sources(). Pass one shared instance to
+                             the DatasetLineage objects of a process that use the same database so that their waits
+                             on a sink share one poller and their finishes wake each other's waits.
+        :param event_bus: Optional LineageEventBus the on_run_started/on_run_finished/on_sources_enqueued callbacks
+                          are dispatched on. Defaults to a bus of this object.
+        :param readiness_counters: Optional SinkReadinessCounters. When given, finishes, sink starts and
+                                   (dis)associations maintain the materialized per sink readiness counters, and rel
+                                   counts and 'all' dependency checks read them instead of counting rels and pending
+                                   events. Pass it to every DatasetLineage writing to the database.
         """
 
-        self.dbmgr = DBManager(db_con, db_pool, db_host, db_user, db_password, db_name)
+        self.dbmgr = DBManager(db_con, db_pool, db_host, db_user, db_password, db_name, backend=backend,
+                               binary_ids=binary_ids)
+        self.binary_ids = self.dbmgr.backend.binary_ids
+        self.id_generator = id_generator
+        self.graph_index:LineageGraphIndex = graph_index
+        self.catalog_cache:ObserverCatalogCache = catalog_cache
+        self.instrumentation:DatasetInstrumentation = instrumentation
+        self.ready_waiter:ReadySourcesWaiter = ready_waiter if ready_waiter is not None else ReadySourcesWaiter()
+        self.event_bus:LineageEventBus = event_bus if event_bus is not None else LineageEventBus()
+        self.readiness_counters:SinkReadinessCounters = readiness_counters
 
-        if db_con:
-            self.db_con:dbapi_connector = db_con
-            self.db_type=1
-        elif db_pool:
-            self.db_pool:dbapi_pool = db_pool
-            self.db_type = 2
-        else:
-            self.dbconfig = {
-                "host": db_host,
-                "user" : db_user,
-                "password": db_password,
-                "database": db_name
-            }
+    def close_db_con(self):
 
-            self.db_con = dbapi_connector.connect(**self.dbconfig)
+        self.dbmgr.close_db_con()
 
-        # self.dbapi_pooling = dbapi_pooling.MySQLConnectionPool(pool_name="o_pool", pool_size=3, **self.dbconfig)
+    def get_db_pool_stats(self) -> Dict[str, float]:
+        """
+        Checkout/wait counts, wait time percentiles (us) and size of the backend's internal connection pool.
+        Empty when connections come from the outside (db_con/db_pool) or the backend does not pool.
+        """
+        return self.dbmgr.pool_stats()
 
-        self.db_con.autocommit = True
+    def on_run_started(self, callback:Callable[[DatasetRunStartedEvent], None]) -> Callable:
+        """
+        Call back (asynchronously, on the event bus) after a run of a dataset started.
 
-    def close_db_con(self):
+        :return: callback, for event_bus.unsubscribe(RUN_STARTED, callback)
+        """
+        return self.event_bus.subscribe(RUN_STARTED, callback)
 
-        self.dbmgr.close_db_con()
+    def on_run_finished(self, callback:Callable[[DatasetRunFinishedEvent], None]) -> Callable:
+        """
+        Call back (asynchronously, on the event bus) after a run finished, with the sinks it queued events for.
 
-        if self.db_type == 1: # external con
-            return
-        elif self.db_type == 2: # external pool
-            return
-        else:  # let user explicitly close internally managed con
-            if self.db_con and self.db_con.is_connected:
-                self.db_con.close()
-                self.db_con = None
-            else:
-                self.db_con = None
+        :return: callback, for event_bus.unsubscribe(RUN_FINISHED, callback)
+        """
+        return self.event_bus.subscribe(RUN_FINISHED, callback)
+
+    def on_sources_enqueued(self, callback:Callable[[DatasetSourcesEnqueuedEvent], None]) -> Callable:
+        """
+        Call back (asynchronously, on the event bus) after successful finishes queued source events for sinks. One
+        event per finish call, with every sink that has new events.
+
+        :return: callback, for event_bus.unsubscribe(SOURCES_ENQUEUED, callback)
+        """
+        return self.event_bus.subscribe(SOURCES_ENQUEUED, callback)
+
+    def warm_up(self):
+        """
+        Open a db connection and load the graph index/catalog cache (if configured) ahead of the first API call.
+        Meant for worker processes (see dataset_workers) so the first job does not pay for the setup.
+        """
+        conn = None
+        try:
+            conn = self.__get_db_con()
+            cursor = conn.cursor()
+            cursor.execute("SELECT dataset_observer_id FROM dataset_observer limit 1")
+            cursor.fetchall()
+            cursor.close()
+            if self.graph_index is not None:
+                self.__lineage_graph(conn)
+            if self.catalog_cache is not None:
+                self.__catalog(conn)
+        finally:
+            if conn is not None:
+                self.__close_db_con(conn)
+
+    @instrumented
+    def get_lineage_graph(self) -> LineageGraphIndex:
+        """
+        The in-process lineage graph index, loaded on first use and delta polled once it is older than its
+        refresh interval.
+
+        :return: None if this instance was created without a graph index.
+        """
+        if self.graph_index is None:
+            return None
+
+        conn = None
+        try:
+            conn = self.__get_db_con()
+            return self.__lineage_graph(conn)
+        finally:
+            if conn is not None:
+                self.__close_db_con(conn)
+
+    @instrumented
+    def refresh_lineage_graph(self) -> int:
+        """
+        Poll for rels created or terminated (by any process) since the graph index was last loaded/refreshed.
+
+        :return: Number of rel changes applied to the index.
+        """
+        if self.graph_index is None:
+            raise ConfigValidationException("No graph index configured for this DatasetLineage")
+
+        conn = None
+        try:
+            conn = self.__get_db_con()
+            return self.graph_index.refresh(conn, self.dbmgr.get_max_datetime_to_sec())
+        finally:
+            if conn is not None:
+                self.__close_db_con(conn)
+
+    @instrumented
+    def get_upstream(self, dataset_observer_id:str, max_depth:int = None) -> Dict[str, int]:
+        """
+        All observers feeding this one through active rels, directly or transitively.
+
+        Answered from the graph index when this instance has one. Otherwise the rels are walked in the database,
+        breadth first with one indexed statement per level, so each observer is expanded once however many paths
+        lead to it and cycles end the walk.
+
+        :param max_depth: Optional. Most hops walked, 1 for the direct sources only.
+        :return: dict of observer id -> depth (1 for direct sources), the shortest distance when several paths lead
+                 to an observer. The observer itself is not included.
+        """
+        return self.__walk_lineage(dataset_observer_id, max_depth, upstream=True)
+
+    @instrumented
+    def get_downstream(self, dataset_observer_id:str, max_depth:int = None) -> Dict[str, int]:
+        """
+        All observers consuming from this one through active rels, directly or transitively. Same rules as
+        get_upstream().
+
+        :return: dict of observer id -> depth (1 for direct sinks).
+        """
+        return self.__walk_lineage(dataset_observer_id, max_depth, upstream=False)
+
+    @instrumented
+    def compact_event_queue(self, compactor:EventQueueCompactor, max_chunks:int = None,
+                            max_duration_sec:float = None) -> CompactionResult:
+        """
+        Archive consumed queue events older than the compactor's retention window, chunk by chunk, until the pass
+        reaches the cutoff or max_chunks/max_duration_sec is used up. Each chunk runs on its own connection
+        checkout and transaction, and the compactor's rate limit pauses between chunks. Interrupted compactions
+        resume from the compactor's checkpoint.
+        """
+        started = time.monotonic()
+        archived_count = 0
+        chunk_count = 0
+        pass_complete = False
+
+        while not pass_complete:
+            chunk_started = time.monotonic()
+            conn = None
+            try:
+                conn = self.__get_db_con()
+                moved, pass_complete = compactor.compact_chunk(conn)
+            finally:
+                if conn is not None:
+                    self.__close_db_con(conn)
+            archived_count += moved
+            chunk_count += 1
+
+            if pass_complete or (max_chunks is not None and chunk_count >= max_chunks):
+                break
+            pause = compactor.pause_sec(moved, time.monotonic() - chunk_started)
+            if max_duration_sec is not None and time.monotonic() + pause - started >= max_duration_sec:
+                break
+            if pause > 0:
+                time.sleep(pause)
+
+        return CompactionResult(archived_count, chunk_count, pass_complete, time.monotonic() - started)
+
+    @instrumented
+    def purge_run_history(self, retention:RunHistoryRetention, max_batches:int = None,
+                          max_duration_sec:float = None) -> RetentionResult:
+        """
+        Roll up and delete finalized runs older than the retention window, batch by batch, until none are left or
+        max_batches/max_duration_sec is used up. Each batch runs on its own connection checkout and transaction, and
+        the retention's rate limit pauses between batches.
+        """
+        started = time.monotonic()
+        purged_count = 0
+        rollup_count = 0
+        batch_count = 0
+        complete = False
+
+        while not complete:
+            batch_started = time.monotonic()
+            conn = None
+            try:
+                conn = self.__get_db_con()
+                purged, rollups, complete = retention.purge_batch(conn)
+            finally:
+                if conn is not None:
+                    self.__close_db_con(conn)
+            purged_count += purged
+            rollup_count += rollups
+            batch_count += 1
+
+            if complete or (max_batches is not None and batch_count >= max_batches):
+                break
+            pause = retention.pause_sec(purged, time.monotonic() - batch_started)
+            if max_duration_sec is not None and time.monotonic() + pause - started >= max_duration_sec:
+                break
+            if pause > 0:
+                time.sleep(pause)
+
+        return RetentionResult(purged_count, rollup_count, batch_count, complete, time.monotonic() - started)
+
+    @instrumented
+    def get_dataset_observer_run_rollups(self, dataset_observer_id:str, from_day:date = None,
+                                         to_day:date = None) -> List[DatasetRunRollup]:
+        """
+        Daily rollups of the purged runs of an observer, oldest day first.
+
+        :param from_day: First day to return (inclusive). None for no lower bound.
+        :param to_day: Last day to return (inclusive). None for no upper bound.
+        """
+        stmt_query = "SELECT " + ROLLUP_COLUMNS + " FROM dataset_observer_run_daily WHERE dataset_observer_id = %s "
+        input_vals = [self.__id(dataset_observer_id)]
+        if from_day is not None:
+            stmt_query += "AND run_day >= %s "
+            input_vals.append(from_day)
+        if to_day is not None:
+            stmt_query += "AND run_day <= %s "
+            input_vals.append(to_day)
+        stmt_query += "ORDER BY run_day"
+
+        conn = None
+        try:
+            conn = self.__get_db_con()
+            cursor = conn.cursor()
+            cursor.execute(stmt_query, input_vals)
+            rows = cursor.fetchall()
+            cursor.close()
+            return [rollup_from_row(row) for row in rows]
+        finally:
+            if conn is not None:
+                self.__close_db_con(conn)
+
+    @instrumented
+    def get_consumed_source_events(self, sink_run_id:str, include_archive:bool = False) -> List[DatasetQueueEvent]:
+        """
+        Queue events (source runs) consumed by a sink run.
+
+        :param include_archive: Also read events moved to the archive by the event queue compactor.
+        """
+        return self.__queue_events("sink_run_id", sink_run_id, include_archive)
+
+    @instrumented
+    def get_consuming_sink_events(self, source_run_id:str, include_archive:bool = False) -> List[DatasetQueueEvent]:
+        """
+        Queue events (sink runs) that consumed a source run. Pending events (still waiting for their sink) are not
+        returned.
+
+        :param include_archive: Also read events moved to the archive by the event queue compactor.
+        """
+        return self.__queue_events("source_run_id", source_run_id, include_archive)
+
+    @instrumented
+    def trace_run_provenance(self, run_id:str, max_depth:int = None,
+                             include_archive:bool = False) -> DatasetProvenanceRun:
+        """
+        Tree of the upstream runs that contributed to a run: the source runs it consumed, the source runs they
+        consumed, and so on, with their observer keys, batch_run_id and record_count.
+
+        Walked breadth first with one statement per level: the consumed events of all the runs of a level are read
+        through the sink_run_id index of the queue (and archive) and joined to their source runs and observers. Each
+        run is expanded once, however many runs of the tree it fed.
+
+        :param max_depth: Optional. Most hops walked, 1 for the directly consumed source runs only. Runs at max_depth
+                          have no source_runs listed.
+        :param include_archive: Also follow events moved to the archive by the event queue compactor.
+        :raise: RunNotFoundException if neither the run nor any event it consumed exists.
+        :return: DatasetProvenanceRun of the run, its source runs in source_runs.
+        """
+        if max_depth is not None and max_depth < 1:
+            raise ConfigValidationException("Error: max_depth must be at least 1: %s" % (max_depth))
+
+        conn = None
+        try:
+            conn = self.__get_db_con()
+            root = self.__provenance_root(conn, run_id)
+            self.__walk_runs(conn, root, max_depth, include_archive, upstream=True)
+            if root.dataset_observer_id is None and len(root.source_runs) == 0:
+                raise RunNotFoundException("Could not find run {}".format(run_id))
+            return root
+        finally:
+            if conn is not None:
+                self.__close_db_con(conn)
+
+    @instrumented
+    def impact_of_run(self, run_id:str, quarantine:bool = False, include_archive:bool = False) -> DatasetRunImpact:
+        """
+        Downstream impact of a (bad) run: every sink run that consumed it, directly or transitively, and the pending
+        events of the run and of those sink runs, which their sinks would consume next.
+
+        The consuming runs are walked breadth first with one statement per level over the source_run_id index of the
+        queue (and archive), like trace_run_provenance() upstream.
+
+        :param quarantine: Also quarantine the pending events found, with one set based update: sinks skip them from
+                           then on. The events stay in dataset_source_sink_pending_event with their quarantined_dt.
+        :param include_archive: Also follow events moved to the archive by the event queue compactor.
+        :raise: RunNotFoundException if neither the run nor any event consuming it exists.
+        :return: DatasetRunImpact
+        """
+        conn = None
+        try:
+            conn = self.__get_db_con()
+            root = self.__provenance_root(conn, run_id)
+            consumed_runs = self.__walk_runs(conn, root, None, include_archive, upstream=False)
+            if root.dataset_observer_id is None and len(consumed_runs) == 0:
+                raise RunNotFoundException("Could not find run {}".format(run_id))
+
+            run_id_list = [root.run_id] + [run.run_id for run in consumed_runs]
+            quarantined_count = 0
+            if quarantine:
+                quarantined_count = self.__quarantine_pending_events(conn, run_id_list)
+            return DatasetRunImpact(root, consumed_runs, self.__pending_events_of(conn, run_id_list),
+                                    quarantined_count)
+        finally:
+            if conn is not None:
+                self.__close_db_con(conn)
 
     def clear_dataset_observer_run(self, dataset_run_id:str):
         """
@@ -92,6 +429,7 @@ class DatasetLineage:
         """
         pass
 
+    @instrumented
     def update_dataset_observer(self, dataset_observer_id:str, description:str=None,
                                 observer_config:str=None,
                                 display_name:str=None) ->int:
@@ -138,15 +476,17 @@ class DatasetLineage:
                     stmt_update_sql += ', '
                 stmt_update_sql += col_name_list[i] + ' = %s'
 
-            stmt_update_sql += ", status_update_dt = %s WHERE dataset_observer_id = %s"
+            # the database clock, like the created_dt/status_update_dt defaults of the insert
+            stmt_update_sql += ", status_update_dt = current_timestamp WHERE dataset_observer_id = %s"
             logger.debug("SQL stmt: %s" % stmt_update_sql)
             input_vals = (col_val_list)
-            input_vals.append(datetime.now())
-            input_vals.append(dataset_observer_id)
+            input_vals.append(self.__id(dataset_observer_id))
             cursor.execute(stmt_update_sql, input_vals)
             rows_updated = cursor.rowcount
             # conn.commit()
             cursor.close()
+            if self.catalog_cache is not None:
+                self.catalog_cache.invalidate(dataset_observer_id)
             return rows_updated
         except Exception as err:
             logger.error("Internal operation failure: {}".format(err))
@@ -155,6 +495,7 @@ class DatasetLineage:
             if conn is not None:
                 self.__close_db_con(conn)
 
+    @instrumented
     def update_dataset_observer_status(self, dataset_observer_id:str,
                                        observer_status:int=None) ->int:
 
@@ -210,15 +551,17 @@ class DatasetLineage:
                     stmt_update_sql += ', '
                 stmt_update_sql += col_name_list[i] + ' = %s'
 
-            stmt_update_sql += ", status_update_dt = %s WHERE dataset_observer_id = %s"
+            # the database clock, like the created_dt/status_update_dt defaults of the insert
+            stmt_update_sql += ", status_update_dt = current_timestamp WHERE dataset_observer_id = %s"
             logger.debug("SQL stmt: %s" % stmt_update_sql)
             input_vals = (col_val_list)
-            input_vals.append(datetime.now())
-            input_vals.append(dataset_observer_id)
+            input_vals.append(self.__id(dataset_observer_id))
             cursor.execute(stmt_update_sql, input_vals)
             rows_updated = cursor.rowcount
             # conn.commit()
             cursor.close()
+            if self.catalog_cache is not None:
+                self.catalog_cache.invalidate(dataset_observer_id)
             return rows_updated
         except Exception as err:
             logger.error("Internal operation failure: {}".format(err))
@@ -236,6 +579,7 @@ class DatasetLineage:
         """
         pass
 
+    @instrumented
     def declare_dataset_observer(self,
                                  model_name:str,
                                  model_namespace:str = 'ROOT',
@@ -265,7 +609,7 @@ class DatasetLineage:
 
         conn = None
         try:
-            dataset_observer_id = get_new_guid()
+            dataset_observer_id = self.__new_id()
             conn = self.__get_db_con()
             cursor = conn.cursor()
 
@@ -278,18 +622,68 @@ class DatasetLineage:
                           "dataset_observer_id, description, observer_config, display_name) " \
                           "VALUES ( %s, %s, %s, %s, %s, %s, %s, %s)"
             input_vals = (model_name, model_namespace, model_dataset_props, model_zone_tag,
-                          dataset_observer_id.hex, description, observer_config, display_name)
+                          dataset_observer_id, description, observer_config, display_name)
             cursor.execute(stmt_insert, input_vals)
             cursor.close()
+            if self.catalog_cache is not None:
+                self.catalog_cache.invalidate_keys(model_name, model_namespace, model_dataset_props, model_zone_tag)
+
+            return dataset_observer_id
+        except Exception as err:
+            logger.error("Internal operation failure: {}".format(err))
+            raise InternalDatasetException from err
+        finally:
+            if conn is not None:
+                self.__close_db_con(conn)
+
+    @instrumented
+    def declare_dataset_observers(self, list_of_declares: List[dict]) -> List[str]:
+        """
+        Declare many dataset observers at once, idempotently: an entry whose zone/namespace/name/props key is
+        declared already keeps its existing observer (status, config and descriptions are left as they are) and its id
+        is returned like the id of a new one.
+
+        The observers are written with multi-row inserts of DECLARE_CHUNK_SIZE rows that skip existing keys (any other
+        error fails the declare), then the id of each entry is looked up with its own key, in one transaction.
+
+        :param list_of_declares: List of dicts taking the same keys as declare_dataset_observer(), e.g.
+                                 {'model_name': 'orders', 'model_dataset_props': 'dt=2024-01-01', 'model_zone_tag': 2}
+        :return: Observer id per entry, in the same order as list_of_declares.
+        """
+        keys = []
+        for declare in list_of_declares:
+            model_name = declare.get('model_name')
+            model_zone_tag = declare.get('model_zone_tag', 1)
+            if model_name is None:
+                raise APIValidationException("Validation error: model_name is missing")
+            if model_zone_tag < 0:
+                raise DatasetBaseException('Invalid zone_tag value. The zone tag is: {}'.format(model_zone_tag))
+            keys.append((model_zone_tag, declare.get('model_namespace', 'ROOT'), model_name,
+                         declare.get('model_dataset_props', 'NA')))
+        if len(keys) == 0:
+            return []
 
-            return dataset_observer_id.hex
+        conn = None
+        try:
+            conn = self.__get_db_con()
+            conn.start_transaction()
+            ids = self.__insert_observers(conn, keys, list_of_declares)
+            conn.commit()
+
+            if self.catalog_cache is not None:
+                for model_zone_tag, model_namespace, model_name, model_dataset_props in ids:
+                    self.catalog_cache.invalidate_keys(model_name, model_namespace, model_dataset_props, model_zone_tag)
+            return [ids[key] for key in keys]
         except Exception as err:
             logger.error("Internal operation failure: {}".format(err))
             raise InternalDatasetException from err
         finally:
             if conn is not None:
+                if conn.in_transaction:
+                    conn.rollback()
                 self.__close_db_con(conn)
 
+    @instrumented
     def start_dataset_observer_run_with_id(self,
                                            dataset_observer_id: str,
                                            dependency_check="any",
@@ -337,9 +731,7 @@ class DatasetLineage:
         try:
             conn = self.__get_db_con()
 
-            if self.__does_dataset_observer_id_exist(conn, dataset_observer_id) == False:
-                raise DatasetNotFoundException('Invalid dataset process id. The value was: {}'.format(dataset_observer_id))
-
+            # existence of the dataset process id is checked by the readiness query of the start
             return self.__internal_start_dataset_run(conn, dataset_observer_id,
                                                      dependency_check=dependency_check,
                                                      specific_sources=specific_sources,
@@ -352,6 +744,7 @@ class DatasetLineage:
             if conn is not None:
                 self.__close_db_con(conn)
 
+    @instrumented
     def start_dataset_observer_run_with_keys(self,
                                              model_name: str,
                                              model_namespace: str = 'ROOT',
@@ -428,6 +821,172 @@ class DatasetLineage:
             if conn is not None:
                 self.__close_db_con(conn)
 
+    @instrumented
+    def start_dataset_observer_runs_for_zone(self,
+                                             model_zone_tag: int,
+                                             model_namespace: str = None,
+                                             dependency_check: str = 'any',
+                                             breadcrumb: str = None) -> DatasetZoneStartResult:
+        """
+        Start every sink of a zone whose source dependencies are met, in one transaction.
+
+        Readiness of all the zone's sinks is evaluated with one set based query, the ready sources of the sinks
+        being started are fetched with one query and the queue updates/run inserts are applied with one executemany
+        each. The number of statements is constant per batch, not per sink.
+
+        :param model_zone_tag: Zone of the sinks to start.
+        :param model_namespace: Optional. Only start sinks in this namespace.
+        :param dependency_check: {'all', 'any', 'ignore'} Same rules as start_dataset_observer_run_with_id.
+                                 Sinks with no source dependencies/associations are always run.
+        :param breadcrumb: Customizable field at start of run stored on every run started.
+        :return: DatasetZoneStartResult with a DatasetStartResult per started sink and the skipped sinks. A sink
+                 started or consumed by a concurrent start since its readiness was read is skipped too.
+        """
+
+        if dependency_check not in ['ignore', 'any', 'all']:
+            raise ConfigValidationException("Error: dependency_check argument not valid for a zone start: "
+                                            "%s" % (dependency_check))
+
+        start_dt = datetime.now()
+        conn = None
+        try:
+            conn = self.__get_db_con()
+            conn.start_transaction()
+
+            # 1) readiness of every sink in the zone
+            ready_sink_list = self.__zone_sink_readiness(conn, model_zone_tag, model_namespace)
+
+            skipped_sink_list = []
+            sinks_to_start = {}
+            for ready_sink in ready_sink_list:
+                sink_id = ready_sink.sink_id
+                rel_count = ready_sink.source_sink_rel_count
+                ready_count = ready_sink.ready_source_count
+                if ready_sink.observer_status != 1:
+                    skipped_sink_list.append(DatasetSkippedSink(sink_id, 'disabled', rel_count, ready_count))
+                elif ready_sink.orphan_sink:
+                    skipped_sink_list.append(DatasetSkippedSink(sink_id, 'active', rel_count, ready_count))
+                elif dependency_check == 'all' and rel_count > ready_count:
+                    skipped_sink_list.append(DatasetSkippedSink(sink_id, 'dependency', rel_count, ready_count))
+                elif dependency_check == 'any' and rel_count > 0 and ready_count == 0:
+                    skipped_sink_list.append(DatasetSkippedSink(sink_id, 'dependency', rel_count, ready_count))
+                else:
+                    sinks_to_start[sink_id] = (ready_sink.observer_config, rel_count, ready_count)
+
+            if len(sinks_to_start) == 0:
+                conn.commit()
+                return DatasetZoneStartResult([], skipped_sink_list)
+
+            # 2) ready sources of all the sinks being started
+            queue_map: Dict[str, List[DatasetQueue]] = {sink_id: [] for sink_id in sinks_to_start}
+            sink_id_list = [sink_id for sink_id, vals in sinks_to_start.items() if vals[2] > 0]
+            if len(sink_id_list) > 0:
+                stmt_query = self.__ready_sources_query()
+                stmt_query += " AND z.dataset_observer_id IN (%s)" % ', '.join(['%s'] * len(sink_id_list))
+                stmt_query += " ORDER BY qu.source_ready_dt ASC"
+                sources_rel_cursor = conn.cursor()
+                sources_rel_cursor.execute(stmt_query, sink_id_list)
+                for row in sources_rel_cursor.fetchall():
+                    queue_map[row[0]].append(self.__queue_from_row(row))
+                sources_rel_cursor.close()
+
+            run_vals = {}
+            for sink_id, (observer_config, rel_count, ready_count) in sinks_to_start.items():
+                if observer_config is not None and len(observer_config) == 0:
+                    observer_config = None
+                run_vals[sink_id] = (self.__new_id(), sink_id, start_dt, observer_config, breadcrumb)
+
+            # 3) insert the new run records and consume their pending events
+            lost_sinks = self.__zone_start_runs(conn, run_vals, queue_map, start_dt)
+
+            start_result_list = []
+            for sink_id, (observer_config, rel_count, ready_count) in sinks_to_start.items():
+                if sink_id in lost_sinks:
+                    skipped_sink_list.append(DatasetSkippedSink(sink_id, lost_sinks[sink_id], rel_count, ready_count))
+                    del queue_map[sink_id]
+                    continue
+                queue_list = queue_map[sink_id]
+                start_result_list.append(DatasetStartResult(run_vals[sink_id][0], sink_id, queue_list, rel_count,
+                                                            set(queue.source_dataset_id for queue in queue_list),
+                                                            [queue.source_run_id for queue in queue_list]))
+            self.__count_consumed(conn, queue_map)
+
+            conn.commit()
+            if self.event_bus.has_subscribers(RUN_STARTED):
+                for start_result in start_result_list:
+                    self.__publish_started(start_result, start_dt)
+            return DatasetZoneStartResult(start_result_list, skipped_sink_list)
+        finally:
+            if conn is not None:
+                if conn.in_transaction:
+                    conn.rollback()
+                self.__close_db_con(conn)
+
+    def __zone_start_runs(self, conn, run_vals:Dict[str, Tuple], queue_map:Dict[str, List[DatasetQueue]],
+                          start_dt:datetime) -> Dict[str, str]:
+        """
+        Inserts the runs of a zone start and consumes their pending events, in the caller's transaction. The run
+        inserts are guarded like __internal_start_dataset_run() and the events consumed by their primary keys, one
+        executemany each. If a count comes up short, the transaction starts over one sink at a time, skipping the
+        sinks that got an active run or lost pending events to a concurrent start.
+
+        :param run_vals: (run_id, sink_id, start_dt, observer_config, breadcrumb) by sink.
+        :return: {sink_id: skip reason} of the sinks not started.
+        """
+        # Defensive code to prevent multiple dataset IDs being active at the same time, see
+        # __internal_start_dataset_run
+        stmt_insert = 'INSERT INTO dataset_observer_run (status, run_id, dataset_observer_id, start_dt, ' \
+                      'run_observer_config, run_breadcrumb) SELECT 2, %s, %s, %s, %s, %s FROM dataset_observer ' \
+                      'WHERE dataset_observer_id = %s AND NOT EXISTS (SELECT 1 FROM dataset_observer_run act ' \
+                      'WHERE act.dataset_observer_id = %s AND (act.status = 1 OR act.status = 2))'
+        stmt_insert_q = "INSERT INTO dataset_source_sink_event_queue (" + QUEUE_COLUMNS + ") " \
+                        "SELECT dataset_rel_id, source_run_id, %s, rerun_last_sink_run_id, rerun_status, " \
+                        "source_ready_dt, %s FROM dataset_source_sink_pending_event " \
+                        "WHERE sink_dataset_id=%s AND dataset_rel_id=%s AND source_run_id=%s " \
+                        "AND quarantined_dt IS NULL"
+        stmt_delete = "DELETE FROM dataset_source_sink_pending_event " \
+                      "WHERE sink_dataset_id=%s AND dataset_rel_id=%s AND source_run_id=%s " \
+                      "AND quarantined_dt IS NULL"
+        # (sink run id, start_dt) + the primary key of each pending event
+        queue_vals = {sink_id: [(run_vals[sink_id][0], start_dt, sink_id, queue.dataset_rel_id, queue.source_run_id)
+                                for queue in queue_list] for sink_id, queue_list in queue_map.items()}
+
+        def consume(cursor, vals_list:List[Tuple]) -> bool:
+            if len(vals_list) == 0:
+                return True
+            cursor.executemany(stmt_insert_q, vals_list)
+            if cursor.rowcount != len(vals_list):
+                return False
+            # the pending events just copied are locked by this transaction
+            cursor.executemany(stmt_delete, [vals[2:] for vals in vals_list])
+            if cursor.rowcount != len(vals_list):
+                raise DatasetBaseException("Error: Expected %s pending event deletes, got %s" %
+                                           (len(vals_list), cursor.rowcount))
+            return True
+
+        cursor = conn.cursor()
+        cursor.executemany(stmt_insert, [vals + (vals[1], vals[1]) for vals in run_vals.values()])
+        if cursor.rowcount == len(run_vals) and \
+                consume(cursor, [vals for vals_list in queue_vals.values() for vals in vals_list]):
+            cursor.close()
+            return {}
+
+        conn.rollback()
+        conn.start_transaction()
+        lost_sinks = {}
+        for sink_id, vals in run_vals.items():
+            cursor.execute(stmt_insert, vals + (sink_id, sink_id))
+            if cursor.rowcount == 0:
+                lost_sinks[sink_id] = 'active'
+            elif not consume(cursor, queue_vals[sink_id]):
+                cursor.execute("DELETE FROM dataset_source_sink_event_queue WHERE sink_run_id = %s", (vals[0],))
+                cursor.execute("DELETE FROM dataset_observer_run WHERE run_id = %s", (vals[0],))
+                lost_sinks[sink_id] = 'consumed'
+        cursor.close()
+        logger.info("Zone start skipped sinks started or consumed concurrently: %s" % lost_sinks)
+        return lost_sinks
+
+    @instrumented
     def finish_dataset_observer_run(self, status: str,
                                     dataset_run_id: str,
                                     record_count: int = None,
@@ -455,14 +1014,14 @@ class DatasetLineage:
         :return:
         """
 
-        # Query for run record. Error if no run record is updated/found or not in proper state (ready or started)
-        # UPDATE run record if all goes well
-        # Do not queue up any downstream datasets if status error, just commit and return
+        # UPDATE run record if in proper state (ready or started). Only when no run record is updated query for
+        # the run record to tell a bad run id from an already finished one.
+        # Do not queue up any downstream datasets if status error, a single autocommitted UPDATE is all it takes
 
-        # Query for dataset details using run_id, if find source/sink rels, then queue up records
-        # INSERT queue record (more than one possible) based on source/sink rels found
-        # Above two steps are done via INSERT/SELECT
+        # INSERT queue record (more than one possible) based on the source/sink rels of the run's dataset
+        # Done via INSERT/SELECT, the dataset is resolved from the run id inside the statement
 
+        dataset_run_id = self.__id(dataset_run_id)
         conn = None
 
         try:
@@ -477,18 +1036,12 @@ class DatasetLineage:
 
             conn = self.__get_db_con()
 
-            dlc_dataset_run = self.__lookup_dataset_run_id(conn, dataset_run_id)
-
-            if dlc_dataset_run is None:
-                raise DatasetNotFoundException('dataset run ID not found'.format(dataset_run_id))
-
-            if dlc_dataset_run.status in [0, 3, 4]:
-                raise RunAlreadyFinishedException('dataset run ID not active/running. Current status: '.format(dlc_dataset_run.status))
-
             current_dt = datetime.now()
 
             try:
-                conn.start_transaction()
+                # error runs queue nothing, so the run update alone needs no explicit transaction
+                if status != 'error':
+                    conn.start_transaction()
 
                 update_run_cursor = conn.cursor()
 
@@ -497,12 +1050,12 @@ class DatasetLineage:
                 col_val_list = []
 
                 if dataset_batch_run_id is not None:
-                    col_name_list.append('dataset_batch_run_id')
+                    col_name_list.append('batch_run_id')
                     col_type_list.append("%s")
                     col_val_list.append(dataset_batch_run_id)
 
                 if dataset_partition_key is not None:
-                    col_name_list.append('dataset_partition_key')
+                    col_name_list.append('run_metadata')
                     col_type_list.append("%s")
                     col_val_list.append(dataset_partition_key)
 
@@ -556,21 +1109,32 @@ class DatasetLineage:
                 #print("stmt update run {}".format(stmt_update_run))
                 input_vals = col_val_list
                 update_run_cursor.execute(stmt_update_run, input_vals)
+                update_count = update_run_cursor.rowcount
+                update_run_cursor.close()
 
                 #print("update_run_cursor rowcount: {}".format(update_run_cursor.rowcount))
 
-                if update_run_cursor.rowcount != 1:
-                    update_run_cursor.close()
-                    conn.rollback()
-                    raise RunNotFoundException("Could not find datasource run to update status. Either bad run id or run id already finalized {}".format(dataset_run_id))
+                if update_count != 1:
+                    if conn.in_transaction:
+                        conn.rollback()
 
-                update_run_cursor.close()
+                    dlc_dataset_run = self.__lookup_dataset_run_id(conn, dataset_run_id)
+
+                    if dlc_dataset_run is None:
+                        raise DatasetNotFoundException('dataset run ID not found {}'.format(dataset_run_id))
+
+                    if dlc_dataset_run.status in [0, 3, 4]:
+                        raise RunAlreadyFinishedException('dataset run ID not active/running. Current status: {}'.format(dlc_dataset_run.status))
+
+                    raise RunNotFoundException("Could not find datasource run to update status. Either bad run id or run id already finalized {}".format(dataset_run_id))
 
                 ########
 
                 ## Do not queue up any downstream datasets if error status. We are done here!!
                 if status == 'error':
-                    conn.commit()
+                    if self.event_bus.has_subscribers(RUN_FINISHED):
+                        self.__publish_finished(self.__finished_runs(conn, [dataset_run_id]),
+                                                {dataset_run_id: status}, current_dt)
                     return
                 #####
 
@@ -578,30 +1142,196 @@ class DatasetLineage:
                 # May create multiple queue records
 
                 stmt_insert_q = """INSERT INTO 
-                                       dataset_source_sink_event_queue (
-                                       dataset_rel_id, -- sink_dataset_id, source_dataset_id,
+                                       dataset_source_sink_pending_event (
+                                       sink_dataset_id, dataset_rel_id, source_dataset_id,
                                        source_run_id, source_ready_dt)
                                    SELECT
-                                       dataset_rel_id, %s, %s
+                                       sink_dataset_id, dataset_rel_id, source_dataset_id, %s, %s
                                        FROM dataset_source_to_sink_meta_rel rel
-                                          -- JOIN dataset_observer source ON (source.dataset_observer_id = )
-                                       WHERE source_dataset_id = %s AND terminated_dt = %s"""
+                                       WHERE source_dataset_id = (SELECT dataset_observer_id 
+                                                                  FROM dataset_observer_run WHERE run_id = %s)
+                                       AND terminated_dt = %s"""
 
                 insert_q_cursor = conn.cursor()
 
                 #print("stmt insert/select into q {}".format(stmt_insert_q))
-                input_vals = (dataset_run_id, current_dt, dlc_dataset_run.dataset_id, self.dbmgr.get_max_datetime_to_sec())
+                input_vals = (dataset_run_id, current_dt, dataset_run_id, self.dbmgr.get_max_datetime_to_sec())
                 insert_q_cursor.execute(stmt_insert_q, input_vals)
                 insert_q_cursor.close()
 
+                finished_runs = None
+                if self.__finish_observed() or self.readiness_counters is not None:
+                    finished_runs = self.__finished_runs(conn, [dataset_run_id])
+                    self.__count_finished(conn, finished_runs)
+
                 conn.commit()
             finally:
                 if conn.in_transaction:
                     conn.rollback()
+
+            if finished_runs is not None:
+                self.__publish_finished(finished_runs, {dataset_run_id: status}, current_dt)
         finally:
             if conn is not None:
                 self.__close_db_con(conn)
 
+    @instrumented
+    def finish_dataset_observer_runs(self, list_of_finishes: List[dict]) -> List[DatasetFinishOutcome]:
+        """
+        Close many currently started dataset runs in one transaction.
+
+        All run ids are validated with one query, the run updates are applied with one executemany and the queue
+        records for every successful run are fanned out with a single INSERT/SELECT. A bad run does not fail the
+        batch, it is reported in its outcome instead.
+
+        :param list_of_finishes: List of dicts taking the same keys as finish_dataset_observer_run(), e.g.
+                                 {'status': 'success', 'dataset_run_id': run_id, 'record_count': 10}
+        :return: DatasetFinishOutcome per entry, in the same order as list_of_finishes.
+        """
+
+        status_map = {
+            "error": 0,
+            "success": 3
+        }
+        optional_cols = [('dataset_batch_run_id', 'batch_run_id'),
+                         ('dataset_partition_key', 'run_metadata'),
+                         ('record_count', 'record_count'),
+                         ('ext_job_run_key', 'ext_job_run_key'),
+                         ('ext_job_run_output_log_link', 'ext_job_run_output_log_link'),
+                         ('ext_etl_proc_key', 'ext_etl_proc_key'),
+                         ('ext_etl_proc_output_log_link', 'ext_etl_proc_output_log_link')]
+
+        outcomes: List[DatasetFinishOutcome] = []
+        pending: Dict[str, Tuple[DatasetFinishOutcome, dict]] = {}
+        for finish in list_of_finishes:
+            dataset_run_id = self.__id(finish.get('dataset_run_id'))
+            status = finish.get('status')
+            outcome = DatasetFinishOutcome(dataset_run_id, False, status=status)
+            outcomes.append(outcome)
+
+            if status not in status_map:
+                outcome.error = DatasetBaseException('Invalid status type. The status value was: {}'.format(status))
+            elif dataset_run_id is None:
+                outcome.error = APIValidationException("Validation error: dataset_run_id is missing")
+            elif dataset_run_id in pending:
+                outcome.error = RunAlreadyFinishedException('dataset run ID finished twice in the same batch: {}'
+                                                            .format(dataset_run_id))
+            else:
+                pending[dataset_run_id] = (outcome, finish)
+
+        if len(pending) == 0:
+            return outcomes
+
+        conn = None
+        try:
+            conn = self.__get_db_con()
+
+            # 1) validate every run id with one query
+            run_id_list = list(pending.keys())
+            run_list_params = ', '.join(['%s'] * len(run_id_list))
+            cursor = conn.cursor()
+            stmt_query = "SELECT run_id, dataset_observer_id, status FROM dataset_observer_run " \
+                         "WHERE run_id IN (%s)" % run_list_params
+            cursor.execute(stmt_query, run_id_list)
+            rows = cursor.fetchall()
+            cursor.close()
+
+            found = {row[0]: row for row in rows}
+            update_vals = []
+            current_dt = datetime.now()
+            for dataset_run_id, (outcome, finish) in pending.items():
+                row = found.get(dataset_run_id)
+                if row is None:
+                    outcome.error = DatasetNotFoundException('dataset run ID not found: {}'.format(dataset_run_id))
+                    continue
+                outcome.dataset_observer_id = row[1]
+                if row[2] in [0, 3, 4]:
+                    outcome.error = RunAlreadyFinishedException('dataset run ID not active/running. Current status: {}'
+                                                                .format(row[2]))
+                    continue
+
+                col_val_list = [finish.get(arg_name) for arg_name, col_name in optional_cols]
+                col_val_list += [current_dt, status_map[outcome.status], dataset_run_id]
+                update_vals.append(col_val_list)
+
+            if len(update_vals) == 0:
+                return outcomes
+
+            try:
+                conn.start_transaction()
+
+                # 2) apply all run updates with one statement. Optional values left out keep the column as is.
+                stmt_update_run = 'UPDATE dataset_observer_run SET '
+                for i, (arg_name, col_name) in enumerate(optional_cols):
+                    stmt_update_run += '%s = COALESCE(%%s, %s), ' % (col_name, col_name)
+                stmt_update_run += 'end_dt = %s, status = %s WHERE run_id = %s AND (status = 1 or status = 2)'
+
+                update_run_cursor = conn.cursor()
+                update_run_cursor.executemany(stmt_update_run, update_vals)
+                updated_run_ids = [vals[-1] for vals in update_vals]
+                if update_run_cursor.rowcount != len(update_vals):
+                    # some runs were finished by someone else since validation. Start over one run at a time to
+                    # learn which ones this call finished.
+                    conn.rollback()
+                    conn.start_transaction()
+                    updated_run_ids = []
+                    for vals in update_vals:
+                        update_run_cursor.execute(stmt_update_run, vals)
+                        if update_run_cursor.rowcount > 0:
+                            updated_run_ids.append(vals[-1])
+                update_run_cursor.close()
+
+                success_run_ids = []
+                for dataset_run_id in updated_run_ids:
+                    outcome = pending[dataset_run_id][0]
+                    outcome.finished = True
+                    if outcome.status == 'success':
+                        success_run_ids.append(dataset_run_id)
+
+                # 3) queue up downstream sinks of every successful run with one INSERT/SELECT
+                if len(success_run_ids) > 0:
+                    run_list_params = ', '.join(['%s'] * len(success_run_ids))
+                    stmt_insert_q = """INSERT INTO 
+                                           dataset_source_sink_pending_event (
+                                           sink_dataset_id, dataset_rel_id, source_dataset_id, source_run_id,
+                                           source_ready_dt)
+                                       SELECT
+                                           rel.sink_dataset_id, rel.dataset_rel_id, rel.source_dataset_id, run.run_id, %s
+                                           FROM dataset_observer_run run
+                                           JOIN dataset_source_to_sink_meta_rel rel
+                                              ON (rel.source_dataset_id = run.dataset_observer_id AND
+                                                  rel.terminated_dt = %s)
+                                           WHERE run.status = 3 AND run.run_id IN (""" + run_list_params + ")"
+                    insert_q_cursor = conn.cursor()
+                    input_vals = [current_dt, self.dbmgr.get_max_datetime_to_sec()] + success_run_ids
+                    insert_q_cursor.execute(stmt_insert_q, input_vals)
+                    insert_q_cursor.close()
+
+                finished_runs = None
+                if len(updated_run_ids) > 0 and (self.__finish_observed() or self.readiness_counters is not None):
+                    finished_runs = self.__finished_runs(conn, updated_run_ids)
+                    self.__count_finished(conn, finished_runs)
+
+                conn.commit()
+            finally:
+                if conn.in_transaction:
+                    conn.rollback()
+
+            if finished_runs is not None:
+                self.__publish_finished(finished_runs, {run_id: pending[run_id][0].status for run_id in updated_run_ids},
+                                        current_dt)
+
+            for outcome, finish in pending.values():
+                if not outcome.finished and outcome.error is None:
+                    outcome.error = RunNotFoundException("Could not find datasource run to update status. Either bad "
+                                                         "run id or run id already finalized {}"
+                                                         .format(outcome.dataset_run_id))
+            return outcomes
+        finally:
+            if conn is not None:
+                self.__close_db_con(conn)
+
+    @instrumented
     def get_dataset_observer_run(self, dataset_run_id:str) -> DatasetRun:
         """
         ToDo get_dataset_run()
@@ -610,21 +1340,24 @@ class DatasetLineage:
         """
         pass
 
+    @instrumented
     def get_dataset_observer(self, dataset_observer_id: str) -> DatasetProperties:
         """
         Find a matching dataset.
         :param dataset_observer_id:
         :return: None if no match
         """
+        dataset_observer_id = self.__id(dataset_observer_id)
         conn = None
 
         try:
             conn = self.__get_db_con()
-            cursor = conn.cursor()
 
-            stmt_query = "SELECT dataset_process_id, model_zone_tag, model_name, model_namespace, " \
-                         "model_dataset_props, status, description, created_dt, status_update_dt " \
-                         "FROM dataset_observer WHERE dataset_observer_id = %s "
+            if self.catalog_cache is not None:
+                return self.__catalog(conn).get_by_id(conn, dataset_observer_id)
+
+            cursor = conn.cursor()
+            stmt_query = "SELECT " + OBSERVER_COLUMNS + " FROM dataset_observer WHERE dataset_observer_id = %s "
             input_vals = (dataset_observer_id,)
             cursor.execute(stmt_query, input_vals)
 
@@ -632,17 +1365,7 @@ class DatasetLineage:
 
             dlcp_model = None
             for row in resultset:
-                dlcp_model = DatasetProperties(
-                    dataset_process_id=row[0],
-                    zone=row[1],
-                    model_name=row[2],
-                    model_namespace=row[3],
-                    model_partition_keys=row[4],
-                    status=row[5],
-                    description=row[6],
-                    created_dt=row[7],
-                    status_update_dt=row[8]
-                )
+                dlcp_model = observer_from_row(row)
 
             cursor.close()
             return dlcp_model
@@ -650,6 +1373,7 @@ class DatasetLineage:
             if conn is not None:
                 self.__close_db_con(conn)
 
+    @instrumented
     def get_dataset_observer_id(self,
                                 model_name: str,
                                 model_namespace: str = 'ROOT',
@@ -680,6 +1404,7 @@ class DatasetLineage:
             if conn is not None:
                 self.__close_db_con(conn)
 
+    @instrumented
     def associate_dataset_source_to_sink(self, source_dataset_id:str, sink_dataset_id:str):
         """
         Define a relationship between sink dataset and source dataset.
@@ -696,6 +1421,8 @@ class DatasetLineage:
         # 3) If no current active association, insert new record and return rel id.
         #
 
+        source_dataset_id = self.__id(source_dataset_id)
+        sink_dataset_id = self.__id(sink_dataset_id)
         conn = None
         try:
 
@@ -703,14 +1430,18 @@ class DatasetLineage:
             # conn.start_transaction()
 
             # both source and sink must exist and be enabled, in order to do an association
-            validate_cursor = conn.cursor()
-            sql_select = "SELECT count(*) FROM dataset_observer WHERE " \
-                         "dataset_observer_id IN (%s, %s) and observer_status = 1"
+            if self.catalog_cache is not None:
+                observers = self.__catalog(conn).get_by_ids(conn, [source_dataset_id, sink_dataset_id])
+                rows = [(len([observer for observer in observers.values() if observer.status == 1]),)]
+            else:
+                validate_cursor = conn.cursor()
+                sql_select = "SELECT count(*) FROM dataset_observer WHERE " \
+                             "dataset_observer_id IN (%s, %s) and observer_status = 1"
 
-            select_input_vals = (source_dataset_id, sink_dataset_id)
-            validate_cursor.execute(sql_select, select_input_vals)
-            rows = validate_cursor.fetchall()
-            validate_cursor.close()
+                select_input_vals = (source_dataset_id, sink_dataset_id)
+                validate_cursor.execute(sql_select, select_input_vals)
+                rows = validate_cursor.fetchall()
+                validate_cursor.close()
 
             if len(rows) > 0:
                 # Found a current record
@@ -732,9 +1463,13 @@ class DatasetLineage:
             if len(rows) > 0:
                 # Found a current record
                 current_dataset_rel_id = rows[0][0]
+                if self.graph_index is not None:
+                    self.graph_index.add_rel(source_dataset_id, sink_dataset_id)
                 return current_dataset_rel_id
 
-            rel_id = get_new_guid().hex
+            rel_id = self.__new_id()
+            if self.readiness_counters is not None:
+                conn.start_transaction()
             cursor = conn.cursor()
             stmt_insert = 'INSERT INTO dataset_source_to_sink_meta_rel (source_dataset_id, sink_dataset_id, dataset_rel_id) ' \
                           'VALUES (%s, %s, %s)'
@@ -742,25 +1477,37 @@ class DatasetLineage:
             cursor.execute(stmt_insert, input_vals)
             # conn.commit()
             cursor.close()
+            if self.readiness_counters is not None:
+                self.readiness_counters.add_rel(conn, source_dataset_id, sink_dataset_id)
+                conn.commit()
+            if self.graph_index is not None:
+                self.graph_index.add_rel(source_dataset_id, sink_dataset_id)
             return rel_id
         except Exception as err:
             logger.error("Internal operation failure: {}".format(err))
             raise InternalDatasetException from err
         finally:
             if conn is not None:
+                if conn.in_transaction:
+                    conn.rollback()
                 self.__close_db_con(conn)
 
+    @instrumented
     def disassociate_dataset_source_from_sink(self, source_dataset_id:str, sink_dataset_id:str) ->bool:
         """
         :param source_id:
         :param sink_id:
         :return: True if disassociated, False if never was associated to begin with.
         """
+        source_dataset_id = self.__id(source_dataset_id)
+        sink_dataset_id = self.__id(sink_dataset_id)
         conn = None
         try:
 
             conn = self.__get_db_con()
             # conn.start_transaction()dataset_source_to_sink_meta_rel
+            if self.readiness_counters is not None:
+                conn.start_transaction()
 
             cursor = conn.cursor()
             stmt_update = 'UPDATE dataset_source_to_sink_meta_rel SET terminated_dt = current_timestamp WHERE ' \
@@ -770,17 +1517,26 @@ class DatasetLineage:
             num_rows_updated = cursor.rowcount
             # conn.commit()
             cursor.close()
+            if self.readiness_counters is not None:
+                if num_rows_updated > 0:
+                    self.readiness_counters.remove_rel(conn, source_dataset_id, sink_dataset_id)
+                conn.commit()
             if num_rows_updated == 0:
                 return False
             else:
+                if self.graph_index is not None:
+                    self.graph_index.remove_rel(source_dataset_id, sink_dataset_id)
                 return True
         except Exception as err:
             logger.error("Internal operation failure: {}".format(err))
             raise InternalDatasetException from err
         finally:
             if conn is not None:
+                if conn.in_transaction:
+                    conn.rollback()
                 self.__close_db_con(conn)
 
+    @instrumented
     def disassociate_all_dataset_sources_from_sink(self, sink_id:str):
         """
         :param sink_id:
@@ -794,7 +1550,7 @@ class DatasetLineage:
             cursor = conn.cursor()
             stmt_delete = 'DELETE FROM dataset_source_to_sink_rel WHERE ' \
                           'sink_dataset_id = %s'
-            input_vals = (sink_id,)
+            input_vals = (self.__id(sink_id),)
             cursor.execute(stmt_delete, input_vals)
             # conn.commit()
             cursor.close()
@@ -802,6 +1558,7 @@ class DatasetLineage:
             if conn is not None:
                 self.__close_db_con(conn)
 
+    @instrumented
     def disassociate_all_dataset_sinks_from_source(self, source_id:str):
         """
         :param source_id:
@@ -815,7 +1572,7 @@ class DatasetLineage:
             cursor = conn.cursor()
             stmt_delete = 'DELETE FROM source_to_sink_rel WHERE ' \
                           'source_dataset_id = %s'
-            input_vals = (source_id,)
+            input_vals = (self.__id(source_id),)
             cursor.execute(stmt_delete, input_vals)
             # conn.commit()
             cursor.close()
@@ -823,6 +1580,63 @@ class DatasetLineage:
             if conn is not None:
                 self.__close_db_con(conn)
 
+    @instrumented
+    def sync_lineage_manifest(self, manifest:LineageManifest, dry_run:bool = False) -> ManifestPlan:
+        """
+        Sync the observers and rels of the database to a lineage manifest (see dataset_manifest.LineageManifest).
+
+        Looks up the manifest's observers by key and loads every active rel, then diffs them against the manifest.
+        The plan is then applied in one transaction: multi-row inserts of the new observers and rels, executemany
+        updates of the changed observer fields and chunked terminated_dt updates of the rels the manifest dropped.
+
+        :param dry_run: Only plan, the database is not changed.
+        :raise: DatasetNotFoundException if a rel to add has a disabled or retired observer (see plan.blocked_rels).
+        :return: ManifestPlan, applied unless dry_run or empty.
+        """
+        started = time.perf_counter()
+        conn = None
+        try:
+            conn = self.__get_db_con()
+            if not dry_run:
+                conn.start_transaction()
+            observers, active_rels = self.__load_lineage(conn, manifest)
+            plan = manifest.plan(observers, active_rels)
+            if not dry_run and len(plan.blocked_rels) > 0:
+                raise DatasetNotFoundException("%d manifest rels have disabled or retired observers, e.g. %s -> %s" %
+                                               ((len(plan.blocked_rels),) + tuple(format_key(key) for key
+                                                                                  in plan.blocked_rels[0])))
+            if dry_run or plan.is_empty():
+                plan.elapsed_sec = time.perf_counter() - started
+                return plan
+            added_rels, removed_rels = self.__apply_manifest_plan(conn, plan, observers)
+            conn.commit()
+        except DatasetBaseException:
+            raise
+        except Exception as err:
+            logger.error("Internal operation failure: {}".format(err))
+            raise InternalDatasetException from err
+        finally:
+            if conn is not None:
+                if conn.in_transaction:
+                    conn.rollback()
+                self.__close_db_con(conn)
+
+        if self.graph_index is not None:
+            for source_id, sink_id in removed_rels:
+                self.graph_index.remove_rel(source_id, sink_id)
+            for source_id, sink_id in added_rels:
+                self.graph_index.add_rel(source_id, sink_id)
+        if self.catalog_cache is not None:
+            for model_zone_tag, model_namespace, model_name, model_dataset_props in \
+                    (observer_key(entry) for entry in plan.observers_to_declare):
+                self.catalog_cache.invalidate_keys(model_name, model_namespace, model_dataset_props, model_zone_tag)
+            for dataset_observer_id, _, _ in plan.observers_to_update:
+                self.catalog_cache.invalidate(dataset_observer_id)
+        plan.applied = True
+        plan.elapsed_sec = time.perf_counter() - started
+        return plan
+
+    @instrumented
     def fetch_ready_dataset_sources_by_sink_id(self,
                                                  sink_dataset_id: str
                                                  #dependency_check: str = 'any'
@@ -842,20 +1656,21 @@ class DatasetLineage:
             conn = self.__get_db_con()
             queue_list, unique_source_id_list, static_source_rel_count, sink_id, source_run_id_list, \
             orphan_sink, dataset_rel_id_list, sink_observer_config =\
-                self.__internal_sources_ready_in_queue(conn, sink_dataset_id)
+                self.__internal_sources_ready_in_queue(conn, self.__id(sink_dataset_id))
 
             fetch_result_summary = DatasetFetchSummary(queue_list, static_source_rel_count, unique_source_id_list,
                                                        sink_id, source_run_id_list, orphan_sink)
 
-            print("queue_list: %s \n unique_source_id_list: %s \n static_source_rel_count: %d \n "
-                  "unique_sink_id_list: %s \n orphan sink: %s" %
-                  (len(queue_list), unique_source_id_list, static_source_rel_count, sink_id, orphan_sink))
+            logger.debug("queue_list: %s \n unique_source_id_list: %s \n static_source_rel_count: %d \n "
+                         "unique_sink_id_list: %s \n orphan sink: %s",
+                         len(queue_list), unique_source_id_list, static_source_rel_count, sink_id, orphan_sink)
 
             return fetch_result_summary
         finally:
             if conn is not None:
                 self.__close_db_con(conn)
 
+    @instrumented
     def fetch_ready_dataset_sources_by_sink_keys(self,
                                                  model_name: str,
                                                  model_namespace: str = 'ROOT',
@@ -864,12 +1679,12 @@ class DatasetLineage:
                                                  # dependency_check: str = 'any'
                                                  ) -> DatasetFetchSummary:
         """
-        Detect if any sources are ready for consumption for a sink.
+        Detect if any sources are ready for consumption for a sink. To search across a zone use list_ready_sinks().
 
-        :param model_zone_tag: Zone may be provided alone or with additional predicates below to narrow datasets of interest.
-        :param model_name Optional
-        :param model_dataset_props Optional
-        :param model_namespace Optional
+        :param model_zone_tag:
+        :param model_name
+        :param model_dataset_props
+        :param model_namespace
         :param dependency_check: {'all', 'any'} Fetch dataset sources ready to run only when 'any' or 'all' of the
                                  dependency sources are present. Default is 'any'. If 'all" and number of unique sources
                                  ready are less than the number of dependencies a sink has then empty list is returned.
@@ -881,7 +1696,7 @@ class DatasetLineage:
             conn = self.__get_db_con()
 
             dataset_queue_list, source_id_list, source_sink_rel_count, sink_id_list, source_run_id_list, \
-            orphan_sink, sink_observer_config =\
+            orphan_sink, dataset_rel_id_list, sink_observer_config =\
                 self.__internal_sources_ready_in_queue(conn,
                                                        model_name=model_name,
                                                        model_namespace=model_namespace,
@@ -898,6 +1713,109 @@ class DatasetLineage:
             if conn is not None:
                 self.__close_db_con(conn)
 
+    @instrumented
+    def wait_for_ready_sources(self,
+                               sink_dataset_id: str,
+                               dependency_check: str = 'any',
+                               timeout_sec: float = 60.0,
+                               specific_sources: List[str] = None) -> DatasetFetchSummary:
+        """
+        Block until the sources ready for a sink satisfy its dependency rule, instead of polling
+        fetch_ready_dataset_sources_by_sink_id() in a loop.
+
+        The readiness query backs off while nothing changes (see ReadySourcesWaiter), is shared by all the callers
+        waiting on the same sink, and runs right away when this process (or one sharing its ready_waiter) finishes
+        an upstream run of the sink.
+
+        :param sink_dataset_id:
+        :param dependency_check: {'any', 'all', 'source_ids', 'source_run_ids'} Same rules as
+                                 start_dataset_observer_run_with_id(). A sink without sources is always ready.
+        :param timeout_sec: How long to wait.
+        :param specific_sources: Source ids or source run ids for 'source_ids' and 'source_run_ids'.
+        :return: DatasetFetchSummary of all the sources ready for the sink. None if the timeout ran out first.
+        """
+        if dependency_check not in WAIT_DEPENDENCY_CHECKS:
+            raise ConfigValidationException("Error: dependency_check argument not valid: %s" % (dependency_check))
+        if dependency_check in ('source_ids', 'source_run_ids') and not specific_sources:
+            raise ConfigValidationException("Error: specific_sources required for dependency_check: %s"
+                                            % (dependency_check))
+
+        return self.ready_waiter.wait(str(sink_dataset_id),
+                                      lambda: self.fetch_ready_dataset_sources_by_sink_id(sink_dataset_id),
+                                      lambda summary: sources_ready(summary, dependency_check, specific_sources),
+                                      timeout_sec)
+
+    @instrumented
+    def list_ready_sinks(self,
+                         model_zone_tag: int,
+                         model_namespace: str = None,
+                         dependency_check: str = 'any') -> List[DatasetReadySink]:
+        """
+        Find every sink of a zone that has sources ready for consumption, with one query.
+
+        :param model_zone_tag: Zone of the sinks.
+        :param model_namespace: Optional. Only sinks in this namespace.
+        :param dependency_check: {'all', 'any'} 'any': sinks with at least one source ready. 'all': sinks where
+                                 every associated source has at least one run ready.
+        :return: DatasetReadySink per ready sink (ready source count, static rel count, oldest source_ready_dt and
+                 orphan flag), oldest waiting sink first.
+        """
+        if dependency_check not in ['any', 'all']:
+            raise ConfigValidationException("Error: dependency_check argument not valid: %s" % (dependency_check))
+
+        conn = None
+        try:
+            conn = self.__get_db_con()
+            ready_sink_list = []
+            for ready_sink in self.__zone_sink_readiness(conn, model_zone_tag, model_namespace):
+                if ready_sink.ready_source_count == 0:
+                    continue
+                if dependency_check == 'all' and ready_sink.ready_source_count < ready_sink.source_sink_rel_count:
+                    continue
+                ready_sink_list.append(ready_sink)
+
+            ready_sink_list.sort(key=lambda ready_sink: ready_sink.oldest_source_ready_dt)
+            return ready_sink_list
+        finally:
+            if conn is not None:
+                self.__close_db_con(conn)
+
+    @instrumented
+    def get_sink_readiness(self, sink_dataset_id:str) -> DatasetSinkReadiness:
+        """
+        Readiness of a sink from its counter row: static rel count, distinct sources with pending events and pending
+        event count. One single row lookup, a cheap check before fetching the ready sources.
+
+        :raise: ConfigValidationException if this object has no readiness_counters.
+        """
+        if self.readiness_counters is None:
+            raise ConfigValidationException("Readiness counters are not enabled")
+
+        conn = None
+        try:
+            conn = self.__get_db_con()
+            return self.readiness_counters.lookup(conn, self.__id(sink_dataset_id))
+        finally:
+            if conn is not None:
+                self.__close_db_con(conn)
+
+    @instrumented
+    def verify_readiness_counters(self, repair:bool = False) -> ReadinessCounterReport:
+        """
+        Recount the readiness counters from the pending events and active rels and report the counters that differ.
+        With repair, differing counters are rebuilt. Also builds the counters of an existing database before they
+        are turned on, so this object does not need readiness_counters itself.
+        """
+        readiness_counters = self.readiness_counters if self.readiness_counters is not None \
+            else SinkReadinessCounters()
+        conn = None
+        try:
+            conn = self.__get_db_con()
+            return readiness_counters.verify(conn, self.dbmgr.get_max_datetime_to_sec(), repair=repair)
+        finally:
+            if conn is not None:
+                self.__close_db_con(conn)
+
     def retry_dataset_observer(self, dataset_run_id):
         """
         Can retry datasets that have errored only. All sources will be recreated/duplicated. Orphaned
@@ -915,35 +1833,276 @@ class DatasetLineage:
         """
         pass
 
-    def __get_db_con(self) -> dbapi_connector.connection:
-
-        if self.db_type == 1: # an outside controlled con
-            self.db_con.autocommit=True
-            return self.db_con
-        elif self.db_type == 2: # an outside con pool
-            con = self.db_pool.get_connection()
-            con.autocommit = True
-            return con
-        else: # db params and internally managed con
-            if self.db_con is None:
-                self.db_con = dbapi_connector.connect(**self.dbconfig)
-                self.db_con.autocommit=True
-                return self.db_con
-            elif self.db_con.is_connected():
-                self.db_con.autocommit = True
-                return self.db_con
-            else: # for some reason the DB con was disconnected, so create a new one
-                self.db_con = dbapi_connector.connect(**self.dbconfig)
-                self.db_con.autocommit = True
-                return self.db_con
-
-    def __close_db_con(self, conn:dbapi_connector):
-        if self.db_type == 1:
+    def __get_db_con(self):
+        conn = self.dbmgr.get_con()
+        if self.binary_ids:
+            conn = BinaryIdConnection(conn)
+        if self.instrumentation is not None:
+            return self.instrumentation.wrap_connection(conn)
+        return conn
+
+    def __close_db_con(self, conn):
+        if isinstance(conn, InstrumentedConnection):
+            conn = conn.raw_connection
+        if isinstance(conn, BinaryIdConnection):
+            conn = conn.raw_connection
+        self.dbmgr.release_con(conn)
+
+    def __id(self, dataset_id:str) -> str:
+        # ids passed in by the caller, marked for conversion when the database stores them as BINARY(16)
+        if self.binary_ids and dataset_id is not None:
+            return HexId(dataset_id)
+        return dataset_id
+
+    def __id_list(self, dataset_id_list:List[str]) -> List[str]:
+        if self.binary_ids and dataset_id_list is not None:
+            return [HexId(dataset_id) for dataset_id in dataset_id_list]
+        return dataset_id_list
+
+    def __new_id(self) -> str:
+        return self.__id(self.id_generator().hex)
+
+    def __insert_observers(self, conn, keys:List[ObserverKey], list_of_declares:List[dict]) -> Dict[ObserverKey, str]:
+        """
+        Multi-row inserts of the observers, skipping the keys declared already, then the id of every key read back.
+        """
+        cursor = conn.cursor()
+        stmt_insert = "INSERT INTO dataset_observer (model_zone_tag, model_namespace, model_name, " \
+                      "model_dataset_props, dataset_observer_id, description, observer_config, display_name) VALUES "
+        for i in range(0, len(keys), DECLARE_CHUNK_SIZE):
+            input_vals = []
+            for key, declare in zip(keys[i:i + DECLARE_CHUNK_SIZE], list_of_declares[i:i + DECLARE_CHUNK_SIZE]):
+                input_vals += key + (self.__new_id(), declare.get('description'), declare.get('observer_config'),
+                                     declare.get('display_name'))
+            row_count = len(input_vals) // 8
+            cursor.execute(stmt_insert + ', '.join(['(%s, %s, %s, %s, %s, %s, %s, %s)'] * row_count) + " " +
+                           self.dbmgr.get_skip_duplicate_clause("dataset_observer_id"), input_vals)
+        cursor.close()
+
+        return {key: row[0] for key, row in
+                self.__resolve_observer_keys(conn, list(dict.fromkeys(keys)), "obs.dataset_observer_id").items()}
+
+    def __resolve_observer_keys(self, conn, keys:List[ObserverKey], columns:str) -> Dict[ObserverKey, Tuple]:
+        """
+        Looks up observers by the caller's keys. The keys are joined to dataset_observer in the database, so they
+        match like the primary key does (e.g. case insensitive under MySQL's default collation) and each row found is
+        returned under the caller's key.
+
+        :param columns: Columns of dataset_observer (as obs) to return.
+        :return: {key: row of columns} of the keys found.
+        """
+        resolved = {}
+        cursor = conn.cursor()
+        for i in range(0, len(keys), KEY_LOOKUP_CHUNK_SIZE):
+            key_chunk = keys[i:i + KEY_LOOKUP_CHUNK_SIZE]
+            key_rows = "SELECT %s AS key_no, %s AS model_zone_tag, %s AS model_namespace, %s AS model_name, " \
+                       "%s AS model_dataset_props" + " UNION ALL SELECT %s, %s, %s, %s, %s" * (len(key_chunk) - 1)
+            cursor.execute("SELECT k.key_no, " + columns + " FROM (" + key_rows + ") as k "
+                           "JOIN dataset_observer as obs ON (obs.model_zone_tag = k.model_zone_tag AND "
+                           "obs.model_namespace = k.model_namespace AND obs.model_name = k.model_name AND "
+                           "obs.model_dataset_props = k.model_dataset_props)",
+                           [val for key_no, key in enumerate(key_chunk) for val in (key_no,) + tuple(key)])
+            for row in cursor.fetchall():
+                resolved[key_chunk[row[0]]] = tuple(row[1:])
+        cursor.close()
+        return resolved
+
+    def __load_lineage(self, conn, manifest:LineageManifest) \
+            -> Tuple[Dict[ObserverKey, ManifestObserver], List[Tuple[str, str, ObserverKey]]]:
+        """
+        :return: (declared observers of the manifest by manifest key, (source id, sink id, source key) of every
+                 active rel)
+        """
+        observers = {key: ManifestObserver(*row) for key, row in self.__resolve_observer_keys(
+            conn, list(manifest.observers), "obs.dataset_observer_id, obs.observer_status, obs.observer_config, "
+                                            "obs.display_name, obs.description").items()}
+        cursor = conn.cursor()
+        cursor.execute("SELECT rel.source_dataset_id, rel.sink_dataset_id, obs.model_zone_tag, obs.model_namespace, "
+                       "obs.model_name, obs.model_dataset_props FROM dataset_source_to_sink_meta_rel as rel "
+                       "JOIN dataset_observer as obs ON (obs.dataset_observer_id = rel.source_dataset_id) "
+                       "WHERE rel.terminated_dt = %s", (self.dbmgr.get_max_datetime_to_sec(),))
+        active_rels = [(row[0], row[1], tuple(row[2:])) for row in cursor.fetchall()]
+        cursor.close()
+        return observers, active_rels
+
+    def __apply_manifest_plan(self, conn, plan:ManifestPlan, observers:Dict[ObserverKey, ManifestObserver]) \
+            -> Tuple[List[Tuple[str, str]], List[Tuple[str, str]]]:
+        """
+        Writes a plan of sync_lineage_manifest() in the caller's transaction. observers are the ones it was planned on.
+
+        :return: (rels added, rels terminated) as (source id, sink id)
+        """
+        ids = {}
+        if len(plan.observers_to_declare) > 0:
+            ids = self.__insert_observers(conn, [observer_key(entry) for entry in plan.observers_to_declare],
+                                          plan.observers_to_declare)
+
+        cursor = conn.cursor()
+        updates_by_fields = {}
+        for dataset_observer_id, _, changes in plan.observers_to_update:
+            fields = tuple(sorted(changes))
+            updates_by_fields.setdefault(fields, []).append(
+                tuple(changes[field] for field in fields) + (dataset_observer_id,))
+        for fields, update_vals in updates_by_fields.items():
+            cursor.executemany("UPDATE dataset_observer SET " + ', '.join(field + ' = %s' for field in fields) +
+                               ", status_update_dt = current_timestamp WHERE dataset_observer_id = %s", update_vals)
+
+        max_datetime = self.dbmgr.get_max_datetime_to_sec()
+        removed_rels = [(source_id, sink_id) for source_id, sink_id, _, _ in plan.rels_to_terminate]
+        for i in range(0, len(removed_rels), DECLARE_CHUNK_SIZE):
+            chunk = removed_rels[i:i + DECLARE_CHUNK_SIZE]
+            cursor.execute("UPDATE dataset_source_to_sink_meta_rel SET terminated_dt = current_timestamp "
+                           "WHERE (source_dataset_id, sink_dataset_id) IN (" + ', '.join(['(%s, %s)'] * len(chunk)) +
+                           ") AND terminated_dt = %s", [rel_id for rel in chunk for rel_id in rel] + [max_datetime])
+
+        keys_by_id = {}
+        for key, dataset_observer_id in ids.items():
+            other = keys_by_id.setdefault(str(dataset_observer_id), key)
+            if other != key:
+                raise ConfigValidationException("Error: observers are the same in the database: %s, %s" %
+                                                (format_key(other), format_key(key)))
+        observer_ids = {key: observer.dataset_observer_id for key, observer in observers.items()}
+        observer_ids.update(ids)
+        added_rels = [(observer_ids[source], observer_ids[sink]) for source, sink in plan.rels_to_add]
+        for i in range(0, len(added_rels), DECLARE_CHUNK_SIZE):
+            chunk = added_rels[i:i + DECLARE_CHUNK_SIZE]
+            cursor.execute("INSERT INTO dataset_source_to_sink_meta_rel (source_dataset_id, sink_dataset_id, "
+                           "dataset_rel_id) VALUES " + ', '.join(['(%s, %s, %s)'] * len(chunk)),
+                           [val for source_id, sink_id in chunk for val in (source_id, sink_id, self.__new_id())])
+        cursor.close()
+
+        if self.readiness_counters is not None:
+            self.readiness_counters.change_rels(conn, added_rels, removed_rels)
+        return added_rels, removed_rels
+
+    def __finish_observed(self) -> bool:
+        return self.ready_waiter.has_waiters() or self.event_bus.has_subscribers(RUN_FINISHED) or \
+            self.event_bus.has_subscribers(SOURCES_ENQUEUED)
+
+    def __finished_runs(self, conn, run_id_list:List[str]) -> Dict[str, Tuple[str, List[str]]]:
+        """
+        Observer and the sinks events were queued for of just finished runs. Runs in the finishing transaction,
+        before a sink start can consume the pending events.
+
+        :return: {run_id: (dataset_observer_id, sink_id_list)}
+        """
+        cursor = conn.cursor()
+        cursor.execute("SELECT run.run_id, run.dataset_observer_id, qu.sink_dataset_id FROM dataset_observer_run run "
+                       "LEFT JOIN dataset_source_sink_pending_event qu ON qu.source_run_id = run.run_id "
+                       "WHERE run.run_id IN (" + ', '.join(['%s'] * len(run_id_list)) + ")", run_id_list)
+        finished_runs = {}
+        for run_id, dataset_observer_id, sink_id in cursor.fetchall():
+            sink_id_list = finished_runs.setdefault(run_id, (dataset_observer_id, []))[1]
+            if sink_id is not None:
+                sink_id_list.append(sink_id)
+        cursor.close()
+        return finished_runs
+
+    def __count_finished(self, conn, finished_runs:Dict[str, Tuple[str, List[str]]]):
+        if self.readiness_counters is None:
             return
-        elif self.db_type == 2:
-            conn.close() # return to the pool
-        else: # do not close internally managed con
+        pending_deltas = {}
+        for run_id, (dataset_observer_id, sink_id_list) in finished_runs.items():
+            for sink_id in sink_id_list:
+                key = (sink_id, dataset_observer_id)
+                pending_deltas[key] = pending_deltas.get(key, 0) + 1
+        self.readiness_counters.apply(conn, pending_deltas)
+
+    def __count_consumed(self, conn, queue_map:Dict[str, List[DatasetQueue]]):
+        if self.readiness_counters is None:
             return
+        pending_deltas = {}
+        for sink_id, queue_list in queue_map.items():
+            for queue in queue_list:
+                key = (sink_id, queue.source_dataset_id)
+                pending_deltas[key] = pending_deltas.get(key, 0) - 1
+        self.readiness_counters.apply(conn, pending_deltas)
+
+    def __publish_finished(self, finished_runs:Dict[str, Tuple[str, List[str]]], status_of:Dict[str, str],
+                           end_dt:datetime):
+        """
+        Wakes the waits on the sinks that got events and publishes the finish events, after the commit.
+        """
+        sink_ids = {}
+        source_run_id_list = []
+        for run_id, (dataset_observer_id, run_sink_id_list) in finished_runs.items():
+            self.event_bus.publish(RUN_FINISHED, DatasetRunFinishedEvent(run_id, dataset_observer_id,
+                                                                         status_of[run_id], run_sink_id_list, end_dt))
+            if len(run_sink_id_list) > 0:
+                source_run_id_list.append(run_id)
+                sink_ids.update(dict.fromkeys(run_sink_id_list))
+
+        if len(sink_ids) > 0:
+            sink_id_list = list(sink_ids)
+            self.ready_waiter.notify(str(sink_id) for sink_id in sink_id_list)
+            self.event_bus.publish(SOURCES_ENQUEUED,
+                                   DatasetSourcesEnqueuedEvent(sink_id_list, source_run_id_list, end_dt))
+
+    def __publish_started(self, start_result:DatasetStartResult, start_dt:datetime):
+        self.event_bus.publish(RUN_STARTED, DatasetRunStartedEvent(start_result.run_id, start_result.sink_id,
+                                                                   start_result.source_id_list,
+                                                                   start_result.source_run_id_list, start_dt))
+
+    def __lineage_graph(self, conn) -> LineageGraphIndex:
+        if self.graph_index.needs_refresh():
+            self.graph_index.refresh(conn, self.dbmgr.get_max_datetime_to_sec())
+        return self.graph_index
+
+    def __walk_lineage(self, dataset_observer_id:str, max_depth:int, upstream:bool) -> Dict[str, int]:
+        if max_depth is not None and max_depth < 1:
+            raise ConfigValidationException("Error: max_depth must be at least 1: %s" % (max_depth))
+
+        conn = None
+        try:
+            conn = self.__get_db_con()
+            if self.graph_index is not None:
+                graph_index = self.__lineage_graph(conn)
+                if upstream:
+                    return graph_index.upstream(dataset_observer_id, max_depth)
+                return graph_index.downstream(dataset_observer_id, max_depth)
+            return self.__walk_rels(conn, self.__id(dataset_observer_id), max_depth, upstream)
+        finally:
+            if conn is not None:
+                self.__close_db_con(conn)
+
+    def __walk_rels(self, conn, dataset_observer_id:str, max_depth:int, upstream:bool) -> Dict[str, int]:
+        """
+        Breadth first walk of the active rels. Each level is one statement over the frontier (in chunks of
+        WALK_CHUNK_SIZE ids), read from the (sink, source, terminated_dt) index upstream and the
+        (source, terminated_dt, sink) index downstream without touching the rel rows.
+        """
+        if upstream:
+            stmt_query = "SELECT source_dataset_id FROM dataset_source_to_sink_meta_rel " \
+                         "WHERE terminated_dt = %s AND sink_dataset_id IN (%s)"
+        else:
+            stmt_query = "SELECT sink_dataset_id FROM dataset_source_to_sink_meta_rel " \
+                         "WHERE terminated_dt = %s AND source_dataset_id IN (%s)"
+        max_datetime = self.dbmgr.get_max_datetime_to_sec()
+
+        depths = {dataset_observer_id: 0}
+        frontier = [dataset_observer_id]
+        depth = 0
+        cursor = conn.cursor()
+        while len(frontier) > 0 and (max_depth is None or depth < max_depth):
+            depth += 1
+            next_frontier = []
+            for i in range(0, len(frontier), WALK_CHUNK_SIZE):
+                chunk = frontier[i:i + WALK_CHUNK_SIZE]
+                cursor.execute(stmt_query % ('%s', ', '.join(['%s'] * len(chunk))), [max_datetime] + chunk)
+                for row in cursor.fetchall():
+                    if row[0] not in depths:
+                        depths[row[0]] = depth
+                        next_frontier.append(row[0])
+            frontier = next_frontier
+        cursor.close()
+
+        del depths[dataset_observer_id]
+        return {str(node_id): node_depth for node_id, node_depth in depths.items()}
+
+    def __catalog(self, conn) -> ObserverCatalogCache:
+        if self.catalog_cache.needs_refresh():
+            self.catalog_cache.refresh(conn)
+        return self.catalog_cache
 
     def __lookup_dataset_id(self, conn,
                             model_name:str,
@@ -961,11 +2120,16 @@ class DatasetLineage:
         :param model_partition_keys:
         :return:
         """
+        if self.catalog_cache is not None:
+            observer = self.__catalog(conn).get_by_keys(conn, model_name, model_namespace, model_dataset_props,
+                                                        model_zone_tag)
+            return observer.dataset_process_id if observer is not None else None
+
         cursor = conn.cursor()
 
-        stmt_query = "SELECT dataset_observer_id FROM dataset_observer WHERE zone = %s " \
-                     " AND model_name = %s AND model_namespace = %s AND model_dataset_props = %s AND model_zone_tag = %i"
-        input_vals = (model_name, model_namespace, model_dataset_props, model_zone_tag)
+        stmt_query = "SELECT dataset_observer_id FROM dataset_observer WHERE model_zone_tag = %s " \
+                     " AND model_name = %s AND model_namespace = %s AND model_dataset_props = %s"
+        input_vals = (model_zone_tag, model_name, model_namespace, model_dataset_props)
         cursor.execute(stmt_query, input_vals)
 
         row = cursor.fetchall()
@@ -978,7 +2142,7 @@ class DatasetLineage:
 
         return process_id
 
-    def __lookup_dataset_run_id(self, conn:dbapi_connector.connection, run_id:str) -> DatasetRun:
+    def __lookup_dataset_run_id(self, conn, run_id:str) -> DatasetRun:
         """
 
         :param conn:
@@ -1009,35 +2173,7 @@ class DatasetLineage:
 
         return run_model
 
-    def __does_dataset_observer_id_exist(self, conn, dataset_observer_id:str) -> bool:
-        """
-        Check if dataset process id exists.
-
-        :param conn:
-        :param dataset_observer_id:
-        :return: False or True if process id exists
-        """
-        cursor = conn.cursor()
-
-        #print("dataset_id {}".format(dataset_process_id))
-        #print(get_dlc_raw_hex_to_byte(dataset_process_id))
-
-        stmt_query = 'SELECT dataset_observer_id FROM dataset_observer WHERE dataset_observer_id = %s'
-        input_vals = (dataset_observer_id,)
-        cursor.execute(stmt_query, input_vals)
-
-        row = cursor.fetchall()
-        #print('Length {}'.format(len(row)))
-        count = cursor.rowcount
-        #print('Count: {}'.format(count))
-        cursor.close()
-
-        if count == 0:
-            return False
-        else:
-            return True
-
-    def __internal_sources_ready_in_queue(self, conn:dbapi_connector.connection,
+    def __internal_sources_ready_in_queue(self, conn,
                                           dataset_observer_id: str=None,
                                           model_name: str=None,
                                           model_namespace: str = 'ROOT',
@@ -1076,7 +2212,7 @@ class DatasetLineage:
         specific_source_id_list: List[str] = []
         # if type(dependency_check) is list:
         if specific_sources is not None:
-            print("Filter on specific source_ids")
+            logger.debug("Filter on specific source_ids")
             specific_source_id_list = specific_sources
 
         col_name_list = []
@@ -1101,171 +2237,471 @@ class DatasetLineage:
         else:
             raise DatasetBaseException("dataset_id or keys are missing for lookup up dataset sources")
 
-        # get count of actual sources associated with sink. Static meta relationships.
-        count_cursor = conn.cursor()
-        count_query = """
-                     SELECT 
-                          count(rel.source_dataset_id) num_sources, max(z.dataset_observer_id) the_sink_proc_id 
-                     FROM dataset_observer z 
-                         LEFT JOIN dataset_source_to_sink_meta_rel as rel
-                             ON (z.dataset_observer_id = rel.sink_dataset_id AND rel.terminated_dt = %s) 
-                     WHERE
-                     """
+        static_source_rel_count = None
+        if self.graph_index is not None and dataset_observer_id is not None:
+            # static meta relationships come from the in-process graph index, no need to count them
+            static_source_rel_count = self.__lineage_graph(conn).source_count(dataset_observer_id)
+
+        # sink, static rel count, active runs and the ready source runs in one round trip
+        stmt_query, input_vals = self.__sink_readiness_query(col_name_list, col_val_list,
+                                                             with_rel_count=static_source_rel_count is None,
+                                                             with_ready_sources=static_source_rel_count != 0,
+                                                             dependency_check=dependency_check,
+                                                             specific_sources=specific_source_id_list)
+        cursor = conn.cursor()
+        cursor.execute(stmt_query, input_vals)
+        rows = cursor.fetchall()
+        cursor.close()
 
-        for index, col_name in enumerate(col_name_list):
-            if index > 0:
-                count_query += " AND "
-            count_query += col_name + "=%s"
-        # count_query += " GROUP BY z.dataset_observer_id"
-        #print(count_query)
-        input_vals = (self.dbmgr.get_max_datetime_to_sec(), *col_val_list)
-        #print(input_vals)
-        count_cursor.execute(count_query, input_vals)
-
-        # a nice hack to get the sink_proc_id even if it is not explicitly passed in this function.
-        the_sink_proc_id = None
-
-        row = count_cursor.fetchone()
-        static_source_rel_count=0
-        # dont' really need a for loop here, since only on row max can be returned
-        #for row in rows:
-        if row is not None:
-            static_source_rel_count = row[0]
-            the_sink_proc_id = row[1]
-        else:
-            count_cursor.close()
-            raise DatasetBaseException("dataset_id or keys were not found")
+        if len(rows) == 0:
+            raise DatasetNotFoundException("dataset_id or keys were not found")
+
+        the_sink_proc_id = rows[0][0]
+        sink_observer_config = rows[0][21]
+        orphan_sink = rows[0][23] > 0
+        if static_source_rel_count is None:
+            static_source_rel_count = rows[0][22]
+
+        queue_list = []
+        result_source_id_list = []
+        dataset_run_id_list = []
+        dataset_rel_id_list = []
+        # a sink without static rels does not consume from the queue
+        if static_source_rel_count > 0:
+            for row in rows:
+                if row[12] is None:  # LEFT JOIN row of a rel with nothing ready
+                    continue
+                queue = self.__queue_from_row(row)
+
+                result_source_id_list.append(queue.source_dataset_id)
+                dataset_run_id_list.append(queue.source_run_id)
+                queue_list.append(queue)
+                dataset_rel_id_list.append(row[18])
+
+        if static_source_rel_count != len(set(result_source_id_list)) and dependency_check == 'all':
+            # return empty list
+            return [], set(result_source_id_list), static_source_rel_count, the_sink_proc_id, dataset_run_id_list, \
+                   orphan_sink, set(dataset_rel_id_list), sink_observer_config
 
-        count_cursor.close()
+        # source queue/runs found, unique sources ids found in queue, static sink/source rel count
+        return queue_list, set(result_source_id_list), static_source_rel_count, the_sink_proc_id, \
+            dataset_run_id_list, orphan_sink, set(dataset_rel_id_list), sink_observer_config
 
-        # should never happen. defensive code
-        if dataset_observer_id is not None and the_sink_proc_id != dataset_observer_id:
-            raise DatasetBaseException("The provided dataset_id does match records in query. dataset_observer_id: %s, "
-                                       "the_sink_proc_id: %s", dataset_observer_id, the_sink_proc_id)
+    def __zone_sink_readiness(self, conn, model_zone_tag:int, model_namespace:str = None) -> List[DatasetReadySink]:
+        """
+        Set based readiness of every sink of a zone. One grouped query over the sink/pending event/run join; pending
+        events are found through their primary key (sink_dataset_id). With readiness counters the counts come from
+        the sinks' counter rows and nothing is grouped.
 
-        # if static_source_rel_count let next sql run, just in case to handle cases something in went wrong with rel
-        # static vs rel runtime.
+        :return: DatasetReadySink per observer in the zone.
+        """
+        if self.readiness_counters is not None:
+            return self.__zone_sink_counters(conn, model_zone_tag, model_namespace)
 
-        # find all the sources ready for processing by sink
-        sources_rel_cursor = None
-        if static_source_rel_count > 0:
-            sources_rel_cursor = conn.cursor()
         stmt_query = """
+                     SELECT
+                         z.dataset_observer_id, z.model_zone_tag, z.model_name, z.model_namespace,
+                         z.model_dataset_props, z.observer_status, z.observer_config,
+                         (SELECT count(*) FROM dataset_source_to_sink_meta_rel rel
+                             WHERE rel.sink_dataset_id = z.dataset_observer_id AND rel.terminated_dt = %s),
+                         count(DISTINCT CASE WHEN run.run_id IS NOT NULL THEN qu.source_dataset_id END),
+                         min(CASE WHEN run.run_id IS NOT NULL THEN qu.source_ready_dt END),
+                         (SELECT count(*) FROM dataset_observer_run act
+                             WHERE act.dataset_observer_id = z.dataset_observer_id AND (act.status = 1 OR act.status = 2))
+                     FROM dataset_observer z
+                     LEFT JOIN dataset_source_sink_pending_event as qu
+                          ON (qu.sink_dataset_id = z.dataset_observer_id AND qu.quarantined_dt IS NULL)
+                     LEFT JOIN dataset_observer_run as run
+                          ON (run.run_id = qu.source_run_id AND run.status = 3)
+                     WHERE z.model_zone_tag = %s
+                     """
+        input_vals = [self.dbmgr.get_max_datetime_to_sec(), model_zone_tag]
+        if model_namespace is not None:
+            stmt_query += " AND z.model_namespace = %s"
+            input_vals.append(model_namespace)
+        stmt_query += " GROUP BY z.dataset_observer_id, z.model_zone_tag, z.model_name, z.model_namespace, " \
+                      "z.model_dataset_props, z.observer_status, z.observer_config"
+
+        cursor = conn.cursor()
+        cursor.execute(stmt_query, input_vals)
+        rows = cursor.fetchall()
+        cursor.close()
+
+        return self.__ready_sinks_from_rows(rows)
+
+    def __zone_sink_counters(self, conn, model_zone_tag:int, model_namespace:str = None) -> List[DatasetReadySink]:
+        """
+        __zone_sink_readiness() from the readiness counters. Same columns.
+        """
+        stmt_query = """
+                     SELECT
+                         z.dataset_observer_id, z.model_zone_tag, z.model_name, z.model_namespace,
+                         z.model_dataset_props, z.observer_status, z.observer_config,
+                         COALESCE(cnt.source_count, 0), COALESCE(cnt.ready_source_count, 0),
+                         (SELECT min(qu.source_ready_dt) FROM dataset_source_sink_pending_event qu
+                             WHERE qu.sink_dataset_id = z.dataset_observer_id AND qu.quarantined_dt IS NULL),
+                         (SELECT count(*) FROM dataset_observer_run act
+                             WHERE act.dataset_observer_id = z.dataset_observer_id AND (act.status = 1 OR act.status = 2))
+                     FROM dataset_observer z
+                     LEFT JOIN dataset_sink_readiness as cnt
+                          ON (cnt.sink_dataset_id = z.dataset_observer_id)
+                     WHERE z.model_zone_tag = %s
+                     """
+        input_vals = [model_zone_tag]
+        if model_namespace is not None:
+            stmt_query += " AND z.model_namespace = %s"
+            input_vals.append(model_namespace)
+
+        cursor = conn.cursor()
+        cursor.execute(stmt_query, input_vals)
+        rows = cursor.fetchall()
+        cursor.close()
+        return self.__ready_sinks_from_rows(rows)
+
+    def __ready_sinks_from_rows(self, rows) -> List[DatasetReadySink]:
+        ready_sink_list = []
+        for row in rows:
+            ready_sink_list.append(DatasetReadySink(sink_id=row[0], zone=row[1], model_name=row[2],
+                                                    model_namespace=row[3], model_dataset_props=row[4],
+                                                    observer_status=row[5], observer_config=row[6],
+                                                    source_sink_rel_count=row[7], ready_source_count=row[8],
+                                                    oldest_source_ready_dt=to_datetime(row[9]),
+                                                    orphan_sink=row[10] > 0))
+        return ready_sink_list
+
+    def __ready_sources_query(self) -> str:
+        """
+        SELECT of the source runs ready (pending events) for sinks. Callers append the sink predicates.
+        Rows map to DatasetQueue with __queue_from_row.
+        """
+        return """
                      SELECT 
-                         mrel.sink_dataset_id, mrel.source_dataset_id, qu.source_run_id,
+                         qu.sink_dataset_id, qu.source_dataset_id, qu.source_run_id,
                          run.run_observer_config, run.run_breadcrumb, 
                          run.batch_run_id, run.run_metadata, run.record_count, 
                          z.model_name, z.model_zone_tag, z.model_namespace, z.model_dataset_props,
                          run.status, qu.source_ready_dt, 
                          source.model_name, source.model_zone_tag, source.model_namespace, source.model_dataset_props, 
                          qu.dataset_rel_id, qu.rerun_status, qu.rerun_last_sink_run_id, z.observer_config
-                     FROM dataset_source_sink_event_queue as qu
-                     JOIN dataset_source_to_sink_meta_rel as mrel
-                          ON (mrel.dataset_rel_id = qu.dataset_rel_id)
+                     FROM dataset_source_sink_pending_event as qu
                      JOIN dataset_observer_run as run 
                           ON (qu.source_run_id = run.run_id) 
                      JOIN dataset_observer as z -- sink
-                          ON (z.dataset_observer_id = mrel.sink_dataset_id) 
+                          ON (z.dataset_observer_id = qu.sink_dataset_id) 
                      JOIN dataset_observer as source 
-                          ON (source.dataset_observer_id = mrel.source_dataset_id) 
-                     WHERE qu.sink_run_id = 'zzzzzzzzzzzzzzzzzzzzzzzzzzzzzzzz' AND run.status = 3  
+                          ON (source.dataset_observer_id = qu.source_dataset_id) 
+                     WHERE run.status = 3 AND qu.quarantined_dt IS NULL
                      """
-        #for col_name in col_name_list:
-        #    stmt_query += " AND " + col_name + "=%s"
-        stmt_query += " AND z.dataset_observer_id = %s"
 
-        len_source = len(specific_source_id_list)
-        for idx, source_id in enumerate(specific_source_id_list):
-            if idx == 0:
-                if dependency_check == 'source_ids':
-                    stmt_query += " AND mrel.source_dataset_id IN ("
-                else:
-                    stmt_query += " AND qu.source_run_id IN ("
+    def __queue_events(self, run_col:str, run_id:str, include_archive:bool) -> List[DatasetQueueEvent]:
+        # predicate pushed into each branch so both tables are read through their run id index
+        stmt_query = "SELECT " + QUEUE_COLUMNS + ", 0 AS archived FROM dataset_source_sink_event_queue " \
+                     "WHERE " + run_col + " = %s "
+        input_vals = [self.__id(run_id)]
+        if include_archive:
+            stmt_query += "UNION ALL SELECT " + QUEUE_COLUMNS + ", 1 AS archived " \
+                          "FROM dataset_source_sink_event_queue_archive WHERE " + run_col + " = %s "
+            input_vals.append(self.__id(run_id))
+
+        stmt_query = """SELECT qu.dataset_rel_id, mrel.source_dataset_id, mrel.sink_dataset_id, qu.source_run_id,
+                               qu.sink_run_id, qu.source_ready_dt, qu.sink_start_dt, qu.rerun_status,
+                               qu.rerun_last_sink_run_id, qu.archived
+                        FROM (""" + stmt_query + """) as qu
+                        JOIN dataset_source_to_sink_meta_rel as mrel
+                             ON (mrel.dataset_rel_id = qu.dataset_rel_id)
+                        ORDER BY qu.source_ready_dt, qu.source_run_id"""
 
-            if idx == (len_source - 1):
-                stmt_query += "%s)"
-            else:
-                stmt_query += "%s,"
+        conn = None
+        try:
+            conn = self.__get_db_con()
+            cursor = conn.cursor()
+            cursor.execute(stmt_query, input_vals)
+            rows = cursor.fetchall()
+            cursor.close()
+        finally:
+            if conn is not None:
+                self.__close_db_con(conn)
 
-        stmt_query += " ORDER BY qu.source_ready_dt ASC"
+        return [DatasetQueueEvent(dataset_rel_id=row[0],
+                                  source_dataset_id=row[1],
+                                  sink_dataset_id=row[2],
+                                  source_run_id=row[3],
+                                  sink_run_id=row[4],
+                                  source_ready_dt=to_datetime(row[5]),
+                                  sink_start_dt=to_datetime(row[6]),
+                                  rerun_status=row[7],
+                                  rerun_last_sink_run_id=row[8],
+                                  archived=row[9] == 1) for row in rows]
+
+    def __provenance_root(self, conn, run_id:str) -> DatasetProvenanceRun:
+        cursor = conn.cursor()
+        cursor.execute("SELECT run.run_id, run.dataset_observer_id, obs.model_name, obs.model_namespace, "
+                       "obs.model_zone_tag, obs.model_dataset_props, " + PROVENANCE_RUN_COLUMNS +
+                       " FROM dataset_observer_run run LEFT JOIN dataset_observer obs "
+                       "ON (obs.dataset_observer_id = run.dataset_observer_id) WHERE run.run_id = %s",
+                       (self.__id(run_id),))
+        rows = cursor.fetchall()
+        cursor.close()
+        if len(rows) > 0:
+            return self.__provenance_run(rows[0], 0)
+        # purged by the run history retention, its queue events may still be around
+        return DatasetProvenanceRun(str(run_id), None, None, None, None, None, None, None, None, None, None, 0)
 
-        # print(stmt_query)
+    def __walk_runs(self, conn, root:DatasetProvenanceRun, max_depth:int, include_archive:bool,
+                    upstream:bool) -> List[DatasetProvenanceRun]:
+        """
+        Breadth first walk of the queue events from a run, upstream (source runs consumed) or downstream (sink runs
+        consuming). Links every run found into the source_runs of the run(s) consuming it.
 
-        #total_col_val_list = col_val_list + specific_source_id_list
-        # print(total_col_val_list)
+        :return: The runs found, nearest first.
+        """
+        runs = {root.run_id: root}
+        found_runs = []
+        frontier = [root]
+        depth = 0
+        chunk_size = WALK_CHUNK_SIZE // 2 if include_archive else WALK_CHUNK_SIZE
+        while len(frontier) > 0 and (max_depth is None or depth < max_depth):
+            depth += 1
+            next_frontier = []
+            for i in range(0, len(frontier), chunk_size):
+                frontier_runs = {run.run_id: run for run in frontier[i:i + chunk_size]}
+                for row in self.__run_hop(conn, list(frontier_runs), include_archive, upstream):
+                    run = runs.get(str(row[0]))
+                    if run is None:
+                        run = runs[str(row[0])] = self.__provenance_run(row, depth)
+                        found_runs.append(run)
+                        next_frontier.append(run)
+                    frontier_run = frontier_runs[str(row[11])]
+                    if upstream:
+                        frontier_run.source_runs.append(run)
+                    else:
+                        run.source_runs.append(frontier_run)
+            frontier = next_frontier
+        return found_runs
+
+    def __run_hop(self, conn, run_id_list:List[str], include_archive:bool, upstream:bool) -> List:
+        """
+        One level of __walk_runs(): the source runs consumed by (upstream) or the sink runs consuming (downstream) a
+        list of runs. Rows are the __provenance_run columns followed by the run of the list.
+        """
+        from_col, to_col = ("sink_run_id", "source_run_id") if upstream else ("source_run_id", "sink_run_id")
+        observer_col = "rel.source_dataset_id" if upstream else "rel.sink_dataset_id"
+        in_list = ', '.join(['%s'] * len(run_id_list))
+        run_id_list = self.__id_list(run_id_list)
+        stmt_query = "SELECT dataset_rel_id, source_run_id, sink_run_id FROM dataset_source_sink_event_queue " \
+                     "WHERE " + from_col + " IN (" + in_list + ") "
+        input_vals = list(run_id_list)
+        if include_archive:
+            stmt_query += "UNION ALL SELECT dataset_rel_id, source_run_id, sink_run_id " \
+                          "FROM dataset_source_sink_event_queue_archive WHERE " + from_col + " IN (" + in_list + ") "
+            input_vals += run_id_list
+
+        stmt_query = """SELECT qu.""" + to_col + """, """ + observer_col + """, obs.model_name, obs.model_namespace,
+                               obs.model_zone_tag, obs.model_dataset_props, """ + PROVENANCE_RUN_COLUMNS + """,
+                               qu.""" + from_col + """
+                        FROM (""" + stmt_query + """) as qu
+                        JOIN dataset_source_to_sink_meta_rel as rel
+                             ON (rel.dataset_rel_id = qu.dataset_rel_id)
+                        LEFT JOIN dataset_observer_run as run
+                             ON (run.run_id = qu.""" + to_col + """)
+                        LEFT JOIN dataset_observer as obs
+                             ON (obs.dataset_observer_id = """ + observer_col + """)
+                        ORDER BY run.start_dt, qu.""" + to_col
+        cursor = conn.cursor()
+        cursor.execute(stmt_query, input_vals)
+        rows = cursor.fetchall()
+        cursor.close()
+        return rows
 
-        #input_vals = (total_col_val_list, )
-        input_vals = (the_sink_proc_id, *specific_source_id_list)
-        # print("input vals")
-        # print(input_vals)
+    def __quarantine_pending_events(self, conn, run_id_list:List[str]) -> int:
+        """
+        Quarantines the pending events of the runs in one transaction that also takes them off the readiness
+        counters. The events are selected (and locked) first, then exactly those are updated and counted.
+        """
+        events = []
+        conn.start_transaction()
+        try:
+            cursor = conn.cursor()
+            for i in range(0, len(run_id_list), WALK_CHUNK_SIZE):
+                chunk = self.__id_list(run_id_list[i:i + WALK_CHUNK_SIZE])
+                cursor.execute("SELECT sink_dataset_id, dataset_rel_id, source_run_id, source_dataset_id "
+                               "FROM dataset_source_sink_pending_event "
+                               "WHERE source_run_id IN (" + ', '.join(['%s'] * len(chunk)) + ") "
+                               "AND quarantined_dt IS NULL " + self.dbmgr.get_lock_rows_clause(), chunk)
+                events += cursor.fetchall()
+
+            quarantined_dt = datetime.now()
+            quarantined_count = 0
+            for i in range(0, len(events), WALK_CHUNK_SIZE):
+                chunk = events[i:i + WALK_CHUNK_SIZE]
+                cursor.execute("UPDATE dataset_source_sink_pending_event SET quarantined_dt = %s "
+                               "WHERE (sink_dataset_id, dataset_rel_id, source_run_id) IN (" +
+                               ', '.join(['(%s, %s, %s)'] * len(chunk)) + ") AND quarantined_dt IS NULL",
+                               [quarantined_dt] + [val for event in chunk for val in event[:3]])
+                quarantined_count += cursor.rowcount
+            if quarantined_count != len(events):
+                raise DatasetBaseException("Error: Expected %s quarantined pending events, got %s" %
+                                           (len(events), quarantined_count))
+
+            if self.readiness_counters is not None and len(events) > 0:
+                pending_deltas = {}
+                for event in events:
+                    key = (event[0], event[3])
+                    pending_deltas[key] = pending_deltas.get(key, 0) - 1
+                self.readiness_counters.apply(conn, pending_deltas)
+            cursor.close()
+            conn.commit()
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+        return quarantined_count
 
-        rows = []
-        if sources_rel_cursor is not None:
-            sources_rel_cursor.execute(stmt_query, input_vals)
-            rows = sources_rel_cursor.fetchall()
+    def __pending_events_of(self, conn, run_id_list:List[str]) -> List[DatasetQueueEvent]:
+        pending_event_list = []
+        cursor = conn.cursor()
+        for i in range(0, len(run_id_list), WALK_CHUNK_SIZE):
+            chunk = self.__id_list(run_id_list[i:i + WALK_CHUNK_SIZE])
+            cursor.execute("SELECT dataset_rel_id, source_dataset_id, sink_dataset_id, source_run_id, source_ready_dt, "
+                           "rerun_status, rerun_last_sink_run_id, quarantined_dt "
+                           "FROM dataset_source_sink_pending_event "
+                           "WHERE source_run_id IN (" + ', '.join(['%s'] * len(chunk)) + ")", chunk)
+            for row in cursor.fetchall():
+                pending_event_list.append(DatasetQueueEvent(dataset_rel_id=row[0],
+                                                            source_dataset_id=row[1],
+                                                            sink_dataset_id=row[2],
+                                                            source_run_id=row[3],
+                                                            sink_run_id=None,
+                                                            source_ready_dt=to_datetime(row[4]),
+                                                            sink_start_dt=None,
+                                                            rerun_status=row[5],
+                                                            rerun_last_sink_run_id=row[6],
+                                                            archived=False,
+                                                            quarantined_dt=to_datetime(row[7])))
+        cursor.close()
+        pending_event_list.sort(key=lambda event: (event.source_ready_dt, event.source_run_id, event.sink_dataset_id))
+        return pending_event_list
+
+    def __provenance_run(self, row, depth:int) -> DatasetProvenanceRun:
+        return DatasetProvenanceRun(run_id=str(row[0]), dataset_observer_id=row[1], model_name=row[2],
+                                    model_namespace=row[3], model_zone_tag=row[4], model_dataset_props=row[5],
+                                    status=row[6], batch_run_id=row[7], record_count=row[8],
+                                    start_dt=to_datetime(row[9]), end_dt=to_datetime(row[10]), depth=depth)
+
+    def __queue_from_row(self, row) -> DatasetQueue:
+        return DatasetQueue(
+            sink_dataset_id=row[0],
+            source_dataset_id=row[1],
+            source_run_id=row[2],
+            run_config=row[3],
+            run_breadcrumb=row[4],
+            dataset_batch_run_id=row[5],
+            dataset_run_metadata=row[6],
+            dataset_record_count=row[7],
+
+            sink_model_name=row[8],
+            sink_zone=row[9],
+            sink_model_namespace=row[10],
+            sink_model_dataset_props=row[11],
+
+            source_ready_dt=row[13],
+
+            source_model_name=row[14],
+            source_zone=row[15],
+            source_model_namespace=row[16],
+            source_model_dataset_props=row[17],
+            dataset_rel_id=row[18]
+        )
+
+    def __sink_readiness_query(self, col_name_list:List[str], col_val_list:List,
+                               with_rel_count:bool = True,
+                               with_ready_sources:bool = True,
+                               dependency_check='any',
+                               specific_sources:List[str] = None) -> (str, List):
+        """
+        Readiness of one sink as a single statement. Every row carries the sink, its static source rel count and
+        its active (ready/started) run count; pending events and their runs are LEFT JOINed, so the sink row comes
+        back even when nothing is ready. Pending events are read through their sink key, and with_ready_sources=False
+        (rel count known to be zero) leaves them out altogether.
 
-        queue_list = []
-        result_source_id_list = []
-        #sink_id_list = []
-        dataset_run_id_list = []
-        dataset_rel_id_list = []
-        sink_observer_config=""
-        for row in rows:
-            queue = DatasetQueue(
-                sink_dataset_id=row[0],
-                source_dataset_id=row[1],
-                source_run_id=row[2],
-                run_config=row[3],
-                run_breadcrumb=row[4],
-                dataset_batch_run_id=row[5],
-                dataset_run_metadata=row[6],
-                dataset_record_count=row[7],
-
-                sink_model_name=row[8],
-                sink_zone=row[9],
-                sink_model_namespace=row[10],
-                sink_model_dataset_props=row[11],
-
-                source_ready_dt=row[13],
-
-                source_model_name=row[14],
-                source_zone=row[15],
-                source_model_namespace=row[16],
-                source_model_dataset_props=row[17]
-            )
-
-            result_source_id_list.append(queue.source_dataset_id)
-            #sink_id_list.append(queue.sink_dataset_id)
-            dataset_run_id_list.append(queue.source_run_id)
-            queue_list.append(queue)
-            dataset_rel_id_list.append(row[18])
-            sink_observer_config = row[19]
-
-        if sources_rel_cursor is not None:
-            sources_rel_cursor.close()
-
-        # Check and report if sink has orphans
-        orphan_query = "SELECT run_id, status FROM dataset_observer_run" \
-                      " WHERE dataset_observer_id = %s AND (status = 1 OR status = 2)"
-        input_vals = (the_sink_proc_id,)
-        orphan_cursor = conn.cursor()
-        orphan_cursor.execute(orphan_query, input_vals)
-
-        orphan_sink = False
-        rows = orphan_cursor.fetchall()
-        if orphan_cursor.rowcount > 0:
-            orphan_sink = True
-        orphan_cursor.close()
+        Columns 0-21 map to DatasetQueue with __queue_from_row for the rows with a ready source run (run.status,
+        column 12, is NULL on the others), column 22 is the static rel count (NULL unless with_rel_count) and 23 the
+        active run count.
 
+        With readiness counters the rel count is read from the sink's counter row, and for dependency_check 'all'
+        the pending events are only joined when the counters have every source ready.
+        """
+        if with_ready_sources:
+            ready_cols = """qu.source_dataset_id, qu.source_run_id,
+                         run.run_observer_config, run.run_breadcrumb, 
+                         run.batch_run_id, run.run_metadata, run.record_count,"""
+            ready_source_cols = """run.status, qu.source_ready_dt, 
+                         source.model_name, source.model_zone_tag, source.model_namespace, source.model_dataset_props, 
+                         qu.dataset_rel_id, qu.rerun_status, qu.rerun_last_sink_run_id,"""
+        else:
+            ready_cols = "NULL, NULL, NULL, NULL, NULL, NULL, NULL,"
+            ready_source_cols = "NULL, NULL, NULL, NULL, NULL, NULL, NULL, NULL, NULL,"
+
+        input_vals = []
+        with_counters = self.readiness_counters is not None and \
+            (with_rel_count or (with_ready_sources and dependency_check == 'all'))
+        rel_count_col = "NULL"
+        if with_rel_count and with_counters:
+            rel_count_col = "COALESCE(cnt.source_count, 0)"
+        elif with_rel_count:
+            rel_count_col = """(SELECT count(*) FROM dataset_source_to_sink_meta_rel rel
+                             WHERE rel.sink_dataset_id = z.dataset_observer_id AND rel.terminated_dt = %s)"""
+            input_vals.append(self.dbmgr.get_max_datetime_to_sec())
 
-        if static_source_rel_count != len(set(result_source_id_list)) and dependency_check == 'all':
-            # return empty list
-            return [], set(result_source_id_list), static_source_rel_count, the_sink_proc_id, dataset_run_id_list, \
-                   orphan_sink, set(dataset_rel_id_list), sink_observer_config
+        stmt_query = """
+                     SELECT 
+                         z.dataset_observer_id, %s
+                         z.model_name, z.model_zone_tag, z.model_namespace, z.model_dataset_props,
+                         %s
+                         z.observer_config,
+                         %s,
+                         (SELECT count(*) FROM dataset_observer_run act
+                             WHERE act.dataset_observer_id = z.dataset_observer_id AND (act.status = 1 OR act.status = 2))
+                     FROM dataset_observer as z -- sink
+                     """ % (ready_cols, ready_source_cols, rel_count_col)
+
+        if with_counters:
+            stmt_query += """
+                     LEFT JOIN dataset_sink_readiness as cnt
+                          ON (cnt.sink_dataset_id = z.dataset_observer_id)
+                     """
 
-        # source queue/runs found, unique sources ids found in queue, static sink/source rel count
-        return queue_list, set(result_source_id_list), static_source_rel_count, the_sink_proc_id, \
-            dataset_run_id_list, orphan_sink, set(dataset_rel_id_list), sink_observer_config
+        if with_ready_sources:
+            source_filter = ""
+            run_filter = ""
+            if with_counters and dependency_check == 'all':
+                source_filter = " AND cnt.ready_source_count >= cnt.source_count"
+            if specific_sources is not None and len(specific_sources) > 0:
+                if dependency_check == 'source_ids':
+                    source_filter += " AND qu.source_dataset_id IN (%s)" % ', '.join(['%s'] * len(specific_sources))
+                else:
+                    run_filter = " AND qu.source_run_id IN (%s)" % ', '.join(['%s'] * len(specific_sources))
+                input_vals += specific_sources
+
+            stmt_query += """
+                     LEFT JOIN dataset_source_sink_pending_event as qu
+                          ON (qu.sink_dataset_id = z.dataset_observer_id AND qu.quarantined_dt IS NULL%s%s)
+                     LEFT JOIN dataset_observer_run as run 
+                          ON (qu.source_run_id = run.run_id AND run.status = 3) 
+                     LEFT JOIN dataset_observer as source 
+                          ON (source.dataset_observer_id = qu.source_dataset_id)
+                     """ % (source_filter, run_filter)
+
+        stmt_query += " WHERE "
+        for index, col_name in enumerate(col_name_list):
+            if index > 0:
+                stmt_query += " AND "
+            stmt_query += col_name + " = %s"
+        input_vals += col_val_list
+
+        if with_ready_sources:
+            stmt_query += " ORDER BY qu.source_ready_dt ASC"
+
+        return stmt_query, input_vals
 
     def __internal_start_dataset_run(self, conn, dataset_observer_id:str,
                                      dependency_check='any',
@@ -1311,7 +2747,9 @@ class DatasetLineage:
             raise ConfigValidationException("Error: dependency_check argument not valid: "
                                                     "%s" % (dependency_check))
 
-        run_id = get_new_guid().hex
+        dataset_observer_id = self.__id(dataset_observer_id)
+        specific_sources = self.__id_list(specific_sources)
+        run_id = self.__new_id()
         start_dt = datetime.now()
 
         try:
@@ -1320,29 +2758,20 @@ class DatasetLineage:
             # in case of multiple (un-authorized) sinks.
             conn.start_transaction()  # isolation_level='READ COMMITTED')
 
-            # print("start dt {}".format(start_dt))
-
-            # 1) Get number of source dependencies and other dep metadata.
-            #
-
-            # 2) Lookup all associated sources_dataset_run_ids runs and return rowcounts/dataset_batch_id
-            #    and model keys for each source run IDs
-
-            # 3) Update Queue that sink has started to run and use #2 source_run_ids
+            # 1) Get number of source dependencies, active runs and all ready sources_dataset_run_ids runs
+            #    (rowcounts/dataset_batch_id and model keys) in one query
 
-            # 4) Insert dataset run record (ready/start)
+            # 2) Insert dataset run record (ready/start), guarded so it only inserts when no run is active
             #       -Some defensive code to prevent duplicates running for dataset ID
 
+            # 3) Update Queue that sink has started to run and use #1 source_run_ids
+
             # Dont worry, dependency_check ignore gets handled like 'any' during this call
             queue_list, unique_source_id_list, static_source_rel_count, sink_id, source_run_id_list, \
             orphan_sink, dataset_rel_id_list, sink_observer_config = \
                 self.__internal_sources_ready_in_queue(conn, dataset_observer_id, dependency_check=dependency_check,
                                                        specific_sources=specific_sources)
 
-            logger.info("queue_list: %s \n unique_source_id_list: %s \n static_source_rel_count: %d \n "
-                  "unique_sink_id_list: %s \n orphan sink: %s" %
-                  (len(queue_list), unique_source_id_list, static_source_rel_count, sink_id, orphan_sink))
-
             if orphan_sink == True:
                 logger.warning("queue_list: %s \n unique_source_id_list: %s \n static_source_rel_count: %d \n "
                             "unique_sink_id_list: %s \n orphan sink: %s" %
@@ -1369,57 +2798,6 @@ class DatasetLineage:
             else:
                 pass  # must be 'ignore' or all input is valid
 
-            # print("source_run_id_list")
-            # print(source_run_id_list)
-
-            ####
-            # Now prepare the update to the queue
-
-            q_update_cursor = conn.cursor()
-
-            # source_run_id_list_str = ", ".join(source_run_id_list)
-            # if sources_id_list is not None and len(sources_id_list) > 0:
-            #    id_list_qmark = ', '.join('s' * len(sources_id_list)).replace('s', '%s')
-
-            run_list_params=None
-            if source_run_id_list is not None and len(source_run_id_list) > 0:
-                run_list_params = ', '.join('s' * len(source_run_id_list)).replace('s', '%s')
-
-            where_list = [run_id, start_dt, dataset_observer_id]
-            stmt_update = """UPDATE dataset_source_sink_event_queue q
-                               JOIN dataset_source_to_sink_meta_rel rel ON (q.dataset_rel_id = rel.dataset_rel_id)
-                             SET q.sink_run_id=%s, q.sink_start_dt=%s WHERE """
-            stmt_update += "q.sink_run_id = 'zzzzzzzzzzzzzzzzzzzzzzzzzzzzzzzz' "
-            stmt_update += 'AND rel.sink_dataset_id=%s '
-            # if id_list_qmark is not None:
-            #    stmt_update += 'AND source_dataset_id IN (%s) '.format(id_list_qmark)
-            #    where_list.append(sources_id_list)
-
-            if run_list_params is not None:
-                stmt_update += 'AND q.source_run_id IN (%s)' % run_list_params
-                where_list += source_run_id_list
-
-            input_vals = where_list
-            # print(input_vals)
-            # print("stmt update {}".format(stmt_update))
-
-            q_update_cursor.execute(stmt_update, input_vals)
-
-            update_count=q_update_cursor.rowcount
-
-            # print("update count: {}".format(update_count))
-
-            # If this updates zero records when run_list_params is
-            #  is provided there is a problem with what user is trying do.
-            #  It can be zero if run_list_params is empty/None but if run_list was
-            #  provided something should have been found. So will error out.
-            if run_list_params is not None and update_count != len(source_run_id_list):
-                q_update_cursor.close()
-                conn.rollback()
-                raise DatasetBaseException("Error: Source run ids provided, but no queue updates detected. "
-                                            "Bad source run ids? : {}".format(source_run_id_list))
-            q_update_cursor.close()
-
             ###
 
             # Insert new run record
@@ -1475,30 +2853,57 @@ class DatasetLineage:
             col_list_str = ", ".join(col_name_list)
             col_type_list_str = ", ".join(col_type_list)
 
-            stmt_insert = 'INSERT INTO dataset_observer_run (status, %s) VALUES (2, %s);' % (col_list_str, col_type_list_str)
+            # Defensive code to prevent multiple dataset IDs being active at the same time: the insert selects
+            # from the sink row only when no other run of it is ready/started, so no follow up query is needed.
+            stmt_insert = 'INSERT INTO dataset_observer_run (status, %s) ' \
+                          'SELECT 2, %s FROM dataset_observer WHERE dataset_observer_id = %%s AND NOT EXISTS ' \
+                          '(SELECT 1 FROM dataset_observer_run act WHERE act.dataset_observer_id = %%s ' \
+                          'AND (act.status = 1 OR act.status = 2))' % (col_list_str, col_type_list_str)
             # print("stmt insert {}".format(stmt_insert))
-            input_vals = col_val_list
+            input_vals = col_val_list + [dataset_observer_id, dataset_observer_id]
             cursor.execute(stmt_insert, input_vals)
+            insert_count = cursor.rowcount
             cursor.close()
 
-            # Defensive code to prevent multiple dataset IDs being active at the same time.
+            if insert_count != 1:
+                conn.rollback()
+                raise AlreadyActiveException("Defensive check: Can't run dataset, there is one already "
+                                             "active/orphaned {}".format(dataset_observer_id))
 
-            # if another dataset_run is not final or error, then rollback this one
-            query_cursor = conn.cursor()
+            ####
+            # Now consume the ready sources: append the consumption records and drop the pending events. Nothing to
+            # do when no source runs were found.
 
-            stmt_query = "SELECT run_id, status FROM dataset_observer_run" \
-                         " WHERE dataset_observer_id = %s AND (status = 1 OR status = 2)"
-            input_vals = (dataset_observer_id,)
-            query_cursor.execute(stmt_query, input_vals)
+            if source_run_id_list is not None and len(source_run_id_list) > 0:
+                pending_filter = 'WHERE sink_dataset_id=%s AND source_run_id IN (%s) AND quarantined_dt IS NULL' % \
+                                 ('%s', ', '.join(['%s'] * len(source_run_id_list)))
+
+                stmt_insert_q = "INSERT INTO dataset_source_sink_event_queue (" + QUEUE_COLUMNS + ") " \
+                                "SELECT dataset_rel_id, source_run_id, %s, rerun_last_sink_run_id, rerun_status, " \
+                                "source_ready_dt, %s FROM dataset_source_sink_pending_event " + pending_filter
+                stmt_delete = "DELETE FROM dataset_source_sink_pending_event " + pending_filter
+
+                q_update_cursor = conn.cursor()
+                q_update_cursor.execute(stmt_insert_q, [run_id, start_dt, dataset_observer_id] + source_run_id_list)
+                q_update_cursor.execute(stmt_delete, [dataset_observer_id] + source_run_id_list)
+                update_count = q_update_cursor.rowcount
+                q_update_cursor.close()
 
-            rows = query_cursor.fetchall()
-            if query_cursor.rowcount > 1:
-                query_cursor.close()
-                conn.rollback()
-                raise AlreadyActiveException("Defensive check: Can't run dataset, there is one already active/orphaned {}".format(rows))
+                # Every source run found ready must be consumed by this sink run. If not, they were consumed in
+                # the meantime or the user provided bad source run ids.
+                if update_count != len(source_run_id_list):
+                    conn.rollback()
+                    raise DatasetBaseException("Error: Source run ids provided, but no queue updates detected. "
+                                                "Bad source run ids? : {}".format(source_run_id_list))
+
+                self.__count_consumed(conn, {dataset_observer_id: queue_list})
 
-            query_cursor.close()
             conn.commit()
+            logger.debug("queue_list: %s \n unique_source_id_list: %s \n static_source_rel_count: %d \n "
+                         "unique_sink_id_list: %s \n orphan sink: %s",
+                         len(queue_list), unique_source_id_list, static_source_rel_count, sink_id, orphan_sink)
+            if self.event_bus.has_subscribers(RUN_STARTED):
+                self.__publish_started(dataset_start_result, start_dt)
             return dataset_start_result
 
         finally:
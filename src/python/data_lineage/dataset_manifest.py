@@ -0,0 +1,272 @@
+"""
+Declarative lineage manifest: the observers and source/sink rels of a lineage graph kept in a JSON (or YAML) file,
+synced to the database with DatasetLineage.sync_lineage_manifest().
+
+    {"observers": [{"model_name": "orders", "model_zone_tag": 1},
+                   {"model_name": "orders", "model_zone_tag": 2, "description": "standardized orders"}],
+     "rels": [{"source": {"model_name": "orders", "model_zone_tag": 1},
+               "sink": {"model_name": "orders", "model_zone_tag": 2}}]}
+
+Observer entries take the keys of DatasetLineage.declare_dataset_observer(), rel endpoints the four key fields
+(model_zone_tag, model_namespace, model_name, model_dataset_props, defaulted like the declare) of an observer of the
+manifest.
+
+    cd src/python
+    python -m data_lineage.dataset_manifest --sqlite /var/lib/dlcp/lineage.db plan lineage.json
+    python -m data_lineage.dataset_manifest --sqlite /var/lib/dlcp/lineage.db apply lineage.json
+
+MySQL databases take --db-host/--db-user/--db-password/--db-name instead of --sqlite.
+"""
+import argparse
+import json
+import os
+from typing import Dict, List, Tuple
+
+try:
+    import yaml
+except ImportError:  # PyYAML is only needed to read .yaml manifests
+    yaml = None
+
+from .dataset_exceptions import ConfigValidationException
+
+import logging
+
+logger = logging.getLogger("dataset-manifest")
+logger.setLevel(logging.INFO)
+
+ObserverKey = Tuple[int, str, str, str]  # (model_zone_tag, model_namespace, model_name, model_dataset_props)
+
+KEY_FIELDS = ('model_zone_tag', 'model_namespace', 'model_name', 'model_dataset_props')
+MUTABLE_FIELDS = ('observer_config', 'display_name', 'description')
+
+
+def observer_key(entry: dict) -> ObserverKey:
+    if entry.get('model_name') is None:
+        raise ConfigValidationException("Error: model_name is missing: %s" % (entry))
+    return (entry.get('model_zone_tag', 1), entry.get('model_namespace', 'ROOT'), entry['model_name'],
+            entry.get('model_dataset_props', 'NA'))
+
+
+def format_key(key: ObserverKey) -> str:
+    return "%s/%s/%s/%s" % key
+
+
+class ManifestObserver:
+    def __init__(self, dataset_observer_id: str, status: int, observer_config: str, display_name: str,
+                 description: str):
+        """
+        An observer of the database, as loaded to plan a sync.
+        """
+        self.dataset_observer_id = dataset_observer_id
+        self.status = status
+        self.observer_config = observer_config
+        self.display_name = display_name
+        self.description = description
+
+
+class ManifestPlan:
+    def __init__(self, observers_to_declare: List[dict], observers_to_update: List[Tuple[str, ObserverKey, dict]],
+                 rels_to_add: List[Tuple[ObserverKey, ObserverKey]],
+                 rels_to_terminate: List[Tuple[str, str, ObserverKey, ObserverKey]],
+                 blocked_rels: List[Tuple[ObserverKey, ObserverKey]], unchanged_rel_count: int):
+        """
+
+        :param observers_to_declare: Manifest entries of the observers missing from the database.
+        :param observers_to_update: (observer id, key, {field: manifest value}) of the declared observers whose
+                                    config/display_name/description differ from the manifest.
+        :param rels_to_add: (source key, sink key) of the manifest rels that are not active.
+        :param rels_to_terminate: (source id, sink id, source key, sink key) of the active rels of the manifest's sinks
+                                  that the manifest does not list.
+        :param blocked_rels: (source key, sink key) of the rels to add with a disabled or retired observer. A sync
+                             refuses to apply a plan with blocked rels, like associate_dataset_source_to_sink().
+        :param unchanged_rel_count: Manifest rels active already.
+        """
+        self.observers_to_declare = observers_to_declare
+        self.observers_to_update = observers_to_update
+        self.rels_to_add = rels_to_add
+        self.rels_to_terminate = rels_to_terminate
+        self.blocked_rels = blocked_rels
+        self.unchanged_rel_count = unchanged_rel_count
+        self.applied = False
+        self.elapsed_sec = None
+
+    def is_empty(self) -> bool:
+        return len(self.observers_to_declare) == 0 and len(self.observers_to_update) == 0 and \
+            len(self.rels_to_add) == 0 and len(self.rels_to_terminate) == 0
+
+    def render(self, max_lines: int = None) -> str:
+        """
+        Dry-run output, one line per change ('+' declare/associate, '~' update, '-' terminate, '!' blocked) and a
+        summary line.
+
+        :param max_lines: Optional. Most change lines listed, the summary counts them all.
+        """
+        lines = []
+        lines += ["+ observer %s" % format_key(observer_key(entry)) for entry in self.observers_to_declare]
+        lines += ["~ observer %s: %s" % (format_key(key), ', '.join(sorted(changes)))
+                  for _, key, changes in self.observers_to_update]
+        lines += ["+ rel %s -> %s" % (format_key(source), format_key(sink)) for source, sink in self.rels_to_add]
+        lines += ["- rel %s -> %s" % (format_key(source), format_key(sink))
+                  for _, _, source, sink in self.rels_to_terminate]
+        lines += ["! rel %s -> %s: observer disabled or retired" % (format_key(source), format_key(sink))
+                  for source, sink in self.blocked_rels]
+        if max_lines is not None and len(lines) > max_lines:
+            lines = lines[:max_lines] + ["... %d more" % (len(lines) - max_lines)]
+        lines.append("%s: %d observers to declare, %d to update, %d rels to add, %d to terminate, %d unchanged, "
+                     "%d blocked" % ("applied" if self.applied else "plan", len(self.observers_to_declare),
+                                     len(self.observers_to_update), len(self.rels_to_add),
+                                     len(self.rels_to_terminate), self.unchanged_rel_count, len(self.blocked_rels)))
+        return '\n'.join(lines)
+
+
+class LineageManifest:
+    """
+    The desired observers and source/sink rels of a lineage graph.
+
+    A sync declares the missing observers, updates the config/display_name/description the manifest sets, adds the
+    missing rels and terminates the active rels of the manifest's observers (as sinks) that it does not list. The
+    manifest owns the sources of its observers: rels of sinks that are not in the manifest are left alone, and
+    observers are never disabled or deleted.
+    """
+
+    def __init__(self, observers: List[dict], rels: List[Tuple[dict, dict]]):
+        """
+        :param observers: declare_dataset_observer() keyword dicts.
+        :param rels: (source, sink) key dicts, both observers of the manifest.
+        """
+        self.observers: Dict[ObserverKey, dict] = {}
+        for entry in observers:
+            unknown = set(entry) - set(KEY_FIELDS) - set(MUTABLE_FIELDS)
+            if len(unknown) > 0:
+                raise ConfigValidationException("Error: unknown observer fields: %s" % (sorted(unknown)))
+            key = observer_key(entry)
+            if key[0] < 0:
+                raise ConfigValidationException("Error: invalid zone_tag value: %s" % (format_key(key)))
+            if key in self.observers:
+                raise ConfigValidationException("Error: observer listed twice: %s" % (format_key(key)))
+            self.observers[key] = entry
+
+        self.rels: List[Tuple[ObserverKey, ObserverKey]] = []
+        for source, sink in rels:
+            rel = (observer_key(source), observer_key(sink))
+            for key in rel:
+                if key not in self.observers:
+                    raise ConfigValidationException("Error: rel observer not in the manifest: %s" % (format_key(key)))
+            self.rels.append(rel)
+        self.rels = list(dict.fromkeys(self.rels))
+
+    @classmethod
+    def from_dict(cls, manifest: dict) -> 'LineageManifest':
+        unknown = set(manifest) - {'observers', 'rels'}
+        if len(unknown) > 0:
+            raise ConfigValidationException("Error: unknown manifest sections: %s" % (sorted(unknown)))
+        rels = []
+        for rel in manifest.get('rels', []):
+            if 'source' not in rel or 'sink' not in rel:
+                raise ConfigValidationException("Error: rel needs a source and a sink: %s" % (rel))
+            rels.append((rel['source'], rel['sink']))
+        return cls(manifest.get('observers', []), rels)
+
+    @classmethod
+    def load(cls, path: str) -> 'LineageManifest':
+        """
+        Reads a .json manifest, or a .yaml/.yml one if PyYAML is installed.
+        """
+        with open(path) as manifest_file:
+            if os.path.splitext(path)[1].lower() in ('.yaml', '.yml'):
+                if yaml is None:
+                    raise ConfigValidationException("Error: PyYAML is needed to read yaml manifests: %s" % (path))
+                return cls.from_dict(yaml.safe_load(manifest_file))
+            return cls.from_dict(json.load(manifest_file))
+
+    def plan(self, current_observers: Dict[ObserverKey, ManifestObserver],
+             active_rels: List[Tuple[str, str, ObserverKey]]) -> ManifestPlan:
+        """
+        Diff against the database.
+
+        :param current_observers: The declared observers of the manifest, by manifest key. The database matches the
+                                  keys, so an observer may be stored with a key differing in case or trailing spaces.
+        :param active_rels: (source id, sink id, source key as stored) of the active rels.
+        """
+        observers_to_declare = []
+        observers_to_update = []
+        for key, entry in self.observers.items():
+            observer = current_observers.get(key)
+            if observer is None:
+                observers_to_declare.append(entry)
+                continue
+            changes = {field: entry[field] for field in MUTABLE_FIELDS
+                       if field in entry and entry[field] != getattr(observer, field)}
+            if len(changes) > 0:
+                observers_to_update.append((observer.dataset_observer_id, key, changes))
+
+        keys_by_id = {}
+        for key, observer in current_observers.items():
+            other = keys_by_id.setdefault(str(observer.dataset_observer_id), key)
+            if other != key:
+                raise ConfigValidationException("Error: observers are the same in the database: %s, %s" %
+                                                (format_key(other), format_key(key)))
+        active = {}
+        for source_id, sink_id, source_key in active_rels:
+            sink = keys_by_id.get(str(sink_id))
+            if sink is not None:
+                active[(keys_by_id.get(str(source_id), source_key), sink)] = (source_id, sink_id)
+
+        rels_to_add = []
+        blocked_rels = []
+        for rel in self.rels:
+            if rel in active:
+                continue
+            if any(key in current_observers and current_observers[key].status != 1 for key in rel):
+                blocked_rels.append(rel)
+            else:
+                rels_to_add.append(rel)
+
+        wanted = set(self.rels)
+        rels_to_terminate = [(source_id, sink_id, source, sink) for (source, sink), (source_id, sink_id)
+                             in active.items() if (source, sink) not in wanted]
+        rels_to_terminate.sort(key=lambda rel: (str(rel[0]), str(rel[1])))
+        return ManifestPlan(observers_to_declare, observers_to_update, rels_to_add, rels_to_terminate,
+                            blocked_rels, len(self.rels) - len(rels_to_add) - len(blocked_rels))
+
+
+def main():
+    from .dataset_lineage_mgmt import DatasetLineage
+    from .db_layer import MySQLBackend, SqliteBackend
+    from .dataset_readiness import SinkReadinessCounters
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["plan", "apply"])
+    parser.add_argument("manifest", help="manifest file (.json, or .yaml with PyYAML installed)")
+    parser.add_argument("--sqlite", default=None, help="sqlite database file")
+    parser.add_argument("--readiness-counters", action="store_true",
+                        help="the writers keep readiness counters, update them too")
+    parser.add_argument("--db-host", default=os.environ.get('DLC_DB_HOST'))
+    parser.add_argument("--db-user", default=os.environ.get('DLC_DB_USER'))
+    parser.add_argument("--db-password", default=os.environ.get('DLC_DB_PASSWORD'))
+    parser.add_argument("--db-name", default=os.environ.get('DLC_DB_NAME'))
+    parser.add_argument("--max-lines", type=int, default=1000, help="most changes listed")
+    args = parser.parse_args()
+
+    manifest = LineageManifest.load(args.manifest)
+    if args.sqlite is not None:
+        if not os.path.exists(args.sqlite):
+            parser.error("database file not found: %s" % args.sqlite)
+        try:
+            backend = SqliteBackend(args.sqlite, pool_size=1)
+        except ConfigValidationException:  # binary ids
+            backend = SqliteBackend(args.sqlite, pool_size=1, binary_ids=True)
+    else:
+        backend = MySQLBackend(db_host=args.db_host, db_user=args.db_user, db_password=args.db_password,
+                               db_name=args.db_name, pool_size=1)
+    dataset_lineage = DatasetLineage(backend=backend,
+                                     readiness_counters=SinkReadinessCounters() if args.readiness_counters else None)
+    try:
+        plan = dataset_lineage.sync_lineage_manifest(manifest, dry_run=args.command == "plan")
+        print(plan.render(args.max_lines))
+    finally:
+        dataset_lineage.close_db_con()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,267 @@
+from typing import Dict, List, Tuple
+
+import logging
+
+logger = logging.getLogger("dataset-readiness")
+logger.setLevel(logging.INFO)
+
+PairKey = Tuple[str, str]  # (sink_dataset_id, source_dataset_id)
+
+
+class DatasetSinkReadiness:
+    def __init__(self, sink_id: str, source_sink_rel_count: int, ready_source_count: int, pending_event_count: int):
+        """
+
+        :param sink_id: Sink dataset observer id.
+        :param source_sink_rel_count: Count of statically defined source/sink relationships
+        :param ready_source_count: Count of unique sources with events waiting for the sink
+        :param pending_event_count: Source run events waiting for the sink
+        """
+        self.sink_id = sink_id
+        self.source_sink_rel_count = source_sink_rel_count
+        self.ready_source_count = ready_source_count
+        self.pending_event_count = pending_event_count
+
+
+class ReadinessCounterReport:
+    def __init__(self, pair_diffs: List[Tuple[str, str, int, int]], sink_diffs: List[Tuple[str, Tuple, Tuple]],
+                 rebuilt: bool):
+        """
+
+        :param pair_diffs: (sink_id, source_id, expected pending count, counted pending count) of every
+                           (sink, source) counter that differs from the pending events. None for a missing row.
+        :param sink_diffs: (sink_id, expected, counted) of every sink counter that differs, the counts being
+                           (source_count, ready_source_count, pending_count). None for a missing row.
+        :param rebuilt: True if the counters were rebuilt from the pending events and rels.
+        """
+        self.pair_diffs = pair_diffs
+        self.sink_diffs = sink_diffs
+        self.rebuilt = rebuilt
+
+    def is_consistent(self) -> bool:
+        return len(self.pair_diffs) == 0 and len(self.sink_diffs) == 0
+
+
+class SinkReadinessCounters:
+    """
+    Materialized readiness counters: pending events per (sink, source) in dataset_sink_source_pending_count and
+    per sink the active source rels, distinct ready sources and pending events in dataset_sink_readiness. Quarantined
+    events are not counted.
+
+    Pass it to every DatasetLineage writing to the database. Finishes, sink starts and (dis)associations then
+    apply their changes to the counters in the same transaction, and dependency checks read the sink's counter
+    row instead of joining and counting its pending events. Turn it on with verify(conn, repair=True) (see
+    DatasetLineage.verify_readiness_counters), which builds the counters of the existing rels and events.
+
+    Counter rows are always updated in (sink, source) order, pair rows before sink rows, so writers touching the
+    same sinks do not deadlock. A sink's row is a hot spot when many of its sources finish at the same time.
+    """
+
+    def lookup(self, conn, sink_id:str) -> DatasetSinkReadiness:
+        """
+        :return: Counters of the sink. All zero if the sink has no counter row (never had a source rel).
+        """
+        cursor = conn.cursor()
+        cursor.execute("SELECT source_count, ready_source_count, pending_count FROM dataset_sink_readiness "
+                       "WHERE sink_dataset_id = %s", (sink_id,))
+        rows = cursor.fetchall()
+        cursor.close()
+        if len(rows) == 0:
+            return DatasetSinkReadiness(sink_id, 0, 0, 0)
+        return DatasetSinkReadiness(sink_id, rows[0][0], rows[0][1], rows[0][2])
+
+    def add_rel(self, conn, source_id:str, sink_id:str):
+        """
+        A source/sink rel was created.
+        """
+        cursor = conn.cursor()
+        cursor.execute("SELECT count(*) FROM dataset_sink_source_pending_count "
+                       "WHERE sink_dataset_id = %s AND source_dataset_id = %s", (sink_id, source_id))
+        if cursor.fetchall()[0][0] == 0:
+            cursor.execute("INSERT INTO dataset_sink_source_pending_count (sink_dataset_id, source_dataset_id) "
+                           "VALUES (%s, %s)", (sink_id, source_id))
+        cursor.execute("UPDATE dataset_sink_readiness SET source_count = source_count + 1 WHERE sink_dataset_id = %s",
+                       (sink_id,))
+        if cursor.rowcount == 0:
+            cursor.execute("INSERT INTO dataset_sink_readiness (sink_dataset_id, source_count) VALUES (%s, 1)",
+                           (sink_id,))
+        cursor.close()
+
+    def remove_rel(self, conn, source_id:str, sink_id:str):
+        """
+        A source/sink rel was terminated. Its pending events stay ready for the sink, like in the queue.
+        """
+        cursor = conn.cursor()
+        cursor.execute("UPDATE dataset_sink_readiness SET source_count = source_count - 1 WHERE sink_dataset_id = %s",
+                       (sink_id,))
+        cursor.close()
+
+    def change_rels(self, conn, added_rels:List[Tuple[str, str]], removed_rels:List[Tuple[str, str]],
+                    chunk_size:int = 500):
+        """
+        add_rel()/remove_rel() of many (source_id, sink_id) rels, with a few statements per chunk_size sinks.
+        """
+        sink_deltas: Dict[str, int] = {}
+        added_pairs = set()
+        for source_id, sink_id in added_rels:
+            sink_deltas[sink_id] = sink_deltas.get(sink_id, 0) + 1
+            added_pairs.add((sink_id, source_id))
+        for source_id, sink_id in removed_rels:
+            sink_deltas[sink_id] = sink_deltas.get(sink_id, 0) - 1
+        sink_ids = sorted(sink_deltas)
+
+        cursor = conn.cursor()
+        pairs = set()
+        sink_rows = set()
+        for i in range(0, len(sink_ids), chunk_size):
+            chunk = sink_ids[i:i + chunk_size]
+            in_list = ', '.join(['%s'] * len(chunk))
+            cursor.execute("SELECT sink_dataset_id, source_dataset_id FROM dataset_sink_source_pending_count "
+                           "WHERE sink_dataset_id IN (%s)" % in_list, chunk)
+            pairs.update((row[0], row[1]) for row in cursor.fetchall())
+            cursor.execute("SELECT sink_dataset_id FROM dataset_sink_readiness WHERE sink_dataset_id IN (%s)" % in_list,
+                           chunk)
+            sink_rows.update(row[0] for row in cursor.fetchall())
+
+        new_pairs = sorted(added_pairs - pairs)
+        if len(new_pairs) > 0:
+            cursor.executemany("INSERT INTO dataset_sink_source_pending_count (sink_dataset_id, source_dataset_id) "
+                               "VALUES (%s, %s)", new_pairs)
+        update_vals = [(sink_deltas[sink_id], sink_id) for sink_id in sink_ids
+                       if sink_id in sink_rows and sink_deltas[sink_id] != 0]
+        if len(update_vals) > 0:
+            cursor.executemany("UPDATE dataset_sink_readiness SET source_count = source_count + %s "
+                               "WHERE sink_dataset_id = %s", update_vals)
+        # like remove_rel(), a sink without a counter row has no rel to remove
+        insert_vals = [(sink_id, sink_deltas[sink_id]) for sink_id in sink_ids
+                       if sink_id not in sink_rows and sink_deltas[sink_id] > 0]
+        if len(insert_vals) > 0:
+            cursor.executemany("INSERT INTO dataset_sink_readiness (sink_dataset_id, source_count) VALUES (%s, %s)",
+                               insert_vals)
+        cursor.close()
+
+    def apply(self, conn, pending_deltas:Dict[PairKey, int]):
+        """
+        Events were queued (positive delta) or consumed (negative delta) for these (sink, source) pairs.
+        """
+        pending_deltas = {key: delta for key, delta in pending_deltas.items() if delta != 0}
+        if len(pending_deltas) == 0:
+            return
+        keys = sorted(pending_deltas)
+
+        cursor = conn.cursor()
+        cursor.executemany("UPDATE dataset_sink_source_pending_count SET pending_count = pending_count + %s "
+                           "WHERE sink_dataset_id = %s AND source_dataset_id = %s",
+                           [(pending_deltas[key],) + key for key in keys])
+
+        # the pairs are locked by this transaction now, their counts tell which ones became (un)ready
+        sink_ids = sorted(set(key[0] for key in keys))
+        source_ids = sorted(set(key[1] for key in keys))
+        cursor.execute("SELECT sink_dataset_id, source_dataset_id, pending_count FROM dataset_sink_source_pending_count "
+                       "WHERE sink_dataset_id IN (%s) AND source_dataset_id IN (%s)" %
+                       (', '.join(['%s'] * len(sink_ids)), ', '.join(['%s'] * len(source_ids))),
+                       sink_ids + source_ids)
+        counts = {(row[0], row[1]): row[2] for row in cursor.fetchall()}
+
+        sink_deltas: Dict[str, List[int]] = {}
+        for key in keys:
+            delta = pending_deltas[key]
+            count = counts.get(key)
+            if count is None:
+                logger.warning("No readiness counter for sink %s source %s, verify the counters", key[0], key[1])
+                continue
+            sink_delta = sink_deltas.setdefault(key[0], [0, 0])
+            sink_delta[1] += delta
+            if delta > 0 and count == delta:
+                sink_delta[0] += 1  # first pending event of the source
+            elif delta < 0 and count == 0:
+                sink_delta[0] -= 1  # last pending event of the source consumed
+
+        cursor.executemany("UPDATE dataset_sink_readiness SET ready_source_count = ready_source_count + %s, "
+                           "pending_count = pending_count + %s WHERE sink_dataset_id = %s",
+                           [(ready_delta, pending_delta, sink_id)
+                            for sink_id, (ready_delta, pending_delta) in sorted(sink_deltas.items())])
+        cursor.close()
+
+    def verify(self, conn, max_datetime:str, repair:bool = False) -> ReadinessCounterReport:
+        """
+        Recount the counters from the pending events and the active rels and diff them against the tables. With
+        repair and differences found, the counter tables are rebuilt from a new recount in a second transaction. It
+        clears the counter rows first, so writers wait for the rebuild instead of updating rows it replaces.
+
+        :param max_datetime: terminated_dt of the active rels.
+        """
+        conn.start_transaction()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT sink_dataset_id, source_dataset_id, pending_count "
+                           "FROM dataset_sink_source_pending_count")
+            counted_pairs = {(row[0], row[1]): row[2] for row in cursor.fetchall()}
+            cursor.execute("SELECT sink_dataset_id, source_count, ready_source_count, pending_count "
+                           "FROM dataset_sink_readiness")
+            counted_sinks = {row[0]: (row[1], row[2], row[3]) for row in cursor.fetchall()}
+            expected_pairs, expected_sinks = self.__recount(cursor, max_datetime)
+            cursor.close()
+            conn.commit()
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+
+        pair_diffs = []
+        for key in sorted(set(expected_pairs) | set(counted_pairs)):
+            expected, counted = expected_pairs.get(key), counted_pairs.get(key)
+            # a pair row left behind by a terminated rel is fine once its events were consumed
+            if expected != counted and not (expected is None and counted == 0):
+                pair_diffs.append(key + (expected, counted))
+        sink_diffs = []
+        for sink_id in sorted(set(expected_sinks) | set(counted_sinks)):
+            expected, counted = expected_sinks.get(sink_id), counted_sinks.get(sink_id)
+            if expected != counted and not (expected is None and counted == (0, 0, 0)):
+                sink_diffs.append((sink_id, expected, counted))
+
+        rebuilt = False
+        if repair and (len(pair_diffs) > 0 or len(sink_diffs) > 0):
+            self.__rebuild(conn, max_datetime)
+            rebuilt = True
+        return ReadinessCounterReport(pair_diffs, sink_diffs, rebuilt)
+
+    def __rebuild(self, conn, max_datetime:str):
+        conn.start_transaction()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM dataset_sink_source_pending_count")
+            cursor.execute("DELETE FROM dataset_sink_readiness")
+            expected_pairs, expected_sinks = self.__recount(cursor, max_datetime)
+            if len(expected_pairs) > 0:
+                cursor.executemany("INSERT INTO dataset_sink_source_pending_count "
+                                   "(sink_dataset_id, source_dataset_id, pending_count) VALUES (%s, %s, %s)",
+                                   [key + (count,) for key, count in sorted(expected_pairs.items())])
+            if len(expected_sinks) > 0:
+                cursor.executemany("INSERT INTO dataset_sink_readiness "
+                                   "(sink_dataset_id, source_count, ready_source_count, pending_count) "
+                                   "VALUES (%s, %s, %s, %s)",
+                                   [(sink_id,) + counts for sink_id, counts in sorted(expected_sinks.items())])
+            cursor.close()
+            conn.commit()
+            logger.info("Rebuilt readiness counters of %d sinks", len(expected_sinks))
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+
+    @staticmethod
+    def __recount(cursor, max_datetime:str) -> Tuple[Dict[PairKey, int], Dict[str, Tuple[int, int, int]]]:
+        pair_counts: Dict[PairKey, int] = {}
+        sink_counts: Dict[str, List[int]] = {}
+        cursor.execute("SELECT sink_dataset_id, source_dataset_id FROM dataset_source_to_sink_meta_rel "
+                       "WHERE terminated_dt = %s", (max_datetime,))
+        for sink_id, source_id in cursor.fetchall():
+            pair_counts[(sink_id, source_id)] = 0
+            sink_counts.setdefault(sink_id, [0, 0, 0])[0] += 1
+        cursor.execute("SELECT sink_dataset_id, source_dataset_id, count(*) FROM dataset_source_sink_pending_event "
+                       "WHERE quarantined_dt IS NULL GROUP BY sink_dataset_id, source_dataset_id")
+        for sink_id, source_id, count in cursor.fetchall():
+            pair_counts[(sink_id, source_id)] = count
+            counts = sink_counts.setdefault(sink_id, [0, 0, 0])
+            counts[1] += 1
+            counts[2] += count
+        return pair_counts, {sink_id: tuple(counts) for sink_id, counts in sink_counts.items()}
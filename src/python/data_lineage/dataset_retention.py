@@ -0,0 +1,217 @@
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Tuple
+
+from .dataset_exceptions import ConfigValidationException
+from .db_layer import parse_datetime, to_datetime
+
+import logging
+
+logger = logging.getLogger("dataset-retention")
+logger.setLevel(logging.INFO)
+
+# finalized runs: 0 error, 3 success, 4 cleared-orphan. Ready/started runs are never purged.
+FINAL_RUN_STATUSES = (0, 3, 4)
+
+# run ids per DELETE ... IN list of a batch
+DELETE_CHUNK_SIZE = 100
+
+ROLLUP_COLUMNS = "dataset_observer_id, run_day, run_count, error_count, success_count, cleared_count, " \
+                 "record_count, p50_duration_sec, p95_duration_sec"
+
+# Runs that must stay: the latest success of each observer (the last good state of the dataset) and source runs
+# with events still waiting for a sink.
+KEPT_RUN_FILTER = """
+    AND NOT EXISTS (SELECT 1 FROM dataset_source_sink_pending_event as qu WHERE qu.source_run_id = run.run_id)
+    AND (run.status <> 3 OR EXISTS (SELECT 1 FROM dataset_observer_run as later
+                                    WHERE later.dataset_observer_id = run.dataset_observer_id
+                                      AND later.status = 3 AND later.start_dt > run.start_dt))
+    """
+
+
+class RetentionResult:
+    def __init__(self, purged_count: int, rollup_count: int, batch_count: int, complete: bool, elapsed_sec: float):
+        """
+
+        :param purged_count: Runs rolled up and deleted by this call.
+        :param rollup_count: Daily rollup rows created or updated.
+        :param batch_count: Batches (transactions) committed.
+        :param complete: True if no run older than the retention window is left to purge.
+        :param elapsed_sec: Wall time of the call, including rate limit pauses.
+        """
+        self.purged_count = purged_count
+        self.rollup_count = rollup_count
+        self.batch_count = batch_count
+        self.complete = complete
+        self.elapsed_sec = elapsed_sec
+
+
+class DatasetRunRollup:
+    def __init__(self, dataset_observer_id: str, run_day: date, run_count: int, error_count: int, success_count: int,
+                 cleared_count: int, record_count: int, p50_duration_sec: float, p95_duration_sec: float):
+        """
+
+        :param run_day: Day the runs started on.
+        :param run_count: Runs rolled up for the day.
+        :param error_count: Runs finished with status error.
+        :param success_count: Runs finished with status success.
+        :param cleared_count: Orphaned runs that were cleared.
+        :param record_count: Sum of the runs' record_count.
+        :param p50_duration_sec: Median duration (start to end) of the runs.
+        :param p95_duration_sec: 95th percentile duration of the runs.
+        """
+        self.dataset_observer_id = dataset_observer_id
+        self.run_day = run_day
+        self.run_count = run_count
+        self.error_count = error_count
+        self.success_count = success_count
+        self.cleared_count = cleared_count
+        self.record_count = record_count
+        self.p50_duration_sec = p50_duration_sec
+        self.p95_duration_sec = p95_duration_sec
+
+
+def rollup_from_row(row) -> DatasetRunRollup:
+    """
+    DatasetRunRollup from a dataset_observer_run_daily row selected with ROLLUP_COLUMNS.
+    """
+    run_day = row[1]
+    if isinstance(run_day, datetime):
+        run_day = run_day.date()
+    elif not isinstance(run_day, date):
+        run_day = parse_datetime(str(run_day)[:10]).date()
+    return DatasetRunRollup(dataset_observer_id=row[0], run_day=run_day, run_count=row[2], error_count=row[3],
+                            success_count=row[4], cleared_count=row[5], record_count=row[6],
+                            p50_duration_sec=row[7], p95_duration_sec=row[8])
+
+
+def percentile(sorted_vals: List[float], pct: float) -> float:
+    """
+    Nearest rank percentile of already sorted values. None for no values.
+    """
+    if len(sorted_vals) == 0:
+        return None
+    rank = max(1, int(-(-pct * len(sorted_vals) // 100)))
+    return sorted_vals[rank - 1]
+
+
+class RunHistoryRetention:
+    """
+    Keeps dataset_observer_run bounded. Finalized runs that started before the retention window are collapsed into
+    per observer, per day rows of dataset_observer_run_daily (counts by status, total record_count, p50/p95
+    duration) and then deleted.
+
+    Work is done in batches of at most batch_size runs, oldest first. The rollups of a batch and the delete of its
+    runs commit together, so a job that dies never counts a run twice. An (observer, day) group larger than a batch
+    is added to its rollup row batch by batch. The latest successful run of each observer and runs still
+    referenced by pending events are kept. They are rolled into their day's row once they are purged by a
+    later job. They then add to the day's counts but not to its duration percentiles.
+
+    Run it with DatasetLineage.purge_run_history().
+    """
+
+    def __init__(self, retention_days:int = 90, batch_size:int = 500, max_rows_per_sec:float = None):
+        """
+        :param retention_days: Runs that started before midnight retention_days ago are purged.
+        :param batch_size: Most runs rolled up and deleted per batch (transaction).
+        :param max_rows_per_sec: Rate limit. Pauses between batches keep the average at or below it. None runs the
+                                 batches back to back.
+        """
+        if batch_size < 1:
+            raise ConfigValidationException("batch_size must be at least 1")
+        if max_rows_per_sec is not None and max_rows_per_sec <= 0:
+            raise ConfigValidationException("max_rows_per_sec must be positive")
+
+        self.retention_days = retention_days
+        self.batch_size = batch_size
+        self.max_rows_per_sec = max_rows_per_sec
+
+    def cutoff_dt(self, now:datetime = None) -> datetime:
+        now = now if now is not None else datetime.now()
+        return datetime.combine(now.date() - timedelta(days=self.retention_days), datetime.min.time())
+
+    def pause_sec(self, purged_count:int, batch_sec:float) -> float:
+        """
+        How long to pause after a batch that purged purged_count runs in batch_sec to stay within the rate limit.
+        """
+        if self.max_rows_per_sec is None:
+            return 0.0
+        return max(0.0, purged_count / self.max_rows_per_sec - batch_sec)
+
+    def purge_batch(self, conn, now:datetime = None) -> Tuple[int, int, bool]:
+        """
+        Roll up and delete the next batch of at most batch_size runs, oldest first, in one transaction.
+
+        :return: (runs purged, rollup rows written, True if nothing is left to purge)
+        """
+        now = now if now is not None else datetime.now()
+        cutoff_dt = self.cutoff_dt(now)
+        status_params = ', '.join(['%s'] * len(FINAL_RUN_STATUSES))
+
+        conn.start_transaction()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT run.run_id, run.status, run.start_dt, run.end_dt, run.record_count, "
+                           "run.dataset_observer_id FROM dataset_observer_run as run "
+                           "WHERE run.start_dt < %s AND run.status IN (" + status_params + ") " + KEPT_RUN_FILTER +
+                           "ORDER BY run.start_dt, run.run_id LIMIT %d" % self.batch_size,
+                           (cutoff_dt,) + FINAL_RUN_STATUSES)
+            runs = cursor.fetchall()
+            complete = len(runs) < self.batch_size
+
+            groups: Dict[Tuple[str, date], List[Tuple]] = {}
+            for run in runs:
+                groups.setdefault((run[5], to_datetime(run[2]).date()), []).append(run[:5])
+            for (dataset_observer_id, run_day), group_runs in sorted(groups.items()):
+                self.__write_rollup(cursor, dataset_observer_id, run_day, group_runs, cutoff_dt, now)
+
+            purged_count = 0
+            run_ids = [run[0] for run in runs]
+            for i in range(0, len(run_ids), DELETE_CHUNK_SIZE):
+                chunk = run_ids[i:i + DELETE_CHUNK_SIZE]
+                cursor.execute("DELETE FROM dataset_observer_run WHERE run_id IN (%s)" % ', '.join(['%s'] * len(chunk)),
+                               chunk)
+                purged_count += cursor.rowcount
+            cursor.close()
+
+            conn.commit()
+            logger.debug("Purged %d runs into %d daily rollups, complete: %s", purged_count, len(groups), complete)
+            return purged_count, len(groups), complete
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+
+    @staticmethod
+    def __write_rollup(cursor, dataset_observer_id:str, run_day:date, runs:List[Tuple], cutoff_dt:datetime,
+                       now:datetime):
+        """
+        Adds the runs to the (observer, day) rollup. The batch that creates the row takes the duration percentiles
+        from all the day's runs left to purge, so a day purged over several batches still gets them.
+        """
+        status_counts: Dict[int, int] = {}
+        record_count = 0
+        for run_id, status, start_dt, end_dt, run_record_count in runs:
+            status_counts[status] = status_counts.get(status, 0) + 1
+            record_count += run_record_count or 0
+
+        counts = (len(runs), status_counts.get(0, 0), status_counts.get(3, 0), status_counts.get(4, 0), record_count)
+        cursor.execute("UPDATE dataset_observer_run_daily SET run_count=run_count + %s, error_count=error_count + %s, "
+                       "success_count=success_count + %s, cleared_count=cleared_count + %s, "
+                       "record_count=record_count + %s, updated_dt=%s "
+                       "WHERE dataset_observer_id = %s AND run_day = %s",
+                       counts + (now, dataset_observer_id, run_day))
+        if cursor.rowcount > 0:
+            return
+
+        day_start = datetime.combine(run_day, datetime.min.time())
+        cursor.execute("SELECT run.start_dt, run.end_dt FROM dataset_observer_run as run "
+                       "WHERE run.dataset_observer_id = %s AND run.start_dt >= %s AND run.start_dt < %s "
+                       "AND run.end_dt IS NOT NULL AND run.status IN (" +
+                       ', '.join(['%s'] * len(FINAL_RUN_STATUSES)) + ") " + KEPT_RUN_FILTER,
+                       (dataset_observer_id, day_start, min(day_start + timedelta(days=1), cutoff_dt))
+                       + FINAL_RUN_STATUSES)
+        durations = sorted((to_datetime(end_dt) - to_datetime(start_dt)).total_seconds()
+                           for start_dt, end_dt in cursor.fetchall())
+        cursor.execute("INSERT INTO dataset_observer_run_daily (" + ROLLUP_COLUMNS + ", updated_dt) "
+                       "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)",
+                       (dataset_observer_id, run_day) + counts +
+                       (percentile(durations, 50), percentile(durations, 95), now))
@@ -0,0 +1,238 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Set
+
+from .dataset_lineage_mgmt import DatasetLineage
+from .dataset_events import RUN_STARTED, RUN_FINISHED
+from .dataset_exceptions import ConfigValidationException, AlreadyActiveException, DependencyException
+from .dataset_structs import DatasetStartResult, DatasetFetchSummary, DatasetRunStartedEvent, DatasetRunFinishedEvent
+
+import logging
+
+logger = logging.getLogger("dataset-scheduler")
+logger.setLevel(logging.INFO)
+
+TRIGGER_DEPENDENCY_CHECKS = ('any', 'all', 'source_ids')
+
+
+class _SinkTrigger:
+    def __init__(self, sink_id:str, dependency_check:str, specific_sources:Set[str]):
+        self.sink_id = sink_id
+        self.dependency_check = dependency_check
+        self.specific_sources = specific_sources
+        self.source_sink_rel_count = 0
+        self.ready_runs: Dict[str, str] = {}  # pending source run id -> source id
+        self.consumed_runs: Set[str] = set()  # consumed before their finish event arrived
+        self.active = False  # the sink has a ready/started run
+        self.finished_run_id = None  # last run of the sink seen finishing
+        self.launching = False
+
+    def started(self, run_id:str):
+        # the finish event of the run may overtake its start event
+        if run_id != self.finished_run_id:
+            self.active = True
+
+    def is_ready(self) -> bool:
+        if len(self.ready_runs) == 0:
+            return False
+        if self.dependency_check == 'any':
+            return True
+        ready_source_ids = set(self.ready_runs.values())
+        if self.dependency_check == 'all':
+            return len(ready_source_ids) >= self.source_sink_rel_count
+        return len(ready_source_ids & self.specific_sources) > 0
+
+
+class DependencyTriggerScheduler:
+    """
+    Starts sinks as soon as their sources satisfy their dependency rule and hands the started runs to a launcher.
+
+    The scheduler keeps the pending source runs of every watched sink in memory. It follows the run lifecycle
+    events of the DatasetLineage (its event_bus): a finished source run is added to the sinks it queued events for,
+    so a finish costs work in the number of its sinks, not a readiness query per downstream sink. A sink run that
+    starts (launched here or elsewhere in the process) removes the source runs it consumed, and the sink is not
+    launched again until that run finished.
+
+    A sink that becomes ready is launched exactly once: the scheduler starts it with
+    DatasetLineage.start_dataset_observer_run_with_id() and calls launcher(DatasetStartResult) on one of
+    max_concurrent threads. The launcher runs (or submits) the job and finishes the run; if it raises, the run is
+    finished as 'error'. Launches beyond max_concurrent wait for a free thread.
+
+    Finishes in other processes are not seen. Call resync() periodically to reload the watched sinks from the
+    database if other processes finish sources or start sinks, or after associations changed.
+    """
+
+    def __init__(self, dataset_lineage:DatasetLineage, launcher:Callable[[DatasetStartResult], None],
+                 max_concurrent:int = 4):
+        """
+        :param dataset_lineage: Used to read readiness and start the sinks. Its event_bus drives the scheduler.
+        :param launcher: Called with the DatasetStartResult of every sink run the scheduler started.
+        :param max_concurrent: Most launches (start and launcher call) running at the same time.
+        """
+        if max_concurrent < 1:
+            raise ConfigValidationException("max_concurrent must be at least 1")
+
+        self.dataset_lineage = dataset_lineage
+        self.launcher = launcher
+        self.max_concurrent = max_concurrent
+        self.launch_count = 0
+        self.launch_error_count = 0
+        self._lock = threading.Lock()
+        self._sinks: Dict[str, _SinkTrigger] = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix="dataset-scheduler")
+
+        self.dataset_lineage.event_bus.subscribe(RUN_FINISHED, self.__run_finished)
+        self.dataset_lineage.event_bus.subscribe(RUN_STARTED, self.__run_started)
+
+    def watch_sink(self, sink_id:str, dependency_check:str = 'all', specific_sources:List[str] = None):
+        """
+        Launch the sink whenever its ready sources satisfy dependency_check. Loads its pending source runs with one
+        readiness query and launches it right away if it is ready already.
+
+        :param dependency_check: {'any', 'all', 'source_ids'} Same rules as start_dataset_observer_run_with_id().
+        :param specific_sources: Source dataset ids for 'source_ids'.
+        """
+        if dependency_check not in TRIGGER_DEPENDENCY_CHECKS:
+            raise ConfigValidationException("Error: dependency_check argument not valid: %s" % (dependency_check))
+        if dependency_check == 'source_ids' and not specific_sources:
+            raise ConfigValidationException("Error: specific_sources required for dependency_check: %s"
+                                            % (dependency_check))
+
+        sink_trigger = _SinkTrigger(str(sink_id), dependency_check,
+                                    set(str(source_id) for source_id in specific_sources or []))
+        self.__load(sink_trigger, self.dataset_lineage.fetch_ready_dataset_sources_by_sink_id(sink_id))
+        if sink_trigger.source_sink_rel_count == 0:
+            raise ConfigValidationException("Sink %s has no sources to trigger it" % (sink_id))
+        with self._lock:
+            self._sinks[sink_trigger.sink_id] = sink_trigger
+            self.__evaluate(sink_trigger)
+
+    def unwatch_sink(self, sink_id:str) -> bool:
+        with self._lock:
+            return self._sinks.pop(str(sink_id), None) is not None
+
+    def resync(self):
+        """
+        Reloads the pending source runs, rel counts and active state of all watched sinks from the database and
+        launches the ones that are ready. One readiness query per sink.
+        """
+        with self._lock:
+            sink_triggers = list(self._sinks.values())
+        for sink_trigger in sink_triggers:
+            self.__resync(sink_trigger)
+
+    def close(self, wait:bool = True):
+        """
+        Stops following the run events. With wait, returns after the running launches returned.
+        """
+        self.dataset_lineage.event_bus.unsubscribe(RUN_FINISHED, self.__run_finished)
+        self.dataset_lineage.event_bus.unsubscribe(RUN_STARTED, self.__run_started)
+        self._executor.shutdown(wait=wait)
+
+    def __load(self, sink_trigger:_SinkTrigger, summary:DatasetFetchSummary):
+        sink_trigger.source_sink_rel_count = summary.source_sink_rel_count
+        sink_trigger.ready_runs = {str(queue.source_run_id): str(queue.source_dataset_id)
+                                   for queue in summary.dataset_queue_list}
+        sink_trigger.consumed_runs = set()
+        if not sink_trigger.launching:
+            sink_trigger.active = summary.orphan_sink
+
+    def __resync(self, sink_trigger:_SinkTrigger):
+        summary = self.dataset_lineage.fetch_ready_dataset_sources_by_sink_id(sink_trigger.sink_id)
+        with self._lock:
+            self.__load(sink_trigger, summary)
+            self.__evaluate(sink_trigger)
+
+    def __run_finished(self, event:DatasetRunFinishedEvent):
+        source_id = str(event.dataset_observer_id)
+        run_id = str(event.run_id)
+        with self._lock:
+            for sink_id in event.sink_id_list:
+                sink_trigger = self._sinks.get(str(sink_id))
+                if sink_trigger is None:
+                    continue
+                if run_id in sink_trigger.consumed_runs:
+                    sink_trigger.consumed_runs.discard(run_id)
+                    continue
+                sink_trigger.ready_runs[run_id] = source_id
+                self.__evaluate(sink_trigger)
+
+            # a run of a watched sink finished, it can be launched again
+            sink_trigger = self._sinks.get(source_id)
+            if sink_trigger is not None:
+                sink_trigger.finished_run_id = run_id
+                sink_trigger.consumed_runs = set()  # the finish events of the runs it consumed were out long ago
+                if not sink_trigger.launching:
+                    sink_trigger.active = False
+                    self.__evaluate(sink_trigger)
+
+    def __run_started(self, event:DatasetRunStartedEvent):
+        with self._lock:
+            sink_trigger = self._sinks.get(str(event.sink_id))
+            if sink_trigger is None:
+                return
+            if not sink_trigger.launching:
+                sink_trigger.started(str(event.run_id))
+            self.__consumed(sink_trigger, event.source_run_id_list)
+
+    def __consumed(self, sink_trigger:_SinkTrigger, source_run_id_list:List[str]):
+        for source_run_id in source_run_id_list:
+            source_run_id = str(source_run_id)
+            if sink_trigger.ready_runs.pop(source_run_id, None) is None:
+                # the start event overtook the finish event of the source run
+                sink_trigger.consumed_runs.add(source_run_id)
+
+    def __evaluate(self, sink_trigger:_SinkTrigger):
+        # called with the lock held
+        if sink_trigger.launching or sink_trigger.active or not sink_trigger.is_ready():
+            return
+        sink_trigger.launching = True
+        try:
+            self._executor.submit(self.__launch, sink_trigger)
+        except RuntimeError:
+            # closed
+            sink_trigger.launching = False
+
+    def __launch(self, sink_trigger:_SinkTrigger):
+        specific_sources = list(sink_trigger.specific_sources) if sink_trigger.dependency_check == 'source_ids' \
+            else None
+        try:
+            start_result = self.dataset_lineage.start_dataset_observer_run_with_id(
+                sink_trigger.sink_id, dependency_check=sink_trigger.dependency_check,
+                specific_sources=specific_sources)
+        except AlreadyActiveException:
+            with self._lock:
+                sink_trigger.launching = False
+                sink_trigger.active = True
+            return
+        except DependencyException:
+            # the sources were consumed or rels changed behind the scheduler's back
+            logger.info("Sink %s was not ready, reloading it", sink_trigger.sink_id)
+            with self._lock:
+                sink_trigger.launching = False
+                sink_trigger.active = True  # no launch before the reload
+            self.__resync(sink_trigger)
+            return
+        except Exception:
+            logger.exception("Could not start sink %s", sink_trigger.sink_id)
+            with self._lock:
+                self.launch_error_count += 1
+                sink_trigger.launching = False
+                sink_trigger.active = True  # wait for resync()
+            return
+
+        with self._lock:
+            sink_trigger.launching = False
+            sink_trigger.started(str(start_result.run_id))
+            for source_run_id in start_result.source_run_id_list:
+                # the start event removes them too
+                sink_trigger.ready_runs.pop(str(source_run_id), None)
+            self.launch_count += 1
+
+        try:
+            self.launcher(start_result)
+        except Exception:
+            with self._lock:
+                self.launch_error_count += 1
+            logger.exception("Launcher failed for sink %s run %s", sink_trigger.sink_id, start_result.run_id)
+            self.dataset_lineage.finish_dataset_observer_run(status="error", dataset_run_id=start_result.run_id)
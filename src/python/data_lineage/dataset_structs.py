@@ -32,8 +32,8 @@ class DatasetRun:
 
 class DatasetProperties:
     def __init__(self, dataset_process_id:str, zone:int, model_name:str, model_namespace:str,
-                 model_partition_keys:str = None, status:bool = None, description:str = None,
-                 created_dt:datetime = None, status_update_dt:datetime = None):
+                 model_partition_keys:str = None, status:int = None, description:str = None,
+                 created_dt:datetime = None, status_update_dt:datetime = None, observer_config:str = None):
         self.zone=zone
         self.dataset_process_id=dataset_process_id
         self.model_name=model_name
@@ -43,6 +43,7 @@ class DatasetProperties:
         self.status = status
         self.created_dt = created_dt
         self.status_update_dt = status_update_dt
+        self.observer_config = observer_config
 
 
 class DatasetQueue:
@@ -64,6 +65,7 @@ class DatasetQueue:
                  source_model_name: str,
                  source_model_namespace: str,
                  source_model_dataset_props: str,
+                 dataset_rel_id: str = None,
                  ):
         self.sink_dataset_id=sink_dataset_id
         self.source_dataset_id=source_dataset_id
@@ -84,6 +86,8 @@ class DatasetQueue:
         self.source_model_name = source_model_name
         self.source_model_namespace = source_model_namespace
         self.source_model_dataset_props = source_model_dataset_props
+        # source/sink rel the pending event was queued for
+        self.dataset_rel_id = dataset_rel_id
 
 class DatasetStartResult:
     def __init__(self, run_id, sink_id: str, dataset_queue_list: List[DatasetQueue], source_sink_rel_count: int,
@@ -126,3 +130,222 @@ class DatasetFetchSummary:
         self.source_run_idList = source_run_id_list
         self.orphan_sink = orphan_sink
 
+
+
+class DatasetFinishOutcome:
+    def __init__(self, dataset_run_id: str, finished: bool, dataset_observer_id: str = None,
+                 status: str = None, error: Exception = None):
+        """
+
+        :param dataset_run_id: Run id the finish was requested for.
+        :param finished: True if the run was finalized by this call.
+        :param dataset_observer_id: Observer the run belongs to (None if the run id was not found).
+        :param status: Requested finish status {'error', 'success'}
+        :param error: Why the run was not finished (same exception the single run finish would raise).
+        """
+        self.dataset_run_id = dataset_run_id
+        self.finished = finished
+        self.dataset_observer_id = dataset_observer_id
+        self.status = status
+        self.error = error
+
+
+class DatasetSkippedSink:
+    def __init__(self, sink_id: str, reason: str, source_sink_rel_count: int, ready_source_count: int):
+        """
+
+        :param sink_id: Sink dataset observer that was not started.
+        :param reason: 'disabled' observer is disabled/retired, 'active' sink already has an active or orphaned
+                       run, 'dependency' the dependency_check rule is not satisfied, 'consumed' a concurrent start of
+                       the sink consumed its ready sources first.
+        :param source_sink_rel_count: Count of statically defined source/sink relationships
+        :param ready_source_count: Count of unique sources that are ready to be consumed by this sink
+        """
+        self.sink_id = sink_id
+        self.reason = reason
+        self.source_sink_rel_count = source_sink_rel_count
+        self.ready_source_count = ready_source_count
+
+
+class DatasetZoneStartResult:
+    def __init__(self, start_result_list: List[DatasetStartResult], skipped_sink_list: List[DatasetSkippedSink]):
+        """
+
+        :param start_result_list: DatasetStartResult of every sink started.
+        :param skipped_sink_list: Sinks of the zone that were not started and why.
+        """
+        self.start_result_list = start_result_list
+        self.skipped_sink_list = skipped_sink_list
+
+
+class DatasetReadySink:
+    def __init__(self, sink_id: str, zone: int, model_name: str, model_namespace: str, model_dataset_props: str,
+                 observer_status: int, source_sink_rel_count: int, ready_source_count: int,
+                 oldest_source_ready_dt: datetime, orphan_sink: bool, observer_config: str = None):
+        """
+
+        :param sink_id: Sink dataset observer id.
+        :param source_sink_rel_count: Count of statically defined source/sink relationships
+        :param ready_source_count: Count of unique sources that are ready to be consumed by this sink
+        :param oldest_source_ready_dt: source_ready_dt of the oldest source run waiting for this sink
+        :param orphan_sink: Is sink currently in possible orphan/run state
+        :param observer_config: Static configuration of the sink observer
+        """
+        self.sink_id = sink_id
+        self.zone = zone
+        self.model_name = model_name
+        self.model_namespace = model_namespace
+        self.model_dataset_props = model_dataset_props
+        self.observer_status = observer_status
+        self.source_sink_rel_count = source_sink_rel_count
+        self.ready_source_count = ready_source_count
+        self.oldest_source_ready_dt = oldest_source_ready_dt
+        self.orphan_sink = orphan_sink
+        self.observer_config = observer_config
+
+
+class DatasetQueueEvent:
+    def __init__(self, dataset_rel_id: str, source_dataset_id: str, sink_dataset_id: str, source_run_id: str,
+                 sink_run_id: str, source_ready_dt: datetime, sink_start_dt: datetime, rerun_status: int,
+                 rerun_last_sink_run_id: str, archived: bool, quarantined_dt: datetime = None):
+        """
+
+        :param dataset_rel_id: Source/sink rel the event was queued for.
+        :param source_run_id: Source run that produced the event.
+        :param sink_run_id: Sink run that consumed the event. None for a pending event.
+        :param source_ready_dt: When the source run finished successfully.
+        :param sink_start_dt: When the sink run started (consumed the event).
+        :param archived: True if the event was read from the archive table.
+        :param quarantined_dt: When the pending event was quarantined (sinks skip it), None if it is not.
+        """
+        self.dataset_rel_id = dataset_rel_id
+        self.source_dataset_id = source_dataset_id
+        self.sink_dataset_id = sink_dataset_id
+        self.source_run_id = source_run_id
+        self.sink_run_id = sink_run_id
+        self.source_ready_dt = source_ready_dt
+        self.sink_start_dt = sink_start_dt
+        self.rerun_status = rerun_status
+        self.rerun_last_sink_run_id = rerun_last_sink_run_id
+        self.archived = archived
+        self.quarantined_dt = quarantined_dt
+
+
+class DatasetProvenanceRun:
+    def __init__(self, run_id: str, dataset_observer_id: str, model_name: str, model_namespace: str,
+                 model_zone_tag: int, model_dataset_props: str, status: int, batch_run_id: str, record_count: int,
+                 start_dt: datetime, end_dt: datetime, depth: int):
+        """
+
+        :param run_id: Run id.
+        :param dataset_observer_id: Observer of the run.
+        :param status: Run status. None (like the other run fields) if the run was purged by the run history retention.
+        :param batch_run_id: Batch data run id the run was finished with.
+        :param record_count: Record count the run was finished with.
+        :param depth: Hops from the traced run, 0 for the traced run. The shortest one if the run fed the traced run
+                      along several paths.
+        """
+        self.run_id = run_id
+        self.dataset_observer_id = dataset_observer_id
+        self.model_name = model_name
+        self.model_namespace = model_namespace
+        self.model_zone_tag = model_zone_tag
+        self.model_dataset_props = model_dataset_props
+        self.status = status
+        self.batch_run_id = batch_run_id
+        self.record_count = record_count
+        self.start_dt = start_dt
+        self.end_dt = end_dt
+        self.depth = depth
+        # source runs consumed by this run. A run that fed several runs of the tree is the same object under each.
+        self.source_runs: List['DatasetProvenanceRun'] = []
+
+    def upstream_runs(self) -> List['DatasetProvenanceRun']:
+        """
+        Every run below this one in the tree, once each, nearest first.
+        """
+        seen = {self.run_id}
+        runs = []
+        frontier = [self]
+        while len(frontier) > 0:
+            next_frontier = []
+            for run in frontier:
+                for source_run in run.source_runs:
+                    if source_run.run_id not in seen:
+                        seen.add(source_run.run_id)
+                        runs.append(source_run)
+                        next_frontier.append(source_run)
+            frontier = next_frontier
+        return runs
+
+
+class DatasetRunImpact:
+    def __init__(self, run: DatasetProvenanceRun, consumed_runs: List[DatasetProvenanceRun],
+                 pending_event_list: List[DatasetQueueEvent], quarantined_count: int):
+        """
+
+        :param run: The run analysed, depth 0.
+        :param consumed_runs: Every sink run that consumed it, directly or transitively, nearest first. depth is the
+                              hops from the analysed run and source_runs the runs of the impact it consumed.
+        :param pending_event_list: Pending events of the run and of the consumed runs: what the sinks would
+                                   consume next.
+        :param quarantined_count: Pending events quarantined by this call.
+        """
+        self.run = run
+        self.consumed_runs = consumed_runs
+        self.pending_event_list = pending_event_list
+        self.quarantined_count = quarantined_count
+
+    def sink_ids(self) -> Set[str]:
+        """
+        Sinks with an impacted run or an impacted pending event.
+        """
+        return set(run.dataset_observer_id for run in self.consumed_runs) | \
+            set(event.sink_dataset_id for event in self.pending_event_list)
+
+
+class DatasetRunStartedEvent:
+    def __init__(self, run_id: str, sink_id: str, source_id_list: Set[str], source_run_id_list: List[str],
+                 start_dt: datetime):
+        """
+
+        :param run_id: Run id of the started dataset.
+        :param sink_id: Dataset observer that was started.
+        :param source_id_list: Sources whose events the run consumed.
+        :param source_run_id_list: Source runs whose events the run consumed.
+        """
+        self.run_id = run_id
+        self.sink_id = sink_id
+        self.source_id_list = source_id_list
+        self.source_run_id_list = source_run_id_list
+        self.start_dt = start_dt
+
+
+class DatasetRunFinishedEvent:
+    def __init__(self, run_id: str, dataset_observer_id: str, status: str, sink_id_list: List[str],
+                 end_dt: datetime):
+        """
+
+        :param run_id: Run id that was finished.
+        :param dataset_observer_id: Observer the run belongs to.
+        :param status: {'error', 'success'}
+        :param sink_id_list: Downstream sinks events were queued for. Empty for an error finish.
+        """
+        self.run_id = run_id
+        self.dataset_observer_id = dataset_observer_id
+        self.status = status
+        self.sink_id_list = sink_id_list
+        self.end_dt = end_dt
+
+
+class DatasetSourcesEnqueuedEvent:
+    def __init__(self, sink_id_list: List[str], source_run_id_list: List[str], source_ready_dt: datetime):
+        """
+
+        :param sink_id_list: Sinks that have new source events ready to consume.
+        :param source_run_id_list: Successfully finished source runs the events were queued for.
+        :param source_ready_dt: When the source runs finished.
+        """
+        self.sink_id_list = sink_id_list
+        self.source_run_id_list = source_run_id_list
+        self.source_ready_dt = source_ready_dt
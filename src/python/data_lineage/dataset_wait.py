@@ -0,0 +1,157 @@
+import random
+import threading
+import time
+from typing import Callable, Dict, Iterable, List
+
+from .dataset_exceptions import ConfigValidationException
+from .dataset_structs import DatasetFetchSummary
+
+import logging
+
+logger = logging.getLogger("dataset-wait")
+logger.setLevel(logging.INFO)
+
+WAIT_DEPENDENCY_CHECKS = ('any', 'all', 'source_ids', 'source_run_ids')
+
+
+def sources_ready(summary:DatasetFetchSummary, dependency_check:str, specific_sources:List[str] = None) -> bool:
+    """
+    Whether the ready sources of a sink (fetched with dependency_check 'any') satisfy a dependency rule, the way
+    a sink start would check it. A sink without source rels is always ready.
+    """
+    if summary.source_sink_rel_count == 0:
+        return True
+    if dependency_check == 'any':
+        return len(summary.source_id_list) > 0
+    if dependency_check == 'all':
+        return len(summary.source_id_list) >= summary.source_sink_rel_count
+    if dependency_check == 'source_ids':
+        return any(source_id in summary.source_id_list for source_id in specific_sources)
+    return any(run_id in summary.source_run_idList for run_id in specific_sources)
+
+
+class _SinkWait:
+    def __init__(self, min_poll_sec:float):
+        self.waiter_count = 0
+        self.polling = False
+        self.summary: DatasetFetchSummary = None
+        self.generation = 0
+        self.poll_sec = min_poll_sec
+        self.next_poll_at = 0.0  # poll right away
+        self.woken = False
+
+
+class ReadySourcesWaiter:
+    """
+    Blocks callers until the ready sources of a sink satisfy their dependency rule, for
+    DatasetLineage.wait_for_ready_sources().
+
+    Callers waiting on the same sink share one poller: one of them runs the readiness query and every waiter checks
+    its own rule against the result. The poll interval starts at min_poll_sec and grows by backoff (with jitter) up
+    to max_poll_sec while the sink's ready sources do not change. DatasetLineage calls notify() after a successful
+    finish queued events for a sink, which polls it right away and resets the interval. So a finish in the same
+    process is seen at once, finishes in other processes within max_poll_sec.
+
+    Share one waiter between the DatasetLineage instances of a process that use the same database to coalesce all
+    their waits. Never share it between databases.
+    """
+
+    def __init__(self, min_poll_sec:float = 0.1, max_poll_sec:float = 30.0, backoff:float = 2.0):
+        """
+        :param min_poll_sec: Poll interval of a new wait and after a change or a wakeup.
+        :param max_poll_sec: Longest poll interval. Bounds how late a finish in another process is seen.
+        :param backoff: Factor the interval grows by after a poll that found nothing new.
+        """
+        if min_poll_sec <= 0 or max_poll_sec < min_poll_sec:
+            raise ConfigValidationException("Poll intervals must be positive and min_poll_sec <= max_poll_sec")
+        if backoff < 1:
+            raise ConfigValidationException("backoff must be at least 1")
+
+        self.min_poll_sec = min_poll_sec
+        self.max_poll_sec = max_poll_sec
+        self.backoff = backoff
+        self.poll_count = 0
+        self._cond = threading.Condition()
+        self._sinks: Dict[str, _SinkWait] = {}
+
+    def has_waiters(self) -> bool:
+        return len(self._sinks) > 0
+
+    def waiting_sinks(self) -> List[str]:
+        with self._cond:
+            return list(self._sinks.keys())
+
+    def notify(self, sink_ids:Iterable[str]):
+        """
+        Events were queued for these sinks: poll the ones being waited on now.
+        """
+        with self._cond:
+            woken = False
+            for sink_id in sink_ids:
+                sink_wait = self._sinks.get(sink_id)
+                if sink_wait is not None:
+                    sink_wait.woken = True
+                    sink_wait.next_poll_at = 0.0
+                    woken = True
+            if woken:
+                self._cond.notify_all()
+
+    def wait(self, sink_id:str, poll:Callable[[], DatasetFetchSummary], ready:Callable[[DatasetFetchSummary], bool],
+             timeout_sec:float) -> DatasetFetchSummary:
+        """
+        :param poll: Fetches the ready sources of the sink.
+        :param ready: The caller's dependency rule.
+        :return: The first summary the rule accepts. None if the timeout ran out first.
+        """
+        deadline = time.monotonic() + timeout_sec
+        with self._cond:
+            sink_wait = self._sinks.get(sink_id)
+            if sink_wait is None:
+                sink_wait = self._sinks[sink_id] = _SinkWait(self.min_poll_sec)
+            sink_wait.waiter_count += 1
+        try:
+            seen_generation = 0
+            while True:
+                with self._cond:
+                    while True:
+                        if sink_wait.generation != seen_generation:
+                            seen_generation = sink_wait.generation
+                            if ready(sink_wait.summary):
+                                return sink_wait.summary
+                        now = time.monotonic()
+                        if now >= deadline:
+                            return None
+                        if not sink_wait.polling and now >= sink_wait.next_poll_at:
+                            sink_wait.polling = True
+                            break
+                        # someone else polls, or not due yet
+                        wake_at = deadline if sink_wait.polling else min(deadline, sink_wait.next_poll_at)
+                        self._cond.wait(wake_at - now)
+
+                summary = None
+                try:
+                    summary = poll()
+                finally:
+                    with self._cond:
+                        sink_wait.polling = False
+                        if summary is not None:
+                            self.__polled(sink_wait, summary)
+                        self._cond.notify_all()
+        finally:
+            with self._cond:
+                sink_wait.waiter_count -= 1
+                if sink_wait.waiter_count == 0:
+                    del self._sinks[sink_id]
+
+    def __polled(self, sink_wait:_SinkWait, summary:DatasetFetchSummary):
+        self.poll_count += 1
+        changed = sink_wait.summary is None or \
+            set(sink_wait.summary.source_run_idList) != set(summary.source_run_idList)
+        if changed or sink_wait.woken:
+            sink_wait.poll_sec = self.min_poll_sec
+        else:
+            sink_wait.poll_sec = min(self.max_poll_sec, sink_wait.poll_sec * self.backoff)
+        sink_wait.woken = False
+        sink_wait.summary = summary
+        sink_wait.generation += 1
+        sink_wait.next_poll_at = time.monotonic() + sink_wait.poll_sec * random.uniform(0.8, 1.2)
@@ -0,0 +1,55 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable
+
+from .dataset_lineage_mgmt import DatasetLineage
+from .dataset_exceptions import ConfigValidationException
+
+import logging
+
+logger = logging.getLogger("dataset-workers")
+logger.setLevel(logging.INFO)
+
+# the DatasetLineage of this worker process, built by init_worker_dataset_lineage()
+_worker_lineage: DatasetLineage = None
+
+
+def init_worker_dataset_lineage(factory:Callable[[], DatasetLineage], warm_up:bool = True):
+    """
+    Process pool initializer. Builds the worker's DatasetLineage with factory (once per process) and, by default,
+    opens its connection and loads its caches before the first job arrives.
+
+    :param factory: Module level function (or functools.partial) returning a DatasetLineage. It must be picklable
+                    for the spawn/forkserver start methods.
+    :param warm_up: Call DatasetLineage.warm_up() on the new instance.
+    """
+    global _worker_lineage
+    _worker_lineage = factory()
+    if warm_up:
+        _worker_lineage.warm_up()
+    logger.debug("DatasetLineage ready in worker process %s", os.getpid())
+
+
+def get_worker_dataset_lineage() -> DatasetLineage:
+    """
+    The DatasetLineage of the current worker process.
+    """
+    if _worker_lineage is None:
+        raise ConfigValidationException("No DatasetLineage in this process, start the process pool with "
+                                        "init_worker_dataset_lineage as its initializer")
+    return _worker_lineage
+
+
+def dataset_lineage_process_pool(factory:Callable[[], DatasetLineage], max_workers:int = None,
+                                 warm_up:bool = True, mp_context = None) -> ProcessPoolExecutor:
+    """
+    ProcessPoolExecutor whose workers each own a pre-warmed DatasetLineage. Jobs get it with
+    get_worker_dataset_lineage().
+
+    :param factory: See init_worker_dataset_lineage().
+    :param max_workers: Defaults to the ProcessPoolExecutor default.
+    :param warm_up: See init_worker_dataset_lineage().
+    :param mp_context: Optional multiprocessing context (start method).
+    """
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=mp_context,
+                               initializer=init_worker_dataset_lineage, initargs=(factory, warm_up))
@@ -1,6 +1,23 @@
-import mysql.connector as dbapi_connector
-# from mysql.connector import Error as dbapi_error
-from  mysql.connector.pooling import MySQLConnectionPool as dbapi_pool
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Callable, Dict, List, Tuple
+
+try:
+    import mysql.connector as dbapi_connector
+    # from mysql.connector import Error as dbapi_error
+    from mysql.connector.pooling import MySQLConnectionPool as dbapi_pool
+except ImportError:  # mysql driver is only needed by the MySQL backend
+    dbapi_connector = None
+    dbapi_pool = None
+
+from .dataset_exceptions import ConnectionPoolTimeoutException, ConfigValidationException
+from .dataset_instrumentation import LatencyHistogram
+from .uuid_util import HexId
 
 import logging
 
@@ -8,19 +25,340 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("dataset-db")
 logger.setLevel(logging.INFO)
 
+# Schema shipped at the root of this repo (src/python/data_lineage -> ../../../schema)
+DEFAULT_SCHEMA_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..',
+                                                   'schema', 'dataset_observer_schema.sql'))
 
-class DBManager:
+# guid hex ids are CHAR(32) in the shipped schema, BINARY(16) in a binary id database
+HEX_ID_TYPE = 'CHAR(32)'
+BINARY_ID_TYPE = 'BINARY(16)'
+
+
+def binary_id_schema(schema_sql:str) -> str:
+    """
+    The schema with every id column stored as BINARY(16) instead of its CHAR(32) hex string.
+    """
+    return schema_sql.replace(HEX_ID_TYPE, BINARY_ID_TYPE)
+
+
+def after_key_condition(columns:List[str], key) -> Tuple[str, list]:
+    """
+    Keyset paging condition "(columns) > (key)" spelled out as "a >= x AND (a > x OR (a = x AND b > y) ...)". MySQL
+    does not use an index range for the row constructor comparison and would scan the index from its start.
+
+    :return: (condition, its input values)
+    """
+    terms = []
+    input_vals = [key[0]]
+    for i, col in enumerate(columns):
+        terms.append("(" + ' AND '.join([prev_col + " = %s" for prev_col in columns[:i]] + [col + " > %s"]) + ")")
+        input_vals += list(key[:i + 1])
+    return "(" + columns[0] + " >= %s AND (" + ' OR '.join(terms) + "))", input_vals
+
+
+class DBBackend:
+    """
+    Storage engine sitting behind DatasetLineage. A backend hands out connections that follow the
+    mysql.connector API surface used by DatasetLineage (cursor(), start_transaction(), commit(),
+    rollback(), in_transaction, autocommit) and takes %s style parameters.
+
+    A connection handed out by get_con() belongs to the calling thread until release_con(), so concurrent
+    DatasetLineage calls never share a connection (or its transaction). Backends built on a single shared
+    connection serialize callers between get_con() and release_con().
+    """
+    name = None
+    # ids stored as BINARY(16). DatasetLineage then converts them at its boundary, callers still see hex strings.
+    binary_ids = False
+
+    def get_con(self):
+        raise NotImplementedError
+
+    def release_con(self, conn):
+        raise NotImplementedError
+
+    def close(self):
+        raise NotImplementedError
+
+    def get_max_datetime_to_sec(self) -> str:
+        return '9999-12-31 23:59:59.0'
+
+    def get_skip_duplicate_clause(self, column:str) -> str:
+        """
+        Clause ending an INSERT ... VALUES so rows colliding with an existing primary key are skipped instead of
+        failing the statement. Any other error still fails it. column is a column of the table, left as it is.
+        """
+        return 'ON DUPLICATE KEY UPDATE %s = %s' % (column, column)
+
+    def get_lock_rows_clause(self) -> str:
+        """
+        Clause ending a SELECT so the rows it reads stay locked, for the rest of the transaction, against writers
+        of other transactions.
+        """
+        return 'FOR UPDATE'
+
+    def pool_stats(self) -> Dict[str, float]:
+        """
+        Stats of the backend's internal connection pool. Empty if it does not pool connections.
+        """
+        return {}
+
+    def after_fork(self):
+        """
+        Called (by DBManager) in a child process before its first get_con(). Connections inherited from the
+        parent must be dropped, not closed: closing them would end the parent's sessions.
+        """
+        pass
+
+    def table_sizes(self, conn) -> Dict[str, Tuple[int, int]]:
+        """
+        {table name: (data bytes, index bytes)} of the lineage database. Empty if the engine does not report it.
+        """
+        return {}
+
+    def cache_read_stats(self, conn) -> Tuple[int, int]:
+        """
+        (page read requests, reads that missed the cache and went to disk), counted since the engine started.
+        None if the engine does not report them.
+        """
+        return None
+
+
+class ConnectionPool:
+    """
+    Bounded pool of db connections.
+
+    Connections are not pinged on every checkout: one idle for longer than validate_idle_sec is validated before it
+    is handed out, and one older than max_lifetime_sec is closed and replaced. Failed connects are retried with
+    exponential backoff. Checkouts block (up to checkout_timeout_sec) while max_size connections are in use.
+    """
 
     def __init__(self,
-                 db_con:dbapi_connector = None,
-                 db_pool:dbapi_pool = None,
-                 db_host:str = None, db_user:str = None, db_password:str = None, db_name:str = None):
+                 connect:Callable,
+                 validate:Callable = None,
+                 max_size:int = 8,
+                 checkout_timeout_sec:float = 30,
+                 validate_idle_sec:float = 30,
+                 max_lifetime_sec:float = 3600,
+                 reconnect_attempts:int = 5,
+                 reconnect_backoff_sec:float = 0.1,
+                 max_reconnect_backoff_sec:float = 5):
+        """
+        :param connect: Creates a new connection.
+        :param validate: Returns True if a connection is still usable (e.g. ping). None skips validation.
+        :param max_size: Max connections open at the same time.
+        :param checkout_timeout_sec: How long get_con() waits for a free connection before raising
+                                     ConnectionPoolTimeoutException.
+        :param validate_idle_sec: Connections idle for longer than this are validated on checkout.
+        :param max_lifetime_sec: Connections older than this are recycled. None keeps them open.
+        :param reconnect_attempts: Connect attempts before giving up.
+        :param reconnect_backoff_sec: First retry delay, doubled on every failed attempt.
+        :param max_reconnect_backoff_sec: Max retry delay.
+        """
+        self.connect = connect
+        self.validate = validate
+        self.max_size = max_size
+        self.checkout_timeout_sec = checkout_timeout_sec
+        self.validate_idle_sec = validate_idle_sec
+        self.max_lifetime_sec = max_lifetime_sec
+        self.reconnect_attempts = reconnect_attempts
+        self.reconnect_backoff_sec = reconnect_backoff_sec
+        self.max_reconnect_backoff_sec = max_reconnect_backoff_sec
+
+        self._cond = threading.Condition()
+        self._idle = []  # (conn, created at, last used), most recently used last
+        self._in_use: Dict[int, float] = {}  # id(conn) -> created at
+        self._next_slot = 0
+        self._closed = False
+
+        self.checkouts = 0
+        self.waits = 0
+        self.timeouts = 0
+        self.created = 0
+        self.recycled = 0
+        self.validations = 0
+        self.validation_failures = 0
+        self.connect_failures = 0
+        self.wait_time_us = LatencyHistogram()
+
+    @property
+    def size(self) -> int:
+        return len(self._idle) + len(self._in_use)
+
+    def stats(self) -> Dict[str, float]:
+        with self._cond:
+            return {
+                "size": self.size,
+                "in_use": len(self._in_use),
+                "idle": len(self._idle),
+                "checkouts": self.checkouts,
+                "waits": self.waits,
+                "timeouts": self.timeouts,
+                "created": self.created,
+                "recycled": self.recycled,
+                "validations": self.validations,
+                "validation_failures": self.validation_failures,
+                "connect_failures": self.connect_failures,
+                "wait_time_us_p50": self.wait_time_us.percentile(50) or 0,
+                "wait_time_us_p99": self.wait_time_us.percentile(99) or 0,
+                "wait_time_us_max": self.wait_time_us.max or 0
+            }
+
+    def get_con(self):
+        started = time.monotonic()
+        waited = False
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise ConnectionPoolTimeoutException("Connection pool is closed")
+                if len(self._idle) > 0:
+                    conn, created_at, last_used = self._idle.pop()
+                    slot = id(conn)
+                    self._in_use[slot] = created_at
+                    break
+                if self.size < self.max_size:
+                    conn = None
+                    self._next_slot -= 1  # placeholder slot, held while connecting outside the lock
+                    slot = self._next_slot
+                    self._in_use[slot] = 0
+                    break
+
+                remaining = self.checkout_timeout_sec - (time.monotonic() - started)
+                if remaining <= 0:
+                    self.timeouts += 1
+                    raise ConnectionPoolTimeoutException("No db connection available after %s sec (max_size %s)" %
+                                                         (self.checkout_timeout_sec, self.max_size))
+                waited = True
+                self._cond.wait(remaining)
+
+            self.checkouts += 1
+            if waited:
+                self.waits += 1
+            self.wait_time_us.record((time.monotonic() - started) * 1e6)
+
+        if conn is None:
+            return self.__open(slot)
+
+        now = time.monotonic()
+        if self.max_lifetime_sec is not None and now - created_at > self.max_lifetime_sec:
+            self.__count("recycled")
+            self.__close_quietly(conn)
+            return self.__open(slot)
+        if self.validate is not None and now - last_used > self.validate_idle_sec:
+            self.__count("validations")
+            if not self.__is_valid(conn):
+                self.__count("validation_failures")
+                self.__close_quietly(conn)
+                return self.__open(slot)
+        return conn
+
+    def release_con(self, conn):
+        with self._cond:
+            created_at = self._in_use.pop(id(conn), None)
+            if created_at is None:
+                return  # not ours (or already released)
+            if self._closed:
+                self.__close_quietly(conn)
+            else:
+                self._idle.append((conn, created_at, time.monotonic()))
+            self._cond.notify()
+
+    def discard_con(self, conn):
+        """
+        Drop a broken connection instead of returning it to the pool.
+        """
+        with self._cond:
+            if self._in_use.pop(id(conn), None) is None:
+                return
+            self._cond.notify()
+        self.__close_quietly(conn)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle = self._idle
+            self._idle = []
+            self._cond.notify_all()
+        for conn, created_at, last_used in idle:
+            self.__close_quietly(conn)
+
+    def __open(self, slot:int):
+        """
+        Connect (with backoff) into a slot already counted as in use.
+        """
+        delay = self.reconnect_backoff_sec
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                conn = self.connect()
+                break
+            except Exception as err:
+                self.__count("connect_failures")
+                if attempt >= self.reconnect_attempts:
+                    with self._cond:
+                        self._in_use.pop(slot, None)
+                        self._cond.notify()
+                    raise
+                logger.warning("db connect failed (attempt %d/%d), retrying in %.2f sec: %s" %
+                               (attempt, self.reconnect_attempts, delay, err))
+                time.sleep(delay)
+                delay = min(delay * 2, self.max_reconnect_backoff_sec)
+
+        with self._cond:
+            self.created += 1
+            self._in_use.pop(slot, None)
+            self._in_use[id(conn)] = time.monotonic()
+        return conn
+
+    def __count(self, counter:str):
+        with self._cond:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def __is_valid(self, conn) -> bool:
+        try:
+            return self.validate(conn)
+        except Exception:
+            return False
 
+    @staticmethod
+    def __close_quietly(conn):
+        try:
+            conn.close()
+        except Exception as err:
+            logger.debug("Error closing pooled db connection: %s" % err)
+
+
+class MySQLBackend(DBBackend):
+    """
+    The MySQL server backend. Can pass in a db_con and manage the connection from the outside (db_type 1),
+    pass a db pool and let the backend request and return connections from the pool (db_type 2), or pass
+    db params and let the backend manage its own connections (db_type 3) in an internal ConnectionPool.
+
+    binary_ids=True is for a database created (or migrated with dataset_id_migration) with BINARY(16) ids.
+    """
+    name = 'mysql'
+
+    def __init__(self,
+                 db_con=None,
+                 db_pool=None,
+                 db_host:str = None, db_user:str = None, db_password:str = None, db_name:str = None,
+                 pool_size:int = 8,
+                 pool_checkout_timeout_sec:float = 30,
+                 pool_validate_idle_sec:float = 30,
+                 pool_max_lifetime_sec:float = 3600,
+                 binary_ids:bool = False):
+
+        if dbapi_connector is None:
+            raise ImportError("mysql-connector-python is required for the MySQL backend")
+
+        self.db_con = None
+        self.binary_ids = binary_ids
+        self._con_lock = threading.RLock()
         if db_con:
-            self.db_con:dbapi_connector = db_con
-            self.db_type=1
+            self.db_con = db_con
+            self.db_type = 1
         elif db_pool:
-            self.db_pool:dbapi_pool = db_pool
+            self.db_pool = db_pool
             self.db_type = 2
         else:
             self.dbconfig = {
@@ -29,62 +367,480 @@ class DBManager:
                 "password": db_password,
                 "database": db_name
             }
+            self.pool_config = {
+                "max_size": pool_size,
+                "checkout_timeout_sec": pool_checkout_timeout_sec,
+                "validate_idle_sec": pool_validate_idle_sec,
+                "max_lifetime_sec": pool_max_lifetime_sec
+            }
+            self.pool: ConnectionPool = None
+            self.db_type = 3
 
-            self.db_con = dbapi_connector.connect(**self.dbconfig)
-
-        # self.dbapi_pooling = dbapi_pooling.MySQLConnectionPool(pool_name="o_pool", pool_size=3, **self.dbconfig)
-
-        self.db_con.autocommit = True
+        if self.db_con is not None:
+            self.db_con.autocommit = True
 
     def get_con(self):
-        pass
 
-    def get_max_datetime_to_sec(self) -> str:
-        return '9999-12-31 23:59:59.0'
+        if self.db_type == 1: # an outside controlled con, one caller at a time
+            self._con_lock.acquire()
+            self.db_con.autocommit=True
+            return self.db_con
+        elif self.db_type == 2: # an outside con pool
+            con = self.db_pool.get_connection()
+            con.autocommit = True
+            return con
+        else: # db params and internally managed cons. Only cons idle for a while are pinged, not every checkout
+            if self.pool is None:
+                self.pool = ConnectionPool(self.__connect, validate=lambda con: con.is_connected(),
+                                           **self.pool_config)
+            con = self.pool.get_con()
+            con.autocommit = True
+            return con
 
-    def close_db_con(self):
-        pass
+    def release_con(self, conn):
+        if self.db_type == 1:
+            self._con_lock.release()
+        elif self.db_type == 2:
+            conn.close() # return to the pool
+        else: # back to the internal pool, never with an open transaction
+            if conn.in_transaction:
+                try:
+                    conn.rollback()
+                except Exception:
+                    self.pool.discard_con(conn)
+                    return
+            self.pool.release_con(conn)
 
+    def close(self):
         if self.db_type == 1: # external con
             return
         elif self.db_type == 2: # external pool
             return
-        else:  # let user explicitly close internally managed con
-            if self.db_con and self.db_con.is_connected:
+        else:  # let user explicitly close internally managed cons, a later get_con() starts a new pool
+            if self.pool is not None:
+                self.pool.close()
+            self.pool = None
+
+    def pool_stats(self) -> Dict[str, float]:
+        if self.db_type == 3 and self.pool is not None:
+            return self.pool.stats()
+        return {}
+
+    def after_fork(self):
+        self._con_lock = threading.RLock()
+        if self.db_type == 3:
+            self.pool = None  # the child opens its own pool on first use
+        else:
+            raise ConfigValidationException("A db_con/db_pool passed in from the outside cannot be used by a "
+                                            "forked process. Pass db params, or create the DatasetLineage "
+                                            "in the child process.")
+
+    def table_sizes(self, conn) -> Dict[str, Tuple[int, int]]:
+        # InnoDB estimates, refreshed by ANALYZE TABLE
+        cursor = conn.cursor()
+        cursor.execute("SELECT table_name, data_length, index_length FROM information_schema.TABLES "
+                       "WHERE table_schema = DATABASE()")
+        rows = cursor.fetchall()
+        cursor.close()
+        return {row[0]: (int(row[1] or 0), int(row[2] or 0)) for row in rows}
+
+    def cache_read_stats(self, conn) -> Tuple[int, int]:
+        # InnoDB buffer pool, server wide
+        cursor = conn.cursor()
+        cursor.execute("SHOW GLOBAL STATUS LIKE 'Innodb_buffer_pool_read%'")
+        status = {row[0]: int(row[1]) for row in cursor.fetchall()}
+        cursor.close()
+        return status.get('Innodb_buffer_pool_read_requests', 0), status.get('Innodb_buffer_pool_reads', 0)
+
+    def __connect(self):
+        return dbapi_connector.connect(**self.dbconfig)
+
+
+@lru_cache(maxsize=512)
+def _to_qmark(stmt:str) -> str:
+    # DatasetLineage SQL is written with mysql's %s paramstyle
+    return stmt.replace('%s', '?')
+
+
+def _adapt_param(val):
+    if isinstance(val, datetime):
+        return val.isoformat(' ')
+    if isinstance(val, date):
+        return val.isoformat()
+    return val
+
+
+def parse_datetime(txt:str) -> datetime:
+    """
+    Datetime from DATETIME/DATE text: 'YYYY-MM-DD', optionally followed by ' HH:MM:SS' (or 'THH:MM:SS') and a
+    fraction of any length, e.g. the max datetime '9999-12-31 23:59:59.0'. datetime.fromisoformat() only takes
+    such fractions from python 3.11 on.
+
+    :raise: ValueError if txt is not a datetime.
+    """
+    date_part, _, time_part = txt.replace('T', ' ', 1).partition(' ')
+    if time_part == '':
+        return datetime.strptime(date_part, '%Y-%m-%d')
+    time_part, _, fraction = time_part.partition('.')
+    val = datetime.strptime(date_part + ' ' + time_part, '%Y-%m-%d %H:%M:%S')
+    if fraction == '':
+        return val
+    if not fraction.isdigit():
+        raise ValueError("Invalid datetime string: %r" % (txt))
+    return val.replace(microsecond=int(fraction[:6].ljust(6, '0')))
+
+
+def to_datetime(val):
+    """
+    Datetime from a DATETIME aggregate/expression column. Drivers that do not know the column type
+    (sqlite3 for computed columns) hand back the stored text.
+    """
+    if val is None or isinstance(val, datetime):
+        return val
+    return parse_datetime(str(val))
+
+
+def _convert_datetime(val:bytes):
+    txt = val.decode()
+    try:
+        return parse_datetime(txt)
+    except ValueError:
+        return txt
+
+
+def _convert_date(val:bytes):
+    txt = val.decode()
+    try:
+        return parse_datetime(txt).date()
+    except ValueError:
+        return txt
+
+
+sqlite3.register_converter("DATETIME", _convert_datetime)
+sqlite3.register_converter("DATE", _convert_date)
+
+
+class SqliteCursor:
+    """
+    Cursor adapter giving sqlite3 the behaviour DatasetLineage expects from mysql.connector cursors
+    (%s params, rowcount of rows read after a SELECT).
+    """
+
+    def __init__(self, cursor:sqlite3.Cursor):
+        self._cursor = cursor
+        self.rowcount = -1
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    def execute(self, stmt:str, params=()):
+        self._cursor.execute(_to_qmark(stmt), [_adapt_param(p) for p in params] if params else ())
+        self.rowcount = self._cursor.rowcount if self._cursor.description is None else 0
+
+    def executemany(self, stmt:str, seq_of_params):
+        self._cursor.executemany(_to_qmark(stmt), ([_adapt_param(p) for p in params] for params in seq_of_params))
+        self.rowcount = self._cursor.rowcount
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        self.rowcount += len(rows)
+        return rows
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is not None:
+            self.rowcount += 1
+        return row
+
+    def close(self):
+        self._cursor.close()
+
+
+class SqliteConnection:
+    """
+    Connection adapter for the embedded engine. Runs sqlite3 in autocommit mode and opens explicit
+    write (IMMEDIATE) transactions from start_transaction() the way DatasetLineage uses mysql.connector.
+    """
+
+    def __init__(self, raw_con:sqlite3.Connection):
+        self._con = raw_con
+        self.autocommit = True
+
+    @property
+    def in_transaction(self) -> bool:
+        return self._con.in_transaction
+
+    def cursor(self) -> SqliteCursor:
+        return SqliteCursor(self._con.cursor())
+
+    def start_transaction(self, isolation_level:str = None):
+        self._con.execute("BEGIN IMMEDIATE")
+
+    def commit(self):
+        self._con.commit()
+
+    def rollback(self):
+        self._con.rollback()
+
+    def is_connected(self) -> bool:
+        return self._con is not None
+
+    def close(self):
+        if self._con is not None:
+            self._con.close()
+            self._con = None
+
+
+class SqliteBackend(DBBackend):
+    """
+    Embedded SQLite engine built from the shipped schema. Runs in process, so start/finish/fetch calls
+    pay no network round trip. File databases are opened in WAL mode with memory mapped I/O and a tuned
+    page cache. db_path ':memory:' gives a private in-memory database (handy for tests and single node
+    edge deployments that do not need durability).
+
+    File databases hand each caller its own connection from a ConnectionPool (WAL lets readers run next to
+    the single writer, writers queue on busy_timeout). The in-memory database lives on one connection, which
+    callers take turns on.
+
+    binary_ids=True creates new databases with BINARY(16) ids (stored as 16 byte blobs).
+    """
+    name = 'sqlite'
+
+    def __init__(self, db_path:str = ':memory:',
+                 schema_path:str = DEFAULT_SCHEMA_PATH,
+                 mmap_size:int = 256 * 1024 * 1024,
+                 cache_size_kib:int = 64 * 1024,
+                 busy_timeout_ms:int = 5000,
+                 synchronous:str = 'NORMAL',
+                 pool_size:int = 8,
+                 binary_ids:bool = False):
+
+        self.db_path = db_path
+        self.schema_path = schema_path
+        self.mmap_size = mmap_size
+        self.cache_size_kib = cache_size_kib
+        self.busy_timeout_ms = busy_timeout_ms
+        self.synchronous = synchronous
+        self.pool_size = pool_size
+        self.binary_ids = binary_ids
+
+        self.in_memory = db_path == ':memory:'
+        if self.in_memory:
+            # named shared-cache db so every connection of this backend sees the same data
+            self.uri = "file:dlcp_%s?mode=memory&cache=shared" % uuid.uuid4().hex
+        else:
+            self.uri = "file:%s" % os.path.abspath(db_path)
+
+        self._con_lock = threading.RLock()
+        self.pool: ConnectionPool = None
+        self.db_con = self.__connect()
+        self.__init_schema(self.db_con)
+        if not self.in_memory:  # file dbs are served from the pool
+            self.db_con.close()
+            self.db_con = None
+
+    def __connect(self) -> SqliteConnection:
+        raw_con = sqlite3.connect(self.uri, uri=True, isolation_level=None, cached_statements=256,
+                                  detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False)
+        raw_con.execute("PRAGMA busy_timeout = %d" % self.busy_timeout_ms)
+        raw_con.execute("PRAGMA temp_store = MEMORY")
+        raw_con.execute("PRAGMA cache_size = -%d" % self.cache_size_kib)
+        if not self.in_memory:
+            raw_con.execute("PRAGMA journal_mode = WAL")
+            raw_con.execute("PRAGMA synchronous = %s" % self.synchronous)
+            raw_con.execute("PRAGMA mmap_size = %d" % self.mmap_size)
+        return SqliteConnection(raw_con)
+
+    def __init_schema(self, conn:SqliteConnection):
+        cursor = conn.cursor()
+        cursor.execute("SELECT type FROM pragma_table_info('dataset_observer') WHERE name = 'dataset_observer_id'")
+        rows = cursor.fetchall()
+        cursor.close()
+        if len(rows) > 0:
+            if (rows[0][0].upper() == BINARY_ID_TYPE) != self.binary_ids:
+                raise ConfigValidationException("Database %s stores ids as %s, open it with binary_ids=%s" %
+                                                (self.db_path, rows[0][0], not self.binary_ids))
+            return
+
+        with open(self.schema_path) as schema_file:
+            schema_sql = schema_file.read()
+        conn._con.executescript(binary_id_schema(schema_sql) if self.binary_ids else schema_sql)
+        logger.info("Created embedded lineage schema from %s" % self.schema_path)
+
+    def get_con(self) -> SqliteConnection:
+        if self.in_memory:
+            self._con_lock.acquire()
+            if self.db_con is None:
+                self.db_con = self.__connect()
+            return self.db_con
+
+        if self.pool is None:
+            with self._con_lock:
+                if self.pool is None:
+                    self.pool = ConnectionPool(self.__connect, max_size=self.pool_size, max_lifetime_sec=None)
+        return self.pool.get_con()
+
+    def release_con(self, conn):
+        if conn.in_transaction:  # never leave a write lock behind
+            conn.rollback()
+        if self.in_memory:
+            self._con_lock.release()
+        else:
+            self.pool.release_con(conn)
+
+    def close(self):
+        with self._con_lock:
+            if self.pool is not None:
+                self.pool.close()
+                self.pool = None
+            if self.db_con is not None:
                 self.db_con.close()
                 self.db_con = None
+
+    def pool_stats(self) -> Dict[str, float]:
+        if self.pool is not None:
+            return self.pool.stats()
+        return {}
+
+    def after_fork(self):
+        self._con_lock = threading.RLock()
+        if self.in_memory:
+            raise ConfigValidationException("The in-memory database is private to the process that created it. "
+                                            "Use a database file to share it with forked processes.")
+        self.pool = None  # the child opens its own pool on first use
+
+    def get_skip_duplicate_clause(self, column:str) -> str:
+        return 'ON CONFLICT DO NOTHING'
+
+    def get_lock_rows_clause(self) -> str:
+        return ''  # BEGIN IMMEDIATE holds the database write lock already
+
+    def table_sizes(self, conn) -> Dict[str, Tuple[int, int]]:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT m.tbl_name, m.type, sum(s.pgsize) FROM dbstat as s "
+                           "JOIN sqlite_master as m ON (m.name = s.name) GROUP BY m.tbl_name, m.type")
+            rows = cursor.fetchall()
+        except sqlite3.OperationalError:  # sqlite built without the dbstat table
+            return {}
+        finally:
+            cursor.close()
+        sizes = {}
+        for table_name, obj_type, size in rows:
+            data_size, index_size = sizes.get(table_name, (0, 0))
+            if obj_type == 'table':
+                sizes[table_name] = (data_size + size, index_size)
             else:
-                self.db_con = None
+                sizes[table_name] = (data_size, index_size + size)
+        return sizes
 
-    def __get_db_con(self) -> dbapi_connector.connection:
-        pass
 
-        if self.db_type == 1: # an outside controlled con
-            self.db_con.autocommit=True
-            return self.db_con
-        elif self.db_type == 2: # an outside con pool
-            con = self.db_pool.get_connection()
-            con.autocommit = True
-            return con
-        else: # db params and internally managed con
-            if self.db_con is None:
-                self.db_con = dbapi_connector.connect(**self.dbconfig)
-                self.db_con.autocommit=True
-                return self.db_con
-            elif self.db_con.is_connected():
-                self.db_con.autocommit = True
-                return self.db_con
-            else: # for some reason the DB con was disconnected, so create a new one
-                self.db_con = dbapi_connector.connect(**self.dbconfig)
-                self.db_con.autocommit = True
-                return self.db_con
-
-    def __close_db_con(self, conn:dbapi_connector):
-        pass
+def _encode_id(val):
+    if type(val) is HexId:
+        try:
+            return bytes.fromhex(val)
+        except ValueError:  # not a guid, matches no row either way
+            return val
+    return val
 
-        if self.db_type == 1:
-            return
-        elif self.db_type == 2:
-            conn.close() # return to the pool
-        else: # do not close internally managed con
-            return
\ No newline at end of file
+
+def _decode_ids(row):
+    return tuple(HexId(val.hex()) if isinstance(val, (bytes, bytearray)) and len(val) == 16 else val
+                 for val in row)
+
+
+class BinaryIdCursor:
+    """
+    Cursor of a binary id database. HexId params go out as 16 bytes, 16 byte values come back as HexId, so ids
+    read from one statement can be passed to the next.
+    """
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def execute(self, stmt:str, params=()):
+        self._cursor.execute(stmt, [_encode_id(p) for p in params] if params else params)
+
+    def executemany(self, stmt:str, seq_of_params):
+        self._cursor.executemany(stmt, [[_encode_id(p) for p in params] for params in seq_of_params])
+
+    def fetchall(self):
+        return [_decode_ids(row) for row in self._cursor.fetchall()]
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        return _decode_ids(row) if row is not None else None
+
+    def close(self):
+        self._cursor.close()
+
+
+class BinaryIdConnection:
+    """
+    Wraps a backend connection of a binary id database (DBBackend.binary_ids) with BinaryIdCursor cursors.
+    """
+
+    def __init__(self, conn):
+        self.raw_connection = conn
+
+    def __getattr__(self, name):
+        return getattr(self.raw_connection, name)
+
+    def __setattr__(self, name, value):
+        if name == "raw_connection":
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self.raw_connection, name, value)
+
+    def cursor(self) -> BinaryIdCursor:
+        return BinaryIdCursor(self.raw_connection.cursor())
+
+
+class DBManager:
+
+    def __init__(self,
+                 db_con = None,
+                 db_pool = None,
+                 db_host:str = None, db_user:str = None, db_password:str = None, db_name:str = None,
+                 backend:DBBackend = None,
+                 binary_ids:bool = False):
+
+        if backend is None:
+            backend = MySQLBackend(db_con, db_pool, db_host, db_user, db_password, db_name, binary_ids=binary_ids)
+        elif binary_ids and not backend.binary_ids:
+            raise ConfigValidationException("binary_ids must be set on the backend passed in")
+        self.backend:DBBackend = backend
+        self._pid = os.getpid()
+
+    def get_con(self):
+        if self._pid != os.getpid():
+            # running in a forked child, do not touch the connections inherited from the parent
+            self.backend.after_fork()
+            self._pid = os.getpid()
+        return self.backend.get_con()
+
+    def release_con(self, conn):
+        self.backend.release_con(conn)
+
+    def get_max_datetime_to_sec(self) -> str:
+        return self.backend.get_max_datetime_to_sec()
+
+    def get_skip_duplicate_clause(self, column:str) -> str:
+        return self.backend.get_skip_duplicate_clause(column)
+
+    def get_lock_rows_clause(self) -> str:
+        return self.backend.get_lock_rows_clause()
+
+    def pool_stats(self) -> Dict[str, float]:
+        return self.backend.pool_stats()
+
+    def close_db_con(self):
+        self.backend.close()
@@ -1,8 +1,66 @@
+import os
+import threading
+import time
 import uuid
+from typing import Callable
 
 
 def get_new_guid():
     return uuid.uuid4()
 
+
+class TimeOrderedGuidGenerator:
+    """
+    UUIDv7 style guids: 48 bit unix time in ms, then a 42 bit counter (in the rand_a bits and the top of rand_b) and
+    32 random bits. Ids sort by creation time, so inserts append to the right edge of the id indexes instead of
+    landing on random pages.
+
+    Monotonic within the process: the counter starts at a random value every ms and increments for each id created
+    in the same ms. A counter that runs out borrows the next ms, and a clock that steps back is ignored until it
+    catches up. Ids of different processes in the same ms interleave and are told apart by the random bits.
+    """
+
+    def __init__(self, clock_ms:Callable[[], int] = None):
+        """
+        :param clock_ms: Current unix time in ms. Defaults to the system clock.
+        """
+        self._clock_ms = clock_ms if clock_ms is not None else lambda: time.time_ns() // 1000000
+        self._lock = threading.Lock()
+        self._last_ms = 0
+        self._counter = 0
+
+    def __call__(self) -> uuid.UUID:
+        with self._lock:
+            unix_ms = self._clock_ms()
+            if unix_ms > self._last_ms:
+                self._last_ms = unix_ms
+                self._counter = int.from_bytes(os.urandom(6), 'big') >> 7  # 41 bits, leaves room to count up
+            else:
+                self._counter += 1
+                if self._counter >= 1 << 42:
+                    self._last_ms += 1
+                    self._counter = 0
+            unix_ms, counter = self._last_ms, self._counter
+
+        rand = int.from_bytes(os.urandom(4), 'big')
+        value = (unix_ms & 0xFFFFFFFFFFFF) << 80 | 0x7 << 76 | (counter >> 30) << 64 | 0x2 << 62 | \
+                (counter & 0x3FFFFFFF) << 32 | rand
+        return uuid.UUID(int=value)
+
+
+# one generator per process, ids stay ordered across the DatasetLineage instances of the process
+get_new_time_ordered_guid = TimeOrderedGuidGenerator()
+
 def get_pdl_raw_hex_to_byte(raw_hex_string):
     return bytes.fromhex(raw_hex_string)
+
+def get_pdl_raw_byte_to_hex(raw_bytes):
+    return raw_bytes.hex()
+
+
+class HexId(str):
+    """
+    A guid hex string that is stored as BINARY(16) in a binary id database. The binary id connection
+    (db_layer.BinaryIdConnection) converts statement params of this type to bytes; plain strings pass through.
+    """
+    __slots__ = ()
@@ -0,0 +1,690 @@
+from data_lineage.dataset_lineage_mgmt import DatasetLineage
+from data_lineage.dataset_exceptions import *
+from data_lineage.dataset_manifest import LineageManifest
+
+
+class DatasetLineageBehaviour:
+    """
+    Backend independent behaviour of DatasetLineage. Mixed into a unittest.TestCase per storage backend.
+    """
+
+    def new_dataset_lineage(self) -> DatasetLineage:
+        raise NotImplementedError
+
+    def test_1_declare_dataset_observer(self):
+        dataset_observer = self.new_dataset_lineage()
+
+        dataset1 = dataset_observer.declare_dataset_observer(model_name="some_dataset1--test")
+
+        dataset2 = dataset_observer.declare_dataset_observer(model_name="another_dataset2--test",
+                                                             model_namespace="somespace",
+                                                             model_dataset_props="key stuff",
+                                                             model_zone_tag=3, description="cool model",
+                                                             observer_config="some config",
+                                                             display_name='some disp name')
+        print("Declare Dataset Observer")
+
+    def test_1_1_declare_dataset_observers(self):
+        dataset_observer = self.new_dataset_lineage()
+
+        existing = dataset_observer.declare_dataset_observer(model_name="test1_1--test", model_dataset_props="p=0",
+                                                             description="first declare")
+        declares = [{'model_name': "test1_1--test", 'model_dataset_props': "p=%d" % i, 'description': "bulk"}
+                    for i in range(3)]
+        declares.append({'model_name': "test1_1--test", 'model_dataset_props': "p=1", 'model_zone_tag': 2})
+        declares.append(declares[1])
+        ids = dataset_observer.declare_dataset_observers(declares)
+
+        self.assertEqual(len(ids), 5)
+        self.assertEqual(ids[0], existing)
+        self.assertEqual(len(set(ids)), 4)
+        self.assertEqual(ids[4], ids[1])
+        self.assertEqual(dataset_observer.get_dataset_observer(existing).description, "first declare")
+        self.assertEqual(dataset_observer.get_dataset_observer(ids[2]).description, "bulk")
+        self.assertEqual(dataset_observer.get_dataset_observer_id("test1_1--test", model_dataset_props="p=1",
+                                                                  model_zone_tag=2), ids[3])
+
+        # declaring again is a no-op returning the same ids
+        self.assertEqual(dataset_observer.declare_dataset_observers(declares), ids)
+        self.assertEqual(dataset_observer.declare_dataset_observers([]), [])
+
+        # ids are looked up per entry across lookup chunks
+        many = [{'model_name': "test1_1_many--test", 'model_dataset_props': "p=%d" % i} for i in range(300)]
+        many_ids = dataset_observer.declare_dataset_observers(many)
+        self.assertEqual(len(set(many_ids)), 300)
+        self.assertEqual(dataset_observer.get_dataset_observer_id("test1_1_many--test", model_dataset_props="p=299"),
+                         many_ids[299])
+        self.assertRaises(DatasetBaseException, dataset_observer.declare_dataset_observers,
+                          [{'model_name': "test1_1--test", 'model_zone_tag': -1}])
+
+    def test_2_0_update_dataset_observer(self):
+        dataset_observer = self.new_dataset_lineage()
+
+        dataset1 = dataset_observer.declare_dataset_observer(model_name="another_dataset3--test",
+                                                             model_namespace="somespace",
+                                                             model_dataset_props="key stuff",
+                                                             model_zone_tag=3,
+                                                             description="cool model")
+
+        dataset_observer.update_dataset_observer(dataset1, description="changed description",
+                                                 observer_config="config changes",
+                                                 display_name='disp name')
+        print("Update Dataset Observer")
+
+    def test_2_1_update_dataset_observer_status(self):
+        dataset_observer = self.new_dataset_lineage()
+
+        dataset1 = dataset_observer.declare_dataset_observer(model_name="another_dataset3_1--test",
+                                                             model_namespace="somespace",
+                                                             model_dataset_props="key stuff",
+                                                             model_zone_tag=3,
+                                                             description="cool model")
+
+        dataset_observer.update_dataset_observer_status(dataset1, observer_status=2)
+
+        print("Update Dataset Observer Status Only")
+
+    def test_3_0_associate_dataset_source_to_sink(self):
+        dataset_observer = self.new_dataset_lineage()
+
+        dataset1 = dataset_observer.declare_dataset_observer(model_name="some_dataset4--test")
+
+        dataset2 = dataset_observer.declare_dataset_observer(model_name="another_dataset5--test",
+                                                             model_namespace="somespace",
+                                                             model_dataset_props="key stuff",
+                                                             model_zone_tag=3,
+                                                             description="cool model",
+                                                             observer_config="some config")
+
+        rel_id = dataset_observer.associate_dataset_source_to_sink(dataset1, dataset2)
+        print("rel_id %s:" % rel_id)
+        # second time should be ignored and id returned
+        rel_id = dataset_observer.associate_dataset_source_to_sink(dataset1, dataset2)
+        print("rel_id %s:" % rel_id)
+        print("Associate 2 Dataset Observers source/sink")
+
+    def test_4_0_disassociate_dataset_source_from_sink(self):
+        dataset_observer = self.new_dataset_lineage()
+
+        dataset1 = dataset_observer.declare_dataset_observer(model_name="some_dataset6--test")
+
+        dataset2 = dataset_observer.declare_dataset_observer(model_name="another_dataset7--test",
+                                                             model_namespace="somespace",
+                                                             model_dataset_props="key stuff", model_zone_tag=3,
+                                                             description="cool model",
+                                                             observer_config="some config")
+
+        rel_id = dataset_observer.associate_dataset_source_to_sink(dataset1, dataset2)
+        print(rel_id)
+
+        status = dataset_observer.disassociate_dataset_source_from_sink(dataset1, dataset2)
+        print(status)
+        status = dataset_observer.disassociate_dataset_source_from_sink(dataset1, dataset2)
+        print(status)
+        print("Disassociate 2 Dataset Observers source/sink")
+
+    def test_4_1_disassociate_then_reassociate_dataset_source_from_sink(self):
+        dataset_observer = self.new_dataset_lineage()
+
+        dataset1 = dataset_observer.declare_dataset_observer(model_name="some_dataset8--test")
+
+        dataset2 = dataset_observer.declare_dataset_observer(model_name="another_dataset9--test",
+                                                             model_namespace="somespace",
+                                                             model_dataset_props="key stuff",
+                                                             model_zone_tag=3,
+                                                             description="cool model",
+                                                             observer_config="some config")
+
+        dataset_observer.associate_dataset_source_to_sink(dataset1, dataset2)
+
+        dataset_observer.disassociate_dataset_source_from_sink(dataset1, dataset2)
+
+        dataset_observer.associate_dataset_source_to_sink(dataset1, dataset2)
+
+        print("Disassociate 2 Dataset Observers source/sink, then re-associate them again")
+
+    def test_5_0_start_dataset_observer_run_with_id_simple(self):
+        # simple case with no associations
+        dataset_observer = self.new_dataset_lineage()
+
+        dataset1 = dataset_observer.declare_dataset_observer(model_name="test5_0--test")
+
+        result = dataset_observer.start_dataset_observer_run_with_id(dataset1)
+
+    def test_5_1_finish_dataset_observer_run_simple(self):
+        # simple case with no associations
+        dataset_observer = self.new_dataset_lineage()
+
+        dataset1 = dataset_observer.declare_dataset_observer(model_name="test5_1--test")
+
+        result = dataset_observer.start_dataset_observer_run_with_id(dataset1)
+        dataset_observer.finish_dataset_observer_run(status="success", dataset_run_id=result.run_id)
+
+    def test_5_2_fetch_ready_dataset_sources_by_sink_id(self):
+        # check if fetching available sources (for a sink) is tested
+        dataset_observer = self.new_dataset_lineage()
+
+        dataset1 = dataset_observer.declare_dataset_observer(model_name="test5_2--test")
+        dataset2 = dataset_observer.declare_dataset_observer(model_name="another_test5_2--test")
+        dataset_observer.associate_dataset_source_to_sink(dataset1, dataset2)
+
+        result1 = dataset_observer.start_dataset_observer_run_with_id(dataset1)
+        dataset_observer.finish_dataset_observer_run(status="success", dataset_run_id=result1.run_id)
+
+        dataset_observer.fetch_ready_dataset_sources_by_sink_id(sink_dataset_id=dataset2)
+
+    def test_6_0_start_dataset_observer_run_with_id_with_association_start_finish_first(self):
+        # More complex start case with association. Start the first dataset
+        dataset_observer = self.new_dataset_lineage()
+
+        dataset1 = dataset_observer.declare_dataset_observer(model_name="test6_0--test")
+        dataset2 = dataset_observer.declare_dataset_observer(model_name="another_test6_0--test")
+        dataset_observer.associate_dataset_source_to_sink(dataset1, dataset2)
+
+        result = dataset_observer.start_dataset_observer_run_with_id(dataset1)
+        dataset_observer.finish_dataset_observer_run(status="success", dataset_run_id=result.run_id)
+
+    def test_6_1_start_dataset_observer_run_with_id_with_association_start_finish_first_second(self):
+        # More complex start case with association. Start the first/second dataset
+        dataset_observer = self.new_dataset_lineage()
+
+        dataset1 = dataset_observer.declare_dataset_observer(model_name="test6_1--test")
+        dataset2 = dataset_observer.declare_dataset_observer(model_name="another_test6_1--test")
+        dataset_observer.associate_dataset_source_to_sink(dataset1, dataset2)
+
+        result1 = dataset_observer.start_dataset_observer_run_with_id(dataset1)
+        dataset_observer.finish_dataset_observer_run(status="success", dataset_run_id=result1.run_id)
+
+        result2 = dataset_observer.start_dataset_observer_run_with_id(dataset2)
+        dataset_observer.finish_dataset_observer_run(status="success", dataset_run_id=result2.run_id)
+
+    def test_7_0_fetch_ready_dataset_sources(self):
+        # More complex start case with association. Start the first/second dataset
+        dataset_observer = self.new_dataset_lineage()
+
+        dataset1_1 = dataset_observer.declare_dataset_observer(model_name="test7_0--test", model_dataset_props="dim1")
+        dataset1_2 = dataset_observer.declare_dataset_observer(model_name="test7_0--test", model_dataset_props="dim2")
+        dataset2 = dataset_observer.declare_dataset_observer(model_name="another_test7_0--test")
+        dataset_observer.associate_dataset_source_to_sink(dataset1_1, dataset2)
+        dataset_observer.associate_dataset_source_to_sink(dataset1_2, dataset2)
+
+        result1_1 = dataset_observer.start_dataset_observer_run_with_id(dataset1_1)
+        dataset_observer.finish_dataset_observer_run(status="success", dataset_run_id=result1_1.run_id)
+        result1_2 = dataset_observer.start_dataset_observer_run_with_id(dataset1_2)
+        dataset_observer.finish_dataset_observer_run(status="success", dataset_run_id=result1_2.run_id)
+
+        datasetFetchSummary = dataset_observer.fetch_ready_dataset_sources_by_sink_id(sink_dataset_id=dataset2)
+        print(datasetFetchSummary)
+
+        result2 = dataset_observer.start_dataset_observer_run_with_id(dataset2,dependency_check="source_run_ids",
+                                                                      specific_sources=[result1_1.run_id])
+        dataset_observer.finish_dataset_observer_run(status="success", dataset_run_id=result2.run_id)
+        #result2 = dataset_observer.start_dataset_observer_run_with_id(dataset2, dependency_check="source_ids",
+        #                                                              specific_sources=[dataset1_2])
+        #dataset_observer.finish_dataset_observer_run(status="success", dataset_run_id=result2.run_id)
+
+    def test_8_0_start_dataset_observer_run_dependency_check_all(self):
+        dataset_observer = self.new_dataset_lineage()
+
+        dataset1_1 = dataset_observer.declare_dataset_observer(model_name="test8_0--test", model_dataset_props="dim1")
+        dataset1_2 = dataset_observer.declare_dataset_observer(model_name="test8_0--test", model_dataset_props="dim2")
+        dataset2 = dataset_observer.declare_dataset_observer(model_name="another_test8_0--test")
+        dataset_observer.associate_dataset_source_to_sink(dataset1_1, dataset2)
+        dataset_observer.associate_dataset_source_to_sink(dataset1_2, dataset2)
+
+        result1_1 = dataset_observer.start_dataset_observer_run_with_id(dataset1_1)
+        dataset_observer.finish_dataset_observer_run(status="success", dataset_run_id=result1_1.run_id)
+
+        with self.assertRaises(DependencyException):
+            dataset_observer.start_dataset_observer_run_with_id(dataset2, dependency_check="all")
+
+        result1_2 = dataset_observer.start_dataset_observer_run_with_id(dataset1_2)
+        dataset_observer.finish_dataset_observer_run(status="success", dataset_run_id=result1_2.run_id)
+
+        result2 = dataset_observer.start_dataset_observer_run_with_id(dataset2, dependency_check="all")
+        self.assertEqual(result2.source_sink_rel_count, 2)
+        self.assertEqual(result2.source_id_list, {dataset1_1, dataset1_2})
+        self.assertCountEqual(result2.source_run_id_list, [result1_1.run_id, result1_2.run_id])
+
+    def test_8_1_start_consumes_ready_sources(self):
+        dataset_observer = self.new_dataset_lineage()
+
+        dataset1 = dataset_observer.declare_dataset_observer(model_name="test8_1--test")
+        dataset2 = dataset_observer.declare_dataset_observer(model_name="another_test8_1--test")
+        dataset_observer.associate_dataset_source_to_sink(dataset1, dataset2)
+
+        result1 = dataset_observer.start_dataset_observer_run_with_id(dataset1)
+        dataset_observer.finish_dataset_observer_run(status="success", dataset_run_id=result1.run_id,
+                                                     record_count=42, dataset_batch_run_id="batch8_1")
+
+        summary = dataset_observer.fetch_ready_dataset_sources_by_sink_id(sink_dataset_id=dataset2)
+        self.assertEqual(len(summary.dataset_queue_list), 1)
+        self.assertEqual(summary.dataset_queue_list[0].source_run_id, result1.run_id)
+        self.assertEqual(summary.dataset_queue_list[0].dataset_record_count, 42)
+        self.assertFalse(summary.orphan_sink)
+
+        result2 = dataset_observer.start_dataset_observer_run_with_id(dataset2)
+        self.assertEqual(result2.source_run_id_list, [result1.run_id])
+
+        # sink run is active and the queue was consumed
+        summary = dataset_observer.fetch_ready_dataset_sources_by_sink_id(sink_dataset_id=dataset2)
+        self.assertEqual(len(summary.dataset_queue_list), 0)
+        self.assertTrue(summary.orphan_sink)
+
+        with self.assertRaises(AlreadyActiveException):
+            dataset_observer.start_dataset_observer_run_with_id(dataset2, dependency_check="ignore")
+
+        dataset_observer.finish_dataset_observer_run(status="success", dataset_run_id=result2.run_id)
+        with self.assertRaises(DependencyException):
+            dataset_observer.start_dataset_observer_run_with_id(dataset2)
+
+    def test_8_2_finish_dataset_observer_run_errors(self):
+        dataset_observer = self.new_dataset_lineage()
+
+        dataset1 = dataset_observer.declare_dataset_observer(model_name="test8_2--test")
+        result1 = dataset_observer.start_dataset_observer_run_with_id(dataset1)
+        dataset_observer.finish_dataset_observer_run(status="error", dataset_run_id=result1.run_id)
+
+        with self.assertRaises(RunAlreadyFinishedException):
+            dataset_observer.finish_dataset_observer_run(status="success", dataset_run_id=result1.run_id)
+        with self.assertRaises(DatasetNotFoundException):
+            dataset_observer.finish_dataset_observer_run(status="success", dataset_run_id="0" * 32)
+
+    def test_8_3_start_dataset_observer_run_with_keys(self):
+        dataset_observer = self.new_dataset_lineage()
+
+        dataset1 = dataset_observer.declare_dataset_observer(model_name="test8_3--test", model_namespace="ns8_3",
+                                                             model_dataset_props="dim1", model_zone_tag=2)
+        self.assertEqual(dataset_observer.get_dataset_observer_id("test8_3--test", "ns8_3", "dim1", 2), dataset1)
+
+        result = dataset_observer.start_dataset_observer_run_with_keys("test8_3--test", "ns8_3", "dim1", 2)
+        self.assertEqual(result.sink_id, dataset1)
+
+        with self.assertRaises(DatasetNotFoundException):
+            dataset_observer.start_dataset_observer_run_with_keys("missing8_3--test", "ns8_3", "dim1", 2)
+
+    def test_9_0_finish_dataset_observer_runs(self):
+        dataset_observer = self.new_dataset_lineage()
+
+        dataset1_1 = dataset_observer.declare_dataset_observer(model_name="test9_0--test", model_dataset_props="dim1")
+        dataset1_2 = dataset_observer.declare_dataset_observer(model_name="test9_0--test", model_dataset_props="dim2")
+        dataset2 = dataset_observer.declare_dataset_observer(model_name="another_test9_0--test")
+        dataset3 = dataset_observer.declare_dataset_observer(model_name="more_test9_0--test")
+        dataset_observer.associate_dataset_source_to_sink(dataset1_1, dataset2)
+        dataset_observer.associate_dataset_source_to_sink(dataset1_2, dataset2)
+        dataset_observer.associate_dataset_source_to_sink(dataset1_1, dataset3)
+
+        result1_1 = dataset_observer.start_dataset_observer_run_with_id(dataset1_1)
+        result1_2 = dataset_observer.start_dataset_observer_run_with_id(dataset1_2)
+
+        outcomes = dataset_observer.finish_dataset_observer_runs([
+            {'status': 'success', 'dataset_run_id': result1_1.run_id, 'record_count': 7,
+             'dataset_batch_run_id': 'batch9_0'},
+            {'status': 'error', 'dataset_run_id': result1_2.run_id},
+            {'status': 'success', 'dataset_run_id': result1_1.run_id},
+            {'status': 'success', 'dataset_run_id': '0' * 32},
+            {'status': 'done', 'dataset_run_id': result1_2.run_id},
+        ])
+
+        self.assertEqual([outcome.finished for outcome in outcomes], [True, True, False, False, False])
+        self.assertEqual(outcomes[0].dataset_observer_id, dataset1_1)
+        self.assertIsNone(outcomes[0].error)
+        self.assertIsInstance(outcomes[2].error, RunAlreadyFinishedException)
+        self.assertIsInstance(outcomes[3].error, DatasetNotFoundException)
+        self.assertIsInstance(outcomes[4].error, DatasetBaseException)
+
+        # only the successful run was queued, for both of its sinks
+        summary = dataset_observer.fetch_ready_dataset_sources_by_sink_id(sink_dataset_id=dataset2)
+        self.assertEqual([queue.source_run_id for queue in summary.dataset_queue_list], [result1_1.run_id])
+        self.assertEqual(summary.dataset_queue_list[0].dataset_record_count, 7)
+        self.assertEqual(summary.dataset_queue_list[0].dataset_batch_run_id, 'batch9_0')
+        summary = dataset_observer.fetch_ready_dataset_sources_by_sink_id(sink_dataset_id=dataset3)
+        self.assertEqual(len(summary.dataset_queue_list), 1)
+
+        outcomes = dataset_observer.finish_dataset_observer_runs([
+            {'status': 'success', 'dataset_run_id': result1_2.run_id}])
+        self.assertFalse(outcomes[0].finished)
+        self.assertIsInstance(outcomes[0].error, RunAlreadyFinishedException)
+
+    def test_10_0_start_dataset_observer_runs_for_zone(self):
+        dataset_observer = self.new_dataset_lineage()
+
+        source1 = dataset_observer.declare_dataset_observer(model_name="test10_0_src1--test", model_zone_tag=4)
+        source2 = dataset_observer.declare_dataset_observer(model_name="test10_0_src2--test", model_zone_tag=4)
+        no_rels = dataset_observer.declare_dataset_observer(model_name="test10_0_a--test", model_zone_tag=5)
+        ready = dataset_observer.declare_dataset_observer(model_name="test10_0_b--test", model_zone_tag=5,
+                                                          observer_config="cfg_b")
+        partial = dataset_observer.declare_dataset_observer(model_name="test10_0_c--test", model_zone_tag=5)
+        not_ready = dataset_observer.declare_dataset_observer(model_name="test10_0_d--test", model_zone_tag=5)
+        disabled = dataset_observer.declare_dataset_observer(model_name="test10_0_e--test", model_zone_tag=5)
+        other_ns = dataset_observer.declare_dataset_observer(model_name="test10_0_f--test", model_zone_tag=5,
+                                                             model_namespace="other10_0")
+        dataset_observer.associate_dataset_source_to_sink(source1, ready)
+        dataset_observer.associate_dataset_source_to_sink(source1, partial)
+        dataset_observer.associate_dataset_source_to_sink(source2, partial)
+        dataset_observer.associate_dataset_source_to_sink(source2, not_ready)
+        dataset_observer.update_dataset_observer_status(disabled, observer_status=0)
+
+        result1 = dataset_observer.start_dataset_observer_run_with_id(source1)
+        dataset_observer.finish_dataset_observer_run(status="success", dataset_run_id=result1.run_id)
+
+        zone_result = dataset_observer.start_dataset_observer_runs_for_zone(5, model_namespace='ROOT',
+                                                                            dependency_check='all')
+        started = {result.sink_id: result for result in zone_result.start_result_list}
+        skipped = {skip.sink_id: skip for skip in zone_result.skipped_sink_list}
+
+        self.assertEqual(set(started.keys()), {no_rels, ready})
+        self.assertEqual(started[ready].source_run_id_list, [result1.run_id])
+        self.assertEqual(started[ready].source_sink_rel_count, 1)
+        self.assertEqual(started[no_rels].dataset_queue_list, [])
+        self.assertEqual(set(skipped.keys()), {partial, not_ready, disabled})
+        self.assertEqual(skipped[partial].reason, 'dependency')
+        self.assertEqual(skipped[partial].ready_source_count, 1)
+        self.assertEqual(skipped[partial].source_sink_rel_count, 2)
+        self.assertEqual(skipped[not_ready].reason, 'dependency')
+        self.assertEqual(skipped[disabled].reason, 'disabled')
+        self.assertNotIn(other_ns, started)
+
+        # the run records were created and consumed the queue
+        summary = dataset_observer.fetch_ready_dataset_sources_by_sink_id(sink_dataset_id=ready)
+        self.assertEqual(len(summary.dataset_queue_list), 0)
+        self.assertTrue(summary.orphan_sink)
+        dataset_observer.finish_dataset_observer_run(status="success", dataset_run_id=started[ready].run_id)
+
+        # 'any' now starts the partially ready sink; the no rels sink is still running
+        zone_result = dataset_observer.start_dataset_observer_runs_for_zone(5, dependency_check='any')
+        started = {result.sink_id: result for result in zone_result.start_result_list}
+        skipped = {skip.sink_id: skip.reason for skip in zone_result.skipped_sink_list}
+        self.assertEqual(set(started.keys()), {partial, other_ns})
+        self.assertEqual(skipped[no_rels], 'active')
+        self.assertEqual(skipped[ready], 'dependency')
+
+        with self.assertRaises(ConfigValidationException):
+            dataset_observer.start_dataset_observer_runs_for_zone(5, dependency_check='source_ids')
+
+    def test_11_0_list_ready_sinks(self):
+        dataset_observer = self.new_dataset_lineage()
+
+        source1 = dataset_observer.declare_dataset_observer(model_name="test11_0_src1--test", model_zone_tag=6)
+        source2 = dataset_observer.declare_dataset_observer(model_name="test11_0_src2--test", model_zone_tag=6)
+        sink_any = dataset_observer.declare_dataset_observer(model_name="test11_0_a--test", model_zone_tag=7)
+        sink_all = dataset_observer.declare_dataset_observer(model_name="test11_0_b--test", model_zone_tag=7)
+        dataset_observer.declare_dataset_observer(model_name="test11_0_c--test", model_zone_tag=7)
+        dataset_observer.associate_dataset_source_to_sink(source1, sink_any)
+        dataset_observer.associate_dataset_source_to_sink(source2, sink_any)
+        dataset_observer.associate_dataset_source_to_sink(source2, sink_all)
+
+        self.assertEqual(dataset_observer.list_ready_sinks(7), [])
+
+        result2 = dataset_observer.start_dataset_observer_run_with_id(source2)
+        dataset_observer.finish_dataset_observer_run(status="success", dataset_run_id=result2.run_id)
+        result2 = dataset_observer.start_dataset_observer_run_with_id(source2)
+        dataset_observer.finish_dataset_observer_run(status="success", dataset_run_id=result2.run_id)
+
+        ready_sinks = {ready.sink_id: ready for ready in dataset_observer.list_ready_sinks(7)}
+        self.assertEqual(set(ready_sinks.keys()), {sink_any, sink_all})
+        self.assertEqual(ready_sinks[sink_any].source_sink_rel_count, 2)
+        self.assertEqual(ready_sinks[sink_any].ready_source_count, 1)
+        self.assertEqual(ready_sinks[sink_all].ready_source_count, 1)
+        self.assertIsNotNone(ready_sinks[sink_all].oldest_source_ready_dt)
+        self.assertFalse(ready_sinks[sink_all].orphan_sink)
+
+        ready_sinks = dataset_observer.list_ready_sinks(7, model_namespace='ROOT', dependency_check='all')
+        self.assertEqual([ready.sink_id for ready in ready_sinks], [sink_all])
+
+        dataset_observer.start_dataset_observer_run_with_id(sink_all)
+        self.assertEqual([ready.sink_id for ready in dataset_observer.list_ready_sinks(7)], [sink_any])
+
+    def test_11_1_fetch_ready_dataset_sources_by_sink_keys(self):
+        dataset_observer = self.new_dataset_lineage()
+
+        source = dataset_observer.declare_dataset_observer(model_name="test11_1_src--test")
+        sink = dataset_observer.declare_dataset_observer(model_name="test11_1_sink--test", model_namespace="ns11_1",
+                                                         model_dataset_props="dim1", model_zone_tag=2)
+        dataset_observer.associate_dataset_source_to_sink(source, sink)
+        result = dataset_observer.start_dataset_observer_run_with_id(source)
+        dataset_observer.finish_dataset_observer_run(status="success", dataset_run_id=result.run_id)
+
+        summary = dataset_observer.fetch_ready_dataset_sources_by_sink_keys("test11_1_sink--test", "ns11_1", "dim1", 2)
+        self.assertEqual(summary.sink_id, sink)
+        self.assertEqual(summary.source_sink_rel_count, 1)
+        self.assertEqual([queue.source_run_id for queue in summary.dataset_queue_list], [result.run_id])
+
+    def test_12_0_start_with_specific_sources(self):
+        dataset_observer = self.new_dataset_lineage()
+
+        source1 = dataset_observer.declare_dataset_observer(model_name="test12_0_src1--test")
+        source2 = dataset_observer.declare_dataset_observer(model_name="test12_0_src2--test")
+        sink = dataset_observer.declare_dataset_observer(model_name="test12_0_sink--test",
+                                                         observer_config="cfg12_0")
+        dataset_observer.associate_dataset_source_to_sink(source1, sink)
+        dataset_observer.associate_dataset_source_to_sink(source2, sink)
+        run1 = dataset_observer.start_dataset_observer_run_with_id(source1).run_id
+        dataset_observer.finish_dataset_observer_run(status="success", dataset_run_id=run1)
+        run2 = dataset_observer.start_dataset_observer_run_with_id(source2).run_id
+        dataset_observer.finish_dataset_observer_run(status="success", dataset_run_id=run2)
+
+        result = dataset_observer.start_dataset_observer_run_with_id(sink, dependency_check="source_ids",
+                                                                     specific_sources=[source2])
+        self.assertEqual(result.source_sink_rel_count, 2)
+        self.assertEqual(result.source_run_id_list, [run2])
+        dataset_observer.finish_dataset_observer_run(status="success", dataset_run_id=result.run_id)
+
+        # only the filtered source was consumed
+        summary = dataset_observer.fetch_ready_dataset_sources_by_sink_id(sink_dataset_id=sink)
+        self.assertEqual([queue.source_run_id for queue in summary.dataset_queue_list], [run1])
+
+        with self.assertRaises(DependencyException):
+            dataset_observer.start_dataset_observer_run_with_id(sink, dependency_check="source_run_ids",
+                                                                specific_sources=[run2])
+        with self.assertRaises(DatasetNotFoundException):
+            dataset_observer.start_dataset_observer_run_with_id("0" * 32)
+        with self.assertRaises(DatasetNotFoundException):
+            dataset_observer.fetch_ready_dataset_sources_by_sink_id(sink_dataset_id="0" * 32)
+
+    def test_12_1_consumed_events(self):
+        dataset_observer = self.new_dataset_lineage()
+
+        source = dataset_observer.declare_dataset_observer(model_name="test12_1_src--test")
+        sink1 = dataset_observer.declare_dataset_observer(model_name="test12_1_sink1--test")
+        sink2 = dataset_observer.declare_dataset_observer(model_name="test12_1_sink2--test")
+        dataset_observer.associate_dataset_source_to_sink(source, sink1)
+        dataset_observer.associate_dataset_source_to_sink(source, sink2)
+        source_run = dataset_observer.start_dataset_observer_run_with_id(source).run_id
+        dataset_observer.finish_dataset_observer_run(status="success", dataset_run_id=source_run)
+
+        # pending for both sinks, consumed by neither
+        self.assertEqual(dataset_observer.get_consuming_sink_events(source_run), [])
+
+        sink1_run = dataset_observer.start_dataset_observer_run_with_id(sink1).run_id
+        events = dataset_observer.get_consumed_source_events(sink1_run)
+        self.assertEqual([(event.source_run_id, event.source_dataset_id, event.sink_dataset_id) for event in events],
+                         [(source_run, source, sink1)])
+        self.assertIsNotNone(events[0].sink_start_dt)
+
+        # still pending for the other sink
+        summary = dataset_observer.fetch_ready_dataset_sources_by_sink_id(sink_dataset_id=sink2)
+        self.assertEqual([queue.source_run_id for queue in summary.dataset_queue_list], [source_run])
+        sink2_run = dataset_observer.start_dataset_observer_run_with_id(sink2).run_id
+        self.assertEqual(sorted(event.sink_run_id for event in dataset_observer.get_consuming_sink_events(source_run)),
+                         sorted([sink1_run, sink2_run]))
+        self.assertEqual(dataset_observer.fetch_ready_dataset_sources_by_sink_id(sink_dataset_id=sink1)
+                         .dataset_queue_list, [])
+
+    def test_12_2_wait_for_ready_sources(self):
+        dataset_observer = self.new_dataset_lineage()
+
+        source1 = dataset_observer.declare_dataset_observer(model_name="test12_2_src1--test")
+        source2 = dataset_observer.declare_dataset_observer(model_name="test12_2_src2--test")
+        sink = dataset_observer.declare_dataset_observer(model_name="test12_2_sink--test")
+        dataset_observer.associate_dataset_source_to_sink(source1, sink)
+        dataset_observer.associate_dataset_source_to_sink(source2, sink)
+        run1 = dataset_observer.start_dataset_observer_run_with_id(source1).run_id
+        dataset_observer.finish_dataset_observer_run(status="success", dataset_run_id=run1)
+
+        self.assertIsNone(dataset_observer.wait_for_ready_sources(sink, dependency_check="all", timeout_sec=0.3))
+        summary = dataset_observer.wait_for_ready_sources(sink, dependency_check="source_run_ids", timeout_sec=0.3,
+                                                          specific_sources=[run1])
+        self.assertEqual(summary.source_run_idList, [run1])
+
+        run2 = dataset_observer.start_dataset_observer_run_with_id(source2).run_id
+        dataset_observer.finish_dataset_observer_runs([{"dataset_run_id": run2, "status": "success"}])
+        summary = dataset_observer.wait_for_ready_sources(sink, dependency_check="all", timeout_sec=0.3)
+        self.assertEqual(summary.source_id_list, {source1, source2})
+
+    def test_13_0_upstream_downstream(self):
+        dataset_observer = self.new_dataset_lineage()
+
+        # a -> b -> d -> e, a -> c -> d, e -> b (cycle), f retired from d
+        a, b, c, d, e, f = [dataset_observer.declare_dataset_observer(model_name="test13_0_%s--test" % name)
+                            for name in "abcdef"]
+        for source, sink in ((a, b), (b, d), (d, e), (a, c), (c, d), (e, b), (f, d)):
+            dataset_observer.associate_dataset_source_to_sink(source, sink)
+        dataset_observer.disassociate_dataset_source_from_sink(f, d)
+
+        self.assertEqual(dataset_observer.get_downstream(a), {b: 1, c: 1, d: 2, e: 3})
+        self.assertEqual(dataset_observer.get_downstream(a, max_depth=2), {b: 1, c: 1, d: 2})
+        self.assertEqual(dataset_observer.get_upstream(d), {b: 1, c: 1, a: 2, e: 2})
+        self.assertEqual(dataset_observer.get_upstream(d, max_depth=1), {b: 1, c: 1})
+        self.assertEqual(dataset_observer.get_downstream(e), {b: 1, d: 2})
+        self.assertEqual(dataset_observer.get_upstream(a), {})
+        self.assertEqual(dataset_observer.get_downstream(f), {})
+        self.assertRaises(ConfigValidationException, dataset_observer.get_upstream, d, max_depth=0)
+
+    def test_13_1_trace_run_provenance(self):
+        dataset_observer = self.new_dataset_lineage()
+
+        # raw1 -> std -> cur, raw2 -> cur, raw1 -> cur
+        raw1, raw2, std, cur = [dataset_observer.declare_dataset_observer(model_name="test13_1_%s--test" % name,
+                                                                         model_zone_tag=zone)
+                                for name, zone in (("raw1", 1), ("raw2", 1), ("std", 2), ("cur", 3))]
+        for source, sink in ((raw1, std), (std, cur), (raw2, cur), (raw1, cur)):
+            dataset_observer.associate_dataset_source_to_sink(source, sink)
+
+        def run(observer_id, **finish_args) -> str:
+            run_id = dataset_observer.start_dataset_observer_run_with_id(observer_id).run_id
+            dataset_observer.finish_dataset_observer_run(status="success", dataset_run_id=run_id, **finish_args)
+            return run_id
+
+        raw1_run = run(raw1, record_count=10, dataset_batch_run_id="batch13_1")
+        std_run = run(std)
+        raw2_run = run(raw2)
+        cur_run = run(cur)
+
+        trace = dataset_observer.trace_run_provenance(cur_run)
+        self.assertEqual((trace.run_id, trace.dataset_observer_id, trace.model_name, trace.model_zone_tag,
+                          trace.status, trace.depth), (cur_run, cur, "test13_1_cur--test", 3, 3, 0))
+        self.assertEqual(sorted(source_run.run_id for source_run in trace.source_runs),
+                         sorted([raw1_run, std_run, raw2_run]))
+        std_trace = [source_run for source_run in trace.source_runs if source_run.run_id == std_run][0]
+        raw1_trace = std_trace.source_runs[0]
+        # consumed directly and through std, one node at its shortest depth
+        self.assertIn(raw1_trace, trace.source_runs)
+        self.assertEqual((raw1_trace.run_id, raw1_trace.dataset_observer_id, raw1_trace.batch_run_id,
+                          raw1_trace.record_count, raw1_trace.depth), (raw1_run, raw1, "batch13_1", 10, 1))
+        self.assertEqual(len(trace.upstream_runs()), 3)
+
+        self.assertEqual([source_run.source_runs for source_run in
+                          dataset_observer.trace_run_provenance(cur_run, max_depth=1).source_runs], [[], [], []])
+        self.assertEqual(dataset_observer.trace_run_provenance(raw2_run).source_runs, [])
+        self.assertRaises(RunNotFoundException, dataset_observer.trace_run_provenance, "f" * 32)
+
+    def test_13_2_impact_of_run(self):
+        dataset_observer = self.new_dataset_lineage()
+
+        # raw -> std -> cur, raw -> cur2
+        raw, std, cur, cur2 = [dataset_observer.declare_dataset_observer(model_name="test13_2_%s--test" % name,
+                                                                         model_zone_tag=zone)
+                               for name, zone in (("raw", 1), ("std", 2), ("cur", 3), ("cur2", 3))]
+        for source, sink in ((raw, std), (std, cur), (raw, cur2)):
+            dataset_observer.associate_dataset_source_to_sink(source, sink)
+
+        def run(observer_id) -> str:
+            run_id = dataset_observer.start_dataset_observer_run_with_id(observer_id).run_id
+            dataset_observer.finish_dataset_observer_run(status="success", dataset_run_id=run_id)
+            return run_id
+
+        raw_run = run(raw)
+        std_run = run(std)
+
+        impact = dataset_observer.impact_of_run(raw_run)
+        self.assertEqual((impact.run.run_id, impact.run.dataset_observer_id, impact.quarantined_count),
+                         (raw_run, raw, 0))
+        self.assertEqual([(consumed_run.run_id, consumed_run.depth) for consumed_run in impact.consumed_runs],
+                         [(std_run, 1)])
+        self.assertEqual([source_run.run_id for source_run in impact.consumed_runs[0].source_runs], [raw_run])
+        self.assertEqual(sorted((event.source_run_id, event.sink_dataset_id, event.quarantined_dt)
+                                for event in impact.pending_event_list),
+                         sorted([(raw_run, cur2, None), (std_run, cur, None)]))
+        self.assertEqual(impact.sink_ids(), {std, cur, cur2})
+
+        # overlapping quarantines (usually within the same second) count each event once
+        self.assertEqual(dataset_observer.impact_of_run(std_run, quarantine=True).quarantined_count, 1)
+        impact = dataset_observer.impact_of_run(raw_run, quarantine=True)
+        self.assertEqual(impact.quarantined_count, 1)
+        self.assertTrue(all(event.quarantined_dt is not None for event in impact.pending_event_list))
+        # the sinks skip the quarantined events
+        self.assertRaises(DependencyException, dataset_observer.start_dataset_observer_run_with_id, cur)
+        self.assertRaises(DependencyException, dataset_observer.start_dataset_observer_run_with_id, cur2)
+        self.assertEqual(dataset_observer.list_ready_sinks(3), [])
+        self.assertEqual(dataset_observer.impact_of_run(raw_run, quarantine=True).quarantined_count, 0)
+
+        # a later good run is not impacted
+        run(raw)
+        self.assertEqual(len(dataset_observer.start_dataset_observer_run_with_id(cur2).source_run_id_list), 1)
+        self.assertRaises(RunNotFoundException, dataset_observer.impact_of_run, "f" * 32)
+
+    def test_14_0_sync_lineage_manifest(self):
+        dataset_observer = self.new_dataset_lineage()
+
+        raw = dataset_observer.declare_dataset_observer(model_name="test14_0_raw--test", model_zone_tag=1)
+        old = dataset_observer.declare_dataset_observer(model_name="test14_0_old--test", model_zone_tag=1)
+        std = dataset_observer.declare_dataset_observer(model_name="test14_0_std--test", model_zone_tag=2,
+                                                        description="before")
+        ext = dataset_observer.declare_dataset_observer(model_name="test14_0_ext--test", model_zone_tag=2)
+        dataset_observer.associate_dataset_source_to_sink(old, std)
+        dataset_observer.associate_dataset_source_to_sink(old, raw)
+        dataset_observer.associate_dataset_source_to_sink(old, ext)
+
+        def key(name, zone):
+            return {'model_name': "test14_0_%s--test" % name, 'model_zone_tag': zone}
+
+        manifest = LineageManifest.from_dict({
+            'observers': [key("raw", 1), key("raw2", 1), dict(key("std", 2), description="after"), key("cur", 3)],
+            'rels': [{'source': key("raw", 1), 'sink': key("std", 2)},
+                     {'source': key("raw2", 1), 'sink': key("std", 2)},
+                     {'source': key("std", 2), 'sink': key("cur", 3)}]})
+
+        plan = dataset_observer.sync_lineage_manifest(manifest, dry_run=True)
+        self.assertFalse(plan.applied)
+        self.assertEqual((len(plan.observers_to_declare), len(plan.observers_to_update), len(plan.rels_to_add),
+                          len(plan.rels_to_terminate)), (2, 1, 3, 2))
+        self.assertEqual(dataset_observer.get_upstream(std), {old: 1})
+
+        plan = dataset_observer.sync_lineage_manifest(manifest)
+        self.assertTrue(plan.applied)
+        raw2 = dataset_observer.get_dataset_observer_id("test14_0_raw2--test")
+        cur = dataset_observer.get_dataset_observer_id("test14_0_cur--test", model_zone_tag=3)
+        self.assertEqual(dataset_observer.get_upstream(cur), {std: 1, raw: 2, raw2: 2})
+        # the manifest owns the sources of its observers only
+        self.assertEqual(dataset_observer.get_downstream(old), {ext: 1})
+        self.assertEqual(dataset_observer.get_dataset_observer(std).description, "after")
+        self.assertTrue(dataset_observer.sync_lineage_manifest(manifest).is_empty())
+
+        # the synced rels carry events like associated ones
+        run_id = dataset_observer.start_dataset_observer_run_with_id(raw2).run_id
+        dataset_observer.finish_dataset_observer_run(status="success", dataset_run_id=run_id)
+        self.assertEqual(len(dataset_observer.start_dataset_observer_run_with_id(std).source_run_id_list), 1)
+
+        dataset_observer.update_dataset_observer_status(raw2, observer_status=0)
+        dataset_observer.disassociate_dataset_source_from_sink(raw2, std)
+        plan = dataset_observer.sync_lineage_manifest(manifest, dry_run=True)
+        self.assertEqual(len(plan.blocked_rels), 1)
+        self.assertRaises(DatasetNotFoundException, dataset_observer.sync_lineage_manifest, manifest)
+
+    def test_x_joke(self):
+        from data_lineage.dataset_lineage_mgmt import a_simple_func
+        import time
+        time.sleep(1) # just to get the test logging to not get interleaved with OK
+
+        self.assertEqual(a_simple_func(), "I am talking to you")
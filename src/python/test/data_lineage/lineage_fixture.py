@@ -0,0 +1,36 @@
+import os
+import tempfile
+import unittest
+from data_lineage.dataset_lineage_mgmt import DatasetLineage
+from data_lineage.db_layer import SqliteBackend
+
+
+class SqliteFileTestCase(unittest.TestCase):
+    """
+    Tests on a temp SQLite database file, which more DatasetLineage instances can open like other processes would.
+    """
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.db_path = os.path.join(tmp_dir.name, 'lineage.db')
+
+    def new_dataset_lineage(self, backend:SqliteBackend = None, **kwargs) -> DatasetLineage:
+        """
+        A DatasetLineage on the test's database file, closed at cleanup.
+
+        :param kwargs: Other DatasetLineage arguments.
+        """
+        dataset_lineage = DatasetLineage(backend=backend if backend is not None else SqliteBackend(self.db_path),
+                                         **kwargs)
+        self.addCleanup(dataset_lineage.close_db_con)
+        return dataset_lineage
+
+    def run_source(self, source_id, dataset_lineage:DatasetLineage = None) -> str:
+        """
+        Starts and successfully finishes a run of source_id, with self.dataset_lineage by default.
+        """
+        dataset_lineage = dataset_lineage if dataset_lineage is not None else self.dataset_lineage
+        run_id = dataset_lineage.start_dataset_observer_run_with_id(source_id).run_id
+        dataset_lineage.finish_dataset_observer_run(status="success", dataset_run_id=run_id)
+        return run_id
@@ -0,0 +1,122 @@
+import os
+import time
+import unittest
+from data_lineage.dataset_lineage_mgmt import DatasetLineage
+from data_lineage.db_layer import SqliteBackend
+from data_lineage.dataset_catalog import ObserverCatalogCache
+
+
+class TestObserverCatalogCache(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = SqliteBackend()
+        self.catalog = ObserverCatalogCache(refresh_interval_sec=None)
+        self.dataset_lineage = DatasetLineage(backend=self.backend, catalog_cache=self.catalog)
+        self.addCleanup(self.dataset_lineage.close_db_con)
+
+    def test_start_by_keys_hits_cache(self):
+        dataset_lineage = self.dataset_lineage
+        dataset1 = dataset_lineage.declare_dataset_observer(model_name="catalog1--test", model_namespace="ns1")
+
+        for i in range(3):
+            result = dataset_lineage.start_dataset_observer_run_with_keys(model_name="catalog1--test",
+                                                                          model_namespace="ns1")
+            self.assertEqual(result.sink_id, dataset1)
+            dataset_lineage.finish_dataset_observer_run(status="success", dataset_run_id=result.run_id)
+
+        stats = self.catalog.stats()
+        self.assertEqual(stats["entries"], 1)
+        self.assertGreaterEqual(stats["hits"], 2)
+
+        observer = dataset_lineage.get_dataset_observer(dataset1)
+        self.assertEqual(observer.model_name, "catalog1--test")
+        self.assertEqual(observer.model_namespace, "ns1")
+        self.assertEqual(observer.status, 1)
+        self.assertIsNone(dataset_lineage.get_dataset_observer("no-such-observer"))
+
+    def test_update_invalidates(self):
+        dataset_lineage = self.dataset_lineage
+        dataset1 = dataset_lineage.declare_dataset_observer(model_name="catalog2--test")
+        self.assertIsNone(dataset_lineage.get_dataset_observer(dataset1).description)
+
+        dataset_lineage.update_dataset_observer(dataset1, description="updated")
+        self.assertEqual(dataset_lineage.get_dataset_observer(dataset1).description, "updated")
+
+        dataset_lineage.update_dataset_observer_status(dataset1, observer_status=0)
+        self.assertEqual(dataset_lineage.get_dataset_observer(dataset1).status, 0)
+        self.assertEqual(self.catalog.invalidations, 2)
+
+    def test_disabled_observer_cannot_be_associated(self):
+        dataset_lineage = self.dataset_lineage
+        source = dataset_lineage.declare_dataset_observer(model_name="catalog_source--test")
+        sink = dataset_lineage.declare_dataset_observer(model_name="catalog_sink--test")
+        self.assertIsNotNone(dataset_lineage.get_dataset_observer(source))
+
+        dataset_lineage.update_dataset_observer_status(source, observer_status=0)
+        with self.assertRaises(Exception):
+            dataset_lineage.associate_dataset_source_to_sink(source, sink)
+
+        dataset_lineage.update_dataset_observer_status(source, observer_status=1)
+        dataset_lineage.associate_dataset_source_to_sink(source, sink)
+
+    def test_refresh_sees_other_writers(self):
+        dataset_lineage = self.dataset_lineage
+        other_writer = DatasetLineage(backend=self.backend)
+        dataset1 = dataset_lineage.declare_dataset_observer(model_name="catalog3--test")
+
+        conn = self.backend.get_con()
+        self.assertEqual(self.catalog.refresh(conn), 0)  # first poll only sets the watermark
+        self.assertEqual(dataset_lineage.get_dataset_observer(dataset1).status, 1)
+
+        other_writer.update_dataset_observer_status(dataset1, observer_status=0)
+        self.assertEqual(dataset_lineage.get_dataset_observer(dataset1).status, 1)  # stale until polled
+
+        self.assertEqual(self.catalog.refresh(conn), 1)
+        self.assertEqual(dataset_lineage.get_dataset_observer(dataset1).status, 0)
+
+    def restore_tz(self, tz:str):
+        if tz is None:
+            os.environ.pop('TZ', None)
+        else:
+            os.environ['TZ'] = tz
+        time.tzset()
+
+    @unittest.skipIf(not hasattr(time, 'tzset'), "needs time.tzset()")
+    def test_refresh_west_of_utc(self):
+        # SQLite's current_timestamp is UTC, a local clock would stamp updates hours before the inserts
+        self.addCleanup(self.restore_tz, os.environ.get('TZ'))
+        os.environ['TZ'] = 'America/New_York'
+        time.tzset()
+
+        dataset_lineage = self.dataset_lineage
+        other_writer = DatasetLineage(backend=self.backend)
+        source = dataset_lineage.declare_dataset_observer(model_name="catalog_tz_source--test")
+        sink = other_writer.declare_dataset_observer(model_name="catalog_tz_sink--test")
+
+        conn = self.backend.get_con()
+        self.catalog.refresh(conn)
+        self.assertEqual(dataset_lineage.get_dataset_observer(sink).status, 1)
+        other_writer.update_dataset_observer_status(sink, observer_status=2)
+
+        self.assertEqual(self.catalog.refresh(conn), 1)
+        with self.assertRaises(Exception):
+            dataset_lineage.associate_dataset_source_to_sink(source, sink)
+
+    def test_lru_eviction_and_ttl(self):
+        catalog = ObserverCatalogCache(max_entries=2, refresh_interval_sec=None)
+        dataset_lineage = DatasetLineage(backend=self.backend, catalog_cache=catalog)
+        ids = [dataset_lineage.declare_dataset_observer(model_name="catalog_lru%d--test" % i) for i in range(3)]
+
+        observers = catalog.get_by_ids(self.backend.get_con(), ids)
+        self.assertEqual(set(observers.keys()), set(ids))
+        self.assertEqual(catalog.stats()["entries"], 2)
+        self.assertEqual(catalog.evictions, 1)
+
+        catalog.ttl_sec = 0
+        misses = catalog.misses
+        self.assertIsNotNone(dataset_lineage.get_dataset_observer(ids[2]))
+        self.assertEqual(catalog.misses, misses + 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+import unittest
+from datetime import datetime, timedelta
+from data_lineage.dataset_lineage_mgmt import DatasetLineage
+from data_lineage.dataset_compaction import EventQueueCompactor
+from data_lineage.dataset_exceptions import ConfigValidationException
+from data_lineage.db_layer import SqliteBackend
+
+
+class TestEventQueueCompactor(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = SqliteBackend()
+        self.dataset_lineage = DatasetLineage(backend=self.backend)
+        self.addCleanup(self.dataset_lineage.close_db_con)
+
+        dataset_lineage = self.dataset_lineage
+        self.source = dataset_lineage.declare_dataset_observer(model_name="compact_source--test")
+        self.sink = dataset_lineage.declare_dataset_observer(model_name="compact_sink--test")
+        dataset_lineage.associate_dataset_source_to_sink(self.source, self.sink)
+
+        # 5 consumed events (one sink run per source run) and 1 pending event
+        self.sink_run_ids = []
+        for i in range(6):
+            result = dataset_lineage.start_dataset_observer_run_with_id(self.source)
+            dataset_lineage.finish_dataset_observer_run(status="success", dataset_run_id=result.run_id)
+            if i < 5:
+                result = dataset_lineage.start_dataset_observer_run_with_id(self.sink)
+                dataset_lineage.finish_dataset_observer_run(status="success", dataset_run_id=result.run_id)
+                self.sink_run_ids.append(result.run_id)
+
+        # age every event past the retention window, a minute apart
+        conn = self.backend.get_con()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT source_run_id FROM dataset_source_sink_event_queue ORDER BY source_ready_dt")
+            source_run_ids = [row[0] for row in cursor.fetchall()]
+            for i, source_run_id in enumerate(source_run_ids):
+                cursor.execute("UPDATE dataset_source_sink_event_queue SET source_ready_dt=%s WHERE source_run_id=%s",
+                               (datetime(2020, 1, 1) + timedelta(minutes=i), source_run_id))
+            cursor.close()
+        finally:
+            self.backend.release_con(conn)
+
+    def count(self, table:str) -> int:
+        conn = self.backend.get_con()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT count(*) FROM " + table)
+            count = cursor.fetchall()[0][0]
+            cursor.close()
+            return count
+        finally:
+            self.backend.release_con(conn)
+
+    def test_archives_consumed_events_only(self):
+        result = self.dataset_lineage.compact_event_queue(EventQueueCompactor(retention_days=30, chunk_size=2))
+
+        self.assertEqual(result.archived_count, 5)
+        self.assertEqual(result.chunk_count, 3)
+        self.assertTrue(result.pass_complete)
+        self.assertEqual(self.count("dataset_source_sink_event_queue"), 0)
+        self.assertEqual(self.count("dataset_source_sink_event_queue_archive"), 5)
+        self.assertEqual(self.count("dataset_source_sink_pending_event"), 1)
+
+        # the pending event is still consumed by the next sink run
+        start_result = self.dataset_lineage.start_dataset_observer_run_with_id(self.sink)
+        self.assertEqual(len(start_result.source_run_id_list), 1)
+
+    def test_resumes_from_checkpoint(self):
+        compactor = EventQueueCompactor(retention_days=30, chunk_size=2)
+
+        result = self.dataset_lineage.compact_event_queue(compactor, max_chunks=1)
+        self.assertEqual((result.archived_count, result.pass_complete), (2, False))
+
+        result = self.dataset_lineage.compact_event_queue(compactor)
+        self.assertEqual((result.archived_count, result.pass_complete), (3, True))
+
+        # new pass, nothing left to archive
+        result = self.dataset_lineage.compact_event_queue(compactor)
+        self.assertEqual((result.archived_count, result.chunk_count, result.pass_complete), (0, 1, True))
+
+    def test_retention_window(self):
+        result = self.dataset_lineage.compact_event_queue(EventQueueCompactor(retention_days=365 * 100))
+        self.assertEqual(result.archived_count, 0)
+        self.assertEqual(self.count("dataset_source_sink_event_queue"), 5)
+
+    def test_queries_union_archive_when_asked(self):
+        dataset_lineage = self.dataset_lineage
+        sink_run_id = self.sink_run_ids[0]
+        events = dataset_lineage.get_consumed_source_events(sink_run_id)
+        self.assertEqual(len(events), 1)
+        self.assertFalse(events[0].archived)
+        source_run_id = events[0].source_run_id
+        self.assertEqual(events[0].source_dataset_id, self.source)
+        self.assertEqual(events[0].sink_dataset_id, self.sink)
+
+        dataset_lineage.compact_event_queue(EventQueueCompactor(retention_days=30))
+
+        self.assertEqual(dataset_lineage.get_consumed_source_events(sink_run_id), [])
+        events = dataset_lineage.get_consumed_source_events(sink_run_id, include_archive=True)
+        self.assertEqual([(event.source_run_id, event.archived) for event in events], [(source_run_id, True)])
+        self.assertEqual(events[0].source_ready_dt, datetime(2020, 1, 1))
+
+        events = dataset_lineage.get_consuming_sink_events(source_run_id, include_archive=True)
+        self.assertEqual([event.sink_run_id for event in events], [sink_run_id])
+
+    def test_trace_run_provenance_through_archive(self):
+        dataset_lineage = self.dataset_lineage
+        sink_run_id = self.sink_run_ids[0]
+        source_run_id = dataset_lineage.trace_run_provenance(sink_run_id).source_runs[0].run_id
+
+        dataset_lineage.compact_event_queue(EventQueueCompactor(retention_days=30))
+
+        self.assertEqual(dataset_lineage.trace_run_provenance(sink_run_id).source_runs, [])
+        trace = dataset_lineage.trace_run_provenance(sink_run_id, include_archive=True)
+        self.assertEqual([(source_run.run_id, source_run.dataset_observer_id) for source_run in trace.source_runs],
+                         [(source_run_id, self.source)])
+
+    def test_rate_limit(self):
+        compactor = EventQueueCompactor(max_rows_per_sec=100)
+        self.assertAlmostEqual(compactor.pause_sec(50, 0.1), 0.4)
+        self.assertEqual(compactor.pause_sec(50, 1.0), 0.0)
+        self.assertEqual(EventQueueCompactor().pause_sec(50, 0.1), 0.0)
+        self.assertRaises(ConfigValidationException, EventQueueCompactor, max_rows_per_sec=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
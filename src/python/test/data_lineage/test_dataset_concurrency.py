@@ -0,0 +1,209 @@
+import os
+import tempfile
+import threading
+import unittest
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from data_lineage.dataset_lineage_mgmt import DatasetLineage
+from data_lineage.dataset_exceptions import AlreadyActiveException, DependencyException, RunNotFoundException
+from data_lineage.db_layer import SqliteBackend
+from test.data_lineage.lineage_fixture import SqliteFileTestCase
+
+
+class ConcurrentStartFinish:
+    """
+    One DatasetLineage shared by 32 threads starting and finishing runs of a handful of observers.
+    """
+    THREADS = 32
+    ITERATIONS = 20
+
+    def new_backend(self) -> SqliteBackend:
+        raise NotImplementedError
+
+    def test_concurrent_start_finish(self):
+        backend = self.new_backend()
+        dataset_lineage = DatasetLineage(backend=backend)
+        self.addCleanup(dataset_lineage.close_db_con)
+
+        sources = [dataset_lineage.declare_dataset_observer(model_name="stress_source%d--test" % i) for i in range(6)]
+        sink = dataset_lineage.declare_dataset_observer(model_name="stress_sink--test")
+        for source in sources:
+            dataset_lineage.associate_dataset_source_to_sink(source, sink)
+        observers = sources + [sink]
+
+        lock = threading.Lock()
+        active = {}
+        started_runs = []
+        consumed_source_runs = []
+        errors = []
+
+        def worker(thread_no):
+            for i in range(self.ITERATIONS):
+                observer = observers[(thread_no + i) % len(observers)]
+                try:
+                    result = dataset_lineage.start_dataset_observer_run_with_id(observer)
+                except (AlreadyActiveException, DependencyException):
+                    continue
+
+                with lock:
+                    if observer in active:
+                        errors.append("duplicate active run of %s" % observer)
+                    active[observer] = result.run_id
+                    started_runs.append(result.run_id)
+                    consumed_source_runs.extend(result.source_run_id_list)
+
+                with lock:
+                    if active.pop(observer, None) != result.run_id:
+                        errors.append("run of %s replaced while active" % observer)
+                dataset_lineage.finish_dataset_observer_run(status="success", dataset_run_id=result.run_id)
+
+        with ThreadPoolExecutor(max_workers=self.THREADS) as executor:
+            for future in [executor.submit(worker, n) for n in range(self.THREADS)]:
+                future.result()
+
+        self.assertEqual(errors, [])
+        self.assertGreater(len(started_runs), len(observers))
+        # every source run was consumed by at most one sink run
+        self.assertEqual(len(consumed_source_runs), len(set(consumed_source_runs)))
+
+        conn = backend.get_con()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT status, count(*) FROM dataset_observer_run GROUP BY status")
+            status_counts = dict(cursor.fetchall())
+            # the queue only holds consumed events, pending ones are in dataset_source_sink_pending_event
+            cursor.execute("SELECT count(*) FROM dataset_source_sink_event_queue")
+            consumed_count = cursor.fetchall()[0][0]
+            cursor.close()
+        finally:
+            backend.release_con(conn)
+
+        self.assertEqual(status_counts, {3: len(started_runs)})
+        self.assertEqual(consumed_count, len(consumed_source_runs))
+
+
+class TestConcurrentSqliteFile(ConcurrentStartFinish, unittest.TestCase):
+    """
+    Pooled connections, one per thread, on a WAL file database.
+    """
+
+    def new_backend(self) -> SqliteBackend:
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        return SqliteBackend(os.path.join(tmp_dir.name, 'stress.db'))
+
+
+class TestConcurrentSqliteMemory(ConcurrentStartFinish, unittest.TestCase):
+    """
+    Threads taking turns on the single in-memory connection.
+    """
+
+    def new_backend(self) -> SqliteBackend:
+        return SqliteBackend()
+
+
+class HookedCursor:
+
+    def __init__(self, cursor, backend, conn):
+        self._cursor = cursor
+        self._backend = backend
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def execute(self, stmt:str, params=()):
+        self._backend.fire(stmt, self._conn)
+        return self._cursor.execute(stmt, params)
+
+    def executemany(self, stmt:str, seq_of_params):
+        self._backend.fire(stmt, self._conn)
+        return self._cursor.executemany(stmt, seq_of_params)
+
+
+class RacingBackend(SqliteBackend):
+    """
+    Runs race(cursor) before every statement starting with race_stmt, on the connection of the call: the changes a
+    concurrent writer committed between the call's reads and its writes. race must be idempotent, it runs again
+    when the call starts over.
+    """
+    race_stmt = None
+    race = None
+
+    def get_con(self):
+        conn = super().get_con()
+        if 'cursor' not in vars(conn):
+            conn.cursor = lambda: HookedCursor(type(conn).cursor(conn), self, conn)
+        return conn
+
+    def fire(self, stmt:str, conn):
+        if self.race_stmt is not None and stmt.startswith(self.race_stmt):
+            cursor = type(conn).cursor(conn)
+            self.race(cursor)
+            cursor.close()
+
+
+class TestRacingWriters(SqliteFileTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.backend = RacingBackend(self.db_path)
+        self.dataset_lineage = self.new_dataset_lineage(self.backend)
+
+    def declare(self, *names) -> list:
+        return [self.dataset_lineage.declare_dataset_observer(model_name="race_%s--test" % name, model_zone_tag=2)
+                for name in names]
+
+    def test_batch_finish_loses_a_run(self):
+        dataset_lineage = self.dataset_lineage
+        source1, source2, sink = self.declare("source1", "source2", "sink")
+        dataset_lineage.associate_dataset_source_to_sink(source1, sink)
+        dataset_lineage.associate_dataset_source_to_sink(source2, sink)
+        run1 = dataset_lineage.start_dataset_observer_run_with_id(source1).run_id
+        run2 = dataset_lineage.start_dataset_observer_run_with_id(source2).run_id
+
+        # run1 failed in another writer, in the same second, after the batch validated it
+        self.backend.race_stmt = "UPDATE dataset_observer_run SET"
+        self.backend.race = lambda cursor: cursor.execute(
+            "UPDATE dataset_observer_run SET status = 0, end_dt = %s WHERE run_id = %s AND status = 2",
+            (datetime.now().replace(microsecond=0), run1))
+        outcomes = dataset_lineage.finish_dataset_observer_runs([{'status': 'success', 'dataset_run_id': run1},
+                                                                 {'status': 'success', 'dataset_run_id': run2}])
+        self.backend.race_stmt = None
+        self.assertFalse(outcomes[0].finished)
+        self.assertIsInstance(outcomes[0].error, RunNotFoundException)
+        self.assertTrue(outcomes[1].finished)
+        self.assertEqual(dataset_lineage.start_dataset_observer_run_with_id(sink).source_run_id_list, [run2])
+
+    def test_zone_start_loses_sinks(self):
+        dataset_lineage = self.dataset_lineage
+        source, sink1, sink2, sink3 = self.declare("source", "sink1", "sink2", "sink3")
+        for sink in (sink1, sink2):
+            dataset_lineage.associate_dataset_source_to_sink(source, sink)
+        source_run = self.run_source(source)
+        dataset_lineage.update_dataset_observer_status(source, observer_status=0)
+
+        # sink1's event was consumed and sink3 (no sources) started by other writers after the readiness was read
+        def race(cursor):
+            cursor.execute("DELETE FROM dataset_source_sink_pending_event WHERE sink_dataset_id = %s", (sink1,))
+            cursor.execute("INSERT INTO dataset_observer_run (status, run_id, dataset_observer_id, start_dt) "
+                           "SELECT 2, %s, %s, %s WHERE NOT EXISTS (SELECT 1 FROM dataset_observer_run "
+                           "WHERE run_id = %s)", ("f" * 32, sink3, datetime.now(), "f" * 32))
+        self.backend.race_stmt = "INSERT INTO dataset_observer_run"
+        self.backend.race = race
+        zone_result = dataset_lineage.start_dataset_observer_runs_for_zone(2)
+        self.backend.race_stmt = None
+
+        self.assertEqual([(start_result.sink_id, start_result.source_run_id_list)
+                          for start_result in zone_result.start_result_list], [(sink2, [source_run])])
+        self.assertEqual(sorted((skipped.sink_id, skipped.reason) for skipped in zone_result.skipped_sink_list),
+                         sorted([(source, 'disabled'), (sink1, 'consumed'), (sink3, 'active')]))
+        self.assertRaises(AlreadyActiveException, dataset_lineage.start_dataset_observer_run_with_id, sink3)
+        # sink1 was left without a run
+        self.assertEqual(len(dataset_lineage.start_dataset_observer_run_with_id(sink1,
+                                                                                dependency_check='ignore')
+                             .source_run_id_list), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import threading
+import unittest
+from data_lineage.dataset_events import LineageEventBus, RUN_FINISHED
+from data_lineage.dataset_exceptions import ConfigValidationException
+from data_lineage.dataset_structs import DatasetRunStartedEvent, DatasetRunFinishedEvent, DatasetSourcesEnqueuedEvent
+from test.data_lineage.lineage_fixture import SqliteFileTestCase
+
+
+class TestLineageEvents(SqliteFileTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.event_bus = LineageEventBus(max_workers=2)
+        self.dataset_lineage = self.new_dataset_lineage(event_bus=self.event_bus)
+        self.addCleanup(self.event_bus.shutdown)
+
+        dataset_lineage = self.dataset_lineage
+        self.source = dataset_lineage.declare_dataset_observer(model_name="events_source--test", model_zone_tag=7)
+        self.sink1 = dataset_lineage.declare_dataset_observer(model_name="events_sink1--test", model_zone_tag=7)
+        self.sink2 = dataset_lineage.declare_dataset_observer(model_name="events_sink2--test", model_zone_tag=7)
+        dataset_lineage.associate_dataset_source_to_sink(self.source, self.sink1)
+        dataset_lineage.associate_dataset_source_to_sink(self.source, self.sink2)
+
+        self.events = []
+        self.lock = threading.Lock()
+
+    def record(self, event):
+        with self.lock:
+            self.events.append(event)
+
+    def test_run_lifecycle_events(self):
+        dataset_lineage = self.dataset_lineage
+        dataset_lineage.on_run_started(self.record)
+        dataset_lineage.on_run_finished(self.record)
+        dataset_lineage.on_sources_enqueued(self.record)
+
+        source_run = dataset_lineage.start_dataset_observer_run_with_id(self.source).run_id
+        dataset_lineage.finish_dataset_observer_run(status="success", dataset_run_id=source_run)
+        zone_start = dataset_lineage.start_dataset_observer_runs_for_zone(7)
+        sink_runs = {result.sink_id: result.run_id for result in zone_start.start_result_list}
+        dataset_lineage.finish_dataset_observer_runs([{"status": "success", "dataset_run_id": sink_runs[self.sink1]},
+                                                      {"status": "error", "dataset_run_id": sink_runs[self.sink2]}])
+        self.event_bus.shutdown()
+
+        started = {event.sink_id: event for event in self.events if isinstance(event, DatasetRunStartedEvent)}
+        finished = {event.run_id: event for event in self.events if isinstance(event, DatasetRunFinishedEvent)}
+        enqueued = [event for event in self.events if isinstance(event, DatasetSourcesEnqueuedEvent)]
+
+        self.assertEqual(set(started), {self.source, self.sink1, self.sink2})
+        self.assertEqual(started[self.sink1].source_run_id_list, [source_run])
+        self.assertEqual(started[self.source].source_run_id_list, [])
+
+        self.assertEqual(len(finished), 3)
+        self.assertEqual(finished[source_run].dataset_observer_id, self.source)
+        self.assertEqual(sorted(finished[source_run].sink_id_list), sorted([self.sink1, self.sink2]))
+        self.assertEqual((finished[sink_runs[self.sink2]].status, finished[sink_runs[self.sink2]].sink_id_list),
+                         ('error', []))
+
+        self.assertEqual(len(enqueued), 1)
+        self.assertEqual(sorted(enqueued[0].sink_id_list), sorted([self.sink1, self.sink2]))
+        self.assertEqual(enqueued[0].source_run_id_list, [source_run])
+
+    def test_push_triggered_sink(self):
+        dataset_lineage = self.dataset_lineage
+        started = threading.Event()
+        sink_run = []
+
+        def start_sink(event):
+            if self.sink1 in event.sink_id_list:
+                sink_run.append(dataset_lineage.start_dataset_observer_run_with_id(self.sink1))
+                started.set()
+
+        dataset_lineage.on_sources_enqueued(start_sink)
+        source_run = dataset_lineage.start_dataset_observer_run_with_id(self.source).run_id
+        dataset_lineage.finish_dataset_observer_run(status="success", dataset_run_id=source_run)
+
+        self.assertTrue(started.wait(5))
+        self.assertEqual(sink_run[0].source_run_id_list, [source_run])
+
+    def test_bounded_dispatch(self):
+        event_bus = LineageEventBus(max_workers=1, max_pending=2)
+        release = threading.Event()
+
+        def blocked(event):
+            release.wait(5)
+            raise ValueError(event)
+
+        event_bus.subscribe(RUN_FINISHED, blocked)
+        for i in range(5):
+            event_bus.publish(RUN_FINISHED, i)
+        release.set()
+        event_bus.shutdown()
+
+        self.assertEqual((event_bus.published_count, event_bus.dropped_count, event_bus.error_count), (2, 3, 2))
+        self.assertTrue(event_bus.unsubscribe(RUN_FINISHED, blocked))
+        self.assertFalse(event_bus.has_subscribers(RUN_FINISHED))
+        self.assertRaises(ConfigValidationException, event_bus.subscribe, 'run_retried', blocked)
+
+
+if __name__ == '__main__':
+    unittest.main()
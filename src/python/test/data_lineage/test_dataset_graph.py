@@ -0,0 +1,83 @@
+import unittest
+from data_lineage.dataset_lineage_mgmt import DatasetLineage
+from data_lineage.db_layer import SqliteBackend
+from data_lineage.dataset_graph import LineageGraphIndex
+
+
+class TestLineageGraphIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = SqliteBackend()
+        self.dataset_lineage = DatasetLineage(backend=self.backend, graph_index=LineageGraphIndex())
+        self.addCleanup(self.dataset_lineage.close_db_con)
+
+    def test_incremental_associate_disassociate(self):
+        dataset_lineage = self.dataset_lineage
+        raw = dataset_lineage.declare_dataset_observer(model_name="raw--test")
+        std = dataset_lineage.declare_dataset_observer(model_name="std--test")
+        cur = dataset_lineage.declare_dataset_observer(model_name="cur--test")
+
+        graph = dataset_lineage.get_lineage_graph()
+        self.assertEqual(graph.edge_count, 0)
+
+        dataset_lineage.associate_dataset_source_to_sink(raw, std)
+        dataset_lineage.associate_dataset_source_to_sink(std, cur)
+        self.assertEqual(graph.get_sinks(raw), [std])
+        self.assertEqual(graph.get_sources(cur), [std])
+        self.assertTrue(graph.has_rel(raw, std))
+        self.assertFalse(graph.has_rel(std, raw))
+        self.assertEqual(graph.downstream(raw), {std: 1, cur: 2})
+        self.assertEqual(graph.upstream(cur), {std: 1, raw: 2})
+        self.assertEqual(graph.upstream(cur, max_depth=1), {std: 1})
+
+        # cached walks hand out copies and are dropped when an edge changes
+        graph.upstream(cur).clear()
+        self.assertEqual(graph.upstream(cur), {std: 1, raw: 2})
+
+        dataset_lineage.disassociate_dataset_source_from_sink(raw, std)
+        self.assertEqual(graph.source_count(std), 0)
+        self.assertEqual(graph.downstream(raw), {})
+
+    def test_delta_poll_sees_other_writers(self):
+        graph = self.dataset_lineage.get_lineage_graph()
+        other_writer = DatasetLineage(backend=self.backend)
+
+        source = other_writer.declare_dataset_observer(model_name="source--test")
+        sink = other_writer.declare_dataset_observer(model_name="sink--test")
+        other_writer.associate_dataset_source_to_sink(source, sink)
+        self.assertEqual(graph.source_count(sink), 0)
+
+        self.assertEqual(self.dataset_lineage.refresh_lineage_graph(), 1)
+        self.assertEqual(graph.source_count(sink), 1)
+        # polling again inside the lag window is idempotent
+        self.assertEqual(self.dataset_lineage.refresh_lineage_graph(), 0)
+
+        other_writer.disassociate_dataset_source_from_sink(source, sink)
+        other_writer.associate_dataset_source_to_sink(source, sink)
+        self.dataset_lineage.refresh_lineage_graph()
+        # the terminated rel does not remove the rel that replaced it
+        self.assertTrue(graph.has_rel(source, sink))
+
+        other_sink = other_writer.declare_dataset_observer(model_name="other_sink--test")
+        other_writer.associate_dataset_source_to_sink(source, other_sink)
+        self.dataset_lineage.refresh_lineage_graph()
+        other_writer.disassociate_dataset_source_from_sink(source, other_sink)
+        self.dataset_lineage.refresh_lineage_graph()
+        self.assertEqual(graph.get_sinks(source), [sink])
+
+    def test_load_and_memory_usage(self):
+        graph = LineageGraphIndex()
+        # 100 sources fanning out to 200 sinks with 10 sources each
+        for i in range(2000):
+            graph.add_rel("%032x" % (i % 100), "%032x" % (100 + i // 10))
+
+        usage = graph.memory_usage()
+        self.assertEqual(usage["edges"], 2000)
+        self.assertEqual(usage["nodes"], 300)
+        self.assertEqual(graph.source_count("%032x" % 100), 10)
+        self.assertGreater(usage["bytes_per_edge"], 0)
+        self.assertLess(usage["bytes_per_edge"], 64)
+
+
+if __name__ == '__main__':
+    unittest.main()
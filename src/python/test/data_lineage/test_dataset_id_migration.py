@@ -0,0 +1,153 @@
+import unittest
+import os
+import tempfile
+from datetime import datetime, timedelta
+from data_lineage.dataset_lineage_mgmt import DatasetLineage
+from data_lineage.dataset_id_migration import BinaryIdMigration, IdSizeReport, schema_id_tables
+from data_lineage.dataset_exceptions import ConfigValidationException, InternalDatasetException
+from data_lineage.db_layer import SqliteBackend, DEFAULT_SCHEMA_PATH
+
+
+class TestBinaryIdMigration(unittest.TestCase):
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.db_path = os.path.join(tmp_dir.name, 'lineage.db')
+
+        self.dataset_lineage = DatasetLineage(backend=SqliteBackend(self.db_path))
+        dataset_lineage = self.dataset_lineage
+        self.source = dataset_lineage.declare_dataset_observer(model_name="migrate_source--test")
+        self.sink = dataset_lineage.declare_dataset_observer(model_name="migrate_sink--test")
+        dataset_lineage.associate_dataset_source_to_sink(self.source, self.sink)
+
+        # 3 consumed events, 1 sink run per source run
+        self.sink_run_ids = []
+        for i in range(3):
+            self.finish(dataset_lineage.start_dataset_observer_run_with_id(self.source).run_id)
+            self.sink_run_ids.append(dataset_lineage.start_dataset_observer_run_with_id(self.sink).run_id)
+            self.finish(self.sink_run_ids[-1])
+
+        self.backend = SqliteBackend(self.db_path)
+        self.addCleanup(self.backend.close)
+        self.migration = BinaryIdMigration(self.backend, batch_size=2)
+
+    def finish(self, run_id):
+        self.dataset_lineage.finish_dataset_observer_run(status="success", dataset_run_id=run_id)
+
+    def count(self, table:str) -> int:
+        conn = self.backend.get_con()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT count(*) FROM " + table)
+            count = cursor.fetchall()[0][0]
+            cursor.close()
+            return count
+        finally:
+            self.backend.release_con(conn)
+
+    def test_schema_id_tables(self):
+        with open(DEFAULT_SCHEMA_PATH) as schema_file:
+            tables = {table.name: table for table in schema_id_tables(schema_file.read())}
+
+        self.assertEqual(tables['dataset_observer_run'].primary_key, ['run_id'])
+        self.assertEqual(tables['dataset_observer_run'].id_columns, ['run_id', 'dataset_observer_id'])
+        self.assertEqual(tables['dataset_source_sink_event_queue'].primary_key,
+                         ['dataset_rel_id', 'sink_run_id', 'source_run_id'])
+        self.assertEqual(len(tables['dataset_source_sink_event_queue'].index_stmts), 3)
+        self.assertEqual(tables['dataset_observer'].primary_key,
+                         ['model_zone_tag', 'model_namespace', 'model_name', 'model_dataset_props'])
+        self.assertIn('BINARY(16)', tables['dataset_observer'].shadow_ddl(rename_indexes=True)[0])
+        self.assertIn('dataset_observer_indx_bin ON dataset_observer_bin',
+                      tables['dataset_observer'].shadow_ddl(rename_indexes=True)[1])
+
+    def test_online_migration(self):
+        dataset_lineage = self.dataset_lineage
+        migration = self.migration
+
+        # enough run history for the index sizes to differ
+        conn = self.backend.get_con()
+        try:
+            cursor = conn.cursor()
+            cursor.executemany("INSERT INTO dataset_observer_run (run_id, dataset_observer_id, start_dt, status) "
+                               "VALUES (%s, %s, %s, 3)",
+                               [('%032x' % i, self.source, datetime(2020, 1, 1) + timedelta(minutes=i))
+                                for i in range(2000)])
+            cursor.close()
+        finally:
+            self.backend.release_con(conn)
+        migration.batch_size = 500
+        migration.prepare()
+
+        result = migration.copy(max_batches=3)
+        self.assertEqual((result.copied_count, result.batch_count, result.complete), (3, 3, False))
+
+        # writes while the copy runs: a new observer, a pending event and a new consumed event
+        late_source = dataset_lineage.declare_dataset_observer(model_name="migrate_late_source--test")
+        dataset_lineage.associate_dataset_source_to_sink(late_source, self.sink)
+        self.finish(dataset_lineage.start_dataset_observer_run_with_id(self.source).run_id)
+        late_sink_run_id = dataset_lineage.start_dataset_observer_run_with_id(self.sink).run_id
+
+        self.assertTrue(migration.copy().complete)
+
+        # a run finished after the copy, and a pending event left for the binary side
+        self.finish(late_sink_run_id)
+        self.finish(dataset_lineage.start_dataset_observer_run_with_id(late_source).run_id)
+        dataset_lineage.close_db_con()  # writers stopped
+
+        before = migration.size_report()
+        migration.cutover()
+        self.assertEqual(self.count("dataset_observer_run_hex"), self.count("dataset_observer_run"))
+        self.assertEqual(self.count("dataset_source_sink_pending_event"), 1)
+
+        report = migration.size_report()
+        hex_size, bin_size = report.table_sizes['dataset_observer_run']
+        self.assertLess(bin_size[1], hex_size[1])
+        self.assertEqual(report.table_sizes['dataset_observer_run'], before.table_sizes['dataset_observer_run'])
+        self.assertIsNone(report.cache_hit_ratio())
+        self.assertIn('dataset_source_sink_event_queue', report.render())
+        self.assertEqual(IdSizeReport.from_json(report.to_json()).table_sizes, report.table_sizes)
+
+        # the migrated database only opens with binary ids
+        self.assertRaises(ConfigValidationException, SqliteBackend, self.db_path)
+        dataset_lineage = DatasetLineage(backend=SqliteBackend(self.db_path, binary_ids=True))
+        self.addCleanup(dataset_lineage.close_db_con)
+
+        self.assertEqual(dataset_lineage.get_dataset_observer_id(model_name="migrate_source--test"), self.source)
+        self.assertEqual(dataset_lineage.get_dataset_observer(late_source).model_name, "migrate_late_source--test")
+        events = dataset_lineage.get_consumed_source_events(self.sink_run_ids[0])
+        self.assertEqual([event.source_dataset_id for event in events], [self.source])
+        self.assertEqual(len(dataset_lineage.get_consumed_source_events(late_sink_run_id)), 1)
+
+        # the pending event written just before the cutover is consumed by the next sink run
+        start_result = dataset_lineage.start_dataset_observer_run_with_id(self.sink)
+        self.assertEqual(start_result.source_id_list, {late_source})
+        dataset_lineage.finish_dataset_observer_run(status="success", dataset_run_id=start_result.run_id)
+
+    def test_cutover_refuses_lost_rows(self):
+        self.migration.prepare()
+        self.assertTrue(self.migration.copy().complete)
+
+        # a queue row deleted behind the copy (e.g. by the compactor)
+        conn = self.backend.get_con()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM dataset_source_sink_event_queue WHERE sink_run_id = %s", (self.sink_run_ids[0],))
+            cursor.close()
+        finally:
+            self.backend.release_con(conn)
+        self.dataset_lineage.close_db_con()
+
+        self.assertRaises(InternalDatasetException, self.migration.cutover)
+        self.assertEqual(self.count("dataset_observer_run"), 6)  # nothing swapped
+        self.assertEqual(self.count("dataset_observer_run_bin"), 6)
+
+    def test_rejects_bad_config(self):
+        self.assertRaises(ConfigValidationException, BinaryIdMigration, self.backend, batch_size=0)
+        self.assertRaises(ConfigValidationException, self.migration.copy)  # not prepared
+        self.assertRaises(ConfigValidationException, DatasetLineage, backend=self.backend, binary_ids=True)
+        self.dataset_lineage.close_db_con()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import random
+import unittest
+from data_lineage.dataset_lineage_mgmt import DatasetLineage
+from data_lineage.dataset_exceptions import DatasetNotFoundException
+from data_lineage.db_layer import SqliteBackend, SqliteConnection
+from data_lineage.dataset_instrumentation import DatasetInstrumentation, LatencyHistogram, InMemoryExporter, \
+    PrometheusExporter, InstrumentedConnection, WALL_TIME_US, STATEMENTS, ROWS, TRANSACTION_TIME_US
+
+
+class TestLatencyHistogram(unittest.TestCase):
+
+    def test_percentiles_within_precision(self):
+        histogram = LatencyHistogram(precision_bits=6)
+        values = [random.randint(0, 5000000) for i in range(10000)]
+        for value in values:
+            histogram.record(value)
+        values.sort()
+
+        self.assertEqual(histogram.count, len(values))
+        self.assertEqual(histogram.min, values[0])
+        self.assertEqual(histogram.max, values[-1])
+        for percent in (50, 90, 99):
+            exact = values[int(round(percent / 100.0 * len(values))) - 1]
+            self.assertLessEqual(abs(histogram.percentile(percent) - exact), exact / 32 + 1)
+
+    def test_small_values_are_exact(self):
+        histogram = LatencyHistogram(precision_bits=6)
+        for value in range(64):
+            histogram.record(value)
+        self.assertEqual([upper for upper, count in histogram.buckets()], list(range(64)))
+        self.assertEqual(histogram.percentile(50), 31)
+
+        other = LatencyHistogram(precision_bits=6)
+        other.record(1000)
+        histogram.merge(other)
+        self.assertEqual(histogram.count, 65)
+        self.assertEqual(histogram.max, 1000)
+
+
+class TestDatasetInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        self.instrumentation = DatasetInstrumentation()
+        self.dataset_lineage = DatasetLineage(backend=SqliteBackend(), instrumentation=self.instrumentation)
+        self.addCleanup(self.dataset_lineage.close_db_con)
+
+    def test_api_calls_recorded(self):
+        dataset_lineage = self.dataset_lineage
+        source = dataset_lineage.declare_dataset_observer(model_name="instr_source--test")
+        sink = dataset_lineage.declare_dataset_observer(model_name="instr_sink--test")
+        dataset_lineage.associate_dataset_source_to_sink(source, sink)
+        for i in range(3):
+            run_id = dataset_lineage.start_dataset_observer_run_with_id(source).run_id
+            dataset_lineage.finish_dataset_observer_run(status="success", dataset_run_id=run_id)
+        dataset_lineage.fetch_ready_dataset_sources_by_sink_id(sink)
+
+        self.assertEqual(self.instrumentation.call_count("start_dataset_observer_run_with_id"), 3)
+        self.assertEqual(self.instrumentation.call_count("declare_dataset_observer"), 2)
+
+        # begin, readiness query, run insert, commit
+        statements = self.instrumentation.histogram("start_dataset_observer_run_with_id", STATEMENTS)
+        self.assertEqual((statements.min, statements.max), (4, 4))
+        self.assertIsNotNone(self.instrumentation.histogram("finish_dataset_observer_run", TRANSACTION_TIME_US))
+        # the three source runs are ready for the sink
+        rows = self.instrumentation.histogram("fetch_ready_dataset_sources_by_sink_id", ROWS)
+        self.assertEqual(rows.max, 3)
+
+        snapshot = InMemoryExporter(self.instrumentation).export()
+        self.assertEqual(snapshot["finish_dataset_observer_run"]["calls"], 3)
+        self.assertEqual(snapshot["finish_dataset_observer_run"][WALL_TIME_US]["count"], 3)
+        self.assertIn("p99", snapshot["finish_dataset_observer_run"][WALL_TIME_US])
+
+    def test_errors_counted(self):
+        with self.assertRaises(DatasetNotFoundException):
+            self.dataset_lineage.start_dataset_observer_run_with_id("0" * 32)
+        self.assertEqual(self.instrumentation.call_count("start_dataset_observer_run_with_id"), 1)
+        self.assertEqual(self.instrumentation.error_count("start_dataset_observer_run_with_id"), 1)
+        # the failed start rolled back its transaction
+        self.assertIsNotNone(self.instrumentation.histogram("start_dataset_observer_run_with_id",
+                                                            TRANSACTION_TIME_US))
+
+    def test_prometheus_text(self):
+        dataset_lineage = self.dataset_lineage
+        dataset1 = dataset_lineage.declare_dataset_observer(model_name="instr_prom--test")
+        dataset_lineage.start_dataset_observer_run_with_id(dataset1)
+
+        text = PrometheusExporter(self.instrumentation).render()
+        self.assertIn('dlcp_api_calls_total{api="start_dataset_observer_run_with_id"} 1', text)
+        self.assertIn('# TYPE dlcp_api_wall_time_seconds histogram', text)
+        self.assertIn('dlcp_api_statements_bucket{api="start_dataset_observer_run_with_id",le="4"} 1', text)
+        self.assertIn('dlcp_api_wall_time_seconds_bucket{api="declare_dataset_observer",le="+Inf"} 1', text)
+        self.assertTrue(text.endswith("\n"))
+
+    def test_disabled_does_not_wrap(self):
+        dataset_lineage = DatasetLineage(backend=SqliteBackend())
+        self.addCleanup(dataset_lineage.close_db_con)
+        self.assertIsInstance(dataset_lineage.dbmgr.get_con(), SqliteConnection)
+        self.assertIsInstance(self.instrumentation.wrap_connection(dataset_lineage.dbmgr.get_con()),
+                              InstrumentedConnection)
+        dataset_lineage.declare_dataset_observer(model_name="instr_off--test")
+        self.assertEqual(self.instrumentation.api_names(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import unittest
+import os
+import tempfile
+from data_lineage.dataset_lineage_mgmt import DatasetLineage
+from data_lineage.db_layer import SqliteBackend
+from data_lineage.dataset_graph import LineageGraphIndex
+from data_lineage.dataset_catalog import ObserverCatalogCache
+from data_lineage.dataset_readiness import SinkReadinessCounters
+from data_lineage.uuid_util import get_new_time_ordered_guid
+from test.data_lineage.lineage_behaviour import DatasetLineageBehaviour
+
+
+class TestDatasetLineageSqlite(DatasetLineageBehaviour, unittest.TestCase):
+    """
+    Runs the behaviour suite against the embedded engine. Every test gets its own in-memory database.
+    """
+
+    def new_dataset_lineage(self) -> DatasetLineage:
+        dataset_lineage = DatasetLineage(backend=SqliteBackend())
+        self.addCleanup(dataset_lineage.close_db_con)
+        return dataset_lineage
+
+
+class TestDatasetLineageSqliteGraphIndex(DatasetLineageBehaviour, unittest.TestCase):
+    """
+    Same behaviour with static rel counts answered by the in-process graph index.
+    """
+
+    def new_dataset_lineage(self) -> DatasetLineage:
+        dataset_lineage = DatasetLineage(backend=SqliteBackend(), graph_index=LineageGraphIndex())
+        self.addCleanup(dataset_lineage.close_db_con)
+        return dataset_lineage
+
+
+class TestDatasetLineageSqliteCatalogCache(DatasetLineageBehaviour, unittest.TestCase):
+    """
+    Same behaviour with observer lookups answered by the catalog cache.
+    """
+
+    def new_dataset_lineage(self) -> DatasetLineage:
+        dataset_lineage = DatasetLineage(backend=SqliteBackend(), catalog_cache=ObserverCatalogCache())
+        self.addCleanup(dataset_lineage.close_db_con)
+        return dataset_lineage
+
+
+class TestDatasetLineageSqliteBinaryIds(DatasetLineageBehaviour, unittest.TestCase):
+    """
+    Same behaviour on a database storing ids as BINARY(16), with the graph index and catalog cache loading ids from it.
+    """
+
+    def new_dataset_lineage(self) -> DatasetLineage:
+        dataset_lineage = DatasetLineage(backend=SqliteBackend(binary_ids=True), graph_index=LineageGraphIndex(),
+                                         catalog_cache=ObserverCatalogCache())
+        self.addCleanup(dataset_lineage.close_db_con)
+        return dataset_lineage
+
+
+class TestDatasetLineageSqliteTimeOrderedIds(DatasetLineageBehaviour, unittest.TestCase):
+    """
+    Same behaviour with time ordered observer, rel and run ids.
+    """
+
+    def new_dataset_lineage(self) -> DatasetLineage:
+        dataset_lineage = DatasetLineage(backend=SqliteBackend(), id_generator=get_new_time_ordered_guid)
+        self.addCleanup(dataset_lineage.close_db_con)
+        return dataset_lineage
+
+
+class TestDatasetLineageSqliteReadinessCounters(DatasetLineageBehaviour, unittest.TestCase):
+    """
+    Same behaviour with dependency checks read from the readiness counters. The counters must match the pending
+    events and rels after every test.
+    """
+
+    def new_dataset_lineage(self) -> DatasetLineage:
+        dataset_lineage = DatasetLineage(backend=SqliteBackend(), readiness_counters=SinkReadinessCounters())
+        self.addCleanup(dataset_lineage.close_db_con)
+        self.addCleanup(self.assert_counters_consistent, dataset_lineage)
+        return dataset_lineage
+
+    def assert_counters_consistent(self, dataset_lineage:DatasetLineage):
+        report = dataset_lineage.verify_readiness_counters()
+        self.assertEqual((report.pair_diffs, report.sink_diffs), ([], []))
+
+
+class TestDatasetLineageSqliteFile(unittest.TestCase):
+
+    def test_wal_file_database(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = os.path.join(tmp_dir, 'lineage.db')
+            backend = SqliteBackend(db_path)
+            dataset_observer = DatasetLineage(backend=backend)
+
+            dataset1 = dataset_observer.declare_dataset_observer(model_name="file1--test")
+            result = dataset_observer.start_dataset_observer_run_with_id(dataset1)
+            dataset_observer.finish_dataset_observer_run(status="success", dataset_run_id=result.run_id)
+
+            cursor = backend.get_con().cursor()
+            cursor.execute("PRAGMA journal_mode")
+            self.assertEqual(cursor.fetchall()[0][0], 'wal')
+            cursor.close()
+            dataset_observer.close_db_con()
+
+            # schema already there on reopen, data survives
+            dataset_observer = DatasetLineage(backend=SqliteBackend(db_path))
+            self.assertEqual(dataset_observer.get_dataset_observer_id("file1--test"), dataset1)
+            dataset_observer.close_db_con()
+
+
+if __name__ == '__main__':
+    unittest.main()
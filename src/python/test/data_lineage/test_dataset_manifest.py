@@ -0,0 +1,94 @@
+import json
+import os
+import tempfile
+import unittest
+from data_lineage.dataset_lineage_mgmt import DatasetLineage
+from data_lineage.dataset_manifest import LineageManifest, ManifestObserver, yaml
+from data_lineage.dataset_readiness import SinkReadinessCounters
+from data_lineage.dataset_exceptions import ConfigValidationException
+from data_lineage.db_layer import SqliteBackend
+
+
+def layered_manifest(layers:int, width:int) -> dict:
+    observers = [{'model_name': "manifest_l%d_%d--test" % (layer, i), 'model_zone_tag': layer + 1}
+                 for layer in range(layers) for i in range(width)]
+    rels = [{'source': observers[(layer - 1) * width + (i + offset) % width], 'sink': observers[layer * width + i]}
+            for layer in range(1, layers) for i in range(width) for offset in range(2)]
+    return {'observers': observers, 'rels': rels}
+
+
+class TestLineageManifest(unittest.TestCase):
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.tmp_dir = tmp_dir.name
+
+    def test_validation(self):
+        source = {'model_name': "manifest_source--test"}
+        self.assertRaises(ConfigValidationException, LineageManifest.from_dict, {'observers': [{'zone': 1}]})
+        self.assertRaises(ConfigValidationException, LineageManifest.from_dict,
+                          {'observers': [source, {'model_name': "manifest_source--test", 'model_zone_tag': 1}]})
+        self.assertRaises(ConfigValidationException, LineageManifest.from_dict,
+                          {'observers': [source], 'rels': [{'source': source,
+                                                            'sink': {'model_name': "manifest_sink--test"}}]})
+        self.assertRaises(ConfigValidationException, LineageManifest.from_dict,
+                          {'observers': [source], 'rels': [{'source': source}]})
+        self.assertRaises(ConfigValidationException, LineageManifest.from_dict, {'observer': [source]})
+
+    def test_load_plan_and_apply(self):
+        path = os.path.join(self.tmp_dir, 'lineage.json')
+        with open(path, 'w') as manifest_file:
+            json.dump(layered_manifest(layers=3, width=4), manifest_file)
+        manifest = LineageManifest.load(path)
+        self.assertEqual((len(manifest.observers), len(manifest.rels)), (12, 16))
+
+        dataset_lineage = DatasetLineage(backend=SqliteBackend(os.path.join(self.tmp_dir, 'lineage.db')),
+                                         readiness_counters=SinkReadinessCounters())
+        self.addCleanup(dataset_lineage.close_db_con)
+        plan = dataset_lineage.sync_lineage_manifest(manifest, dry_run=True)
+        rendered = plan.render(max_lines=3).split('\n')
+        self.assertEqual(rendered[:2], ["+ observer 1/ROOT/manifest_l0_0--test/NA",
+                                        "+ observer 1/ROOT/manifest_l0_1--test/NA"])
+        self.assertEqual(rendered[3:], ["... 25 more", "plan: 12 observers to declare, 0 to update, 16 rels to add, "
+                                                       "0 to terminate, 0 unchanged, 0 blocked"])
+
+        self.assertTrue(dataset_lineage.sync_lineage_manifest(manifest).applied)
+        sink_id = dataset_lineage.get_dataset_observer_id("manifest_l2_0--test", model_zone_tag=3)
+        self.assertEqual(dataset_lineage.get_sink_readiness(sink_id).source_sink_rel_count, 2)
+        self.assertTrue(dataset_lineage.verify_readiness_counters().is_consistent())
+
+        # dropping the last layer's rels terminates them in one go
+        manifest = LineageManifest.from_dict(dict(layered_manifest(layers=3, width=4),
+                                                  rels=layered_manifest(layers=2, width=4)['rels']))
+        plan = dataset_lineage.sync_lineage_manifest(manifest)
+        self.assertEqual((len(plan.rels_to_add), len(plan.rels_to_terminate), plan.unchanged_rel_count), (0, 8, 8))
+        self.assertEqual(dataset_lineage.get_sink_readiness(sink_id).source_sink_rel_count, 0)
+        self.assertTrue(dataset_lineage.verify_readiness_counters().is_consistent())
+
+    def test_plan_on_keys_matched_by_the_database(self):
+        # like a case insensitive collation: the database stored the observers with other key values
+        source, sink = {'model_name': "Orders"}, {'model_name': "orders_std", 'model_zone_tag': 2}
+        manifest = LineageManifest.from_dict({'observers': [source, sink], 'rels': [{'source': source, 'sink': sink}]})
+        observers = {(1, 'ROOT', "Orders", 'NA'): ManifestObserver("a1", 1, None, None, None),
+                     (2, 'ROOT', "orders_std", 'NA'): ManifestObserver("b2", 1, None, None, None)}
+        active_rels = [("a1", "b2", (1, 'ROOT', "orders", 'NA')), ("c3", "b2", (1, 'ROOT', "returns", 'NA')),
+                       ("c3", "d4", (1, 'ROOT', "returns", 'NA'))]
+        plan = manifest.plan(observers, active_rels)
+        self.assertEqual((len(plan.observers_to_declare), len(plan.rels_to_add), plan.unchanged_rel_count), (0, 0, 1))
+        self.assertEqual(plan.rels_to_terminate, [("c3", "b2", (1, 'ROOT', "returns", 'NA'),
+                                                   (2, 'ROOT', "orders_std", 'NA'))])
+
+        observers[(2, 'ROOT', "orders_std", 'NA')] = observers[(1, 'ROOT', "Orders", 'NA')]
+        self.assertRaises(ConfigValidationException, manifest.plan, observers, active_rels)
+
+    @unittest.skipIf(yaml is None, "PyYAML not installed")
+    def test_load_yaml(self):
+        path = os.path.join(self.tmp_dir, 'lineage.yaml')
+        with open(path, 'w') as manifest_file:
+            yaml.safe_dump(layered_manifest(layers=2, width=2), manifest_file)
+        self.assertEqual(len(LineageManifest.load(path).rels), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+from data_lineage.dataset_readiness import SinkReadinessCounters
+from data_lineage.dataset_exceptions import ConfigValidationException, DependencyException
+from test.data_lineage.lineage_fixture import SqliteFileTestCase
+
+
+class TestSinkReadinessCounters(SqliteFileTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.dataset_lineage = self.new_dataset_lineage(readiness_counters=SinkReadinessCounters())
+
+        dataset_lineage = self.dataset_lineage
+        self.source1 = dataset_lineage.declare_dataset_observer(model_name="counter_source1--test", model_zone_tag=3)
+        self.source2 = dataset_lineage.declare_dataset_observer(model_name="counter_source2--test", model_zone_tag=3)
+        self.sink = dataset_lineage.declare_dataset_observer(model_name="counter_sink--test", model_zone_tag=4)
+        dataset_lineage.associate_dataset_source_to_sink(self.source1, self.sink)
+        dataset_lineage.associate_dataset_source_to_sink(self.source2, self.sink)
+
+    def assert_readiness(self, rel_count, ready_count, pending_count):
+        readiness = self.dataset_lineage.get_sink_readiness(self.sink)
+        self.assertEqual((readiness.source_sink_rel_count, readiness.ready_source_count,
+                          readiness.pending_event_count), (rel_count, ready_count, pending_count))
+
+    def test_counters_follow_finishes_and_starts(self):
+        dataset_lineage = self.dataset_lineage
+        self.assert_readiness(2, 0, 0)
+
+        self.run_source(self.source1)
+        self.run_source(self.source1)
+        self.assert_readiness(2, 1, 2)
+        self.assertRaises(DependencyException, dataset_lineage.start_dataset_observer_run_with_id, self.sink,
+                          dependency_check='all')
+
+        # batch finish of a success and an error, only the success queues an event
+        run_ids = [dataset_lineage.start_dataset_observer_run_with_id(source_id).run_id
+                   for source_id in (self.source1, self.source2)]
+        dataset_lineage.finish_dataset_observer_runs([{'status': 'error', 'dataset_run_id': run_ids[0]},
+                                                      {'status': 'success', 'dataset_run_id': run_ids[1]}])
+        self.assert_readiness(2, 2, 3)
+
+        start_result = dataset_lineage.start_dataset_observer_run_with_id(self.sink, dependency_check='all')
+        self.assertEqual(len(start_result.source_run_id_list), 3)
+        self.assert_readiness(2, 0, 0)
+        dataset_lineage.finish_dataset_observer_run(status="success", dataset_run_id=start_result.run_id)
+
+        # a terminated rel keeps its pending events ready for the sink
+        self.run_source(self.source2)
+        self.assertTrue(dataset_lineage.disassociate_dataset_source_from_sink(self.source2, self.sink))
+        self.assert_readiness(1, 1, 1)
+        zone_result = dataset_lineage.start_dataset_observer_runs_for_zone(4)
+        self.assertEqual(len(zone_result.start_result_list[0].source_run_id_list), 1)
+        self.assert_readiness(1, 0, 0)
+
+        self.assertTrue(dataset_lineage.verify_readiness_counters().is_consistent())
+
+    def test_zone_readiness_from_counters(self):
+        self.run_source(self.source1)
+        ready_sink_list = self.dataset_lineage.list_ready_sinks(4)
+        self.assertEqual([(ready_sink.sink_id, ready_sink.source_sink_rel_count, ready_sink.ready_source_count)
+                          for ready_sink in ready_sink_list], [(self.sink, 2, 1)])
+        self.assertIsNotNone(ready_sink_list[0].oldest_source_ready_dt)
+        self.assertEqual(self.dataset_lineage.list_ready_sinks(4, dependency_check='all'), [])
+
+    def test_verify_and_repair(self):
+        self.run_source(self.source1)
+
+        # rels and events written by a writer without counters
+        other_lineage = self.new_dataset_lineage()
+        self.run_source(self.source2, other_lineage)
+
+        report = self.dataset_lineage.verify_readiness_counters()
+        self.assertFalse(report.is_consistent())
+        self.assertFalse(report.rebuilt)
+        self.assertEqual(report.pair_diffs, [(self.sink, self.source2, 1, 0)])
+        self.assertEqual(report.sink_diffs, [(self.sink, (2, 2, 2), (2, 1, 1))])
+
+        # the stale counters still say not ready for 'all'
+        self.assertRaises(DependencyException, self.dataset_lineage.start_dataset_observer_run_with_id, self.sink,
+                          dependency_check='all')
+
+        report = self.dataset_lineage.verify_readiness_counters(repair=True)
+        self.assertTrue(report.rebuilt)
+        self.assertTrue(self.dataset_lineage.verify_readiness_counters().is_consistent())
+        self.assert_readiness(2, 2, 2)
+        start_result = self.dataset_lineage.start_dataset_observer_run_with_id(self.sink, dependency_check='all')
+        self.assertEqual(len(start_result.source_run_id_list), 2)
+
+        self.assertRaises(ConfigValidationException, other_lineage.get_sink_readiness, self.sink)
+        # works without counters of its own, nothing left to rebuild
+        self.assertFalse(other_lineage.verify_readiness_counters(repair=True).rebuilt)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import unittest
+from datetime import date, datetime, timedelta
+from data_lineage.dataset_lineage_mgmt import DatasetLineage
+from data_lineage.dataset_retention import RunHistoryRetention, percentile
+from data_lineage.db_layer import SqliteBackend
+
+OLD_DAY = datetime(2020, 1, 1, 10, 0, 0)
+
+
+class TestRunHistoryRetention(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = SqliteBackend()
+        self.dataset_lineage = DatasetLineage(backend=self.backend)
+        self.addCleanup(self.dataset_lineage.close_db_con)
+
+    def run_once(self, dataset_observer_id:str, status:str = "success", record_count:int = None) -> str:
+        result = self.dataset_lineage.start_dataset_observer_run_with_id(dataset_observer_id)
+        self.dataset_lineage.finish_dataset_observer_run(status=status, dataset_run_id=result.run_id)
+        if record_count is not None:
+            self.execute("UPDATE dataset_observer_run SET record_count=%s WHERE run_id=%s", (record_count, result.run_id))
+        return result.run_id
+
+    def age(self, run_id:str, start_dt:datetime, duration_sec:int = 60):
+        self.execute("UPDATE dataset_observer_run SET start_dt=%s, end_dt=%s WHERE run_id=%s",
+                     (start_dt, start_dt + timedelta(seconds=duration_sec), run_id))
+
+    def execute(self, stmt:str, input_vals=()):
+        conn = self.backend.get_con()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(stmt, input_vals)
+            rows = cursor.fetchall()
+            cursor.close()
+            return rows
+        finally:
+            self.backend.release_con(conn)
+
+    def run_ids(self):
+        return set(row[0] for row in self.execute("SELECT run_id FROM dataset_observer_run"))
+
+    def test_rollup_and_purge(self):
+        dataset_lineage = self.dataset_lineage
+        standalone = dataset_lineage.declare_dataset_observer(model_name="retention_standalone--test")
+        source = dataset_lineage.declare_dataset_observer(model_name="retention_source--test")
+        sink = dataset_lineage.declare_dataset_observer(model_name="retention_sink--test")
+        dataset_lineage.associate_dataset_source_to_sink(source, sink)
+
+        for i, (status, record_count) in enumerate([("success", 5), ("success", 7), ("error", None), ("success", 1)]):
+            self.age(self.run_once(standalone, status, record_count), OLD_DAY + timedelta(hours=i), (i + 1) * 10)
+        recent_run = self.run_once(standalone)
+
+        source_run1 = self.run_once(source)
+        sink_run1 = self.run_once(sink)  # consumes source_run1
+        source_run2 = self.run_once(source)  # pending
+        source_run3 = self.run_once(source)  # pending
+        for run_id in (source_run1, source_run2, sink_run1):
+            self.age(run_id, OLD_DAY)
+
+        result = dataset_lineage.purge_run_history(RunHistoryRetention(retention_days=30, batch_size=2))
+        self.assertEqual(result.purged_count, 5)
+        self.assertTrue(result.complete)
+        self.assertGreater(result.batch_count, 1)
+        # pending source run and the only success of the sink are kept
+        self.assertEqual(self.run_ids(), {recent_run, source_run2, source_run3, sink_run1})
+
+        rollups = dataset_lineage.get_dataset_observer_run_rollups(standalone)
+        self.assertEqual(len(rollups), 1)
+        rollup = rollups[0]
+        self.assertEqual(rollup.run_day, date(2020, 1, 1))
+        self.assertEqual((rollup.run_count, rollup.success_count, rollup.error_count, rollup.cleared_count),
+                         (4, 3, 1, 0))
+        self.assertEqual(rollup.record_count, 13)
+        self.assertEqual((rollup.p50_duration_sec, rollup.p95_duration_sec), (20.0, 40.0))
+
+        # once consumed/superseded, the kept runs are rolled into their day
+        self.run_once(sink)
+        result = dataset_lineage.purge_run_history(RunHistoryRetention(retention_days=30))
+        self.assertEqual(result.purged_count, 2)
+        self.assertEqual(dataset_lineage.get_dataset_observer_run_rollups(source)[0].run_count, 2)
+        self.assertEqual(dataset_lineage.get_dataset_observer_run_rollups(sink)[0].success_count, 1)
+        self.assertNotIn(source_run2, self.run_ids())
+
+        self.assertEqual(dataset_lineage.get_dataset_observer_run_rollups(standalone, from_day=date(2020, 1, 2)), [])
+
+    def test_batches_split_groups(self):
+        observers = [self.dataset_lineage.declare_dataset_observer(model_name="retention_split%d--test" % i)
+                     for i in range(3)]
+        for observer in observers:
+            for i in range(20):
+                self.age(self.run_once(observer, "error"), OLD_DAY + timedelta(minutes=i), i + 1)
+
+        retention = RunHistoryRetention(retention_days=30, batch_size=7)
+        purged_counts = []
+        complete = False
+        while not complete:
+            conn = self.backend.get_con()
+            try:
+                purged, _, complete = retention.purge_batch(conn)
+            finally:
+                self.backend.release_con(conn)
+            purged_counts.append(purged)
+        self.assertEqual(purged_counts, [7] * 8 + [4])
+
+        for observer in observers:
+            rollup = self.dataset_lineage.get_dataset_observer_run_rollups(observer)[0]
+            self.assertEqual((rollup.run_count, rollup.error_count), (20, 20))
+            self.assertEqual((rollup.p50_duration_sec, rollup.p95_duration_sec), (10.0, 19.0))
+
+    def test_nothing_to_purge(self):
+        dataset_observer_id = self.dataset_lineage.declare_dataset_observer(model_name="retention_recent--test")
+        self.run_once(dataset_observer_id, "error")
+        result = self.dataset_lineage.purge_run_history(RunHistoryRetention(retention_days=1))
+        self.assertEqual((result.purged_count, result.batch_count, result.complete), (0, 1, True))
+
+    def test_percentile(self):
+        self.assertIsNone(percentile([], 50))
+        self.assertEqual(percentile([3.0], 95), 3.0)
+        self.assertEqual(percentile([float(i) for i in range(1, 101)], 95), 95.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
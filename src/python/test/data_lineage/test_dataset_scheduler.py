@@ -0,0 +1,123 @@
+import threading
+import time
+import unittest
+from data_lineage.dataset_scheduler import DependencyTriggerScheduler
+from data_lineage.dataset_exceptions import ConfigValidationException
+from test.data_lineage.lineage_fixture import SqliteFileTestCase
+
+
+class TestDependencyTriggerScheduler(SqliteFileTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.dataset_lineage = self.new_dataset_lineage()
+        self.addCleanup(self.dataset_lineage.event_bus.shutdown)
+
+        dataset_lineage = self.dataset_lineage
+        self.source1 = dataset_lineage.declare_dataset_observer(model_name="trigger_source1--test")
+        self.source2 = dataset_lineage.declare_dataset_observer(model_name="trigger_source2--test")
+        self.sink_all = dataset_lineage.declare_dataset_observer(model_name="trigger_sink_all--test")
+        self.sink_any = dataset_lineage.declare_dataset_observer(model_name="trigger_sink_any--test")
+        for source in (self.source1, self.source2):
+            dataset_lineage.associate_dataset_source_to_sink(source, self.sink_all)
+            dataset_lineage.associate_dataset_source_to_sink(source, self.sink_any)
+
+        self.launched = []
+        self.lock = threading.Lock()
+
+    def launch_and_finish(self, start_result):
+        with self.lock:
+            self.launched.append(start_result)
+        self.dataset_lineage.finish_dataset_observer_run(status="success", dataset_run_id=start_result.run_id)
+
+    def wait_for_launches(self, count:int):
+        deadline = time.monotonic() + 10
+        while len(self.launched) < count and time.monotonic() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.2)  # no extra launches trailing behind
+        self.assertEqual(len(self.launched), count)
+
+    def launches_of(self, sink_id):
+        return [start_result for start_result in self.launched if start_result.sink_id == sink_id]
+
+    def test_launch_once_per_readiness(self):
+        scheduler = DependencyTriggerScheduler(self.dataset_lineage, self.launch_and_finish, max_concurrent=2)
+        self.addCleanup(scheduler.close)
+        scheduler.watch_sink(self.sink_all, 'all')
+        scheduler.watch_sink(self.sink_any, 'any')
+
+        run1 = self.run_source(self.source1)
+        self.wait_for_launches(1)
+        self.assertEqual(self.launches_of(self.sink_any)[0].source_run_id_list, [run1])
+
+        run2 = self.run_source(self.source2)
+        self.wait_for_launches(3)
+        self.assertEqual(sorted(self.launches_of(self.sink_all)[0].source_run_id_list), sorted([run1, run2]))
+        self.assertEqual(self.launches_of(self.sink_any)[1].source_run_id_list, [run2])
+
+        # a finished launch makes room for the next readiness episode
+        scheduler.unwatch_sink(self.sink_any)
+        run3 = self.run_source(self.source1)
+        run4 = self.run_source(self.source2)
+        self.wait_for_launches(4)
+        self.assertEqual(sorted(self.launches_of(self.sink_all)[1].source_run_id_list), sorted([run3, run4]))
+        self.assertEqual(scheduler.launch_error_count, 0)
+
+    def test_concurrency_limit(self):
+        running = []
+        max_running = []
+        release = threading.Event()
+
+        def slow_launch(start_result):
+            with self.lock:
+                running.append(start_result)
+                max_running.append(len(running))
+            release.wait(5)
+            with self.lock:
+                running.remove(start_result)
+            self.launch_and_finish(start_result)
+
+        scheduler = DependencyTriggerScheduler(self.dataset_lineage, slow_launch, max_concurrent=1)
+        self.addCleanup(scheduler.close)
+        scheduler.watch_sink(self.sink_all, 'all')
+        scheduler.watch_sink(self.sink_any, 'source_ids', specific_sources=[self.source2])
+
+        self.run_source(self.source1)
+        self.run_source(self.source2)
+        time.sleep(0.2)
+        self.assertEqual(len(running), 1)
+        release.set()
+        self.wait_for_launches(2)
+        self.assertEqual(max(max_running), 1)
+
+    def test_resync_and_failed_launch(self):
+        # ready before the scheduler watches, the launch is attempted right away and fails
+        run1 = self.run_source(self.source1)
+
+        def failing_launch(start_result):
+            self.launched.append(start_result)
+            raise ValueError("no cluster")
+
+        scheduler = DependencyTriggerScheduler(self.dataset_lineage, failing_launch)
+        self.addCleanup(scheduler.close)
+        scheduler.watch_sink(self.sink_any, 'any')
+        self.wait_for_launches(1)
+        self.assertEqual(scheduler.launch_error_count, 1)
+        # finished as error, not left running
+        self.assertFalse(self.dataset_lineage.fetch_ready_dataset_sources_by_sink_id(self.sink_any).orphan_sink)
+
+        # a source finished by another process is seen at the next resync
+        run_id = self.run_source(self.source2, self.new_dataset_lineage())
+        time.sleep(0.2)
+        self.assertEqual(len(self.launched), 1)
+        scheduler.resync()
+        self.wait_for_launches(2)
+        self.assertEqual(self.launched[0].source_run_id_list, [run1])
+        self.assertEqual(self.launched[1].source_run_id_list, [run_id])
+
+        self.assertRaises(ConfigValidationException, scheduler.watch_sink, self.source1)  # nothing triggers it
+        self.assertRaises(ConfigValidationException, scheduler.watch_sink, self.sink_all, 'source_run_ids')
+
+
+if __name__ == '__main__':
+    unittest.main()
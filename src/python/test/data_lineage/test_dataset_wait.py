@@ -0,0 +1,85 @@
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from data_lineage.dataset_wait import ReadySourcesWaiter
+from data_lineage.dataset_exceptions import ConfigValidationException
+from test.data_lineage.lineage_fixture import SqliteFileTestCase
+
+
+class TestWaitForReadySources(SqliteFileTestCase):
+
+    def setUp(self):
+        super().setUp()
+        # a slow poll so that only wakeups can explain a fast return
+        self.waiter = ReadySourcesWaiter(min_poll_sec=0.05, max_poll_sec=60, backoff=1000)
+        self.dataset_lineage = self.new_dataset_lineage(ready_waiter=self.waiter)
+
+        dataset_lineage = self.dataset_lineage
+        self.source1 = dataset_lineage.declare_dataset_observer(model_name="wait_source1--test")
+        self.source2 = dataset_lineage.declare_dataset_observer(model_name="wait_source2--test")
+        self.sink = dataset_lineage.declare_dataset_observer(model_name="wait_sink--test")
+        dataset_lineage.associate_dataset_source_to_sink(self.source1, self.sink)
+        dataset_lineage.associate_dataset_source_to_sink(self.source2, self.sink)
+
+    def wait_until_waiting(self):
+        while not self.waiter.has_waiters() or self.waiter.poll_count < 2:
+            time.sleep(0.01)
+
+    def test_wakeup_on_upstream_finish(self):
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            waits = [executor.submit(self.dataset_lineage.wait_for_ready_sources, self.sink, 'all', 20)
+                     for _ in range(5)]
+            self.wait_until_waiting()
+
+            started = time.monotonic()
+            self.run_source(self.source1)
+            self.run_source(self.source2)
+            summaries = [wait.result() for wait in waits]
+            self.assertLess(time.monotonic() - started, 5)
+
+        for summary in summaries:
+            self.assertEqual(summary.source_id_list, {self.source1, self.source2})
+        # the waits on the sink share one poller: one poll each for the start, 2 sources and the backed off poll
+        self.assertLessEqual(self.waiter.poll_count, 6)
+        self.assertFalse(self.waiter.has_waiters())
+
+    def test_wakeup_from_shared_waiter(self):
+        other_lineage = self.new_dataset_lineage(ready_waiter=self.waiter)
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            wait = executor.submit(self.dataset_lineage.wait_for_ready_sources, self.sink, 'any', 20)
+            self.wait_until_waiting()
+
+            run_id = self.run_source(self.source2, other_lineage)
+            self.assertEqual(wait.result(timeout=5).source_run_idList, [run_id])
+
+    def test_dependency_rules(self):
+        dataset_lineage = self.dataset_lineage
+        run_id = self.run_source(self.source1)
+
+        self.assertIsNone(dataset_lineage.wait_for_ready_sources(self.sink, 'all', timeout_sec=0.2))
+        self.assertIsNone(dataset_lineage.wait_for_ready_sources(self.sink, 'source_ids', timeout_sec=0.2,
+                                                                 specific_sources=[self.source2]))
+        self.assertEqual(dataset_lineage.wait_for_ready_sources(self.sink, 'source_run_ids', timeout_sec=0.2,
+                                                                specific_sources=[run_id]).source_id_list,
+                         {self.source1})
+        self.assertEqual(len(dataset_lineage.wait_for_ready_sources(self.sink, timeout_sec=0.2).dataset_queue_list), 1)
+        # no sources, no wait
+        self.assertEqual(dataset_lineage.wait_for_ready_sources(self.source1, 'all', timeout_sec=0.2)
+                         .source_sink_rel_count, 0)
+
+        self.assertRaises(ConfigValidationException, dataset_lineage.wait_for_ready_sources, self.sink, 'ignore')
+        self.assertRaises(ConfigValidationException, dataset_lineage.wait_for_ready_sources, self.sink, 'source_ids')
+        self.assertRaises(ConfigValidationException, ReadySourcesWaiter, min_poll_sec=2, max_poll_sec=1)
+
+    def test_backoff(self):
+        waiter = ReadySourcesWaiter(min_poll_sec=0.01, max_poll_sec=0.2, backoff=2)
+        dataset_lineage = self.new_dataset_lineage(ready_waiter=waiter)
+
+        self.assertIsNone(dataset_lineage.wait_for_ready_sources(self.sink, 'any', timeout_sec=1))
+        # 0.01 .. 0.16 then every 0.2 sec, not 100 polls
+        self.assertLess(waiter.poll_count, 15)
+
+
+if __name__ == '__main__':
+    unittest.main()
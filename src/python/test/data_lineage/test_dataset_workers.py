@@ -0,0 +1,110 @@
+import functools
+import multiprocessing
+import os
+import tempfile
+import unittest
+from data_lineage.dataset_lineage_mgmt import DatasetLineage
+from data_lineage.dataset_exceptions import ConfigValidationException
+from data_lineage.dataset_workers import dataset_lineage_process_pool, get_worker_dataset_lineage
+from data_lineage.db_layer import SqliteBackend
+
+# DatasetLineage created by the parent and inherited by forked children
+_inherited_lineage: DatasetLineage = None
+
+
+def new_dataset_lineage(db_path:str) -> DatasetLineage:
+    return DatasetLineage(backend=SqliteBackend(db_path))
+
+
+def run_inherited(dataset_observer_id:str):
+    result = _inherited_lineage.start_dataset_observer_run_with_id(dataset_observer_id)
+    _inherited_lineage.finish_dataset_observer_run(status="success", dataset_run_id=result.run_id)
+    return os.getpid(), result.run_id
+
+
+def run_inherited_expect_error(ignored):
+    try:
+        _inherited_lineage.get_dataset_observer_id(model_name="fork_source--test")
+    except ConfigValidationException:
+        return True
+    return False
+
+
+def run_worker(model_name:str):
+    dataset_lineage = get_worker_dataset_lineage()
+    dataset_observer_id = dataset_lineage.declare_dataset_observer(model_name=model_name)
+    result = dataset_lineage.start_dataset_observer_run_with_id(dataset_observer_id)
+    dataset_lineage.finish_dataset_observer_run(status="success", dataset_run_id=result.run_id)
+    return os.getpid(), dataset_lineage.get_db_pool_stats()["checkouts"]
+
+
+@unittest.skipUnless("fork" in multiprocessing.get_all_start_methods(), "fork start method not available")
+class TestForkedWorkers(unittest.TestCase):
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.db_path = os.path.join(tmp_dir.name, 'workers.db')
+
+    def tearDown(self):
+        global _inherited_lineage
+        _inherited_lineage = None
+
+    def test_inherited_instance_reconnects_in_child(self):
+        global _inherited_lineage
+        _inherited_lineage = new_dataset_lineage(self.db_path)
+        self.addCleanup(_inherited_lineage.close_db_con)
+
+        sources = [_inherited_lineage.declare_dataset_observer(model_name="fork_source%d--test" % i)
+                   for i in range(4)]
+        parent_pool = _inherited_lineage.dbmgr.backend.pool
+
+        with multiprocessing.get_context("fork").Pool(2) as pool:
+            results = pool.map(run_inherited, sources)
+
+        self.assertNotIn(os.getpid(), [pid for pid, run_id in results])
+        # the parent still works on its own (untouched) connections
+        self.assertIs(_inherited_lineage.dbmgr.backend.pool, parent_pool)
+        backend = _inherited_lineage.dbmgr.backend
+        conn = backend.get_con()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT run_id, status FROM dataset_observer_run")
+            run_status = dict(cursor.fetchall())
+            cursor.close()
+        finally:
+            backend.release_con(conn)
+        self.assertEqual(run_status, {run_id: 3 for pid, run_id in results})
+
+    def test_inherited_memory_db_rejected_in_child(self):
+        global _inherited_lineage
+        _inherited_lineage = DatasetLineage(backend=SqliteBackend())
+        self.addCleanup(_inherited_lineage.close_db_con)
+        _inherited_lineage.declare_dataset_observer(model_name="fork_source--test")
+
+        with multiprocessing.get_context("fork").Pool(1) as pool:
+            self.assertEqual(pool.map(run_inherited_expect_error, [1]), [True])
+
+        # unaffected in the parent
+        self.assertIsNotNone(_inherited_lineage.get_dataset_observer_id(model_name="fork_source--test"))
+
+    def test_process_pool_builds_instance_per_worker(self):
+        # creates the schema before the workers race for it
+        new_dataset_lineage(self.db_path).close_db_con()
+
+        factory = functools.partial(new_dataset_lineage, self.db_path)
+        with dataset_lineage_process_pool(factory, max_workers=2,
+                                          mp_context=multiprocessing.get_context("fork")) as executor:
+            results = list(executor.map(run_worker, ["worker%d--test" % i for i in range(8)]))
+
+        self.assertEqual(len(results), 8)
+        self.assertNotIn(os.getpid(), [pid for pid, checkouts in results])
+        # warm_up() already checked out a connection before the first job
+        self.assertTrue(all(checkouts > 1 for pid, checkouts in results))
+
+    def test_no_worker_instance(self):
+        self.assertRaises(ConfigValidationException, get_worker_dataset_lineage)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import sqlite3
+import threading
+import time
+import unittest
+from data_lineage.db_layer import ConnectionPool
+from data_lineage.dataset_exceptions import ConnectionPoolTimeoutException
+
+
+def connect_sqlite():
+    return sqlite3.connect(':memory:', check_same_thread=False)
+
+
+class TestConnectionPool(unittest.TestCase):
+
+    def test_reuse_without_validation(self):
+        validated = []
+        pool = ConnectionPool(connect_sqlite, validate=lambda con: validated.append(con) or True)
+        conn = pool.get_con()
+        pool.release_con(conn)
+        self.assertIs(pool.get_con(), conn)
+
+        stats = pool.stats()
+        self.assertEqual((stats["created"], stats["checkouts"], stats["in_use"]), (1, 2, 1))
+        # recently used, so not pinged
+        self.assertEqual(validated, [])
+        pool.close()
+
+    def test_bounded_checkout(self):
+        pool = ConnectionPool(connect_sqlite, max_size=1, checkout_timeout_sec=0.05)
+        conn = pool.get_con()
+        with self.assertRaises(ConnectionPoolTimeoutException):
+            pool.get_con()
+        self.assertEqual(pool.stats()["timeouts"], 1)
+
+        threading.Timer(0.05, pool.release_con, [conn]).start()
+        pool.checkout_timeout_sec = 5
+        self.assertIs(pool.get_con(), conn)
+        stats = pool.stats()
+        self.assertEqual(stats["waits"], 1)
+        self.assertGreater(stats["wait_time_us_max"], 0)
+        pool.close()
+
+    def test_idle_validation_and_recycling(self):
+        pool = ConnectionPool(connect_sqlite, validate=lambda con: False, validate_idle_sec=0)
+        conn = pool.get_con()
+        pool.release_con(conn)
+        time.sleep(0.001)
+        self.assertIsNot(pool.get_con(), conn)
+        self.assertEqual((pool.validations, pool.validation_failures, pool.created), (1, 1, 2))
+        self.assertEqual(pool.size, 1)
+
+        pool = ConnectionPool(connect_sqlite, max_lifetime_sec=0)
+        conn = pool.get_con()
+        pool.release_con(conn)
+        time.sleep(0.001)
+        self.assertIsNot(pool.get_con(), conn)
+        self.assertEqual(pool.recycled, 1)
+
+    def test_reconnect_with_backoff(self):
+        failures = [sqlite3.OperationalError("down"), sqlite3.OperationalError("down")]
+
+        def flaky_connect():
+            if failures:
+                raise failures.pop()
+            return connect_sqlite()
+
+        pool = ConnectionPool(flaky_connect, reconnect_backoff_sec=0.001)
+        self.assertIsNotNone(pool.get_con())
+        self.assertEqual(pool.connect_failures, 2)
+
+        pool = ConnectionPool(lambda: connect_sqlite().execute("bad sql"), max_size=1, reconnect_attempts=2,
+                              reconnect_backoff_sec=0.001, checkout_timeout_sec=0.05)
+        for i in range(2):
+            # the slot of a failed connect is given back
+            with self.assertRaises(sqlite3.OperationalError):
+                pool.get_con()
+        self.assertEqual(pool.size, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
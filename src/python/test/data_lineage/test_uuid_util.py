@@ -0,0 +1,38 @@
+import unittest
+from data_lineage.uuid_util import TimeOrderedGuidGenerator
+
+
+class TestTimeOrderedGuidGenerator(unittest.TestCase):
+
+    def test_uuid7_layout(self):
+        guid = TimeOrderedGuidGenerator(lambda: 1700000000123)()
+        self.assertEqual(guid.version, 7)
+        self.assertEqual(guid.int >> 80, 1700000000123)
+        self.assertEqual(len(guid.hex), 32)
+
+    def test_monotonic_within_and_across_ms(self):
+        generator = TimeOrderedGuidGenerator()
+        ids = [generator().hex for i in range(10000)]
+        self.assertEqual(ids, sorted(ids))
+        self.assertEqual(len(set(ids)), len(ids))
+
+    def test_clock_stepping_back(self):
+        clock = [1700000001000]
+        generator = TimeOrderedGuidGenerator(lambda: clock[0])
+        first = generator()
+        clock[0] = 1700000000000
+        second = generator()
+        self.assertLess(first.hex, second.hex)
+        self.assertEqual(second.int >> 80, 1700000001000)
+
+    def test_counter_overflow_borrows_next_ms(self):
+        generator = TimeOrderedGuidGenerator(lambda: 1700000000000)
+        first = generator()
+        generator._counter = (1 << 42) - 1
+        second = generator()
+        self.assertLess(first.hex, second.hex)
+        self.assertEqual(second.int >> 80, 1700000000001)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -44,6 +44,14 @@ def reset_test_db():
                             WHERE model_name like '%--test')
                             """
                    )
+    cursor.execute("""
+                        DELETE FROM dataset_source_sink_pending_event WHERE dataset_rel_id IN 
+                            (SELECT rel.dataset_rel_id 
+                            FROM dataset_observer o
+                              JOIN dataset_source_to_sink_meta_rel rel ON (rel.sink_dataset_id = o.dataset_observer_id)
+                            WHERE model_name like '%--test')
+                        """
+                   )
     cursor.execute("""
                         DELETE FROM dataset_source_to_sink_meta_rel WHERE source_dataset_id IN 
                             (SELECT dataset_observer_id FROM dataset_observer WHERE model_name like '%--test')